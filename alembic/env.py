@@ -11,7 +11,8 @@ import app.models  # noqa: F401 — ensure all models are registered
 
 config = context.config
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    # 在同一行程內執行遷移時（如測試）保留既有的 logger
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # 優先使用環境變數 DATABASE_URL，並確保使用 asyncpg 驅動
 db_url = os.getenv("DATABASE_URL")
@@ -0,0 +1,36 @@
+"""strip the trunk 0 kept after +886 in phone_e164 (+8860912345678 -> +886912345678)
+
+Revision ID: 0f7d6890a8e2
+Revises: a6d1e8b4c259
+Create Date: 2026-10-19 23:41:08.227915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f7d6890a8e2'
+down_revision: Union[str, Sequence[str], None] = 'a6d1e8b4c259'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('parents', 'registrations')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Numbers typed as "+886 0912 ..." / "00886 09..." were stored with the
+    # trunk 0 and never matched the same number typed nationally.
+    for table in TABLES:
+        op.execute(
+            f"UPDATE {table} SET phone_e164 = '+886' || substr(phone_e164, 6) "
+            f"WHERE phone_e164 LIKE '+8860%'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The original spelling is still in the phone column; nothing to restore.
+    pass
@@ -0,0 +1,85 @@
+"""add campus_id to communication_search_grams; covering index (campus_id, gram, created_at)
+
+Revision ID: 341355c96453
+Revises: 0f7d6890a8e2
+Create Date: 2026-10-19 23:58:14.906127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '341355c96453'
+down_revision: Union[str, Sequence[str], None] = '0f7d6890a8e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('communication_search_grams', sa.Column('campus_id', sa.UUID(), nullable=True))
+
+    # Backfill from the records in keyset batches
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        stmt = "SELECT id FROM communication_records"
+        params = {"limit": BACKFILL_BATCH_SIZE}
+        if last_id is not None:
+            stmt += " WHERE id > :last_id"
+            params["last_id"] = last_id
+        stmt += " ORDER BY id LIMIT :limit"
+        ids = conn.execute(sa.text(stmt), params).scalars().all()
+        if not ids:
+            break
+        conn.execute(
+            sa.text(
+                "UPDATE communication_search_grams g SET campus_id = r.campus_id "
+                "FROM communication_records r WHERE r.id = ANY(:ids) AND g.record_id = r.id"
+            ),
+            {"ids": ids},
+        )
+        last_id = ids[-1]
+
+    # NOT NULL without a locked full scan: a validated CHECK lets SET NOT NULL skip it
+    op.execute(
+        "ALTER TABLE communication_search_grams ADD CONSTRAINT communication_search_grams_campus_id_not_null "
+        "CHECK (campus_id IS NOT NULL) NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "ALTER TABLE communication_search_grams "
+            "VALIDATE CONSTRAINT communication_search_grams_campus_id_not_null"
+        )
+        op.alter_column('communication_search_grams', 'campus_id', nullable=False)
+        op.drop_constraint('communication_search_grams_campus_id_not_null', 'communication_search_grams')
+
+        op.create_index(
+            'ix_communication_search_grams_campus_id_gram_created_at', 'communication_search_grams',
+            ['campus_id', 'gram', 'created_at'], unique=False, postgresql_include=['record_id', 'tf', 'contact_type'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # Superseded: every search filters on campus
+        op.drop_index(
+            'ix_communication_search_grams_gram_created_at', table_name='communication_search_grams',
+            postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_communication_search_grams_gram_created_at', 'communication_search_grams',
+            ['gram', 'created_at'], unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_communication_search_grams_campus_id_gram_created_at', table_name='communication_search_grams',
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column('communication_search_grams', 'campus_id')
@@ -0,0 +1,60 @@
+"""add parents.phone_e164 for caller-id lookup
+
+Revision ID: 3c1d5e7f9a20
+Revises: 900905c4b92f
+Create Date: 2026-10-19 09:12:31.418204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.phone import normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d5e7f9a20'
+down_revision: Union[str, Sequence[str], None] = '900905c4b92f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('parents', sa.Column('phone_e164', sa.String(length=16), nullable=True))
+
+    # Backfill in keyset-paginated batches so large tables never hold one long lock.
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        stmt = "SELECT id, phone FROM parents"
+        params = {"limit": BACKFILL_BATCH_SIZE}
+        if last_id is not None:
+            stmt += " WHERE id > :last_id"
+            params["last_id"] = last_id
+        stmt += " ORDER BY id LIMIT :limit"
+        rows = conn.execute(sa.text(stmt), params).all()
+        if not rows:
+            break
+        updates = [
+            {"id": row.id, "phone_e164": e164}
+            for row in rows
+            if (e164 := normalize_phone(row.phone)) is not None
+        ]
+        if updates:
+            conn.execute(
+                sa.text("UPDATE parents SET phone_e164 = :phone_e164 WHERE id = :id"),
+                updates,
+            )
+        last_id = rows[-1].id
+
+    op.create_index('ix_parents_phone_e164', 'parents', ['phone_e164'], unique=False, postgresql_using='hash')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_parents_phone_e164', table_name='parents', postgresql_using='hash')
+    op.drop_column('parents', 'phone_e164')
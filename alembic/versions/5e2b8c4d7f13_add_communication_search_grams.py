@@ -0,0 +1,77 @@
+"""add communication_search_grams inverted index
+
+Revision ID: 5e2b8c4d7f13
+Revises: 3c1d5e7f9a20
+Create Date: 2026-10-19 10:04:52.730119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.services.search import tokenize
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8c4d7f13'
+down_revision: Union[str, Sequence[str], None] = '3c1d5e7f9a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('communication_search_grams',
+    sa.Column('gram', sa.String(length=32), nullable=False),
+    sa.Column('record_id', sa.UUID(), nullable=False),
+    sa.Column('tf', sa.SmallInteger(), nullable=False),
+    sa.Column('contact_type', postgresql.ENUM('phone', 'in_person', 'line', 'email', 'other', name='contact_type', create_type=False), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['record_id'], ['communication_records.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('gram', 'record_id')
+    )
+
+    # Backfill existing summaries in keyset batches; indexes are built afterwards.
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        stmt = "SELECT id, summary FROM communication_records"
+        params = {"limit": BACKFILL_BATCH_SIZE}
+        if last_id is not None:
+            stmt += " WHERE id > :last_id"
+            params["last_id"] = last_id
+        stmt += " ORDER BY id LIMIT :limit"
+        rows = conn.execute(sa.text(stmt), params).all()
+        if not rows:
+            break
+        grams, record_ids, tfs = [], [], []
+        for row in rows:
+            for gram, tf in tokenize(row.summary).items():
+                grams.append(gram)
+                record_ids.append(row.id)
+                tfs.append(min(tf, 32767))
+        if grams:
+            conn.execute(
+                sa.text(
+                    "INSERT INTO communication_search_grams (gram, record_id, tf, contact_type, created_at) "
+                    "SELECT g.gram, r.id, g.tf, r.contact_type, r.created_at "
+                    "FROM unnest(CAST(:grams AS varchar[]), CAST(:record_ids AS uuid[]), CAST(:tfs AS smallint[])) "
+                    "AS g(gram, record_id, tf) JOIN communication_records r ON r.id = g.record_id"
+                ),
+                {"grams": grams, "record_ids": record_ids, "tfs": tfs},
+            )
+        last_id = rows[-1].id
+
+    op.create_index('ix_communication_search_grams_gram_created_at', 'communication_search_grams', ['gram', 'created_at'], unique=False)
+    op.create_index('ix_communication_search_grams_record_id', 'communication_search_grams', ['record_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_communication_search_grams_record_id', table_name='communication_search_grams')
+    op.drop_index('ix_communication_search_grams_gram_created_at', table_name='communication_search_grams')
+    op.drop_table('communication_search_grams')
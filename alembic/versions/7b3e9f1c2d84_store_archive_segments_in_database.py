@@ -0,0 +1,50 @@
+"""store archived history in archive_segments.data instead of local files
+
+Revision ID: 7b3e9f1c2d84
+Revises: c544244d9cf9
+Create Date: 2026-10-20 01:32:05.871240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9f1c2d84'
+down_revision: Union[str, Sequence[str], None] = 'c544244d9cf9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('archive_segments', sa.Column('data', sa.LargeBinary(), nullable=True))
+    # Already gzip-compressed: TOAST need not try again
+    op.execute("ALTER TABLE archive_segments ALTER COLUMN data SET STORAGE EXTERNAL")
+    # Segments written from now on have no file; existing ones keep theirs
+    # until scripts/archive_history.py --import-files moves them in
+    op.alter_column('archive_segments', 'file', existing_type=sa.String(length=255), nullable=True)
+    op.alter_column('archive_segments', 'offset', existing_type=sa.BigInteger(), nullable=True)
+    op.create_check_constraint(
+        'archive_segments_data_or_file', 'archive_segments', 'data IS NOT NULL OR file IS NOT NULL',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Dropping the column would destroy archived history that exists nowhere else
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM archive_segments WHERE file IS NULL) THEN
+                RAISE EXCEPTION 'archive_segments holds history stored only in the database';
+            END IF;
+        END;
+        $$
+    """)
+    op.drop_constraint('archive_segments_data_or_file', 'archive_segments', type_='check')
+    op.alter_column('archive_segments', 'offset', existing_type=sa.BigInteger(), nullable=False)
+    op.alter_column('archive_segments', 'file', existing_type=sa.String(length=255), nullable=False)
+    op.drop_column('archive_segments', 'data')
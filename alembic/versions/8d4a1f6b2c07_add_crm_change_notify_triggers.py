@@ -0,0 +1,51 @@
+"""add crm_changes notify triggers on parents and students
+
+Revision ID: 8d4a1f6b2c07
+Revises: 5e2b8c4d7f13
+Create Date: 2026-10-19 11:26:07.915342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4a1f6b2c07'
+down_revision: Union[str, Sequence[str], None] = '5e2b8c4d7f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTIFY_TABLES = ('parents', 'students')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crm_notify_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'crm_changes',
+                json_build_object(
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in NOTIFY_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION crm_notify_change()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in NOTIFY_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS crm_notify_change()")
@@ -0,0 +1,37 @@
+"""add covering index parent_student(student_id, parent_id)
+
+Revision ID: a2d6f4c8e315
+Revises: f3b8d2c6a917
+Create Date: 2026-10-19 16:21:05.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2d6f4c8e315'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d2c6a917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps parent_student writable while the index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_parent_student_student_id_parent_id', 'parent_student', ['student_id', 'parent_id'],
+            unique=False, postgresql_include=['relationship_type'], postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_parent_student_student_id_parent_id', table_name='parent_student',
+            postgresql_concurrently=True, if_exists=True,
+        )
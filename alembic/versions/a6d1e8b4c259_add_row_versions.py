@@ -0,0 +1,34 @@
+"""add version columns for optimistic concurrency on parents, students, info_sessions and follow_ups
+
+Revision ID: a6d1e8b4c259
+Revises: f9a2d6c3e187
+Create Date: 2026-10-19 23:02:41.518366
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d1e8b4c259'
+down_revision: Union[str, Sequence[str], None] = 'f9a2d6c3e187'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED = ('parents', 'students', 'info_sessions', 'follow_ups')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant server default is a catalog-only change: no table rewrite. It
+    # also covers raw-SQL inserts (session follow-ups) that do not name the column.
+    for table in VERSIONED:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED:
+        op.drop_column(table, 'version')
@@ -0,0 +1,75 @@
+"""add month-partitioned append-only audit_log
+
+Revision ID: b6e3d9a41f58
+Revises: 8d4a1f6b2c07
+Create Date: 2026-10-19 13:41:18.206557
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e3d9a41f58'
+down_revision: Union[str, Sequence[str], None] = '8d4a1f6b2c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE audit_log (
+            id BIGSERIAL NOT NULL,
+            changed_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            user_id UUID,
+            table_name VARCHAR(63) NOT NULL,
+            row_id TEXT NOT NULL,
+            action VARCHAR(10) NOT NULL,
+            changes JSONB NOT NULL,
+            PRIMARY KEY (id, changed_at)
+        ) PARTITION BY RANGE (changed_at)
+    """)
+    op.create_index('ix_audit_log_table_row', 'audit_log', ['table_name', 'row_id', 'changed_at'], unique=False)
+    op.create_index('ix_audit_log_user_changed_at', 'audit_log', ['user_id', 'changed_at'], unique=False)
+
+    # Creates the partition holding `month` if it does not exist yet; the writer
+    # calls this before the first COPY into a new month.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_log_ensure_partition(month date) RETURNS void AS $$
+        DECLARE
+            start_at date := date_trunc('month', month)::date;
+            end_at date := (date_trunc('month', month) + interval '1 month')::date;
+            part_name text := 'audit_log_' || to_char(start_at, 'YYYY_MM');
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                part_name, start_at, end_at
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("SELECT audit_log_ensure_partition(now()::date)")
+    op.execute("SELECT audit_log_ensure_partition((now() + interval '1 month')::date)")
+
+    # Append-only: history can be added to, never rewritten
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_log_reject_mutation() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'audit_log is append-only';
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER audit_log_append_only
+        BEFORE UPDATE OR DELETE ON audit_log
+        FOR EACH ROW EXECUTE FUNCTION audit_log_reject_mutation()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE audit_log CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS audit_log_reject_mutation()")
+    op.execute("DROP FUNCTION IF EXISTS audit_log_ensure_partition(date)")
@@ -0,0 +1,33 @@
+"""add registrations.follow_up_id
+
+Revision ID: b8e1c5d3f702
+Revises: a2d6f4c8e315
+Create Date: 2026-10-19 16:48:12.730551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e1c5d3f702'
+down_revision: Union[str, Sequence[str], None] = 'a2d6f4c8e315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('registrations', sa.Column('follow_up_id', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'registrations_follow_up_id_fkey', 'registrations', 'follow_ups', ['follow_up_id'], ['id'],
+        ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('registrations_follow_up_id_fkey', 'registrations', type_='foreignkey')
+    op.drop_column('registrations', 'follow_up_id')
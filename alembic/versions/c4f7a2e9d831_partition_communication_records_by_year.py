@@ -0,0 +1,222 @@
+"""partition communication_records by year
+
+Revision ID: c4f7a2e9d831
+Revises: b6e3d9a41f58
+Create Date: 2026-10-19 14:22:40.518306
+
+Online path: the partitioned table is built next to the live one, kept in
+sync by a trigger while existing rows are copied in small autocommitted
+batches, and swapped in under a short exclusive lock at the end. Every
+step is idempotent, so an interrupted run can simply be started again.
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7a2e9d831'
+down_revision: Union[str, Sequence[str], None] = 'b6e3d9a41f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COPY_BATCH_SIZE = 5000
+COLUMNS = "id, parent_id, user_id, contact_type, summary, created_at"
+
+
+def _create_year_partition(year: int, parent: str) -> None:
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS communication_records_{year} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. Partitioned twin of the live table
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS communication_records_partitioned (
+            id UUID NOT NULL,
+            parent_id UUID NOT NULL,
+            user_id UUID NOT NULL,
+            contact_type contact_type NOT NULL,
+            summary TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            CONSTRAINT communication_records_partitioned_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT communication_records_parent_id_fkey
+                FOREIGN KEY (parent_id) REFERENCES parents (id) ON DELETE CASCADE,
+            CONSTRAINT communication_records_user_id_fkey
+                FOREIGN KEY (user_id) REFERENCES users (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_communication_records_parent_id_created_at "
+        "ON communication_records_partitioned (parent_id, created_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_communication_records_created_at "
+        "ON communication_records_partitioned (created_at)"
+    )
+
+    # One partition per year of existing history, plus this year and next
+    conn = op.get_bind()
+    bounds = conn.execute(sa.text(
+        "SELECT extract(year FROM min(created_at) AT TIME ZONE 'UTC')::int AS first, "
+        "extract(year FROM max(created_at) AT TIME ZONE 'UTC')::int AS last "
+        "FROM communication_records"
+    )).one()
+    this_year = datetime.now(timezone.utc).year
+    first = min(bounds.first or this_year, this_year)
+    last = max(bounds.last or this_year, this_year + 1)
+    for year in range(first, last + 1):
+        _create_year_partition(year, 'communication_records_partitioned')
+
+    # 2. Mirror live writes into the new table while the backfill runs
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION communication_records_sync_partitioned() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM communication_records_partitioned
+                WHERE id = OLD.id AND created_at = OLD.created_at;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO communication_records_partitioned ({COLUMNS})
+                VALUES (NEW.id, NEW.parent_id, NEW.user_id, NEW.contact_type, NEW.summary, NEW.created_at)
+                ON CONFLICT (id, created_at) DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS communication_records_sync ON communication_records")
+    op.execute("""
+        CREATE TRIGGER communication_records_sync
+        AFTER INSERT OR UPDATE OR DELETE ON communication_records
+        FOR EACH ROW EXECUTE FUNCTION communication_records_sync_partitioned()
+    """)
+
+    # 3. Copy existing rows in keyset batches, each in its own short transaction
+    with op.get_context().autocommit_block():
+        last_id = None
+        while True:
+            where = "WHERE id > :last_id " if last_id is not None else ""
+            last_id = conn.execute(
+                sa.text(
+                    f"WITH batch AS ("
+                    f"  SELECT {COLUMNS} FROM communication_records {where}ORDER BY id LIMIT :limit"
+                    f"), copied AS ("
+                    f"  INSERT INTO communication_records_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM batch"
+                    f"  ON CONFLICT (id, created_at) DO NOTHING"
+                    f") SELECT id FROM batch ORDER BY id DESC LIMIT 1"
+                ),
+                {"last_id": last_id, "limit": COPY_BATCH_SIZE},
+            ).scalar()
+            if last_id is None:
+                break
+
+    # 4. Swap. Foreign keys can only reference a partitioned table through its
+    # whole primary key, so follow_ups/search grams lose theirs and triggers
+    # take over existence checks and ON DELETE CASCADE.
+    # Give up rather than queue behind long transactions (and block everyone behind us)
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("LOCK TABLE communication_records IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE follow_ups DROP CONSTRAINT IF EXISTS follow_ups_communication_id_fkey")
+    op.execute(
+        "ALTER TABLE communication_search_grams "
+        "DROP CONSTRAINT IF EXISTS communication_search_grams_record_id_fkey"
+    )
+    op.execute("DROP TABLE communication_records")
+    op.execute("DROP FUNCTION communication_records_sync_partitioned()")
+    op.execute("ALTER TABLE communication_records_partitioned RENAME TO communication_records")
+    op.execute("ALTER INDEX communication_records_partitioned_pkey RENAME TO communication_records_pkey")
+
+    # Creates the partition holding `day` if it does not exist yet; the app
+    # keeps this year and next provisioned (app.services.partitions).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION communication_records_ensure_partition(day date) RETURNS void AS $$
+        DECLARE
+            year int := extract(year FROM day)::int;
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF communication_records FOR VALUES FROM (%L) TO (%L)',
+                'communication_records_' || year,
+                year || '-01-01 00:00:00+00',
+                (year + 1) || '-01-01 00:00:00+00'
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION communication_records_cascade_delete() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM follow_ups WHERE communication_id = OLD.id;
+            DELETE FROM communication_search_grams WHERE record_id = OLD.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER communication_records_cascade_delete
+        AFTER DELETE ON communication_records
+        FOR EACH ROW EXECUTE FUNCTION communication_records_cascade_delete()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION follow_ups_check_communication() RETURNS trigger AS $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM communication_records WHERE id = NEW.communication_id) THEN
+                RAISE foreign_key_violation USING MESSAGE = format(
+                    'communication_id %s is not present in table "communication_records"', NEW.communication_id
+                );
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER follow_ups_check_communication
+        BEFORE INSERT OR UPDATE OF communication_id ON follow_ups
+        FOR EACH ROW EXECUTE FUNCTION follow_ups_check_communication()
+    """)
+    op.create_index('ix_follow_ups_communication_id', 'follow_ups', ['communication_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_follow_ups_communication_id', table_name='follow_ups')
+    op.execute("DROP TRIGGER IF EXISTS follow_ups_check_communication ON follow_ups")
+    op.execute("DROP FUNCTION IF EXISTS follow_ups_check_communication()")
+    op.execute("DROP TRIGGER IF EXISTS communication_records_cascade_delete ON communication_records")
+    op.execute("DROP FUNCTION IF EXISTS communication_records_cascade_delete()")
+    op.execute("DROP FUNCTION IF EXISTS communication_records_ensure_partition(date)")
+
+    op.execute("ALTER TABLE communication_records RENAME TO communication_records_partitioned")
+    op.execute("ALTER INDEX communication_records_pkey RENAME TO communication_records_partitioned_pkey")
+    op.create_table('communication_records',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('parent_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('contact_type', postgresql.ENUM('phone', 'in_person', 'line', 'email', 'other', name='contact_type', create_type=False), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['parent_id'], ['parents.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        f"INSERT INTO communication_records ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM communication_records_partitioned"
+    )
+    op.execute("DROP TABLE communication_records_partitioned")
+    op.create_foreign_key(
+        'follow_ups_communication_id_fkey', 'follow_ups', 'communication_records',
+        ['communication_id'], ['id'], ondelete='CASCADE',
+    )
+    op.create_foreign_key(
+        'communication_search_grams_record_id_fkey', 'communication_search_grams', 'communication_records',
+        ['record_id'], ['id'], ondelete='CASCADE',
+    )
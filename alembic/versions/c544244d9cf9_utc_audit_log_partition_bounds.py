@@ -0,0 +1,99 @@
+"""bound audit_log partitions by UTC months, whatever the session TimeZone
+
+Revision ID: c544244d9cf9
+Revises: f56614171a7b
+Create Date: 2026-10-20 00:47:52.118630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c544244d9cf9'
+down_revision: Union[str, Sequence[str], None] = 'f56614171a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The writer routes entries by UTC month. Bounds given as bare dates were
+    # read in the session TimeZone, so on e.g. Asia/Taipei the last hours of
+    # a UTC month had no partition and their COPY failed. Explicit '+00'
+    # instants, like communication_records_ensure_partition.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_log_ensure_partition(month date) RETURNS void AS $$
+        DECLARE
+            start_at date := make_date(extract(year FROM month)::int, extract(month FROM month)::int, 1);
+            end_at date := (start_at + interval '1 month')::date;
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                'audit_log_' || to_char(start_at, 'YYYY_MM'),
+                start_at || ' 00:00:00+00',
+                end_at || ' 00:00:00+00'
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Partitions created under a non-UTC TimeZone are shifted by its offset:
+    # detach them, then move their rows into UTC-bounded partitions. A no-op
+    # on databases that always ran in UTC.
+    op.execute("""
+        DO $$
+        DECLARE
+            part record;
+            legacy text;
+            month date;
+        BEGIN
+            SET LOCAL TimeZone = 'UTC';
+            FOR part IN
+                SELECT c.oid::regclass::text AS name, c.relname,
+                       substring(pg_get_expr(c.relpartbound, c.oid) FROM 'FROM \\(''([^'']+)''\\)')::timestamptz AS lower_bound
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'audit_log'::regclass
+            LOOP
+                IF part.lower_bound IS NULL OR part.lower_bound = date_trunc('month', part.lower_bound) THEN
+                    CONTINUE;
+                END IF;
+                EXECUTE format('ALTER TABLE audit_log DETACH PARTITION %s', part.name);
+                EXECUTE format('ALTER TABLE %s RENAME TO %I', part.name, part.relname || '_legacy');
+            END LOOP;
+
+            FOR legacy IN
+                SELECT relname FROM pg_class WHERE relname ~ '^audit_log_\\d{4}_\\d{2}_legacy$' AND relkind = 'r'
+            LOOP
+                FOR month IN EXECUTE format('SELECT DISTINCT date_trunc(''month'', changed_at)::date FROM %I', legacy)
+                LOOP
+                    PERFORM audit_log_ensure_partition(month);
+                END LOOP;
+                EXECUTE format('INSERT INTO audit_log SELECT * FROM %I', legacy);
+                EXECUTE format('DROP TABLE %I', legacy);
+            END LOOP;
+        END;
+        $$
+    """)
+    op.execute("SELECT audit_log_ensure_partition(CAST(now() AT TIME ZONE 'UTC' AS date))")
+    op.execute("SELECT audit_log_ensure_partition(CAST((now() AT TIME ZONE 'UTC') + interval '1 month' AS date))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partitions keep their UTC bounds; only new ones follow the old definition again
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_log_ensure_partition(month date) RETURNS void AS $$
+        DECLARE
+            start_at date := date_trunc('month', month)::date;
+            end_at date := (date_trunc('month', month) + interval '1 month')::date;
+            part_name text := 'audit_log_' || to_char(start_at, 'YYYY_MM');
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                part_name, start_at, end_at
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
@@ -0,0 +1,79 @@
+"""link registrations to parents: parent_id, match_status, review candidates
+
+Revision ID: c9d2e7a4b160
+Revises: b8e1c5d3f702
+Create Date: 2026-10-19 17:24:40.193872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d2e7a4b160'
+down_revision: Union[str, Sequence[str], None] = 'b8e1c5d3f702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+match_status = postgresql.ENUM('matched', 'review', 'no_match', name='registration_match_status', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    match_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('registrations', sa.Column('phone', sa.String(length=20), nullable=True))
+    op.add_column('registrations', sa.Column('phone_e164', sa.String(length=16), nullable=True))
+    op.add_column('registrations', sa.Column('parent_id', sa.UUID(), nullable=True))
+    op.add_column('registrations', sa.Column('match_status', match_status, nullable=True))
+    op.create_foreign_key(
+        'registrations_parent_id_fkey', 'registrations', 'parents', ['parent_id'], ['id'], ondelete='SET NULL',
+    )
+    op.create_index('ix_registrations_parent_id', 'registrations', ['parent_id'], unique=False)
+    op.create_index(
+        'ix_registrations_session_id_match_status', 'registrations', ['session_id', 'match_status'], unique=False,
+    )
+
+    op.create_table('registration_match_candidates',
+    sa.Column('registration_id', sa.UUID(), nullable=False),
+    sa.Column('parent_id', sa.UUID(), nullable=False),
+    sa.Column('score', sa.SmallInteger(), nullable=False),
+    sa.Column('reasons', postgresql.ARRAY(sa.String(length=10)), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['registration_id'], ['registrations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['parent_id'], ['parents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('registration_id', 'parent_id')
+    )
+    op.create_index(
+        'ix_registration_match_candidates_parent_id', 'registration_match_candidates', ['parent_id'], unique=False,
+    )
+
+    # CONCURRENTLY keeps parents writable while the expression indexes build
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_parents_email_lower', 'parents', [sa.text('lower(email)')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_parents_name_key', 'parents', [sa.text(r"lower(regexp_replace(name, '\s+', '', 'g'))")],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_parents_name_key', table_name='parents', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_parents_email_lower', table_name='parents', postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_registration_match_candidates_parent_id', table_name='registration_match_candidates')
+    op.drop_table('registration_match_candidates')
+    op.drop_index('ix_registrations_session_id_match_status', table_name='registrations')
+    op.drop_index('ix_registrations_parent_id', table_name='registrations')
+    op.drop_constraint('registrations_parent_id_fkey', 'registrations', type_='foreignkey')
+    op.drop_column('registrations', 'match_status')
+    op.drop_column('registrations', 'parent_id')
+    op.drop_column('registrations', 'phone_e164')
+    op.drop_column('registrations', 'phone')
+    match_status.drop(op.get_bind(), checkfirst=True)
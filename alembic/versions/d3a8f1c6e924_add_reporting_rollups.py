@@ -0,0 +1,164 @@
+"""add reporting rollups, change journal triggers and follow_ups.completed_at
+
+Revision ID: d3a8f1c6e924
+Revises: c9d2e7a4b160
+Create Date: 2026-10-19 19:42:17.503318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f1c6e924'
+down_revision: Union[str, Sequence[str], None] = 'c9d2e7a4b160'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Reports count local school days. Changing this needs a full rebuild
+# (python scripts/refresh_reports.py --full).
+REPORT_TIMEZONE = 'Asia/Taipei'
+
+# table -> (rollup, key expressions over its rows, report_changes column they fill)
+JOURNALED = {
+    'communication_records': ('communications', ['crm_report_day(created_at)'], 'day'),
+    'follow_ups': (
+        'follow_ups',
+        ['crm_report_day(created_at)', 'crm_report_day(completed_at)', 'due_date + 1'],
+        'day',
+    ),
+    'registrations': ('sessions', ['session_id'], 'session_id'),
+    'info_sessions': ('sessions', ['id'], 'session_id'),
+}
+
+
+def _journal_function(table: str) -> str:
+    rollup, keys, column = JOURNALED[table]
+
+    def insert(rows: str) -> str:
+        selects = " UNION ".join(f"SELECT {key} FROM {rows}" for key in keys)
+        return f"""
+            INSERT INTO report_changes (rollup, {column})
+            SELECT '{rollup}', k FROM ({selects}) AS changed(k) WHERE k IS NOT NULL;"""
+
+    return f"""
+        CREATE OR REPLACE FUNCTION report_journal_{table}() RETURNS trigger AS $$
+        BEGIN
+            -- Archiving moves history out of the hot tables; its counts stay in the rollups
+            IF current_setting('crm.report_journal', true) = 'off' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN{insert('new_rows')}
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN{insert('old_rows')}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('follow_ups', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_follow_ups_created_at', 'follow_ups', ['created_at'], unique=False)
+    op.create_index('ix_follow_ups_completed_at', 'follow_ups', ['completed_at'], unique=False)
+    op.create_index('ix_follow_ups_due_date', 'follow_ups', ['due_date'], unique=False)
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION crm_report_day(ts timestamptz) RETURNS date
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT (ts AT TIME ZONE '{REPORT_TIMEZONE}')::date $$
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION crm_report_day_start(d date) RETURNS timestamptz
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT d::timestamp AT TIME ZONE '{REPORT_TIMEZONE}' $$
+    """)
+
+    op.create_table('report_communications_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('contact_type', postgresql.ENUM('phone', 'in_person', 'line', 'email', 'other', name='contact_type', create_type=False), nullable=False),
+    sa.Column('communications', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'user_id', 'contact_type')
+    )
+    op.create_table('report_follow_ups_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('assigned_to', sa.UUID(), nullable=False),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('completion_seconds', sa.BigInteger(), nullable=False),
+    sa.Column('became_overdue', sa.Integer(), nullable=False),
+    sa.Column('overdue_resolved', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'assigned_to')
+    )
+    op.create_table('report_session_funnel',
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('session_date', sa.Date(), nullable=False),
+    sa.Column('registrations', sa.Integer(), nullable=False),
+    sa.Column('confirmed', sa.Integer(), nullable=False),
+    sa.Column('cancelled', sa.Integer(), nullable=False),
+    sa.Column('existing_families', sa.Integer(), nullable=False),
+    sa.Column('converted', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index('ix_report_session_funnel_session_date', 'report_session_funnel', ['session_date'], unique=False)
+    op.create_table('report_changes',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('rollup', sa.String(length=20), nullable=False),
+    sa.Column('day', sa.Date(), nullable=True),
+    sa.Column('session_id', sa.UUID(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('report_watermarks',
+    sa.Column('rollup', sa.String(length=20), nullable=False),
+    sa.Column('as_of', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('keys_refreshed', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('rollup')
+    )
+
+    # Statement-level triggers see every written row at once through transition
+    # tables, so a bulk write journals each touched day once. Transition tables
+    # allow a single event per trigger, hence three triggers per table.
+    for table in JOURNALED:
+        op.execute(_journal_function(table))
+        op.execute(f"""
+            CREATE TRIGGER {table}_report_journal_insert
+            AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION report_journal_{table}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_report_journal_update
+            AFTER UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION report_journal_{table}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_report_journal_delete
+            AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION report_journal_{table}()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in JOURNALED:
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_report_journal_{event} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS report_journal_{table}()")
+    op.drop_table('report_watermarks')
+    op.drop_table('report_changes')
+    op.drop_index('ix_report_session_funnel_session_date', table_name='report_session_funnel')
+    op.drop_table('report_session_funnel')
+    op.drop_table('report_follow_ups_daily')
+    op.drop_table('report_communications_daily')
+    op.execute("DROP FUNCTION IF EXISTS crm_report_day_start(date)")
+    op.execute("DROP FUNCTION IF EXISTS crm_report_day(timestamptz)")
+    op.drop_index('ix_follow_ups_due_date', table_name='follow_ups')
+    op.drop_index('ix_follow_ups_completed_at', table_name='follow_ups')
+    op.drop_index('ix_follow_ups_created_at', table_name='follow_ups')
+    op.drop_column('follow_ups', 'completed_at')
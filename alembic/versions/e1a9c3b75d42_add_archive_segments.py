@@ -0,0 +1,43 @@
+"""add archive_segments manifest for cold-storage history
+
+Revision ID: e1a9c3b75d42
+Revises: c4f7a2e9d831
+Create Date: 2026-10-19 15:03:11.472905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a9c3b75d42'
+down_revision: Union[str, Sequence[str], None] = 'c4f7a2e9d831'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('archive_segments',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('parent_id', sa.UUID(), nullable=False),
+    sa.Column('file', sa.String(length=255), nullable=False),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.Column('communication_count', sa.Integer(), nullable=False),
+    sa.Column('follow_up_count', sa.Integer(), nullable=False),
+    sa.Column('first_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['parent_id'], ['parents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archive_segments_parent_id'), 'archive_segments', ['parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_archive_segments_parent_id'), table_name='archive_segments')
+    op.drop_table('archive_segments')
@@ -0,0 +1,54 @@
+"""add parent duplicate candidates and trigram name index
+
+Revision ID: e7c4b2a9d351
+Revises: d3a8f1c6e924
+Create Date: 2026-10-19 20:31:08.661240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c4b2a9d351'
+down_revision: Union[str, Sequence[str], None] = 'd3a8f1c6e924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table('parent_duplicate_candidates',
+    sa.Column('parent_id', sa.UUID(), nullable=False),
+    sa.Column('duplicate_id', sa.UUID(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('reasons', postgresql.ARRAY(sa.String(length=10)), nullable=False),
+    sa.Column('dismissed', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('detected_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('parent_id < duplicate_id', name='ck_parent_duplicate_candidates_order'),
+    sa.ForeignKeyConstraint(['parent_id'], ['parents.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['duplicate_id'], ['parents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('parent_id', 'duplicate_id')
+    )
+    op.create_index(
+        'ix_parent_duplicate_candidates_duplicate_id', 'parent_duplicate_candidates', ['duplicate_id'], unique=False,
+    )
+
+    # CONCURRENTLY keeps parents writable while the trigram index builds
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_parents_name_key_trgm ON parents "
+            r"USING gin (lower(regexp_replace(name, '\s+', '', 'g')) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_parents_name_key_trgm', table_name='parents', postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_parent_duplicate_candidates_duplicate_id', table_name='parent_duplicate_candidates')
+    op.drop_table('parent_duplicate_candidates')
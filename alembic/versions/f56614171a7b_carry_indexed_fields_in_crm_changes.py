@@ -0,0 +1,93 @@
+"""carry the typeahead fields in crm_changes notifications; skip updates that leave them unchanged
+
+Revision ID: f56614171a7b
+Revises: 341355c96453
+Create Date: 2026-10-20 00:21:37.604512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f56614171a7b'
+down_revision: Union[str, Sequence[str], None] = '341355c96453'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> columns the typeahead index is built from (besides id and campus_id)
+NOTIFY_TABLES = {
+    'parents': ('name', 'phone'),
+    'students': ('name', 'grade'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The payload has everything the listener indexes, so workers apply it
+    # without a query; the trigger arguments name the columns to include.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crm_notify_change() RETURNS trigger AS $$
+        DECLARE
+            payload jsonb := jsonb_build_object('table', TG_TABLE_NAME, 'op', TG_OP);
+            new_row jsonb;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                payload := payload || jsonb_build_object('id', OLD.id);
+            ELSE
+                new_row := to_jsonb(NEW);
+                payload := payload || jsonb_build_object('id', NEW.id, 'campus_id', NEW.campus_id);
+                FOR i IN 0 .. TG_NARGS - 1 LOOP
+                    payload := payload || jsonb_build_object(TG_ARGV[i], new_row -> TG_ARGV[i]);
+                END LOOP;
+            END IF;
+            PERFORM pg_notify('crm_changes', payload::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table, columns in NOTIFY_TABLES.items():
+        args = ", ".join(f"'{column}'" for column in columns)
+        changed = " OR ".join(
+            f"OLD.{column} IS DISTINCT FROM NEW.{column}" for column in ('campus_id', *columns)
+        )
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_change
+            AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION crm_notify_change({args})
+        """)
+        # Version bumps, notes, addresses ... do not concern the index
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_update
+            AFTER UPDATE ON {table}
+            FOR EACH ROW WHEN ({changed}) EXECUTE FUNCTION crm_notify_change({args})
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crm_notify_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'crm_changes',
+                json_build_object(
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in NOTIFY_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_update ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION crm_notify_change()
+        """)
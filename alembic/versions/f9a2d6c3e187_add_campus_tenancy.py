@@ -0,0 +1,154 @@
+"""add campuses, campus_id on tenant tables, campus-leading indexes and row-level security
+
+Revision ID: f9a2d6c3e187
+Revises: e7c4b2a9d351
+Create Date: 2026-10-19 21:16:52.307419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9a2d6c3e187'
+down_revision: Union[str, Sequence[str], None] = 'e7c4b2a9d351'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Existing data becomes this campus (code matches the DEFAULT_CAMPUS setting)
+DEFAULT_CAMPUS_ID = '00000000-0000-0000-0000-000000000001'
+DEFAULT_CAMPUS_CODE = 'main'
+DEFAULT_CAMPUS_NAME = '本校'
+
+# table -> campus_id NOT NULL; audit_log keeps NULL for background jobs
+SCOPED = {
+    'users': True,
+    'parents': True,
+    'students': True,
+    'communication_records': True,
+    'follow_ups': True,
+    'info_sessions': True,
+    'registrations': True,
+    'audit_log': False,
+}
+# Partitioned tables cannot take a NOT VALID foreign key
+PARTITIONED = {'communication_records', 'audit_log'}
+
+# Rows are visible when the transaction's crm.campus_id matches, or when it is
+# unset (background jobs, scripts, login). Only enforced for roles that do not
+# own the tables; see TENANT_RLS.
+POLICY = """
+    CREATE POLICY campus_isolation ON {table}
+    USING (
+        coalesce(current_setting('crm.campus_id', true), '') = ''
+        OR campus_id = CAST(current_setting('crm.campus_id', true) AS uuid)
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('campuses',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code')
+    )
+    op.execute(
+        f"INSERT INTO campuses (id, code, name) "
+        f"VALUES ('{DEFAULT_CAMPUS_ID}', '{DEFAULT_CAMPUS_CODE}', '{DEFAULT_CAMPUS_NAME}')"
+    )
+
+    # A constant default fills existing rows without rewriting the tables;
+    # dropping it afterwards makes new rows state their campus.
+    for table, required in SCOPED.items():
+        op.add_column(table, sa.Column(
+            'campus_id', sa.UUID(), nullable=not required, server_default=sa.text(f"'{DEFAULT_CAMPUS_ID}'"),
+        ))
+        op.alter_column(table, 'campus_id', server_default=None)
+        if table == 'audit_log':
+            continue
+        if table in PARTITIONED:
+            op.create_foreign_key(f'{table}_campus_id_fkey', table, 'campuses', ['campus_id'], ['id'])
+        else:
+            # Validated below, after this transaction commits
+            op.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_campus_id_fkey "
+                f"FOREIGN KEY (campus_id) REFERENCES campuses (id) NOT VALID"
+            )
+
+    # Usernames are unique per campus
+    op.drop_index('ix_users_username', table_name='users')
+    op.create_index('ix_users_campus_id_username', 'users', ['campus_id', 'username'], unique=True)
+    # Partitioned parents: CONCURRENTLY is not available, the index is built per partition
+    op.create_index(
+        'ix_communication_records_campus_id_created_at', 'communication_records', ['campus_id', 'created_at'],
+        unique=False,
+    )
+    op.create_index('ix_audit_log_campus_id_changed_at', 'audit_log', ['campus_id', 'changed_at'], unique=False)
+
+    with op.get_context().autocommit_block():
+        # In its own transaction the scan only takes SHARE UPDATE EXCLUSIVE,
+        # so writes to the table go on while existing rows are checked
+        for table in (t for t in SCOPED if t not in PARTITIONED):
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_campus_id_fkey")
+        for name, table, columns in (
+            ('ix_parents_campus_id_created_at', 'parents', ['campus_id', 'created_at']),
+            ('ix_parents_campus_id_email_lower', 'parents', ['campus_id', sa.text('lower(email)')]),
+            (
+                'ix_parents_campus_id_name_key', 'parents',
+                ['campus_id', sa.text(r"lower(regexp_replace(name, '\s+', '', 'g'))")],
+            ),
+            ('ix_students_campus_id_created_at', 'students', ['campus_id', 'created_at']),
+            ('ix_follow_ups_campus_id_due_date', 'follow_ups', ['campus_id', 'due_date']),
+            ('ix_info_sessions_campus_id_session_date', 'info_sessions', ['campus_id', 'session_date']),
+        ):
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        # Superseded by the campus-leading versions above
+        op.drop_index('ix_parents_email_lower', table_name='parents', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_parents_name_key', table_name='parents', postgresql_concurrently=True, if_exists=True)
+
+    for table in SCOPED:
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+        op.execute(POLICY.format(table=table))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in SCOPED:
+        op.execute(f"DROP POLICY IF EXISTS campus_isolation ON {table}")
+        op.execute(f"ALTER TABLE {table} DISABLE ROW LEVEL SECURITY")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_parents_email_lower', 'parents', [sa.text('lower(email)')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_parents_name_key', 'parents', [sa.text(r"lower(regexp_replace(name, '\s+', '', 'g'))")],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        for name, table in (
+            ('ix_info_sessions_campus_id_session_date', 'info_sessions'),
+            ('ix_follow_ups_campus_id_due_date', 'follow_ups'),
+            ('ix_students_campus_id_created_at', 'students'),
+            ('ix_parents_campus_id_name_key', 'parents'),
+            ('ix_parents_campus_id_email_lower', 'parents'),
+            ('ix_parents_campus_id_created_at', 'parents'),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_audit_log_campus_id_changed_at', table_name='audit_log')
+    op.drop_index('ix_communication_records_campus_id_created_at', table_name='communication_records')
+    op.drop_index('ix_users_campus_id_username', table_name='users')
+    # Fails if campuses reuse a username; merge or rename those accounts first
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    for table in SCOPED:
+        if table != 'audit_log':
+            op.drop_constraint(f'{table}_campus_id_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'campus_id')
+    op.drop_table('campuses')
@@ -1,13 +1,83 @@
+"""Database engines and request sessions.
+
+Every campus lives in ``DATABASE_URL`` unless ``CAMPUS_DATABASES`` places it
+on a database of its own (same schema, migrated separately). ``get_db`` opens
+the session on the database of the campus named in the caller's access
+token; engines for those databases are created on first use.
+"""
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
+from app.services.auth import decode_access_token
+from app.services.query_budget import apply_budget
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+
+
+def _create_session_maker(bind: AsyncEngine, url: str) -> async_sessionmaker:
+    # session.info["database"] tells after-commit work (audit writer) where the session wrote
+    return async_sessionmaker(bind, class_=AsyncSession, expire_on_commit=False, info={"database": url})
+
+
+engine = _create_engine(settings.DATABASE_URL)
+async_session = _create_session_maker(engine, settings.DATABASE_URL)
+
+_engines: dict[str, AsyncEngine] = {settings.DATABASE_URL: engine}
+_session_makers: dict[str, async_sessionmaker] = {settings.DATABASE_URL: async_session}
+
+
+def database_url(campus: str | None) -> str:
+    """URL of the database holding ``campus`` (by code)."""
+    return settings.CAMPUS_DATABASES.get(campus or "", settings.DATABASE_URL)
+
+
+def engine_for(url: str) -> AsyncEngine:
+    eng = _engines.get(url)
+    if eng is None:
+        eng = _engines[url] = _create_engine(url)
+    return eng
+
+
+def session_maker_for(url: str) -> async_sessionmaker:
+    maker = _session_makers.get(url)
+    if maker is None:
+        maker = _session_makers[url] = _create_session_maker(engine_for(url), url)
+    return maker
+
+
+def campus_session(campus: str | None) -> async_sessionmaker:
+    """Session factory for the database holding ``campus``."""
+    return session_maker_for(database_url(campus))
+
+
+def database_urls() -> list[str]:
+    """Every configured database, DATABASE_URL first (for per-database background work)."""
+    return list(dict.fromkeys([settings.DATABASE_URL, *settings.CAMPUS_DATABASES.values()]))
+
+
+def request_campus(request: Request) -> str:
+    """Campus code from the access token cookie (DEFAULT_CAMPUS when absent or invalid).
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
-async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    Only picks the database; get_current_user verifies the user against it.
+    """
+    token = request.cookies.get("access_token")
+    payload = decode_access_token(token) if token else None
+    return (payload or {}).get("campus") or settings.DEFAULT_CAMPUS
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with campus_session(request_campus(request))() as session:
+        # statement_timeout budget of the matched route
+        apply_budget(session, getattr(request.scope.get("route"), "name", None))
         yield session
@@ -1,15 +1,26 @@
 import uuid
 from collections.abc import Callable
 
-from fastapi import Cookie, Depends, HTTPException, status
+from fastapi import Cookie, Depends, Header, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import Role, User
+from app.services.audit import audit_actor
 from app.services.auth import decode_access_token
+from app.services.cache import named_cache
+from app.services.idempotency import Idempotency, begin as begin_idempotency
+from app.services.logs import bind_user
+from app.services.tenancy import CampusContext, enter_campus
+from app.services.tracing import traced
+from app.services.writes import parse_if_match
 
+_user_cache = named_cache("users", ttl=settings.USER_CACHE_TTL_SECONDS, maxsize=1024)
 
+
+@traced("auth.get_current_user")
 async def get_current_user(
     access_token: str | None = Cookie(default=None),
     db: AsyncSession = Depends(get_db),
@@ -20,12 +31,22 @@ async def get_current_user(
     if payload is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     user_id = payload.get("sub")
-    if user_id is None:
+    if user_id is None or not payload.get("campus_id"):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    result = await db.execute(select(User).where(User.id == uuid.UUID(user_id)))
-    user = result.scalar_one_or_none()
+    user = _user_cache.get(user_id)
+    if user is None:
+        result = await db.execute(select(User).where(User.id == uuid.UUID(user_id)))
+        user = result.scalar_one_or_none()
+        if user is not None:
+            _user_cache.set(user_id, user, tags=(("users", str(user.id)),))
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+    # The token's campus picked the database; it must also be the user's own campus
+    if str(user.campus_id) != payload["campus_id"]:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    await enter_campus(db, CampusContext(id=user.campus_id, code=payload.get("campus") or settings.DEFAULT_CAMPUS))
+    audit_actor.set(user.id)
+    bind_user(user.id)
     return user
 
 
@@ -35,3 +56,17 @@ def role_required(*roles: Role) -> Callable:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
         return current_user
     return checker
+
+
+async def get_idempotency(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Idempotency:
+    """Honour an ``Idempotency-Key`` header; endpoints return ``.replay`` when it is set."""
+    return await begin_idempotency(request, db, current_user.id)
+
+
+def get_if_match(if_match: str | None = Header(default=None)) -> int | None:
+    """Version the client last read (``If-Match``); None makes the write unconditional."""
+    return parse_if_match(if_match)
@@ -1,9 +1,101 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.routers import (
+    audit, auth, cache, communications, follow_ups, health, info_sessions, lookup, pages, parents, reports,
+    students, typeahead,
+)
+from app.services import audit as audit_service
+from app.services import cache as cache_service
+from app.services import idempotency
+from app.services import partitions
+from app.services import reports as reports_service
+from app.services import typeahead as typeahead_service
+from app.services.assets import STATIC_DIR, STATIC_URL, PrecompressedStaticFiles
+from app.services.load_shed import LoadShedMiddleware
+from app.services.logs import RequestContextMiddleware, configure_logging, shutdown_logging
+from app.services.tracing import TracingMiddleware, exporter as trace_exporter
+from app.database import database_urls
+from app.services.pg_listener import CHANGES_CHANNEL, PgListener, listener
+from app.services.query_budget import CancelOnDisconnectMiddleware, statement_timeout_handler
+from app.services.warmup import warm_up
+from app.services.writes import stale_data_handler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # JSON log lines are written by a background thread, never on the event loop
+    configure_logging()
+    # Finished spans are exported by a background thread as well
+    trace_exporter.start()
+    # The listener rebuilds the typeahead index on every (re)connect, then
+    # applies row-level change notifications incrementally.
+    listener.subscribe(CHANGES_CHANNEL, typeahead_service.handle_change)
+    listener.on_connect(typeahead_service.rebuild)
+    # Cache invalidations broadcast by other workers
+    listener.subscribe(cache_service.INVALIDATION_CHANNEL, cache_service.handle_invalidation)
+    listener.on_connect(cache_service.handle_reconnect)
+    listener.start()
+    # Writes to campuses on their own database broadcast invalidations there
+    campus_listeners = [PgListener(url) for url in database_urls()[1:]]
+    for campus_listener in campus_listeners:
+        campus_listener.subscribe(cache_service.INVALIDATION_CHANNEL, cache_service.handle_invalidation)
+        campus_listener.on_connect(cache_service.handle_reconnect)
+        campus_listener.start()
+    # Warm the DB pool and template cache in the background; /readyz gates traffic until done.
+    warm_up_task = asyncio.create_task(warm_up(), name="warm-up")
+    # Audit entries are queued on commit and written in batches off the request path
+    audit_task = asyncio.create_task(audit_service.run_writer(), name="audit-writer")
+    # Keep next year's communication_records partition provisioned ahead of time
+    partition_task = asyncio.create_task(partitions.run_maintenance(), name="partition-maintenance")
+    purge_task = asyncio.create_task(idempotency.run_purger(), name="idempotency-purge")
+    # Fold journaled changes into the reporting rollups
+    report_task = asyncio.create_task(reports_service.run_refresher(), name="report-refresh")
+    yield
+    warm_up_task.cancel()
+    partition_task.cancel()
+    purge_task.cancel()
+    report_task.cancel()
+    audit_task.cancel()
+    try:
+        await audit_task
+    except asyncio.CancelledError:
+        pass
+    for campus_listener in campus_listeners:
+        await campus_listener.stop()
+    await listener.stop()
+    trace_exporter.stop()
+    shutdown_logging()
+
+
+app = FastAPI(title="School CRM", version="0.1.0", lifespan=lifespan)
+
+# Compress JSON/HTML responses; precompressed static files already carry Content-Encoding
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Abandoned GET requests stop their running query instead of holding a pooled connection
+app.add_middleware(CancelOnDisconnectMiddleware)
+# Added late so it runs early: overload is rejected before any other work
+app.add_middleware(LoadShedMiddleware)
+# Every response, shed ones included, gets a request id and an access log line
+app.add_middleware(RequestContextMiddleware)
+# Outermost: the root span covers the whole stack, and the access line carries its trace id
+app.add_middleware(TracingMiddleware)
+
+# statement_timeout exceeded -> 504
+app.add_exception_handler(DBAPIError, statement_timeout_handler)
+# A versioned row changed under an ORM flush -> 409
+app.add_exception_handler(StaleDataError, stale_data_handler)
 
-from app.routers import auth, communications, follow_ups, info_sessions, pages, parents, students
+# Static assets (fingerprinted build in dist/, sources in src/)
+app.mount(STATIC_URL, PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
 
-app = FastAPI(title="School CRM", version="0.1.0")
+# Health / readiness probes
+app.include_router(health.router)
 
 # API routers
 app.include_router(auth.router)
@@ -12,6 +104,11 @@ app.include_router(students.router)
 app.include_router(communications.router)
 app.include_router(follow_ups.router)
 app.include_router(info_sessions.router)
+app.include_router(lookup.router)
+app.include_router(typeahead.router)
+app.include_router(cache.router)
+app.include_router(audit.router)
+app.include_router(reports.router)
 
 # Page routers (Jinja2 HTML)
 app.include_router(pages.router)
@@ -1,19 +1,49 @@
-from app.models.user import User, Role
-from app.models.parent import Parent
+from app.models.user import Campus, CampusScoped, User, Role
+from app.models.parent import Parent, ParentDuplicate
 from app.models.student import Student, ParentStudent
-from app.models.communication import CommunicationRecord, ContactType, FollowUp
-from app.models.info_session import InfoSession, Registration, RegistrationStatus
+from app.models.communication import CommunicationRecord, CommunicationSearchGram, ContactType, FollowUp
+from app.models.info_session import (
+    InfoSession,
+    MatchStatus,
+    Registration,
+    RegistrationMatchCandidate,
+    RegistrationStatus,
+)
+from app.models.audit import AuditLog
+from app.models.archive import ArchiveSegment
+from app.models.idempotency import IdempotencyKey
+from app.models.report import (
+    ReportChange,
+    ReportCommunicationDaily,
+    ReportFollowUpDaily,
+    ReportSessionFunnel,
+    ReportWatermark,
+)
 
 __all__ = [
+    "Campus",
+    "CampusScoped",
     "User",
     "Role",
     "Parent",
+    "ParentDuplicate",
     "Student",
     "ParentStudent",
     "CommunicationRecord",
+    "CommunicationSearchGram",
     "ContactType",
     "FollowUp",
     "InfoSession",
     "Registration",
     "RegistrationStatus",
+    "RegistrationMatchCandidate",
+    "MatchStatus",
+    "AuditLog",
+    "ArchiveSegment",
+    "IdempotencyKey",
+    "ReportCommunicationDaily",
+    "ReportFollowUpDaily",
+    "ReportSessionFunnel",
+    "ReportChange",
+    "ReportWatermark",
 ]
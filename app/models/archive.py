@@ -0,0 +1,37 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, LargeBinary, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.user import Base
+
+
+class ArchiveSegment(Base):
+    """One parent's archived history from one archive run.
+
+    ``data`` is a self-contained gzip member of JSONL records, stored in the
+    database so every instance can read it back and it is backed up with
+    everything else. Segments archived before that point into a file under
+    ARCHIVE_DIR instead (``file``/``offset``; ``data`` is NULL) until
+    ``scripts/archive_history.py --import-files`` moves them in. Written by
+    app.services.archive.
+    """
+
+    __tablename__ = "archive_segments"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    parent_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("parents.id", ondelete="CASCADE"), index=True
+    )
+    # Loaded only by the read path (list_segments)
+    data: Mapped[bytes | None] = mapped_column(LargeBinary, deferred=True)
+    file: Mapped[str | None] = mapped_column(String(255))
+    offset: Mapped[int | None] = mapped_column(BigInteger)
+    length: Mapped[int] = mapped_column(Integer)
+    communication_count: Mapped[int] = mapped_column(Integer)
+    follow_up_count: Mapped[int] = mapped_column(Integer)
+    first_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.user import Base, CampusScoped
+
+
+class AuditLog(CampusScoped, Base):
+    """Append-only change history, range-partitioned by month on ``changed_at``.
+
+    Rows are written in batches with COPY by app.services.audit, never through the ORM.
+    """
+
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_table_row", "table_name", "row_id", "changed_at"),
+        Index("ix_audit_log_user_changed_at", "user_id", "changed_at"),
+        Index("ix_audit_log_campus_id_changed_at", "campus_id", "changed_at"),
+        {"postgresql_partition_by": "RANGE (changed_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    # Campus of the request that made the change; NULL for background jobs and scripts
+    campus_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    table_name: Mapped[str] = mapped_column(String(63))
+    row_id: Mapped[str] = mapped_column(Text)
+    action: Mapped[str] = mapped_column(String(10))
+    changes: Mapped[dict] = mapped_column(JSONB)
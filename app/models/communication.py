@@ -1,12 +1,12 @@
 import enum
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 
-from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Text, func
+from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, SmallInteger, String, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
-from app.models.user import Base
+from app.models.user import Base, CampusScoped
 
 
 class ContactType(str, enum.Enum):
@@ -17,8 +17,21 @@ class ContactType(str, enum.Enum):
     other = "other"
 
 
-class CommunicationRecord(Base):
+class CommunicationRecord(CampusScoped, Base):
+    """Range-partitioned by year on ``created_at`` (see app.services.partitions).
+
+    The partition key has to be part of the primary key, so rows are
+    identified by ``(id, created_at)``; ``id`` alone is still unique in practice
+    and is what other tables store.
+    """
+
     __tablename__ = "communication_records"
+    __table_args__ = (
+        Index("ix_communication_records_parent_id_created_at", "parent_id", "created_at"),
+        Index("ix_communication_records_created_at", "created_at"),
+        Index("ix_communication_records_campus_id_created_at", "campus_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     parent_id: Mapped[uuid.UUID] = mapped_column(
@@ -29,20 +42,36 @@ class CommunicationRecord(Base):
     )
     contact_type: Mapped[ContactType] = mapped_column(Enum(ContactType, name="contact_type"))
     summary: Mapped[str] = mapped_column(Text)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
 
     parent = relationship("Parent", back_populates="communication_records")
     user = relationship("User", back_populates="communication_records")
-    follow_ups = relationship("FollowUp", back_populates="communication", cascade="all, delete-orphan")
+    follow_ups = relationship(
+        "FollowUp",
+        back_populates="communication",
+        cascade="all, delete-orphan",
+        primaryjoin="CommunicationRecord.id == foreign(FollowUp.communication_id)",
+    )
 
 
-class FollowUp(Base):
+class FollowUp(CampusScoped, Base):
     __tablename__ = "follow_ups"
+    __table_args__ = (
+        Index("ix_follow_ups_communication_id", "communication_id"),
+        # Reporting rollups recompute follow-up events by day (app.services.reports)
+        Index("ix_follow_ups_created_at", "created_at"),
+        Index("ix_follow_ups_completed_at", "completed_at"),
+        Index("ix_follow_ups_due_date", "due_date"),
+        # The follow-up list: by due date within a campus
+        Index("ix_follow_ups_campus_id_due_date", "campus_id", "due_date"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    communication_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("communication_records.id", ondelete="CASCADE")
-    )
+    # No FOREIGN KEY: a partitioned table can only be referenced through its full
+    # primary key. Existence and ON DELETE CASCADE are enforced by triggers.
+    communication_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True))
     parent_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("parents.id", ondelete="CASCADE")
     )
@@ -52,8 +81,52 @@ class FollowUp(Base):
     description: Mapped[str] = mapped_column(Text)
     due_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     is_done: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Set when is_done flips to true; NULL for follow-ups completed before this was tracked
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Optimistic concurrency: every UPDATE bumps it; clients send it back as If-Match
+    # (see app.services.writes). ORM flushes check and bump it too.
+    version: Mapped[int] = mapped_column(Integer, server_default=text("1"))
 
-    communication = relationship("CommunicationRecord", back_populates="follow_ups")
+    __mapper_args__ = {"version_id_col": version}
+
+    communication = relationship(
+        "CommunicationRecord",
+        back_populates="follow_ups",
+        primaryjoin="foreign(FollowUp.communication_id) == CommunicationRecord.id",
+    )
     parent = relationship("Parent", back_populates="follow_ups")
     assigned_user = relationship("User", back_populates="assigned_follow_ups")
+
+    @validates("is_done")
+    def _stamp_completed_at(self, key: str, value: bool) -> bool:
+        if value and not self.is_done:
+            self.completed_at = datetime.now(timezone.utc)
+        elif not value:
+            self.completed_at = None
+        return value
+
+
+class CommunicationSearchGram(Base):
+    """Inverted index row: one n-gram of a communication summary (see app.services.search)."""
+
+    __tablename__ = "communication_search_grams"
+    __table_args__ = (
+        # Searches always run inside a campus and (by default) the hot window; the
+        # included columns let a common gram be aggregated from the index alone
+        Index(
+            "ix_communication_search_grams_campus_id_gram_created_at", "campus_id", "gram", "created_at",
+            postgresql_include=["record_id", "tf", "contact_type"],
+        ),
+        Index("ix_communication_search_grams_record_id", "record_id"),
+    )
+
+    gram: Mapped[str] = mapped_column(String(32), primary_key=True)
+    # Cleaned up by the communication_records delete trigger (no FK, see FollowUp)
+    record_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    tf: Mapped[int] = mapped_column(SmallInteger, default=1)
+    # Denormalized from the record so campus/type/date filters are applied inside the index scan.
+    # Not CampusScoped: the table is only read through raw SQL that filters on it.
+    campus_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True))
+    contact_type: Mapped[ContactType] = mapped_column(Enum(ContactType, name="contact_type", create_type=False))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
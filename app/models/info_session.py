@@ -2,11 +2,12 @@ import enum
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Integer, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, SmallInteger, String, Text, func, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
-from app.models.user import Base
+from app.models.user import Base, CampusScoped
+from app.services.phone import normalize_phone
 
 
 class RegistrationStatus(str, enum.Enum):
@@ -15,8 +16,16 @@ class RegistrationStatus(str, enum.Enum):
     cancelled = "cancelled"
 
 
-class InfoSession(Base):
+class MatchStatus(str, enum.Enum):
+    """Outcome of linking a registration to an existing parent; NULL means not attempted yet."""
+    matched = "matched"
+    review = "review"
+    no_match = "no_match"
+
+
+class InfoSession(CampusScoped, Base):
     __tablename__ = "info_sessions"
+    __table_args__ = (Index("ix_info_sessions_campus_id_session_date", "campus_id", "session_date"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = mapped_column(String(200))
@@ -29,12 +38,21 @@ class InfoSession(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+    # Optimistic concurrency: every UPDATE bumps it; clients send it back as If-Match
+    # (see app.services.writes). ORM flushes check and bump it too.
+    version: Mapped[int] = mapped_column(Integer, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": version}
 
     registrations = relationship("Registration", back_populates="session", cascade="all, delete-orphan")
 
 
-class Registration(Base):
+class Registration(CampusScoped, Base):
     __tablename__ = "registrations"
+    __table_args__ = (
+        # Matching scans one session's unmatched rows
+        Index("ix_registrations_session_id_match_status", "session_id", "match_status"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id: Mapped[uuid.UUID] = mapped_column(
@@ -42,11 +60,47 @@ class Registration(Base):
     )
     name: Mapped[str] = mapped_column(String(100))
     email: Mapped[str] = mapped_column(String(100))
+    phone: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    phone_e164: Mapped[str | None] = mapped_column(String(16), nullable=True)
     status: Mapped[RegistrationStatus] = mapped_column(
         Enum(RegistrationStatus, name="registration_status"), default=RegistrationStatus.pending
     )
     email_sent: Mapped[bool] = mapped_column(Boolean, default=False)
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Set by POST /api/info-sessions/{id}/follow-ups; a registration gets at most one
+    follow_up_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("follow_ups.id", ondelete="SET NULL"), nullable=True
+    )
+
+    # Existing family this registrant belongs to; set by app.services.registration_matching
+    parent_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("parents.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    match_status: Mapped[MatchStatus | None] = mapped_column(
+        Enum(MatchStatus, name="registration_match_status"), nullable=True
+    )
 
     session = relationship("InfoSession", back_populates="registrations")
+    match_candidates = relationship("RegistrationMatchCandidate", cascade="all, delete-orphan", passive_deletes=True)
+
+    @validates("phone")
+    def _sync_phone_e164(self, key: str, value: str | None) -> str | None:
+        self.phone_e164 = normalize_phone(value)
+        return value
+
+
+class RegistrationMatchCandidate(Base):
+    """Review queue: possible parents for a registration that could not be matched unambiguously."""
+    __tablename__ = "registration_match_candidates"
+
+    registration_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("registrations.id", ondelete="CASCADE"), primary_key=True
+    )
+    parent_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("parents.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    score: Mapped[int] = mapped_column(SmallInteger)
+    # Which keys agreed: email / phone / name
+    reasons: Mapped[list[str]] = mapped_column(ARRAY(String(10)))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
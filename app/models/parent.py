@@ -1,19 +1,42 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    Boolean, CheckConstraint, DateTime, Float, ForeignKey, Index, Integer, String, Text, func, literal_column, text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
-from app.models.user import Base
+from app.models.user import Base, CampusScoped
+from app.services.phone import normalize_phone
 
+# Case- and whitespace-insensitive name key ("王 小明" == "王小明"), used by registration
+# matching and duplicate detection
+NAME_KEY_SQL = r"lower(regexp_replace({column}, '\s+', '', 'g'))"
 
-class Parent(Base):
+
+class Parent(CampusScoped, Base):
     __tablename__ = "parents"
+    __table_args__ = (
+        # Equality-only caller-ID probes; a hash index stays O(1) and tolerates shared numbers.
+        Index("ix_parents_phone_e164", "phone_e164", postgresql_using="hash"),
+        # Registration matching joins on these expressions within a campus
+        # (see app.services.registration_matching)
+        Index("ix_parents_campus_id_email_lower", "campus_id", text("lower(email)")),
+        Index("ix_parents_campus_id_name_key", "campus_id", text(NAME_KEY_SQL.format(column="name"))),
+        # The parent list: newest first within a campus
+        Index("ix_parents_campus_id_created_at", "campus_id", "created_at"),
+        # Similar-name blocking for duplicate detection (app.services.dedupe); needs pg_trgm
+        Index(
+            "ix_parents_name_key_trgm", literal_column(NAME_KEY_SQL.format(column="name")).label("name_key"),
+            postgresql_using="gin", postgresql_ops={"name_key": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(100), index=True)
     phone: Mapped[str] = mapped_column(String(20))
+    phone_e164: Mapped[str | None] = mapped_column(String(16), nullable=True)
     email: Mapped[str | None] = mapped_column(String(100), nullable=True)
     address: Mapped[str | None] = mapped_column(Text, nullable=True)
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -21,7 +44,37 @@ class Parent(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+    # Optimistic concurrency: every UPDATE bumps it; clients send it back as If-Match
+    # (see app.services.writes). ORM flushes check and bump it too.
+    version: Mapped[int] = mapped_column(Integer, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": version}
 
     student_associations = relationship("ParentStudent", back_populates="parent", cascade="all, delete-orphan")
     communication_records = relationship("CommunicationRecord", back_populates="parent", cascade="all, delete-orphan")
     follow_ups = relationship("FollowUp", back_populates="parent", cascade="all, delete-orphan")
+
+    @validates("phone")
+    def _sync_phone_e164(self, key: str, value: str) -> str:
+        self.phone_e164 = normalize_phone(value)
+        return value
+
+
+class ParentDuplicate(Base):
+    """Likely duplicate pair found by app.services.dedupe; ``parent_id`` < ``duplicate_id``."""
+
+    __tablename__ = "parent_duplicate_candidates"
+    __table_args__ = (CheckConstraint("parent_id < duplicate_id", name="ck_parent_duplicate_candidates_order"),)
+
+    parent_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("parents.id", ondelete="CASCADE"), primary_key=True
+    )
+    duplicate_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("parents.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    score: Mapped[float] = mapped_column(Float)
+    # Which keys agreed: phone / email / name
+    reasons: Mapped[list[str]] = mapped_column(ARRAY(String(10)))
+    # Reviewed and kept apart; later scans keep the flag
+    dismissed: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"))
+    detected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
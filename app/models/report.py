@@ -0,0 +1,84 @@
+"""Reporting rollups, maintained by app.services.reports.
+
+Source tables journal the days (or sessions) their writes touch into
+``report_changes`` through statement-level triggers; a refresh consumes the
+journal and recomputes only those keys. Days are local school days
+(``crm_report_day()`` in SQL).
+"""
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, Enum, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.communication import ContactType
+from app.models.user import Base
+
+
+class ReportCommunicationDaily(Base):
+    __tablename__ = "report_communications_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    contact_type: Mapped[ContactType] = mapped_column(
+        Enum(ContactType, name="contact_type", create_type=False), primary_key=True
+    )
+    communications: Mapped[int] = mapped_column(Integer)
+
+
+class ReportFollowUpDaily(Base):
+    """Follow-up events per assignee and day.
+
+    ``became_overdue`` counts on the day after the due date (unless completed
+    by then) and ``overdue_resolved`` on the completion day of an overdue
+    follow-up, so a running sum of the difference is the overdue backlog.
+    """
+
+    __tablename__ = "report_follow_ups_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    assigned_to: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    created: Mapped[int] = mapped_column(Integer)
+    completed: Mapped[int] = mapped_column(Integer)
+    # Sum over completed follow-ups of completed_at - created_at
+    completion_seconds: Mapped[int] = mapped_column(BigInteger)
+    became_overdue: Mapped[int] = mapped_column(Integer)
+    overdue_resolved: Mapped[int] = mapped_column(Integer)
+
+
+class ReportSessionFunnel(Base):
+    __tablename__ = "report_session_funnel"
+    __table_args__ = (Index("ix_report_session_funnel_session_date", "session_date"),)
+
+    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    title: Mapped[str] = mapped_column(String(200))
+    session_date: Mapped[date] = mapped_column(Date)
+    registrations: Mapped[int] = mapped_column(Integer)
+    confirmed: Mapped[int] = mapped_column(Integer)
+    cancelled: Mapped[int] = mapped_column(Integer)
+    # Linked to a parent that already existed when they registered
+    existing_families: Mapped[int] = mapped_column(Integer)
+    # Linked to a parent created after they registered: the session converted them
+    converted: Mapped[int] = mapped_column(Integer)
+
+
+class ReportChange(Base):
+    """Journal of rollup keys to recompute; written by triggers, consumed by a refresh."""
+
+    __tablename__ = "report_changes"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    rollup: Mapped[str] = mapped_column(String(20))
+    day: Mapped[date | None] = mapped_column(Date, nullable=True)
+    session_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+
+class ReportWatermark(Base):
+    """Per rollup: every change committed before ``as_of`` is reflected."""
+
+    __tablename__ = "report_watermarks"
+
+    rollup: Mapped[str] = mapped_column(String(20), primary_key=True)
+    as_of: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    keys_refreshed: Mapped[int] = mapped_column(Integer, default=0)
@@ -1,27 +1,41 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.user import Base
+from app.models.user import Base, CampusScoped
 
 
-class Student(Base):
+class Student(CampusScoped, Base):
     __tablename__ = "students"
+    __table_args__ = (Index("ix_students_campus_id_created_at", "campus_id", "created_at"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(100), index=True)
     grade: Mapped[str] = mapped_column(String(20))
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Optimistic concurrency: every UPDATE bumps it; clients send it back as If-Match
+    # (see app.services.writes). ORM flushes check and bump it too.
+    version: Mapped[int] = mapped_column(Integer, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": version}
 
     parent_associations = relationship("ParentStudent", back_populates="student", cascade="all, delete-orphan")
 
 
 class ParentStudent(Base):
     __tablename__ = "parent_student"
+    # The primary key serves parent -> students; this covers student -> parents
+    # (household walks, sibling lookups) without touching the heap.
+    __table_args__ = (
+        Index(
+            "ix_parent_student_student_id_parent_id", "student_id", "parent_id",
+            postgresql_include=["relationship_type"],
+        ),
+    )
 
     parent_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("parents.id", ondelete="CASCADE"), primary_key=True
@@ -2,7 +2,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Enum, String, func
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -17,11 +17,35 @@ class Role(str, enum.Enum):
     front_desk = "front_desk"
 
 
-class User(Base):
+class Campus(Base):
+    """A school campus (tenant). Every campus-scoped row belongs to exactly one."""
+
+    __tablename__ = "campuses"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Chosen at login and carried in the access token; also the key of CAMPUS_DATABASES
+    code: Mapped[str] = mapped_column(String(20), unique=True)
+    name: Mapped[str] = mapped_column(String(100))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class CampusScoped:
+    """Mixin for rows owned by one campus.
+
+    ORM statements are filtered to the signed-in user's campus and new rows
+    are stamped with it (see app.services.tenancy); raw SQL filters on
+    ``campus_id`` itself.
+    """
+
+    campus_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("campuses.id"))
+
+
+class User(CampusScoped, Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_campus_id_username", "campus_id", "username", unique=True),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
+    username: Mapped[str] = mapped_column(String(50))
     hashed_password: Mapped[str] = mapped_column(String(255))
     full_name: Mapped[str] = mapped_column(String(100))
     role: Mapped[Role] = mapped_column(Enum(Role, name="user_role"))
@@ -0,0 +1,56 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import role_required
+from app.models.audit import AuditLog
+from app.models.user import Role, User
+from app.schemas.audit import AuditLogOut
+from app.services.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/audit", tags=["audit"], route_class=TracedRoute)
+
+
+@router.get("", response_model=list[AuditLogOut])
+async def list_audit_log(
+    table_name: str | None = Query(None),
+    row_id: str | None = Query(None),
+    user_id: uuid.UUID | None = Query(None),
+    action: Literal["INSERT", "UPDATE", "DELETE"] | None = Query(None),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    stmt = (
+        select(AuditLog, User.full_name)
+        .outerjoin(User, User.id == AuditLog.user_id)
+        .order_by(AuditLog.changed_at.desc(), AuditLog.id.desc())
+    )
+    if table_name:
+        stmt = stmt.where(AuditLog.table_name == table_name)
+    if row_id:
+        stmt = stmt.where(AuditLog.row_id == row_id)
+    if user_id:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+    if action:
+        stmt = stmt.where(AuditLog.action == action)
+    # Date bounds let Postgres prune whole monthly partitions
+    if date_from:
+        stmt = stmt.where(AuditLog.changed_at >= datetime.combine(date_from, time.min, timezone.utc))
+    if date_to:
+        stmt = stmt.where(AuditLog.changed_at < datetime.combine(date_to + timedelta(days=1), time.min, timezone.utc))
+    rows = (await db.execute(stmt.limit(limit).offset(offset))).all()
+    result = []
+    for entry, user_name in rows:
+        out = AuditLogOut.model_validate(entry)
+        out.user_name = user_name
+        result.append(out)
+    return result
@@ -2,24 +2,32 @@ from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.config import settings
+from app.database import campus_session, get_db
 from app.dependencies import get_current_user, role_required
-from app.models.user import Role, User
+from app.models.user import Campus, Role, User
 from app.schemas.user import TokenOut, UserCreate, UserLogin, UserOut
 from app.services.auth import create_access_token, hash_password, verify_password
+from app.services.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=TracedRoute)
 
 
 @router.post("/login", response_model=TokenOut)
-async def login(body: UserLogin, response: Response, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.username == body.username))
-    user = result.scalar_one_or_none()
+async def login(body: UserLogin, response: Response):
+    code = body.campus or settings.DEFAULT_CAMPUS
+    # Not get_db: the session must be on the requested campus's database, not the cookie's
+    async with campus_session(code)() as db:
+        result = await db.execute(
+            select(User).join(Campus, Campus.id == User.campus_id)
+            .where(Campus.code == code, User.username == body.username)
+        )
+        user = result.scalar_one_or_none()
     if user is None or not verify_password(body.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account disabled")
-    token = create_access_token({"sub": str(user.id)})
+    token = create_access_token({"sub": str(user.id), "campus": code, "campus_id": str(user.campus_id)})
     response.set_cookie(key="access_token", value=token, httponly=True, samesite="lax", max_age=28800)
     return TokenOut(access_token=token, user=UserOut.model_validate(user))
 
@@ -30,6 +38,7 @@ async def register(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(role_required(Role.admin)),
 ):
+    # Scoped to the admin's campus; the new user is stamped with it on flush
     existing = await db.execute(select(User).where(User.username == body.username))
     if existing.scalar_one_or_none():
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists")
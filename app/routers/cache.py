@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+
+from app.dependencies import role_required
+from app.models.user import Role, User
+from app.services import coalesce, load_shed, logs, query_budget, tracing
+from app.services.cache import WORKER_ID, all_stats
+
+router = APIRouter(prefix="/api/cache", tags=["cache"], route_class=tracing.TracedRoute)
+
+
+@router.get("/stats")
+async def cache_stats(current_user: User = Depends(role_required(Role.admin))):
+    """Hit rates and sizes of this worker's named caches."""
+    return {"worker": WORKER_ID, "caches": all_stats()}
+
+
+@router.get("/coalescing")
+async def coalescing_stats(current_user: User = Depends(role_required(Role.admin))):
+    """Per-route single-flight counters: handler executions vs. requests collapsed onto them."""
+    return {"worker": WORKER_ID, "routes": coalesce.all_stats()}
+
+
+@router.get("/concurrency")
+async def concurrency_stats(current_user: User = Depends(role_required(Role.admin))):
+    """Adaptive concurrency limit, DB latency baseline, shed counts and statement timeout/cancel counts."""
+    return {"worker": WORKER_ID, **load_shed.limiter.stats(), "statements": query_budget.stats()}
+
+
+@router.get("/logging")
+async def logging_stats(current_user: User = Depends(role_required(Role.admin))):
+    """Log records waiting for the writer thread, records dropped on a full queue, sampling rates."""
+    return {"worker": WORKER_ID, **logs.stats()}
+
+
+@router.get("/tracing")
+async def tracing_stats(current_user: User = Depends(role_required(Role.admin))):
+    """Spans waiting for the exporter thread, exported, dropped on a full queue or failed to export."""
+    return {"worker": WORKER_ID, **tracing.exporter.stats()}
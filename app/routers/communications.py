@@ -1,4 +1,5 @@
 import uuid
+from datetime import date, datetime, time, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
@@ -6,25 +7,68 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
-from app.dependencies import get_current_user
-from app.models.communication import CommunicationRecord
+from app.dependencies import get_current_user, get_idempotency
+from app.models.communication import CommunicationRecord, ContactType
+from app.models.parent import Parent
 from app.models.user import User
-from app.schemas.communication import CommunicationCreate, CommunicationOut
+from app.schemas.communication import CommunicationCreate, CommunicationOut, CommunicationSearchHit
+from app.services.coalesce import coalesced
+from app.services.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, Embed, Field, View
+from app.services.idempotency import Idempotency
+from app.services.partitions import hot_since
+from app.services.search import index_communication, make_snippet, search_communications
+from app.services.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/communications", tags=["communications"])
+router = APIRouter(prefix="/api/communications", tags=["communications"], route_class=TracedRoute)
 
+communication_view = View(
+    CommunicationRecord,
+    fields={
+        "id": CommunicationRecord.id, "parent_id": CommunicationRecord.parent_id,
+        "user_id": CommunicationRecord.user_id, "contact_type": CommunicationRecord.contact_type,
+        "summary": CommunicationRecord.summary, "created_at": CommunicationRecord.created_at,
+        "user_name": Field(User.full_name, joins=((User, User.id == CommunicationRecord.user_id),)),
+    },
+    includes={
+        "parent": Embed(
+            Parent,
+            correlate=Parent.id == CommunicationRecord.parent_id,
+            fields={"id": Parent.id, "name": Parent.name, "phone": Parent.phone, "email": Parent.email},
+            default=("id", "name", "phone"),
+        ),
+    },
+    out=CommunicationOut,
+)
 
-@router.get("", response_model=list[CommunicationOut])
+
+@router.get("", response_model=list[CommunicationOut] | list[communication_view.schema])
+@coalesced("communications_list", tables=("communication_records",))
 async def list_communications(
     parent_id: uuid.UUID | None = Query(None),
+    date_from: date | None = Query(None, description="Defaults to the start of the hot window (recent years)"),
+    date_to: date | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(None, description=INCLUDE_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    stmt = select(CommunicationRecord).options(selectinload(CommunicationRecord.user))
+    projection = communication_view.parse(fields, include)
+    # Always bound created_at from below so older yearly partitions are pruned
+    since = datetime.combine(date_from, time.min, timezone.utc) if date_from else hot_since()
+    if projection:
+        stmt = projection.select()
+    else:
+        stmt = select(CommunicationRecord).options(selectinload(CommunicationRecord.user))
+    stmt = stmt.where(CommunicationRecord.created_at >= since)
+    if date_to:
+        until = datetime.combine(date_to + timedelta(days=1), time.min, timezone.utc)
+        stmt = stmt.where(CommunicationRecord.created_at < until)
     if parent_id:
         stmt = stmt.where(CommunicationRecord.parent_id == parent_id)
     stmt = stmt.order_by(CommunicationRecord.created_at.desc())
     result = await db.execute(stmt)
+    if projection:
+        return projection.rows(result)
     records = result.scalars().all()
     return [
         CommunicationOut(
@@ -41,7 +85,13 @@ async def create_communication(
     body: CommunicationCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
+    if idempotency.replay:
+        return idempotency.replay
+    # Campus-scoped lookup: a parent of another campus is "not found"
+    if await db.get(Parent, body.parent_id) is None:
+        raise HTTPException(status_code=404, detail="Parent not found")
     record = CommunicationRecord(
         parent_id=body.parent_id,
         user_id=current_user.id,
@@ -49,13 +99,41 @@ async def create_communication(
         summary=body.summary,
     )
     db.add(record)
-    await db.commit()
-    await db.refresh(record)
-    return CommunicationOut(
+    await db.flush()
+    await index_communication(db, record.id, record.summary)
+    out = CommunicationOut(
         id=record.id, parent_id=record.parent_id, user_id=record.user_id,
         contact_type=record.contact_type, summary=record.summary,
         created_at=record.created_at, user_name=current_user.full_name,
     )
+    await idempotency.save(db, status.HTTP_201_CREATED, out)
+    await db.commit()
+    return out
+
+
+@router.get("/search", response_model=list[CommunicationSearchHit])
+async def search(
+    q: str = Query(..., min_length=1),
+    contact_type: list[ContactType] | None = Query(None),
+    date_from: date | None = Query(None, description="Defaults to the start of the hot window (recent years)"),
+    date_to: date | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Bounds the gram scan and the record partitions like the list endpoint
+    date_from = date_from or hot_since().date()
+    rows = await search_communications(db, q, contact_type, date_from, date_to, limit, offset)
+    return [
+        CommunicationSearchHit(
+            id=r["id"], parent_id=r["parent_id"], user_id=r["user_id"],
+            contact_type=r["contact_type"], created_at=r["created_at"],
+            parent_name=r["parent_name"], user_name=r["user_name"],
+            snippet=make_snippet(r["summary"], q), score=r["score"],
+        )
+        for r in rows
+    ]
 
 
 @router.get("/{record_id}", response_model=CommunicationOut)
@@ -1,31 +1,75 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
-from app.dependencies import get_current_user
-from app.models.communication import FollowUp
+from app.dependencies import get_current_user, get_idempotency, get_if_match
+from app.models.communication import CommunicationRecord, FollowUp
+from app.models.parent import Parent
 from app.models.user import Role, User
 from app.schemas.communication import FollowUpCreate, FollowUpOut, FollowUpUpdate
+from app.services.coalesce import coalesced
+from app.services.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, Embed, Field, View
+from app.services.idempotency import Idempotency
+from app.services.tracing import TracedRoute
+from app.services.writes import etag, insert_returning, update_returning
 
-router = APIRouter(prefix="/api/follow-ups", tags=["follow-ups"])
+router = APIRouter(prefix="/api/follow-ups", tags=["follow-ups"], route_class=TracedRoute)
 
+follow_up_view = View(
+    FollowUp,
+    fields={
+        "id": FollowUp.id, "communication_id": FollowUp.communication_id, "parent_id": FollowUp.parent_id,
+        "assigned_to": FollowUp.assigned_to, "description": FollowUp.description,
+        "due_date": FollowUp.due_date, "is_done": FollowUp.is_done, "created_at": FollowUp.created_at,
+        "version": FollowUp.version,
+        "assigned_user_name": Field(User.full_name, joins=((User, User.id == FollowUp.assigned_to),)),
+        "parent_name": Field(Parent.name, joins=((Parent, Parent.id == FollowUp.parent_id),)),
+    },
+    includes={
+        "parent": Embed(
+            Parent,
+            correlate=Parent.id == FollowUp.parent_id,
+            fields={"id": Parent.id, "name": Parent.name, "phone": Parent.phone, "email": Parent.email},
+            default=("id", "name", "phone"),
+        ),
+        "communication": Embed(
+            CommunicationRecord,
+            correlate=CommunicationRecord.id == FollowUp.communication_id,
+            fields={
+                "id": CommunicationRecord.id, "contact_type": CommunicationRecord.contact_type,
+                "summary": CommunicationRecord.summary, "created_at": CommunicationRecord.created_at,
+            },
+            default=("id", "contact_type", "created_at"),
+        ),
+    },
+    out=FollowUpOut,
+)
 
-@router.get("", response_model=list[FollowUpOut])
+
+@router.get("", response_model=list[FollowUpOut] | list[follow_up_view.schema])
+# Non-admins only see their own follow-ups, so responses are shared per user
+@coalesced("follow_ups_list", scope="user", tables=("follow_ups", "parents"))
 async def list_follow_ups(
     mine: bool = Query(False),
     pending: bool = Query(False),
     parent_id: uuid.UUID | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(None, description=INCLUDE_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    stmt = select(FollowUp).options(
-        selectinload(FollowUp.assigned_user),
-        selectinload(FollowUp.parent),
-    )
+    projection = follow_up_view.parse(fields, include)
+    if projection:
+        stmt = projection.select()
+    else:
+        stmt = select(FollowUp).options(
+            selectinload(FollowUp.assigned_user),
+            selectinload(FollowUp.parent),
+        )
     if mine or current_user.role != Role.admin:
         stmt = stmt.where(FollowUp.assigned_to == current_user.id)
     if pending:
@@ -34,12 +78,14 @@ async def list_follow_ups(
         stmt = stmt.where(FollowUp.parent_id == parent_id)
     stmt = stmt.order_by(FollowUp.due_date.asc().nullslast(), FollowUp.created_at.desc())
     result = await db.execute(stmt)
+    if projection:
+        return projection.rows(result)
     follow_ups = result.scalars().all()
     return [
         FollowUpOut(
             id=f.id, communication_id=f.communication_id, parent_id=f.parent_id,
             assigned_to=f.assigned_to, description=f.description,
-            due_date=f.due_date, is_done=f.is_done, created_at=f.created_at,
+            due_date=f.due_date, is_done=f.is_done, created_at=f.created_at, version=f.version,
             assigned_user_name=f.assigned_user.full_name if f.assigned_user else None,
             parent_name=f.parent.name if f.parent else None,
         )
@@ -50,49 +96,74 @@ async def list_follow_ups(
 @router.post("", response_model=FollowUpOut, status_code=status.HTTP_201_CREATED)
 async def create_follow_up(
     body: FollowUpCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
-    follow_up = FollowUp(**body.model_dump())
-    db.add(follow_up)
-    await db.commit()
-    await db.refresh(follow_up, ["assigned_user", "parent"])
-    return FollowUpOut(
+    if idempotency.replay:
+        return idempotency.replay
+    # Campus-scoped lookups: references into another campus are "not found"
+    parent = await db.get(Parent, body.parent_id)
+    if parent is None:
+        raise HTTPException(status_code=404, detail="Parent not found")
+    communication_id = await db.scalar(
+        select(CommunicationRecord.id).where(CommunicationRecord.id == body.communication_id)
+    )
+    if communication_id is None:
+        raise HTTPException(status_code=404, detail="Communication record not found")
+    assigned_user = await db.get(User, body.assigned_to)
+    if assigned_user is None:
+        raise HTTPException(status_code=404, detail="Assigned user not found")
+    follow_up = (await insert_returning(db, FollowUp(**body.model_dump())))[0]
+    out = FollowUpOut(
         id=follow_up.id, communication_id=follow_up.communication_id,
         parent_id=follow_up.parent_id, assigned_to=follow_up.assigned_to,
         description=follow_up.description, due_date=follow_up.due_date,
-        is_done=follow_up.is_done, created_at=follow_up.created_at,
-        assigned_user_name=follow_up.assigned_user.full_name if follow_up.assigned_user else None,
-        parent_name=follow_up.parent.name if follow_up.parent else None,
+        is_done=follow_up.is_done, created_at=follow_up.created_at, version=follow_up.version,
+        assigned_user_name=assigned_user.full_name, parent_name=parent.name,
     )
+    await idempotency.save(db, status.HTTP_201_CREATED, out)
+    await db.commit()
+    response.headers["ETag"] = etag(follow_up.version)
+    return out
 
 
 @router.patch("/{follow_up_id}", response_model=FollowUpOut)
 async def update_follow_up(
     follow_up_id: uuid.UUID,
     body: FollowUpUpdate,
+    response: Response,
+    version: int | None = Depends(get_if_match),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    stmt = select(FollowUp).options(
-        selectinload(FollowUp.assigned_user),
-        selectinload(FollowUp.parent),
-    ).where(FollowUp.id == follow_up_id)
-    result = await db.execute(stmt)
-    follow_up = result.scalar_one_or_none()
-    if not follow_up:
-        raise HTTPException(status_code=404, detail="Follow-up not found")
-    if current_user.role != Role.admin and follow_up.assigned_to != current_user.id:
-        raise HTTPException(status_code=403, detail="Can only update your own follow-ups")
-    for field, value in body.model_dump(exclude_unset=True).items():
-        setattr(follow_up, field, value)
-    await db.commit()
-    await db.refresh(follow_up, ["assigned_user", "parent"])
-    return FollowUpOut(
+    """One ``UPDATE ... RETURNING`` (names included); with ``If-Match`` a stale version is a 409."""
+    values = body.model_dump(exclude_unset=True)
+    if "is_done" in values:
+        # What FollowUp's @validates("is_done") does for ORM writes: stamp the first completion
+        values["completed_at"] = (
+            case((FollowUp.is_done, FollowUp.completed_at), else_=func.now()) if values["is_done"] else None
+        )
+    row = await update_returning(
+        db, FollowUp, follow_up_id, values, version,
+        not_found="Follow-up not found",
+        where=() if current_user.role == Role.admin else (FollowUp.assigned_to == current_user.id,),
+        forbidden="Can only update your own follow-ups",
+        extra=(
+            select(User.full_name).where(User.id == FollowUp.assigned_to).scalar_subquery()
+            .label("assigned_user_name"),
+            select(Parent.name).where(Parent.id == FollowUp.parent_id).scalar_subquery().label("parent_name"),
+        ),
+    )
+    follow_up = row[0]
+    out = FollowUpOut(
         id=follow_up.id, communication_id=follow_up.communication_id,
         parent_id=follow_up.parent_id, assigned_to=follow_up.assigned_to,
         description=follow_up.description, due_date=follow_up.due_date,
-        is_done=follow_up.is_done, created_at=follow_up.created_at,
-        assigned_user_name=follow_up.assigned_user.full_name if follow_up.assigned_user else None,
-        parent_name=follow_up.parent.name if follow_up.parent else None,
+        is_done=follow_up.is_done, created_at=follow_up.created_at, version=follow_up.version,
+        assigned_user_name=row.assigned_user_name, parent_name=row.parent_name,
     )
+    await db.commit()
+    response.headers["ETag"] = etag(follow_up.version)
+    return out
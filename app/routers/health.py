@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Response, status
+
+from app.services import typeahead
+from app.services.tracing import TracedRoute
+from app.services.warmup import readiness
+
+router = APIRouter(tags=["health"], route_class=TracedRoute)
+
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(response: Response):
+    """Readiness: 200 only once the DB pool and template cache are warm."""
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "ready": readiness.ready,
+        "checks": {**readiness.checks, "typeahead": typeahead.index.ready},
+        "timings_ms": readiness.timings_ms,
+        "error": readiness.error,
+    }
@@ -2,36 +2,104 @@ import csv
 import io
 import uuid
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.database import get_db
-from app.dependencies import get_current_user, role_required
-from app.models.info_session import InfoSession, Registration, RegistrationStatus
+from app.dependencies import get_current_user, get_idempotency, get_if_match, role_required
+from app.models.info_session import (
+    InfoSession,
+    MatchStatus,
+    Registration,
+    RegistrationMatchCandidate,
+    RegistrationStatus,
+)
+from app.models.parent import Parent
 from app.models.user import Role, User
 from app.schemas.info_session import (
     ImportResult,
     InfoSessionCreate,
     InfoSessionOut,
     InfoSessionUpdate,
+    MatchCandidateOut,
+    MatchResolve,
+    MatchReviewItem,
+    MatchRunResult,
     RegistrationCreate,
     RegistrationOut,
     SendEmailResult,
+    SessionFollowUpRequest,
+    SessionFollowUpResult,
 )
+from app.services.cache import named_cache
+from app.services.coalesce import coalesced
 from app.services.email import send_notification_email
+from app.services.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, Embed, Field, View
+from app.services.idempotency import Idempotency
+from app.services.registration_matching import match_registrations
+from app.services.session_follow_ups import generate_follow_ups
+from app.services.tracing import TracedRoute
+from app.services.writes import delete_returning, etag, insert_returning, update_returning
+
+router = APIRouter(prefix="/api/info-sessions", tags=["info-sessions"], route_class=TracedRoute)
+
+_list_cache = named_cache(
+    "info_sessions_list",
+    ttl=settings.SESSION_LIST_CACHE_TTL_SECONDS,
+    maxsize=64,  # one list per campus
+    tables=("info_sessions", "registrations"),
+)
 
-router = APIRouter(prefix="/api/info-sessions", tags=["info-sessions"])
+session_view = View(
+    InfoSession,
+    fields={
+        "id": InfoSession.id, "title": InfoSession.title, "description": InfoSession.description,
+        "session_date": InfoSession.session_date, "session_time": InfoSession.session_time,
+        "location": InfoSession.location, "capacity": InfoSession.capacity,
+        "created_at": InfoSession.created_at, "updated_at": InfoSession.updated_at, "version": InfoSession.version,
+        "registration_count": Field(
+            select(func.count(Registration.id)).where(Registration.session_id == InfoSession.id).scalar_subquery()
+        ),
+    },
+    includes={
+        "registrations": Embed(
+            Registration,
+            correlate=Registration.session_id == InfoSession.id,
+            fields={
+                "id": Registration.id, "name": Registration.name, "email": Registration.email,
+                "phone": Registration.phone, "status": Registration.status, "email_sent": Registration.email_sent,
+                "note": Registration.note, "created_at": Registration.created_at,
+                "parent_id": Registration.parent_id, "match_status": Registration.match_status,
+            },
+            default=("id", "name", "email", "status"),
+            many=True,
+            order_by=(Registration.created_at,),
+        ),
+    },
+    out=InfoSessionOut,
+)
 
 
 # ---- InfoSession CRUD ----
 
-@router.get("", response_model=list[InfoSessionOut])
+@router.get("", response_model=list[InfoSessionOut] | list[session_view.schema])
+@coalesced("info_sessions_list", tables=("info_sessions", "registrations"))
 async def list_sessions(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(None, description=INCLUDE_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    projection = session_view.parse(fields, include)
+    if projection:
+        stmt = projection.select().order_by(InfoSession.session_date.desc())
+        return projection.rows(await db.execute(stmt))
+    cached = _list_cache.get(current_user.campus_id)
+    if cached is not None:
+        return cached
     stmt = (
         select(
             InfoSession,
@@ -47,25 +115,31 @@ async def list_sessions(
         out = InfoSessionOut.model_validate(session)
         out.registration_count = reg_count
         result.append(out)
+    _list_cache.set(current_user.campus_id, result)
     return result
 
 
 @router.post("", response_model=InfoSessionOut, status_code=status.HTTP_201_CREATED)
 async def create_session(
     body: InfoSessionCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
-    session = InfoSession(**body.model_dump())
-    db.add(session)
-    await db.commit()
-    await db.refresh(session)
+    if idempotency.replay:
+        return idempotency.replay
+    session = (await insert_returning(db, InfoSession(**body.model_dump())))[0]
     out = InfoSessionOut.model_validate(session)
     out.registration_count = 0
+    await idempotency.save(db, status.HTTP_201_CREATED, out)
+    await db.commit()
+    response.headers["ETag"] = etag(session.version)
     return out
 
 
 @router.get("/{session_id}")
+@coalesced("info_session_detail", tables=("info_sessions", "registrations"))
 async def get_session(
     session_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
@@ -89,15 +163,20 @@ async def get_session(
         "capacity": session.capacity,
         "created_at": session.created_at.isoformat(),
         "updated_at": session.updated_at.isoformat(),
+        "version": session.version,
         "registrations": [
             {
                 "id": str(r.id),
                 "name": r.name,
                 "email": r.email,
+                "phone": r.phone,
                 "status": r.status.value,
                 "email_sent": r.email_sent,
                 "note": r.note,
                 "created_at": r.created_at.isoformat(),
+                "follow_up_id": str(r.follow_up_id) if r.follow_up_id else None,
+                "parent_id": str(r.parent_id) if r.parent_id else None,
+                "match_status": r.match_status.value if r.match_status else None,
             }
             for r in sorted(session.registrations, key=lambda r: r.created_at)
         ],
@@ -108,37 +187,34 @@ async def get_session(
 async def update_session(
     session_id: uuid.UUID,
     body: InfoSessionUpdate,
+    response: Response,
+    version: int | None = Depends(get_if_match),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(select(InfoSession).where(InfoSession.id == session_id))
-    session = result.scalar_one_or_none()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    for field, value in body.model_dump(exclude_unset=True).items():
-        setattr(session, field, value)
-    await db.commit()
-    await db.refresh(session)
-    # count registrations
-    count_result = await db.execute(
-        select(func.count(Registration.id)).where(Registration.session_id == session_id)
+    """One ``UPDATE ... RETURNING`` (registration count included); with ``If-Match`` a stale version is a 409."""
+    registration_count = (
+        select(func.count(Registration.id)).where(Registration.session_id == InfoSession.id).scalar_subquery()
     )
-    out = InfoSessionOut.model_validate(session)
-    out.registration_count = count_result.scalar() or 0
+    row = await update_returning(
+        db, InfoSession, session_id, body.model_dump(exclude_unset=True), version,
+        not_found="Session not found", extra=(registration_count.label("registration_count"),),
+    )
+    out = InfoSessionOut.model_validate(row[0])
+    out.registration_count = row.registration_count
+    await db.commit()
+    response.headers["ETag"] = etag(out.version)
     return out
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: uuid.UUID,
+    version: int | None = Depends(get_if_match),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(role_required(Role.admin)),
 ):
-    result = await db.execute(select(InfoSession).where(InfoSession.id == session_id))
-    session = result.scalar_one_or_none()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    await db.delete(session)
+    await delete_returning(db, InfoSession, session_id, version, not_found="Session not found")
     await db.commit()
 
 
@@ -150,15 +226,22 @@ async def add_registration(
     body: RegistrationCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
+    if idempotency.replay:
+        return idempotency.replay
     session = (await db.execute(select(InfoSession).where(InfoSession.id == session_id))).scalar_one_or_none()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    reg = Registration(session_id=session_id, name=body.name, email=body.email, note=body.note)
+    reg = Registration(session_id=session_id, name=body.name, email=body.email, phone=body.phone, note=body.note)
     db.add(reg)
-    await db.commit()
+    await db.flush()
+    await match_registrations(db, session_id)
     await db.refresh(reg)
-    return RegistrationOut.model_validate(reg)
+    out = RegistrationOut.model_validate(reg)
+    await idempotency.save(db, status.HTTP_201_CREATED, out)
+    await db.commit()
+    return out
 
 
 @router.delete("/{session_id}/registrations/{reg_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -184,7 +267,10 @@ async def import_registrations(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
+    if idempotency.replay:
+        return idempotency.replay
     session = (await db.execute(select(InfoSession).where(InfoSession.id == session_id))).scalar_one_or_none()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -211,12 +297,116 @@ async def import_registrations(
         if not name or not email:
             skipped += 1
             continue
-        reg = Registration(session_id=session_id, name=name, email=email)
+        # Optional third column: phone, used for parent matching
+        phone = row[2].strip() if len(row) > 2 and row[2].strip() else None
+        reg = Registration(session_id=session_id, name=name, email=email, phone=phone)
         db.add(reg)
         imported += 1
 
+    await db.flush()
+    match = await match_registrations(db, session_id)
+    out = ImportResult(
+        imported=imported, skipped=skipped, matched=match.matched, review=match.review, no_match=match.no_match,
+    )
+    await idempotency.save(db, status.HTTP_200_OK, out)
     await db.commit()
-    return ImportResult(imported=imported, skipped=skipped)
+    return out
+
+
+# ---- Parent matching ----
+
+@router.post("/{session_id}/registrations/match", response_model=MatchRunResult)
+async def run_registration_matching(
+    session_id: uuid.UUID,
+    retry_unmatched: bool = Query(False, description="Also retry registrations previously marked no_match"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Link not-yet-matched registrations to existing parents (runs automatically after imports)."""
+    session = (await db.execute(select(InfoSession.id).where(InfoSession.id == session_id))).scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    result = await match_registrations(db, session_id, retry_unmatched=retry_unmatched)
+    await db.commit()
+    return MatchRunResult(matched=result.matched, review=result.review, no_match=result.no_match)
+
+
+@router.get("/{session_id}/match-review", response_model=list[MatchReviewItem])
+async def list_match_review(
+    session_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Registrations whose parent match is ambiguous, with their scored candidates."""
+    rows = (await db.execute(
+        select(Registration, RegistrationMatchCandidate, Parent)
+        .join(RegistrationMatchCandidate, RegistrationMatchCandidate.registration_id == Registration.id)
+        .join(Parent, Parent.id == RegistrationMatchCandidate.parent_id)
+        .where(Registration.session_id == session_id, Registration.match_status == MatchStatus.review)
+        .order_by(Registration.created_at, Registration.id, RegistrationMatchCandidate.score.desc(), Parent.name)
+    )).all()
+    items: dict[uuid.UUID, MatchReviewItem] = {}
+    for reg, candidate, parent in rows:
+        item = items.get(reg.id)
+        if item is None:
+            item = items[reg.id] = MatchReviewItem(
+                registration_id=reg.id, name=reg.name, email=reg.email, phone=reg.phone, candidates=[],
+            )
+        item.candidates.append(MatchCandidateOut(
+            parent_id=parent.id, parent_name=parent.name, phone=parent.phone, email=parent.email,
+            score=candidate.score, reasons=candidate.reasons,
+        ))
+    return list(items.values())
+
+
+@router.put("/{session_id}/registrations/{reg_id}/parent", response_model=RegistrationOut)
+async def resolve_registration_match(
+    session_id: uuid.UUID,
+    reg_id: uuid.UUID,
+    body: MatchResolve,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Set (or clear) a registration's parent by hand; clears its review candidates."""
+    reg = (await db.execute(
+        select(Registration).where(Registration.id == reg_id, Registration.session_id == session_id)
+    )).scalar_one_or_none()
+    if not reg:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    if body.parent_id and await db.get(Parent, body.parent_id) is None:
+        raise HTTPException(status_code=400, detail="Parent not found")
+    reg.parent_id = body.parent_id
+    reg.match_status = MatchStatus.matched if body.parent_id else MatchStatus.no_match
+    await db.execute(delete(RegistrationMatchCandidate).where(RegistrationMatchCandidate.registration_id == reg_id))
+    await db.commit()
+    await db.refresh(reg)
+    return RegistrationOut.model_validate(reg)
+
+
+# ---- Follow-ups ----
+
+@router.post("/{session_id}/follow-ups", response_model=SessionFollowUpResult)
+async def create_attendee_follow_ups(
+    session_id: uuid.UUID,
+    body: SessionFollowUpRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """One follow-up per attendee, assigned round-robin or by open workload.
+
+    Registrations that already have a follow-up are skipped, so calling this
+    again only picks up new attendees.
+    """
+    result = await generate_follow_ups(
+        db, session_id, current_user.id,
+        strategy=body.strategy, assignee_ids=body.assignee_ids, statuses=body.statuses,
+        due_in_days=body.due_in_days, description=body.description,
+    )
+    await db.commit()
+    return SessionFollowUpResult(
+        created=result.created, unmatched=result.unmatched,
+        already_generated=result.already_generated, per_assignee=result.per_assignee,
+    )
 
 
 # ---- Email ----
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.parent import CallerIdCard
+from app.services.caller_id import lookup_by_phone
+from app.services.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/lookup", tags=["lookup"], route_class=TracedRoute)
+
+
+@router.get("/phone/{number}", response_model=list[CallerIdCard])
+async def lookup_phone(
+    number: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    cards = await lookup_by_phone(db, number)
+    if cards is None:
+        raise HTTPException(status_code=422, detail="Invalid phone number")
+    return cards
@@ -4,9 +4,15 @@ from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
+from app.services.assets import asset_url
+from app.services.tracing import TracedRoute, TracedTemplate
+
 templates = Jinja2Templates(directory="app/templates")
+# Set before any template is loaded: every render() becomes a span
+templates.env.template_class = TracedTemplate
+templates.env.globals["asset_url"] = asset_url
 
-router = APIRouter(tags=["pages"])
+router = APIRouter(tags=["pages"], route_class=TracedRoute)
 
 
 @router.get("/", response_class=HTMLResponse)
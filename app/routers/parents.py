@@ -1,87 +1,288 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, func, select, update
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
-from app.dependencies import get_current_user, role_required
-from app.models.parent import Parent
+from app.dependencies import get_current_user, get_idempotency, get_if_match, role_required
+from app.models.parent import Parent, ParentDuplicate
 from app.models.student import ParentStudent, Student
 from app.models.user import Role, User
-from app.schemas.parent import ParentCreate, ParentOut, ParentStudentLink, ParentStudentOut, ParentUpdate
-from app.services.parent_detail import get_parent_full_detail
+from app.schemas.parent import (
+    DuplicateCandidateOut, DuplicatePair, DuplicateParent, DuplicateScanResult, ParentBatchDetailRequest,
+    ParentCreate, ParentMergeRequest, ParentMergeResult, ParentOut, ParentStudentLink, ParentStudentOut,
+    ParentUpdate,
+)
+from app.services.archive import list_segments, stream_segments
+from app.services.coalesce import coalesced
+from app.services.dedupe import merge_parents, scan_duplicates
+from app.services.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, Embed, View
+from app.services.household import get_household
+from app.services.idempotency import Idempotency
+from app.services.parent_cards import stream_cards_csv, stream_cards_html
+from app.services.parent_detail import get_parent_full_detail, get_parents_batch_detail
+from app.services.partitions import hot_since
+from app.services.phone import normalize_phone
+from app.services.tracing import TracedRoute
+from app.services.writes import delete_returning, etag, insert_returning, update_returning
 
-router = APIRouter(prefix="/api/parents", tags=["parents"])
+router = APIRouter(prefix="/api/parents", tags=["parents"], route_class=TracedRoute)
 
+parent_view = View(
+    Parent,
+    fields={
+        "id": Parent.id, "name": Parent.name, "phone": Parent.phone, "email": Parent.email,
+        "address": Parent.address, "note": Parent.note,
+        # First 50 characters, for list pages that only show a teaser
+        "note_preview": func.left(Parent.note, 50, type_=String),
+        "created_at": Parent.created_at, "updated_at": Parent.updated_at, "version": Parent.version,
+    },
+    includes={
+        "students": Embed(
+            ParentStudent,
+            correlate=ParentStudent.parent_id == Parent.id,
+            joins=((Student, Student.id == ParentStudent.student_id),),
+            fields={
+                "id": Student.id, "name": Student.name, "grade": Student.grade,
+                "relationship_type": ParentStudent.relationship_type,
+            },
+            default=("id", "name", "grade", "relationship_type"),
+            many=True,
+            order_by=(Student.name,),
+        ),
+    },
+    out=ParentOut,
+)
 
-@router.get("", response_model=list[ParentOut])
+
+@router.get("", response_model=list[ParentOut] | list[parent_view.schema])
+@coalesced("parents_list", tables=("parents",))
 async def list_parents(
     q: str | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(None, description=INCLUDE_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    stmt = select(Parent).order_by(Parent.created_at.desc())
+    projection = parent_view.parse(fields, include)
+    stmt = projection.select() if projection else select(Parent)
+    stmt = stmt.order_by(Parent.created_at.desc())
     if q:
-        stmt = stmt.where(Parent.name.ilike(f"%{q}%") | Parent.phone.ilike(f"%{q}%"))
+        cond = Parent.name.ilike(f"%{q}%") | Parent.phone.ilike(f"%{q}%")
+        e164 = normalize_phone(q)
+        if e164:
+            cond = cond | (Parent.phone_e164 == e164)
+        stmt = stmt.where(cond)
     result = await db.execute(stmt)
+    if projection:
+        return projection.rows(result)
     return [ParentOut.model_validate(p) for p in result.scalars().all()]
 
 
 @router.post("", response_model=ParentOut, status_code=status.HTTP_201_CREATED)
 async def create_parent(
     body: ParentCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: Idempotency = Depends(get_idempotency),
+):
+    if idempotency.replay:
+        return idempotency.replay
+    parent = (await insert_returning(db, Parent(**body.model_dump())))[0]
+    out = ParentOut.model_validate(parent)
+    await idempotency.save(db, status.HTTP_201_CREATED, out)
+    await db.commit()
+    response.headers["ETag"] = etag(parent.version)
+    return out
+
+
+@router.post("/batch-detail")
+async def parents_batch_detail(
+    body: ParentBatchDetailRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    parent = Parent(**body.model_dump())
-    db.add(parent)
+    """Cards for many parents at once (printing, mail-merge): students, recent communications, open follow-ups.
+
+    ``format=json`` returns ``{"parents": [...], "missing": [...]}``; ``html`` and
+    ``csv`` stream a printable page / spreadsheet in request order.
+    """
+    parent_ids = list(dict.fromkeys(body.ids))
+    if len(parent_ids) > settings.BATCH_DETAIL_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_DETAIL_MAX_IDS} ids per request")
+    since = hot_since()
+    if body.format == "html":
+        return StreamingResponse(
+            stream_cards_html(parent_ids, since, body.communications_per_parent),
+            media_type="text/html; charset=utf-8",
+        )
+    if body.format == "csv":
+        return StreamingResponse(
+            stream_cards_csv(parent_ids, since, body.communications_per_parent),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="parent-cards.csv"'},
+        )
+    cards = await get_parents_batch_detail(db, parent_ids, since, body.communications_per_parent)
+    found = {card["id"] for card in cards}
+    return {"parents": cards, "missing": [str(pid) for pid in parent_ids if str(pid) not in found]}
+
+
+@router.get("/duplicates", response_model=list[DuplicateCandidateOut])
+async def list_parent_duplicates(
+    include_dismissed: bool = Query(False),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Likely duplicate parents from the last scan, best matches first."""
+    first, second = aliased(Parent), aliased(Parent)
+    stmt = (
+        select(ParentDuplicate, first, second)
+        .join(first, first.id == ParentDuplicate.parent_id)
+        .join(second, second.id == ParentDuplicate.duplicate_id)
+        .order_by(ParentDuplicate.score.desc(), ParentDuplicate.parent_id, ParentDuplicate.duplicate_id)
+        .limit(limit)
+        .offset(offset)
+    )
+    if not include_dismissed:
+        stmt = stmt.where(ParentDuplicate.dismissed == False)  # noqa: E712
+    return [
+        DuplicateCandidateOut(
+            parent=DuplicateParent.model_validate(a, from_attributes=True),
+            duplicate=DuplicateParent.model_validate(b, from_attributes=True),
+            score=c.score, reasons=c.reasons, dismissed=c.dismissed, detected_at=c.detected_at,
+        )
+        for c, a, b in (await db.execute(stmt)).all()
+    ]
+
+
+@router.post("/duplicates/scan", response_model=DuplicateScanResult)
+async def scan_parent_duplicates(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Rescan the campus's parents for duplicates now instead of waiting for the nightly run."""
+    result = await scan_duplicates(db)
+    return DuplicateScanResult(
+        parents=result.parents, candidates=result.candidates, pending=result.pending, removed=result.removed,
+    )
+
+
+@router.post("/duplicates/dismiss", status_code=status.HTTP_204_NO_CONTENT)
+async def dismiss_parent_duplicate(
+    body: DuplicatePair,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Mark a pair as different people; later scans keep it out of the list."""
+    low, high = sorted((body.parent_id, body.duplicate_id))
+    result = await db.execute(
+        update(ParentDuplicate)
+        .where(
+            ParentDuplicate.parent_id == low,
+            ParentDuplicate.duplicate_id == high,
+            ParentDuplicate.parent_id.in_(select(Parent.id).where(Parent.campus_id == current_user.campus_id)),
+        )
+        .values(dismissed=True)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Duplicate candidate not found")
     await db.commit()
-    await db.refresh(parent)
-    return ParentOut.model_validate(parent)
 
 
 @router.get("/{parent_id}")
+@coalesced(
+    "parent_detail",
+    tables=("parents", "parent_student", "students", "communication_records", "follow_ups", "archive_segments"),
+)
 async def get_parent(
     parent_id: uuid.UUID,
+    all_history: bool = Query(False, description="Include communications older than the hot window"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await get_parent_full_detail(db, parent_id)
+    return await get_parent_full_detail(db, parent_id, since=None if all_history else hot_since())
+
+
+@router.get("/{parent_id}/archive")
+async def get_parent_archive(
+    parent_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream archived communications and follow-ups back as NDJSON (newest first)."""
+    parent = await db.get(Parent, parent_id)
+    if not parent:
+        raise HTTPException(status_code=404, detail="Parent not found")
+    # Resolve the manifest now: the session is closed before the body is streamed
+    segments = await list_segments(db, parent_id)
+    return StreamingResponse(stream_segments(segments), media_type="application/x-ndjson")
+
+
+@router.get("/{parent_id}/household")
+async def get_parent_household(
+    parent_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """The parent's whole connected family: children, co-parents, step-siblings and latest contact."""
+    return await get_household(db, "parent", parent_id)
 
 
 @router.put("/{parent_id}", response_model=ParentOut)
 async def update_parent(
     parent_id: uuid.UUID,
     body: ParentUpdate,
+    response: Response,
+    version: int | None = Depends(get_if_match),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(select(Parent).where(Parent.id == parent_id))
-    parent = result.scalar_one_or_none()
-    if not parent:
-        raise HTTPException(status_code=404, detail="Parent not found")
-    for field, value in body.model_dump(exclude_unset=True).items():
-        setattr(parent, field, value)
+    """One ``UPDATE ... RETURNING``; with ``If-Match`` a stale version is a 409."""
+    values = body.model_dump(exclude_unset=True)
+    if "phone" in values:
+        # What Parent's @validates("phone") does for ORM writes
+        values["phone_e164"] = normalize_phone(values["phone"])
+    parent = (await update_returning(db, Parent, parent_id, values, version, not_found="Parent not found"))[0]
+    out = ParentOut.model_validate(parent)
     await db.commit()
-    await db.refresh(parent)
-    return ParentOut.model_validate(parent)
+    response.headers["ETag"] = etag(parent.version)
+    return out
 
 
 @router.delete("/{parent_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_parent(
     parent_id: uuid.UUID,
+    version: int | None = Depends(get_if_match),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(role_required(Role.admin)),
 ):
-    result = await db.execute(select(Parent).where(Parent.id == parent_id))
-    parent = result.scalar_one_or_none()
-    if not parent:
-        raise HTTPException(status_code=404, detail="Parent not found")
-    await db.delete(parent)
+    await delete_returning(db, Parent, parent_id, version, not_found="Parent not found")
     await db.commit()
 
 
+@router.post("/{parent_id}/merge", response_model=ParentMergeResult)
+async def merge_parent_duplicates(
+    parent_id: uuid.UUID,
+    body: ParentMergeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Fold ``duplicate_ids`` into this parent: students, communications, follow-ups and registrations move over."""
+    result = await merge_parents(db, parent_id, body.duplicate_ids)
+    await db.commit()
+    await db.refresh(result.survivor)
+    return ParentMergeResult(
+        parent=ParentOut.model_validate(result.survivor), merged=result.merged, moved=result.moved,
+    )
+
+
 @router.post("/{parent_id}/students", response_model=ParentStudentOut, status_code=status.HTTP_201_CREATED)
 async def link_student(
     parent_id: uuid.UUID,
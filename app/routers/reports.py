@@ -0,0 +1,108 @@
+import uuid
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.dependencies import role_required
+from app.models.user import Role, User
+from app.schemas.report import (
+    CommunicationsReport,
+    FollowUpsReport,
+    OverdueReport,
+    RefreshResult,
+    SessionsReport,
+)
+from app.services import reports
+from app.services.reports import Granularity
+from app.services.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/reports", tags=["reports"], route_class=TracedRoute)
+
+DEFAULT_RANGE_DAYS = 365
+
+
+def _date_range(
+    date_from: date | None = Query(None, description="Default: one year before date_to"),
+    date_to: date | None = Query(None, description="Default: today"),
+) -> tuple[date, date]:
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_RANGE_DAYS)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    if (date_to - date_from).days > settings.REPORT_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {settings.REPORT_MAX_RANGE_DAYS} days")
+    return date_from, date_to
+
+
+@router.get("/communications", response_model=CommunicationsReport)
+async def communications_report(
+    dates: tuple[date, date] = Depends(_date_range),
+    granularity: Granularity = Query("week"),
+    user_id: uuid.UUID | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Communications per staff member and period, split by contact type."""
+    date_from, date_to = dates
+    return CommunicationsReport(
+        date_from=date_from, date_to=date_to, granularity=granularity, as_of=await reports.watermark(db),
+        rows=await reports.communications_report(db, date_from, date_to, granularity, user_id),
+    )
+
+
+@router.get("/follow-ups", response_model=FollowUpsReport)
+async def follow_ups_report(
+    dates: tuple[date, date] = Depends(_date_range),
+    granularity: Granularity = Query("week"),
+    user_id: uuid.UUID | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Follow-ups created and completed per assignee and period, with average completion time."""
+    date_from, date_to = dates
+    return FollowUpsReport(
+        date_from=date_from, date_to=date_to, granularity=granularity, as_of=await reports.watermark(db),
+        rows=await reports.follow_ups_report(db, date_from, date_to, granularity, user_id),
+    )
+
+
+@router.get("/overdue", response_model=OverdueReport)
+async def overdue_report(
+    dates: tuple[date, date] = Depends(_date_range),
+    granularity: Granularity = Query("week"),
+    user_id: uuid.UUID | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Overdue follow-up backlog per assignee at the end of each period."""
+    date_from, date_to = dates
+    return OverdueReport(
+        date_from=date_from, date_to=date_to, granularity=granularity, as_of=await reports.watermark(db),
+        rows=await reports.overdue_report(db, date_from, date_to, granularity, user_id),
+    )
+
+
+@router.get("/sessions", response_model=SessionsReport)
+async def sessions_report(
+    dates: tuple[date, date] = Depends(_date_range),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Registration funnel and conversion rate per info session held in the range."""
+    date_from, date_to = dates
+    funnel = await reports.sessions_report(db, date_from, date_to)
+    return SessionsReport(date_from=date_from, date_to=date_to, as_of=await reports.watermark(db), **funnel)
+
+
+@router.post("/refresh", response_model=RefreshResult)
+async def refresh_report_rollups(
+    full: bool = Query(False, description="Rebuild from the raw tables instead of the change journal"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(role_required(Role.admin)),
+):
+    """Fold pending changes into the rollups now instead of waiting for the scheduled refresh."""
+    refreshed = await reports.refresh_reports(db, full=full)
+    return RefreshResult(refreshed=refreshed, as_of=await reports.watermark(db))
@@ -1,44 +1,87 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
-from app.dependencies import get_current_user, role_required
+from app.dependencies import get_current_user, get_idempotency, get_if_match, role_required
+from app.models.parent import Parent
 from app.models.student import ParentStudent, Student
 from app.models.user import Role, User
 from app.schemas.student import StudentCreate, StudentOut, StudentParentLink, StudentUpdate
+from app.services.coalesce import coalesced
+from app.services.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, Embed, View
+from app.services.household import get_household
+from app.services.idempotency import Idempotency
+from app.services.tracing import TracedRoute
+from app.services.writes import delete_returning, etag, insert_returning, update_returning
 
-router = APIRouter(prefix="/api/students", tags=["students"])
+router = APIRouter(prefix="/api/students", tags=["students"], route_class=TracedRoute)
 
+student_view = View(
+    Student,
+    fields={
+        "id": Student.id, "name": Student.name, "grade": Student.grade,
+        "note": Student.note, "created_at": Student.created_at, "version": Student.version,
+    },
+    includes={
+        "parents": Embed(
+            ParentStudent,
+            correlate=ParentStudent.student_id == Student.id,
+            joins=((Parent, Parent.id == ParentStudent.parent_id),),
+            fields={
+                "id": Parent.id, "name": Parent.name, "phone": Parent.phone, "email": Parent.email,
+                "relationship_type": ParentStudent.relationship_type,
+            },
+            default=("id", "name", "phone", "relationship_type"),
+            many=True,
+            order_by=(Parent.name,),
+        ),
+    },
+    out=StudentOut,
+)
 
-@router.get("", response_model=list[StudentOut])
+
+@router.get("", response_model=list[StudentOut] | list[student_view.schema])
+@coalesced("students_list", tables=("students",))
 async def list_students(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(None, description=INCLUDE_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(select(Student).order_by(Student.created_at.desc()))
+    projection = student_view.parse(fields, include)
+    stmt = projection.select() if projection else select(Student)
+    result = await db.execute(stmt.order_by(Student.created_at.desc()))
+    if projection:
+        return projection.rows(result)
     return [StudentOut.model_validate(s) for s in result.scalars().all()]
 
 
 @router.post("", response_model=StudentOut, status_code=status.HTTP_201_CREATED)
 async def create_student(
     body: StudentCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
-    student = Student(**body.model_dump())
-    db.add(student)
+    if idempotency.replay:
+        return idempotency.replay
+    student = (await insert_returning(db, Student(**body.model_dump())))[0]
+    out = StudentOut.model_validate(student)
+    await idempotency.save(db, status.HTTP_201_CREATED, out)
     await db.commit()
-    await db.refresh(student)
-    return StudentOut.model_validate(student)
+    response.headers["ETag"] = etag(student.version)
+    return out
 
 
 @router.get("/{student_id}", response_model=StudentOut)
 async def get_student(
     student_id: uuid.UUID,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -46,38 +89,47 @@ async def get_student(
     student = result.scalar_one_or_none()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
+    response.headers["ETag"] = etag(student.version)
     return StudentOut.model_validate(student)
 
 
+@router.get("/{student_id}/household")
+async def get_student_household(
+    student_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """The student's whole connected family: parents, siblings, co-parents, grades and latest contact."""
+    return await get_household(db, "student", student_id)
+
+
 @router.put("/{student_id}", response_model=StudentOut)
 async def update_student(
     student_id: uuid.UUID,
     body: StudentUpdate,
+    response: Response,
+    version: int | None = Depends(get_if_match),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(select(Student).where(Student.id == student_id))
-    student = result.scalar_one_or_none()
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-    for field, value in body.model_dump(exclude_unset=True).items():
-        setattr(student, field, value)
+    """One ``UPDATE ... RETURNING``; with ``If-Match`` a stale version is a 409."""
+    student = (await update_returning(
+        db, Student, student_id, body.model_dump(exclude_unset=True), version, not_found="Student not found",
+    ))[0]
+    out = StudentOut.model_validate(student)
     await db.commit()
-    await db.refresh(student)
-    return StudentOut.model_validate(student)
+    response.headers["ETag"] = etag(student.version)
+    return out
 
 
 @router.delete("/{student_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_student(
     student_id: uuid.UUID,
+    version: int | None = Depends(get_if_match),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(role_required(Role.admin)),
 ):
-    result = await db.execute(select(Student).where(Student.id == student_id))
-    student = result.scalar_one_or_none()
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-    await db.delete(student)
+    await delete_returning(db, Student, student_id, version, not_found="Student not found")
     await db.commit()
 
 
@@ -91,6 +143,8 @@ async def link_parent(
     student = (await db.execute(select(Student).where(Student.id == student_id))).scalar_one_or_none()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
+    if await db.get(Parent, body.parent_id) is None:
+        raise HTTPException(status_code=404, detail="Parent not found")
     link = ParentStudent(
         parent_id=body.parent_id, student_id=student_id, relationship_type=body.relationship_type,
     )
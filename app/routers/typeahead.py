@@ -0,0 +1,32 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.typeahead import TypeaheadHit
+from app.services.tenancy import current_campus
+from app.services.tracing import TracedRoute
+from app.services.typeahead import index, indexed, search_db
+
+router = APIRouter(prefix="/api/typeahead", tags=["typeahead"], route_class=TracedRoute)
+
+
+@router.get("", response_model=list[TypeaheadHit])
+async def typeahead(
+    q: str = Query(..., min_length=1),
+    kind: Literal["parent", "student"] | None = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if index.ready and indexed(current_campus.get().code):
+        hits = index.search(q, current_user.campus_id, limit=limit, kind=kind)
+    else:
+        hits = await search_db(db, q, limit=limit, kind=kind)
+    return [
+        TypeaheadHit(kind=e.kind, id=e.id, name=e.name, detail=e.detail, score=score)
+        for e, score in hits
+    ]
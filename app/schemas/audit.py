@@ -0,0 +1,17 @@
+import uuid
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class AuditLogOut(BaseModel):
+    id: int
+    changed_at: datetime
+    user_id: uuid.UUID | None
+    user_name: str | None = None
+    table_name: str
+    row_id: str
+    action: str
+    changes: dict
+
+    model_config = {"from_attributes": True}
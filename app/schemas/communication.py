@@ -24,6 +24,18 @@ class CommunicationOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class CommunicationSearchHit(BaseModel):
+    id: uuid.UUID
+    parent_id: uuid.UUID
+    user_id: uuid.UUID
+    contact_type: ContactType
+    created_at: datetime
+    parent_name: str | None = None
+    user_name: str | None = None
+    snippet: str
+    score: float
+
+
 class FollowUpCreate(BaseModel):
     communication_id: uuid.UUID
     parent_id: uuid.UUID
@@ -48,6 +60,7 @@ class FollowUpOut(BaseModel):
     due_date: date | None
     is_done: bool
     created_at: datetime
+    version: int
     assigned_user_name: str | None = None
     parent_name: str | None = None
 
@@ -1,9 +1,10 @@
 import uuid
 from datetime import date, datetime
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.models.info_session import RegistrationStatus
+from app.models.info_session import MatchStatus, RegistrationStatus
 
 
 # --- InfoSession ---
@@ -36,6 +37,7 @@ class InfoSessionOut(BaseModel):
     capacity: int | None
     created_at: datetime
     updated_at: datetime
+    version: int
     registration_count: int = 0
 
     model_config = {"from_attributes": True}
@@ -46,6 +48,7 @@ class InfoSessionOut(BaseModel):
 class RegistrationCreate(BaseModel):
     name: str
     email: str
+    phone: str | None = None
     note: str | None = None
 
 
@@ -54,10 +57,14 @@ class RegistrationOut(BaseModel):
     session_id: uuid.UUID
     name: str
     email: str
+    phone: str | None = None
     status: RegistrationStatus
     email_sent: bool
     note: str | None
     created_at: datetime
+    follow_up_id: uuid.UUID | None = None
+    parent_id: uuid.UUID | None = None
+    match_status: MatchStatus | None = None
 
     model_config = {"from_attributes": True}
 
@@ -65,8 +72,79 @@ class RegistrationOut(BaseModel):
 class ImportResult(BaseModel):
     imported: int
     skipped: int
+    # Outcome of the automatic parent matching that runs after the import
+    matched: int = 0
+    review: int = 0
+    no_match: int = 0
 
 
 class SendEmailResult(BaseModel):
     sent: int
     message: str
+
+
+# --- Parent matching ---
+
+class MatchRunResult(BaseModel):
+    matched: int
+    review: int
+    no_match: int
+
+
+class MatchCandidateOut(BaseModel):
+    parent_id: uuid.UUID
+    parent_name: str
+    phone: str
+    email: str | None
+    score: int
+    reasons: list[str]
+
+
+class MatchReviewItem(BaseModel):
+    registration_id: uuid.UUID
+    name: str
+    email: str
+    phone: str | None
+    candidates: list[MatchCandidateOut]
+
+
+class MatchResolve(BaseModel):
+    # null: confirmed as a new family (no existing parent)
+    parent_id: uuid.UUID | None
+
+
+# --- Follow-up generation ---
+
+class SessionFollowUpRequest(BaseModel):
+    strategy: Literal["round_robin", "balanced"] = "balanced"
+    # Defaults to every active teacher
+    assignee_ids: list[uuid.UUID] | None = None
+    statuses: list[RegistrationStatus] = [RegistrationStatus.confirmed]
+    due_in_days: int = Field(3, ge=0, le=90)
+    description: str | None = None
+
+
+class GeneratedFollowUp(BaseModel):
+    registration_id: uuid.UUID
+    registration_name: str
+    parent_id: uuid.UUID
+    parent_name: str
+    follow_up_id: uuid.UUID
+    assigned_to: uuid.UUID
+    assigned_user_name: str
+    due_date: date
+
+
+class UnmatchedRegistration(BaseModel):
+    registration_id: uuid.UUID
+    name: str
+    email: str
+    match_status: MatchStatus | None = None
+
+
+class SessionFollowUpResult(BaseModel):
+    created: list[GeneratedFollowUp]
+    # Not linked to a parent (no match, or waiting in the match review queue)
+    unmatched: list[UnmatchedRegistration]
+    already_generated: int
+    per_assignee: dict[str, int]
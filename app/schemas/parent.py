@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ParentCreate(BaseModel):
@@ -29,6 +30,8 @@ class ParentOut(BaseModel):
     note: str | None
     created_at: datetime
     updated_at: datetime
+    # Send back as If-Match when editing (also the ETag of write responses)
+    version: int
 
     model_config = {"from_attributes": True}
 
@@ -43,3 +46,67 @@ class ParentStudentOut(BaseModel):
     student_name: str
     grade: str
     relationship_type: str
+
+
+class CallerIdStudent(BaseModel):
+    student_id: uuid.UUID
+    student_name: str
+    grade: str
+    relationship_type: str
+
+
+class CallerIdCard(BaseModel):
+    id: uuid.UUID
+    name: str
+    phone: str
+    email: str | None
+    students: list[CallerIdStudent] = []
+
+
+class ParentBatchDetailRequest(BaseModel):
+    ids: list[uuid.UUID] = Field(min_length=1)
+    format: Literal["json", "html", "csv"] = "json"
+    communications_per_parent: int = Field(5, ge=0, le=50)
+
+
+class DuplicateParent(BaseModel):
+    id: uuid.UUID
+    name: str
+    phone: str
+    email: str | None
+    created_at: datetime
+
+
+class DuplicateCandidateOut(BaseModel):
+    parent: DuplicateParent
+    duplicate: DuplicateParent
+    score: float
+    # Which keys agreed: email / name / phone
+    reasons: list[str]
+    dismissed: bool
+    detected_at: datetime
+
+
+class DuplicateScanResult(BaseModel):
+    parents: int
+    candidates: int
+    # Candidates not dismissed yet
+    pending: int
+    # Earlier candidates this scan no longer found
+    removed: int
+
+
+class DuplicatePair(BaseModel):
+    parent_id: uuid.UUID
+    duplicate_id: uuid.UUID
+
+
+class ParentMergeRequest(BaseModel):
+    duplicate_ids: list[uuid.UUID] = Field(min_length=1)
+
+
+class ParentMergeResult(BaseModel):
+    parent: ParentOut
+    merged: list[uuid.UUID]
+    # Rows moved onto the surviving parent, per table
+    moved: dict[str, int]
@@ -0,0 +1,92 @@
+import uuid
+from datetime import date, datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class CommunicationsRow(BaseModel):
+    period: date
+    user_id: uuid.UUID
+    user_name: str
+    total: int
+    by_type: dict[str, int]
+
+
+class FollowUpsRow(BaseModel):
+    period: date
+    user_id: uuid.UUID
+    user_name: str
+    created: int
+    completed: int
+    # None when nothing with a recorded completion time was completed in the period
+    avg_completion_hours: float | None
+
+
+class OverdueRow(BaseModel):
+    period: date
+    user_id: uuid.UUID
+    user_name: str | None
+    # Open follow-ups past their due date at the end of the period
+    overdue: int
+
+
+class SessionFunnelRow(BaseModel):
+    session_id: uuid.UUID
+    title: str
+    session_date: date
+    registrations: int
+    confirmed: int
+    cancelled: int
+    existing_families: int
+    converted: int
+    # converted / registrants who were not families yet
+    conversion_rate: float | None
+
+
+class SessionFunnelTotals(BaseModel):
+    registrations: int
+    confirmed: int
+    cancelled: int
+    existing_families: int
+    converted: int
+    conversion_rate: float | None
+
+
+class CommunicationsReport(BaseModel):
+    date_from: date
+    date_to: date
+    granularity: Literal["day", "week", "month"]
+    # Changes committed before this time are included (None: rollups never refreshed)
+    as_of: datetime | None
+    rows: list[CommunicationsRow]
+
+
+class FollowUpsReport(BaseModel):
+    date_from: date
+    date_to: date
+    granularity: Literal["day", "week", "month"]
+    as_of: datetime | None
+    rows: list[FollowUpsRow]
+
+
+class OverdueReport(BaseModel):
+    date_from: date
+    date_to: date
+    granularity: Literal["day", "week", "month"]
+    as_of: datetime | None
+    rows: list[OverdueRow]
+
+
+class SessionsReport(BaseModel):
+    date_from: date
+    date_to: date
+    as_of: datetime | None
+    sessions: list[SessionFunnelRow]
+    totals: SessionFunnelTotals
+
+
+class RefreshResult(BaseModel):
+    # Days (or sessions) recomputed per rollup
+    refreshed: dict[str, int]
+    as_of: datetime | None
@@ -22,6 +22,7 @@ class StudentOut(BaseModel):
     grade: str
     note: str | None
     created_at: datetime
+    version: int
 
     model_config = {"from_attributes": True}
 
@@ -0,0 +1,12 @@
+import uuid
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class TypeaheadHit(BaseModel):
+    kind: Literal["parent", "student"]
+    id: uuid.UUID
+    name: str
+    detail: str
+    score: int
@@ -9,6 +9,8 @@ from app.models.user import Role
 class UserLogin(BaseModel):
     username: str
     password: str
+    # Campus code; DEFAULT_CAMPUS when omitted
+    campus: str | None = None
 
 
 class UserCreate(BaseModel):
@@ -20,6 +22,7 @@ class UserCreate(BaseModel):
 
 class UserOut(BaseModel):
     id: uuid.UUID
+    campus_id: uuid.UUID
     username: str
     full_name: str
     role: Role
@@ -0,0 +1,310 @@
+"""Cold-storage archive for old communication history.
+
+``archive_old_history()`` moves the communications (and their closed
+follow-ups) of inactive parents out of the hot tables into
+``archive_segments``: one gzip-compressed JSONL blob per parent and run,
+written in the same transaction that deletes the hot rows, so nothing can be
+deleted without its archive copy. ``stream_segments()`` reads one parent's
+history back segment by segment.
+
+Earlier runs wrote the blobs into files under ARCHIVE_DIR, which only the
+instance that ran the archive job can see; ``import_archive_files()`` moves
+them into the database. A segment that cannot be read back is reported in the
+stream as an ``error`` record rather than silently left out.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import uuid
+import zlib
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from app.config import settings
+from app.models.archive import ArchiveSegment
+from app.models.communication import CommunicationRecord, FollowUp
+from app.models.user import User
+from app.services.cache import record_bulk_change
+
+logger = logging.getLogger(__name__)
+
+# Where segments archived before they were stored in the database live
+ARCHIVE_ROOT = Path(settings.ARCHIVE_DIR)
+
+# Locks the selected parents (FOR UPDATE conflicts with the KEY SHARE lock taken
+# by inserts referencing them), so no communication or follow-up can be added
+# for a parent while its history is being moved.
+_ELIGIBLE_SQL = """
+    SELECT p.id FROM parents p
+    WHERE p.id > :after
+      AND EXISTS (SELECT 1 FROM communication_records c WHERE c.parent_id = p.id)
+      AND NOT EXISTS (
+          SELECT 1 FROM communication_records c WHERE c.parent_id = p.id AND c.created_at >= :cutoff
+      )
+      AND NOT EXISTS (SELECT 1 FROM follow_ups f WHERE f.parent_id = p.id AND NOT f.is_done)
+      {graduated}
+    ORDER BY p.id
+    LIMIT :limit
+    FOR UPDATE OF p SKIP LOCKED
+"""
+_GRADUATED_SQL = """
+      AND NOT EXISTS (
+          SELECT 1 FROM parent_student ps JOIN students s ON s.id = ps.student_id
+          WHERE ps.parent_id = p.id AND s.grade <> ALL(CAST(:grades AS varchar[]))
+      )
+"""
+
+
+@dataclass
+class ArchiveResult:
+    parents: int = 0
+    communications: int = 0
+    follow_ups: int = 0
+
+
+def archive_cutoff(now: datetime | None = None) -> datetime:
+    """Parents whose last contact is before this instant are eligible."""
+    now = now or datetime.now(timezone.utc)
+    year = now.year - settings.ARCHIVE_AFTER_YEARS
+    try:
+        return now.replace(year=year)
+    except ValueError:  # 29 February
+        return now.replace(year=year, day=28)
+
+
+def _communication_row(record: CommunicationRecord, user_name: str | None) -> dict:
+    return {
+        "type": "communication",
+        "id": str(record.id),
+        "parent_id": str(record.parent_id),
+        "user_id": str(record.user_id),
+        "user_name": user_name,
+        "contact_type": record.contact_type.value,
+        "summary": record.summary,
+        "created_at": record.created_at.isoformat(),
+    }
+
+
+def _follow_up_row(follow_up: FollowUp, assigned_user_name: str | None) -> dict:
+    return {
+        "type": "follow_up",
+        "id": str(follow_up.id),
+        "communication_id": str(follow_up.communication_id),
+        "parent_id": str(follow_up.parent_id),
+        "assigned_to": str(follow_up.assigned_to),
+        "assigned_user_name": assigned_user_name,
+        "description": follow_up.description,
+        "due_date": follow_up.due_date.isoformat() if follow_up.due_date else None,
+        "is_done": follow_up.is_done,
+        "completed_at": follow_up.completed_at.isoformat() if follow_up.completed_at else None,
+        "created_at": follow_up.created_at.isoformat(),
+    }
+
+
+async def _eligible_parents(db: AsyncSession, after: uuid.UUID, cutoff: datetime, limit: int) -> list[uuid.UUID]:
+    params: dict = {"after": after, "cutoff": cutoff, "limit": limit}
+    graduated = ""
+    if settings.ARCHIVE_GRADUATED_GRADES:
+        graduated = _GRADUATED_SQL
+        params["grades"] = settings.ARCHIVE_GRADUATED_GRADES
+    rows = await db.execute(text(_ELIGIBLE_SQL.format(graduated=graduated)), params)
+    return [row.id for row in rows]
+
+
+async def _archive_batch(db: AsyncSession, parent_ids: list[uuid.UUID], cutoff: datetime) -> ArchiveResult:
+    comm_rows = (await db.execute(
+        select(CommunicationRecord, User.full_name)
+        .outerjoin(User, User.id == CommunicationRecord.user_id)
+        .where(CommunicationRecord.parent_id.in_(parent_ids), CommunicationRecord.created_at < cutoff)
+        .order_by(CommunicationRecord.parent_id, CommunicationRecord.created_at.desc())
+    )).all()
+    comm_ids = {record.id for record, _ in comm_rows}
+    follow_rows = (await db.execute(
+        select(FollowUp, User.full_name)
+        .outerjoin(User, User.id == FollowUp.assigned_to)
+        .where(FollowUp.parent_id.in_(parent_ids), FollowUp.is_done == True)  # noqa: E712
+        .order_by(FollowUp.created_at.desc())
+    )).all()
+    follow_rows = [(f, name) for f, name in follow_rows if f.communication_id in comm_ids]
+
+    by_parent: dict[uuid.UUID, dict] = {}
+    for record, user_name in comm_rows:
+        group = by_parent.setdefault(record.parent_id, {"lines": [], "comms": 0, "follow_ups": 0, "dates": []})
+        group["lines"].append(_communication_row(record, user_name))
+        group["comms"] += 1
+        group["dates"].append(record.created_at)
+    for follow_up, user_name in follow_rows:
+        group = by_parent[follow_up.parent_id]
+        group["lines"].append(_follow_up_row(follow_up, user_name))
+        group["follow_ups"] += 1
+
+    # Committed together with the deletes below: the hot rows only go once their archive copy is stored
+    segments = []
+    for parent_id, group in by_parent.items():
+        payload = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in group["lines"])
+        member = gzip.compress(payload.encode())
+        segments.append(ArchiveSegment(
+            parent_id=parent_id, data=member, length=len(member),
+            communication_count=group["comms"], follow_up_count=group["follow_ups"],
+            first_at=min(group["dates"]), last_at=max(group["dates"]),
+        ))
+    db.add_all(segments)
+    # Archived history keeps counting in the reporting rollups (app.services.reports)
+    await db.execute(text("SET LOCAL crm.report_journal = 'off'"))
+    if follow_rows:
+        await db.execute(
+            delete(FollowUp)
+            .where(FollowUp.id.in_([f.id for f, _ in follow_rows]))
+            .execution_options(synchronize_session=False)
+        )
+    # created_at bound keeps the delete to the old partitions
+    await db.execute(
+        delete(CommunicationRecord)
+        .where(CommunicationRecord.id.in_(comm_ids), CommunicationRecord.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    # Core deletes bypass the flush hooks: drop cached lists and parent details on every worker.
+    # Not audited: the rows are moved, not lost, and stay readable through the archive.
+    if follow_rows:
+        record_bulk_change(db, "follow_ups", "DELETE")
+    record_bulk_change(db, "communication_records", "DELETE")
+    await db.commit()
+    return ArchiveResult(parents=len(segments), communications=len(comm_ids), follow_ups=len(follow_rows))
+
+
+async def archive_old_history(
+    db: AsyncSession, cutoff: datetime | None = None, batch_size: int = 100
+) -> ArchiveResult:
+    """Move eligible parents' history into archive segments, one transaction per batch."""
+    cutoff = cutoff or archive_cutoff()
+    total = ArchiveResult()
+    after = uuid.UUID(int=0)
+    while True:
+        parent_ids = await _eligible_parents(db, after, cutoff, batch_size)
+        if not parent_ids:
+            await db.rollback()
+            break
+        batch = await _archive_batch(db, parent_ids, cutoff)
+        total.parents += batch.parents
+        total.communications += batch.communications
+        total.follow_ups += batch.follow_ups
+        after = parent_ids[-1]
+        logger.info("Archived %d parents (%d total)", batch.parents, total.parents)
+    return total
+
+
+async def count_eligible(db: AsyncSession, cutoff: datetime | None = None) -> int:
+    """Number of parents the next run would archive (for --dry-run)."""
+    cutoff = cutoff or archive_cutoff()
+    count, after = 0, uuid.UUID(int=0)
+    while parent_ids := await _eligible_parents(db, after, cutoff, 1000):
+        count += len(parent_ids)
+        after = parent_ids[-1]
+    await db.rollback()
+    return count
+
+
+# ---- rehydration ----
+
+async def archived_count(db: AsyncSession, parent_id: uuid.UUID) -> int:
+    stmt = select(func.coalesce(func.sum(ArchiveSegment.communication_count), 0)).where(
+        ArchiveSegment.parent_id == parent_id
+    )
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def list_segments(db: AsyncSession, parent_id: uuid.UUID) -> list[ArchiveSegment]:
+    """A parent's segments with their data, newest first (one parent's compressed history)."""
+    stmt = (
+        select(ArchiveSegment)
+        .options(undefer(ArchiveSegment.data))
+        .where(ArchiveSegment.parent_id == parent_id)
+        .order_by(ArchiveSegment.last_at.desc())
+    )
+    return list((await db.execute(stmt)).scalars().all())
+
+
+def _read_file_member(file: str, offset: int, length: int) -> bytes:
+    with open(ARCHIVE_ROOT / file, "rb") as fh:
+        fh.seek(offset)
+        member = fh.read(length)
+    if len(member) != length:
+        raise EOFError(f"{file} ends before the segment does")
+    return member
+
+
+def _read_segment(segment: ArchiveSegment) -> bytes:
+    member = segment.data
+    if member is None:
+        member = _read_file_member(segment.file, segment.offset, segment.length)
+    return gzip.decompress(member)
+
+
+def _error_record(segment: ArchiveSegment) -> bytes:
+    line = {
+        "type": "error",
+        "detail": "Archived history could not be read",
+        "segment_id": segment.id,
+        "communication_count": segment.communication_count,
+        "follow_up_count": segment.follow_up_count,
+        "first_at": segment.first_at.isoformat(),
+        "last_at": segment.last_at.isoformat(),
+    }
+    return (json.dumps(line, ensure_ascii=False) + "\n").encode()
+
+
+async def stream_segments(segments: list[ArchiveSegment]) -> AsyncIterator[bytes]:
+    """Yield archived records as NDJSON lines, newest segment first.
+
+    An unreadable segment becomes one ``{"type": "error", ...}`` line saying
+    which records are missing, so a partial history is never mistaken for a
+    complete one.
+    """
+    for segment in segments:
+        try:
+            data = await asyncio.to_thread(_read_segment, segment)
+        except (OSError, EOFError, zlib.error):
+            logger.exception("Archive segment %d unreadable (%s)", segment.id, segment.file or "database")
+            yield _error_record(segment)
+            continue
+        yield data
+
+
+async def import_archive_files(db: AsyncSession, batch_size: int = 100) -> tuple[int, int]:
+    """Copy segments still kept in ARCHIVE_DIR files into the database.
+
+    Returns ``(imported, unreadable)``; unreadable segments keep pointing at
+    their file and are reported by ``stream_segments()`` until the file is
+    restored and the import run again.
+    """
+    imported = unreadable = 0
+    after = 0
+    while True:
+        segments = (await db.execute(
+            select(ArchiveSegment)
+            .where(ArchiveSegment.data.is_(None), ArchiveSegment.id > after)
+            .order_by(ArchiveSegment.id)
+            .limit(batch_size)
+        )).scalars().all()
+        if not segments:
+            break
+        for segment in segments:
+            try:
+                member = await asyncio.to_thread(_read_file_member, segment.file, segment.offset, segment.length)
+                gzip.decompress(member)
+            except (OSError, EOFError, zlib.error):
+                logger.exception("Archive segment %d unreadable (%s)", segment.id, segment.file)
+                unreadable += 1
+                continue
+            segment.data, segment.file, segment.offset = member, None, None
+            imported += 1
+        after = segments[-1].id
+        await db.commit()
+    return imported, unreadable
@@ -0,0 +1,99 @@
+"""Static asset serving.
+
+``scripts/build_assets.py`` copies ``app/static/src`` into ``app/static/dist``
+with content-hashed filenames plus ``.gz``/``.br`` siblings and writes
+``manifest.json``. Templates call ``asset_url()`` so they pick up the
+fingerprinted file when a build exists and the plain source file otherwise
+(local development without a build step).
+"""
+import json
+import mimetypes
+import stat
+from pathlib import Path
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+STATIC_URL = "/static"
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest: dict[str, str] | None = None
+
+
+def load_manifest() -> dict[str, str]:
+    global _manifest
+    if _manifest is None:
+        try:
+            _manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(path: str) -> str:
+    """URL for a source asset path such as ``js/app.js``."""
+    fingerprinted = load_manifest().get(path)
+    if fingerprinted:
+        return f"{STATIC_URL}/dist/{fingerprinted}"
+    return f"{STATIC_URL}/src/{path}"
+
+
+def _content_type(path: str) -> str:
+    media_type, _ = mimetypes.guess_type(path)
+    if media_type is None:
+        return "application/octet-stream"
+    if media_type.startswith("text/") or media_type.endswith("javascript"):
+        return f"{media_type}; charset=utf-8"
+    return media_type
+
+
+def _accepted_encodings(scope: Scope) -> set[str]:
+    header = Headers(scope=scope).get("accept-encoding", "")
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``.br``/``.gz`` siblings by ``Accept-Encoding``.
+
+    Fingerprinted files under ``dist/`` get an immutable one-year cache;
+    everything else must be revalidated.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        accepted = _accepted_encodings(scope)
+        if scope["method"] in ("GET", "HEAD"):
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding not in accepted:
+                    continue
+                try:
+                    full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                except (OSError, ValueError):
+                    continue
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    response.headers["content-encoding"] = encoding
+                    response.headers["content-type"] = _content_type(path)
+                    break
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = IMMUTABLE_CACHE if path.startswith("dist/") else REVALIDATE_CACHE
+        return response
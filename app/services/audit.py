@@ -0,0 +1,291 @@
+"""Asynchronous, batched audit log.
+
+Flush hooks capture a before/after diff for every ORM insert, update and
+delete. Diffs are queued in memory after the transaction commits (rolled
+back work is never audited) and a background task writes them to the
+month-partitioned ``audit_log`` table with binary COPY, so a request's write
+path never waits on an extra INSERT. Each entry is written to the database
+its transaction committed to (campuses may live on their own database).
+"""
+import asyncio
+import enum
+import json
+import logging
+import uuid
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import asyncpg
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine_for
+from app.services.tenancy import current_campus_id
+
+logger = logging.getLogger(__name__)
+
+# Set by get_current_user so flush hooks know who made the change
+audit_actor: ContextVar[uuid.UUID | None] = ContextVar("audit_actor", default=None)
+
+EXCLUDED_TABLES = {"audit_log", "communication_search_grams"}
+REDACTED_COLUMNS = {"hashed_password"}
+COPY_COLUMNS = ["changed_at", "user_id", "campus_id", "table_name", "row_id", "action", "changes"]
+
+# Queue items are (database URL, entry)
+_queue: asyncio.Queue | None = None
+_known_partitions: set[tuple[str, int, int]] = set()
+_dropped = 0
+# Errors about the rows themselves: writing the same rows again cannot succeed
+_REJECTED_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        # Blobs (archived history) are recorded by size, not copied into the log
+        return f"<{len(value)} bytes>"
+    return value
+
+
+def _diff(obj, action: str) -> dict:
+    state = inspect(obj)
+    before: dict = {}
+    after: dict = {}
+    for attr in state.mapper.column_attrs:
+        key = attr.key
+        history = state.attrs[key].history
+        if action == "INSERT":
+            if history.added and history.added[0] is not None:
+                after[key] = history.added[0]
+        elif action == "DELETE":
+            value = history.unchanged[0] if history.unchanged else (history.deleted[0] if history.deleted else None)
+            if value is not None:
+                before[key] = value
+        elif history.has_changes():
+            before[key] = history.deleted[0] if history.deleted else None
+            after[key] = history.added[0] if history.added else None
+    for key in REDACTED_COLUMNS:
+        if key in before:
+            before[key] = "***"
+        if key in after:
+            after[key] = "***"
+    return {
+        "before": {k: _json_value(v) for k, v in before.items()},
+        "after": {k: _json_value(v) for k, v in after.items()},
+    }
+
+
+def record_bulk(session, table: str, action: str, rows: list[tuple[str, dict]]) -> None:
+    """Audit rows written with Core/raw SQL; ``rows`` are ``(row_id, after)`` pairs.
+
+    Queued on commit like flush-captured entries, so rolled back work is never audited.
+    """
+    record_rows(session, table, action, [(row_id, {}, after) for row_id, after in rows])
+
+
+def record_rows(session, table: str, action: str, rows: list[tuple[str, dict, dict]]) -> None:
+    """Like ``record_bulk`` with the previous values too; ``rows`` are ``(row_id, before, after)``."""
+    if not settings.AUDIT_ENABLED or table in EXCLUDED_TABLES:
+        return
+    entries: list = session.info.setdefault("audit_entries", [])
+    actor = audit_actor.get()
+    campus_id = current_campus_id()
+    now = datetime.now(timezone.utc)
+    for row_id, before, after in rows:
+        diff = {
+            "before": {k: "***" if k in REDACTED_COLUMNS else _json_value(v) for k, v in before.items()},
+            "after": {k: "***" if k in REDACTED_COLUMNS else _json_value(v) for k, v in after.items()},
+        }
+        entries.append((now, actor, campus_id, table, row_id, action, json.dumps(diff, ensure_ascii=False)))
+
+
+# ---- ORM hooks ----
+
+@event.listens_for(Session, "after_flush")
+def _capture(session: Session, flush_context) -> None:
+    if not settings.AUDIT_ENABLED:
+        return
+    entries: list = session.info.setdefault("audit_entries", [])
+    actor = audit_actor.get()
+    campus_id = current_campus_id()
+    now = datetime.now(timezone.utc)
+    changes = (
+        [(obj, "INSERT") for obj in session.new]
+        + [(obj, "UPDATE") for obj in session.dirty if session.is_modified(obj)]
+        + [(obj, "DELETE") for obj in session.deleted]
+    )
+    for obj, action in changes:
+        mapper = inspect(obj).mapper
+        table = mapper.local_table.name
+        if table in EXCLUDED_TABLES:
+            continue
+        diff = _diff(obj, action)
+        if action == "UPDATE" and not diff["after"] and not diff["before"]:
+            continue
+        row_id = ":".join(str(v) for v in mapper.primary_key_from_instance(obj))
+        entries.append((
+            now, actor, getattr(obj, "campus_id", None) or campus_id, table, row_id, action,
+            json.dumps(diff, ensure_ascii=False),
+        ))
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue(session: Session) -> None:
+    global _dropped
+    entries = session.info.pop("audit_entries", None)
+    if not entries:
+        return
+    if _queue is None:
+        # Writer not running (scripts, tests); nothing to hand the entries to
+        return
+    database = session.info.get("database", settings.DATABASE_URL)
+    dropped = 0
+    for entry in entries:
+        try:
+            _queue.put_nowait((database, entry))
+        except asyncio.QueueFull:
+            dropped += 1
+    if dropped:
+        _dropped += dropped
+        logger.error("Audit queue full; dropped %d entries (%d total)", dropped, _dropped)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session: Session, previous_transaction) -> None:
+    session.info.pop("audit_entries", None)
+
+
+# ---- writer ----
+
+async def _ensure_partitions(conn, database: str, entries: list) -> None:
+    months = {(database, e[0].year, e[0].month) for e in entries} - _known_partitions
+    for key in sorted(months):
+        await conn.execute("SELECT audit_log_ensure_partition($1)", date(key[1], key[2], 1))
+        _known_partitions.add(key)
+
+
+async def _write(database: str, entries: list) -> None:
+    async with engine_for(database).connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        await _ensure_partitions(raw, database, entries)
+        await raw.copy_records_to_table("audit_log", records=entries, columns=COPY_COLUMNS)
+
+
+async def run_writer() -> None:
+    """Drain the queue in batches of AUDIT_BATCH_SIZE or every AUDIT_FLUSH_INTERVAL_SECONDS."""
+    global _queue
+    _queue = asyncio.Queue(maxsize=settings.AUDIT_QUEUE_MAX)
+    batch: list = []
+    try:
+        while True:
+            batch = [await _queue.get()]
+            deadline = asyncio.get_running_loop().time() + settings.AUDIT_FLUSH_INTERVAL_SECONDS
+            while len(batch) < settings.AUDIT_BATCH_SIZE:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await _write_with_retry(batch)
+            batch = []
+    except asyncio.CancelledError:
+        if batch:
+            await _write_with_retry(batch, requeue=False)
+        await flush()
+        raise
+
+
+async def _write_with_retry(batch: list, attempts: int = 3, requeue: bool = True) -> None:
+    """Write ``batch``; on failure nothing is lost without a trace.
+
+    Rows the database rejects are split off by bisection (at most ~2n
+    COPYs) and each is logged in full. A batch that still fails for other
+    reasons (database unreachable) goes back on the queue, or is logged in
+    full when shutting down.
+    """
+    by_database: dict[str, list] = {}
+    for database, entry in batch:
+        by_database.setdefault(database, []).append(entry)
+    # One COPY per database; a failing database does not hold back the others
+    for database, entries in by_database.items():
+        for attempt in range(1, attempts + 1):
+            try:
+                await _write(database, entries)
+                break
+            except _REJECTED_ERRORS:
+                logger.exception("Audit batch of %d rejected; isolating the bad entries", len(entries))
+                await _write_bisecting(database, entries, requeue)
+                break
+            except Exception:
+                logger.exception("Audit batch of %d failed (attempt %d/%d)", len(entries), attempt, attempts)
+                if attempt < attempts:
+                    await asyncio.sleep(attempt)
+        else:
+            _give_back(database, entries, requeue)
+
+
+async def _write_bisecting(database: str, entries: list, requeue: bool) -> None:
+    mid = len(entries) // 2
+    for half in (entries[:mid], entries[mid:]):
+        if not half:
+            continue
+        try:
+            await _write(database, half)
+        except _REJECTED_ERRORS:
+            if len(half) == 1:
+                _log_lost("rejected by the database", database, half)
+            else:
+                await _write_bisecting(database, half, requeue)
+        except Exception:
+            logger.exception("Audit batch of %d failed while isolating rejected entries", len(half))
+            _give_back(database, half, requeue)
+
+
+def _give_back(database: str, entries: list, requeue: bool) -> None:
+    global _dropped
+    if not requeue or _queue is None:
+        _log_lost("not written before shutdown", database, entries)
+        return
+    for i, entry in enumerate(entries):
+        try:
+            _queue.put_nowait((database, entry))
+        except asyncio.QueueFull:
+            _dropped += len(entries) - i
+            _log_lost("dropped, audit queue full", database, entries[i:])
+            return
+    logger.warning("Requeued audit batch of %d entries", len(entries))
+
+
+def _log_lost(reason: str, database: str, entries: list) -> None:
+    """Log entries that will not reach audit_log in full, so they can be replayed by hand."""
+    target = make_url(database).render_as_string(hide_password=True)
+    for entry in entries:
+        logger.error(
+            "Audit entry %s: %s", reason,
+            json.dumps({"database": target, **dict(zip(COPY_COLUMNS, entry))}, default=str, ensure_ascii=False),
+        )
+
+
+async def flush() -> None:
+    """Write out everything still queued (called on shutdown)."""
+    if _queue is None:
+        return
+    batch = []
+    while not _queue.empty():
+        batch.append(_queue.get_nowait())
+        if len(batch) >= settings.AUDIT_BATCH_SIZE:
+            await _write_with_retry(batch, requeue=False)
+            batch = []
+    if batch:
+        await _write_with_retry(batch, requeue=False)
+
@@ -0,0 +1,221 @@
+"""Named in-process caches with cross-worker invalidation.
+
+Every ORM flush records which rows changed as ``(table, op, pk)`` events;
+rows referenced through a foreign key are recorded too (op ``"ref"``), so a
+new communication invalidates cached data tagged with its parent. The events
+are broadcast with ``pg_notify`` inside the committing transaction (so other
+workers hear about them exactly when the data becomes visible) and applied
+to this worker's caches after commit.
+
+A cache entry is dropped when one of its tags ``(table, pk)`` is hit, or the
+whole cache is cleared on any direct change to one of its ``tables``.
+"""
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "crm_cache_invalidate"
+# Identifies this process so it can skip its own broadcasts
+WORKER_ID = uuid.uuid4().hex
+# NOTIFY payloads are limited to 8000 bytes; larger batches degrade to a full flush
+MAX_NOTIFY_PAYLOAD = 7900
+
+Tag = tuple[str, str]
+_MISSING = object()
+
+
+class NamedCache:
+    def __init__(self, name: str, ttl: float, maxsize: int, tables: tuple[str, ...] = ()):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.tables = frozenset(tables)
+        self._data: OrderedDict[Any, tuple[float, Any, tuple[Tag, ...]]] = OrderedDict()
+        self._tags: dict[Tag, set] = {}
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, tags: tuple[Tag, ...] = ()) -> None:
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key) -> None:
+        if key in self._data:
+            self._drop(key)
+            self.invalidations += 1
+
+    def invalidate_tag(self, tag: Tag) -> None:
+        for key in list(self._tags.get(tag, ())):
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        self.invalidations += len(self._data)
+        self._data.clear()
+        self._tags.clear()
+
+    def _drop(self, key) -> None:
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+_registry: dict[str, NamedCache] = {}
+
+
+def named_cache(name: str, *, ttl: float, maxsize: int, tables: tuple[str, ...] = ()) -> NamedCache:
+    """Return the cache called ``name``, creating it on first use."""
+    cache = _registry.get(name)
+    if cache is None:
+        cache = _registry[name] = NamedCache(name, ttl, maxsize, tables)
+    return cache
+
+
+def all_stats() -> list[dict]:
+    return [cache.stats() for cache in _registry.values()]
+
+
+def clear_all() -> None:
+    for cache in _registry.values():
+        cache.clear()
+
+
+def apply_events(events) -> None:
+    """Apply ``(table, op, pk)`` change events to every registered cache."""
+    for table, op, pk in events:
+        tag = (table, pk)
+        for cache in _registry.values():
+            if op != "ref" and table in cache.tables:
+                cache.clear()
+            else:
+                cache.invalidate_tag(tag)
+
+
+def record_bulk_change(session, table: str, op: str = "UPDATE") -> None:
+    """Invalidate ``table``'s caches on commit after a Core/raw SQL write the flush hooks cannot see."""
+    session.info.setdefault("cache_events", set()).add((table, op, "*"))
+
+
+# ---- ORM hooks ----
+
+def _pk_string(mapper, obj) -> str:
+    return ":".join(str(v) for v in mapper.primary_key_from_instance(obj))
+
+
+def _object_events(events: set, obj, op: str) -> None:
+    mapper = inspect(obj).mapper
+    table = mapper.local_table
+    events.add((table.name, op, _pk_string(mapper, obj)))
+    for fk in table.foreign_keys:
+        prop = mapper.get_property_by_column(fk.parent)
+        value = getattr(obj, prop.key, None)
+        if value is not None:
+            events.add((fk.column.table.name, "ref", str(value)))
+
+
+def record_row_change(session, obj, op: str) -> None:
+    """Invalidate on commit for a row written by a Core statement that RETURNed the ORM object."""
+    _object_events(session.info.setdefault("cache_events", set()), obj, op)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    events: set = session.info.setdefault("cache_events", set())
+    changes = (
+        [(obj, "INSERT") for obj in session.new]
+        + [(obj, "UPDATE") for obj in session.dirty if session.is_modified(obj)]
+        + [(obj, "DELETE") for obj in session.deleted]
+    )
+    for obj, op in changes:
+        _object_events(events, obj, op)
+
+
+@event.listens_for(Session, "before_commit")
+def _broadcast_changes(session: Session) -> None:
+    events = session.info.get("cache_events")
+    if not events:
+        return
+    payload = json.dumps({"worker": WORKER_ID, "events": sorted(events)})
+    if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+        payload = json.dumps({"worker": WORKER_ID, "flush": True})
+    # Runs inside the transaction: delivered to listeners only if the commit succeeds
+    session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": INVALIDATION_CHANNEL, "payload": payload})
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_local_changes(session: Session) -> None:
+    events = session.info.pop("cache_events", None)
+    if events:
+        apply_events(events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session: Session, previous_transaction) -> None:
+    session.info.pop("cache_events", None)
+
+
+# ---- cross-worker bus ----
+
+async def handle_invalidation(message: dict) -> None:
+    """LISTEN callback for ``crm_cache_invalidate`` broadcasts from other workers."""
+    if message.get("worker") == WORKER_ID:
+        return
+    if message.get("flush"):
+        clear_all()
+        return
+    apply_events(tuple(e) for e in message.get("events", ()))
+
+
+async def handle_reconnect() -> None:
+    """Notifications may have been missed while disconnected; start cold."""
+    clear_all()
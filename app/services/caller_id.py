@@ -0,0 +1,64 @@
+"""Caller-ID lookup: "who is this?" for an incoming phone number.
+
+One indexed probe on ``parents.phone_e164`` joined to the linked students,
+fronted by a small per-worker LRU cache for repeat callers.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.parent import Parent
+from app.models.student import ParentStudent, Student
+from app.schemas.parent import CallerIdCard, CallerIdStudent
+from app.services.cache import named_cache
+from app.services.phone import normalize_phone
+from app.services.tenancy import current_campus_id
+
+# Any direct write to parents may change which parent a number resolves to
+# (including cached misses), so those flush the cache; student renames and
+# new links invalidate by tag.
+_cache = named_cache(
+    "caller_id",
+    ttl=settings.CALLER_ID_CACHE_TTL_SECONDS,
+    maxsize=settings.CALLER_ID_CACHE_SIZE,
+    tables=("parents",),
+)
+
+
+async def lookup_by_phone(db: AsyncSession, number: str) -> list[CallerIdCard] | None:
+    """Return parent cards matching ``number``, or None if it is not a valid phone number."""
+    e164 = normalize_phone(number)
+    if e164 is None:
+        return None
+    key = (current_campus_id(), e164)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    stmt = (
+        select(Parent, ParentStudent, Student)
+        .outerjoin(ParentStudent, ParentStudent.parent_id == Parent.id)
+        .outerjoin(Student, ParentStudent.student_id == Student.id)
+        .where(Parent.phone_e164 == e164)
+        .order_by(Parent.created_at.desc())
+    )
+    rows = (await db.execute(stmt)).all()
+
+    cards: dict = {}
+    for parent, ps, student in rows:
+        card = cards.get(parent.id)
+        if card is None:
+            card = cards[parent.id] = CallerIdCard(
+                id=parent.id, name=parent.name, phone=parent.phone, email=parent.email, students=[],
+            )
+        if student is not None:
+            card.students.append(CallerIdStudent(
+                student_id=student.id, student_name=student.name, grade=student.grade,
+                relationship_type=ps.relationship_type,
+            ))
+    result = list(cards.values())
+    tags = tuple(("parents", str(card.id)) for card in result) + tuple(
+        ("students", str(s.student_id)) for card in result for s in card.students
+    )
+    _cache.set(key, result, tags=tags)
+    return result
@@ -0,0 +1,200 @@
+"""Single-flight coalescing for hot GET endpoints.
+
+``@coalesced(name)`` wraps a GET handler so that concurrent identical
+requests (same route, same parameters, same authorization scope) share one
+execution: the first caller runs the handler on a DB session of the flight's
+own and renders the JSON body once; everyone who arrives while it is running
+awaits that result. Callers close their request session before waiting, so a
+coalesced request holds at most one pooled connection, and the execution is
+cancelled (with its query) once every caller has gone away. An optional
+micro-cache keeps the rendered body for a second or two, invalidated like any
+other named cache.
+
+Handlers must take ``db`` and ``current_user`` keyword arguments (the usual
+``Depends(get_db)`` / ``Depends(get_current_user)``); every other argument is
+part of the key. The decorator goes under ``@router.get`` so FastAPI still
+sees the original signature, plus a ``request`` parameter: the body is
+rendered through the matched route's ``response_model`` (validation and
+field filtering included), which FastAPI skips for a ready ``Response``.
+"""
+import asyncio
+import functools
+import inspect
+from collections.abc import Awaitable, Callable
+from typing import Any, Literal
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+
+from app.config import settings
+from app.services.cache import NamedCache, named_cache
+from app.services.query_budget import apply_budget
+from app.services.tenancy import campus_sessionmaker
+from app.services.tracing import span
+
+Scope = Literal["shared", "role", "user"]
+_SKIP_ARGS = {"db", "current_user", "request"}
+
+
+class FlightStats:
+    def __init__(self, name: str, scope: Scope, cache: NamedCache | None):
+        self.name = name
+        self.scope = scope
+        self.cache = cache
+        self.executions = 0
+        self.collapsed = 0
+        self.micro_cache_hits = 0
+        self.in_flight = 0
+
+    def stats(self) -> dict:
+        served = self.executions + self.collapsed + self.micro_cache_hits
+        return {
+            "name": self.name,
+            "scope": self.scope,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "micro_cache_hits": self.micro_cache_hits,
+            "in_flight": self.in_flight,
+            # Share of requests answered without running the handler
+            "saved_rate": round((served - self.executions) / served, 4) if served else None,
+            "micro_cache_ttl": self.cache.ttl if self.cache else None,
+        }
+
+
+_flights: dict[str, FlightStats] = {}
+_inflight: dict[tuple, asyncio.Future] = {}
+# flight -> callers still awaiting it
+_waiters: dict[asyncio.Future, int] = {}
+
+
+def all_stats() -> list[dict]:
+    return [flight.stats() for flight in _flights.values()]
+
+
+def _scope_key(scope: Scope, current_user) -> str:
+    # Responses are never shared across campuses
+    if scope == "user":
+        return f"user:{current_user.id}"
+    if scope == "role":
+        return f"{current_user.campus_id}:role:{current_user.role.value}"
+    return f"{current_user.campus_id}:shared"
+
+
+@functools.cache
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _render(result, route: APIRoute | None) -> bytes:
+    if isinstance(result, Response):
+        return result.body
+    if route is None or route.response_model is None:
+        return JSONResponse(content=jsonable_encoder(result)).body
+    adapter = _adapter(route.response_model)
+    try:
+        value = adapter.validate_python(result, from_attributes=True)
+    except ValidationError as exc:
+        raise ResponseValidationError(errors=exc.errors(), body=result) from exc
+    return adapter.dump_json(
+        value,
+        include=route.response_model_include,
+        exclude=route.response_model_exclude,
+        by_alias=route.response_model_by_alias,
+        exclude_unset=route.response_model_exclude_unset,
+        exclude_defaults=route.response_model_exclude_defaults,
+        exclude_none=route.response_model_exclude_none,
+    )
+
+
+def coalesced(
+    name: str,
+    *,
+    scope: Scope = "shared",
+    micro_cache_ttl: float | None = None,
+    tables: tuple[str, ...] = (),
+) -> Callable:
+    """Coalesce concurrent identical calls of a GET handler.
+
+    ``scope`` decides who may share a response: ``"shared"`` for data every
+    signed-in user of a campus sees the same way, ``"role"`` or ``"user"`` when the handler
+    filters by ``current_user``. ``micro_cache_ttl`` (default
+    COALESCE_MICRO_CACHE_SECONDS, 0 = off) keeps rendered bodies briefly;
+    writes to ``tables`` clear them.
+    """
+    ttl = settings.COALESCE_MICRO_CACHE_SECONDS if micro_cache_ttl is None else micro_cache_ttl
+    cache = named_cache(f"coalesce:{name}", ttl=ttl, maxsize=256, tables=tables) if ttl > 0 else None
+    flight_stats = _flights[name] = FlightStats(name, scope, cache)
+
+    def decorator(handler: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        signature = inspect.signature(handler)
+        takes_request = "request" in signature.parameters
+
+        async def execute(kwargs: dict, route: APIRoute | None) -> bytes:
+            # Runs on its own session: the leading request may disconnect before followers are served
+            async with campus_sessionmaker()() as db:
+                apply_budget(db, handler.__name__)
+                with span("handler", handler=handler.__name__):
+                    result = await handler(**kwargs, db=db)
+                with span("serialize"):
+                    return _render(result, route)
+
+        @functools.wraps(handler)
+        async def wrapper(**kwargs):
+            request: Request = kwargs["request"] if takes_request else kwargs.pop("request")
+            route = request.scope.get("route")
+            params = tuple(sorted((k, repr(v)) for k, v in kwargs.items() if k not in _SKIP_ARGS))
+            key = (name, _scope_key(scope, kwargs["current_user"]), params)
+            if cache is not None:
+                body = cache.get(key)
+                if body is not None:
+                    flight_stats.micro_cache_hits += 1
+                    return Response(content=body, media_type="application/json")
+
+            # Only the flight touches the database from here on: give the
+            # request's connection (user lookup) back to the pool first
+            await kwargs["db"].close()
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight_stats.executions += 1
+                flight_stats.in_flight += 1
+                call_kwargs = {k: v for k, v in kwargs.items() if k != "db"}
+                flight = _inflight[key] = asyncio.ensure_future(execute(call_kwargs, route))
+
+                def done(f: asyncio.Future) -> None:
+                    flight_stats.in_flight -= 1
+                    if _inflight.get(key) is f:
+                        del _inflight[key]
+                    if not f.cancelled() and f.exception() is None and cache is not None:
+                        cache.set(key, f.result())
+
+                flight.add_done_callback(done)
+            else:
+                flight_stats.collapsed += 1
+            # shield: one caller going away must not cancel the shared
+            # execution; the last one to go cancels it below
+            _waiters[flight] = _waiters.get(flight, 0) + 1
+            try:
+                with span("coalesce.wait", flight=name, leader=leader):
+                    body = await asyncio.shield(flight)
+            finally:
+                _waiters[flight] -= 1
+                if not _waiters[flight]:
+                    del _waiters[flight]
+                    if not flight.done():
+                        # Nobody is left to serve; later callers start afresh
+                        if _inflight.get(key) is flight:
+                            del _inflight[key]
+                        flight.cancel()
+            return Response(content=body, media_type="application/json")
+
+        if not takes_request:
+            request_param = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), request_param])
+        return wrapper
+
+    return decorator
@@ -0,0 +1,257 @@
+"""Duplicate-parent detection and merging.
+
+``scan_duplicates()`` never compares every pair of parents. Each batch of
+parents (keyset order, one transaction per batch) is joined against the
+whole table on three indexed blocking keys, and only pairs sharing a block
+are scored:
+
+* ``phone`` – equal E.164 number (``ix_parents_phone_e164``), weight 3
+* ``email`` – equal ``lower(email)`` (``ix_parents_campus_id_email_lower``), weight 3
+* ``name``  – name keys with trigram similarity above
+  ``DEDUPE_NAME_SIMILARITY`` (``ix_parents_name_key_trgm``), weight
+  4 × similarity
+
+Pairs scoring at least ``DEDUPE_MIN_SCORE`` are upserted into
+``parent_duplicate_candidates`` (lower id first, so each pair is found once).
+With the defaults a shared phone or e-mail alone is not enough – households
+often share a number – but either one plus a similar name is. Candidates a
+full scan no longer finds are removed; dismissed pairs are kept. Parents are
+only ever paired within their own campus; a scan started from a request
+covers the signed-in user's campus, the nightly script every campus in the
+database.
+
+``merge_parents()`` folds duplicates into a surviving parent in a single
+transaction: every reference is moved with one ``UPDATE`` per table, then the
+duplicates are deleted. Scans and merges share an advisory lock so a batch
+never records a pair for a parent that is being merged away.
+"""
+import logging
+import uuid
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.parent import NAME_KEY_SQL, Parent
+from app.services.audit import record_bulk
+from app.services.cache import record_bulk_change
+from app.services.tenancy import current_campus_id
+
+logger = logging.getLogger(__name__)
+
+PHONE_WEIGHT = 3
+EMAIL_WEIGHT = 3
+NAME_WEIGHT = 4
+
+_LOCK_KEY = "parent_dedupe"
+
+_SCAN_SQL = """
+    WITH batch AS (
+        SELECT id, campus_id, phone_e164, lower(email) AS email_key, {a_name_key} AS name_key
+        FROM parents a
+        WHERE id = ANY(:ids)
+    ),
+    pairs AS (
+        SELECT a.id AS parent_id, p.id AS duplicate_id
+        FROM batch a JOIN parents p ON p.phone_e164 = a.phone_e164 AND p.campus_id = a.campus_id AND p.id > a.id
+      UNION
+        SELECT a.id, p.id
+        FROM batch a JOIN parents p ON lower(p.email) = a.email_key AND p.campus_id = a.campus_id AND p.id > a.id
+      UNION
+        SELECT a.id, p.id
+        FROM batch a JOIN parents p ON {p_name_key} % a.name_key AND p.campus_id = a.campus_id AND p.id > a.id
+    ),
+    scored AS (
+        SELECT pr.parent_id, pr.duplicate_id,
+               coalesce(a.phone_e164 = d.phone_e164, false) AS phone,
+               coalesce(lower(a.email) = lower(d.email), false) AS email,
+               similarity({a_name_key}, {d_name_key}) AS name_similarity
+        FROM pairs pr
+        JOIN parents a ON a.id = pr.parent_id
+        JOIN parents d ON d.id = pr.duplicate_id
+    )
+    INSERT INTO parent_duplicate_candidates AS c (parent_id, duplicate_id, score, reasons)
+    SELECT parent_id, duplicate_id, score, reasons
+    FROM (
+        SELECT parent_id, duplicate_id,
+               {phone_weight} * CAST(phone AS integer) + {email_weight} * CAST(email AS integer)
+                   + {name_weight} * name_similarity AS score,
+               array_remove(ARRAY[
+                   CASE WHEN email THEN 'email' END,
+                   CASE WHEN name_similarity >= :name_similarity THEN 'name' END,
+                   CASE WHEN phone THEN 'phone' END
+               ], NULL) AS reasons
+        FROM scored
+    ) s
+    WHERE score >= :min_score
+    ON CONFLICT (parent_id, duplicate_id)
+    DO UPDATE SET score = EXCLUDED.score, reasons = EXCLUDED.reasons, detected_at = now()
+    RETURNING c.dismissed
+"""
+
+# One link per student is moved; links the survivor already has (or a second
+# duplicate's link to the same student) are dropped with the duplicate.
+_MOVE_STUDENT_LINKS_SQL = """
+    UPDATE parent_student ps
+    SET parent_id = :survivor_id
+    FROM (
+        SELECT DISTINCT ON (student_id) parent_id, student_id
+        FROM parent_student
+        WHERE parent_id = ANY(:duplicate_ids)
+          AND student_id NOT IN (SELECT student_id FROM parent_student WHERE parent_id = :survivor_id)
+        ORDER BY student_id, parent_id
+    ) m
+    WHERE ps.parent_id = m.parent_id AND ps.student_id = m.student_id
+    RETURNING ps.student_id
+"""
+
+_MOVE_MATCH_CANDIDATES_SQL = """
+    UPDATE registration_match_candidates rc
+    SET parent_id = :survivor_id
+    FROM (
+        SELECT DISTINCT ON (registration_id) registration_id, parent_id
+        FROM registration_match_candidates
+        WHERE parent_id = ANY(:duplicate_ids)
+          AND registration_id NOT IN (
+              SELECT registration_id FROM registration_match_candidates WHERE parent_id = :survivor_id
+          )
+        ORDER BY registration_id, score DESC, parent_id
+    ) m
+    WHERE rc.registration_id = m.registration_id AND rc.parent_id = m.parent_id
+"""
+
+# Tables whose rows simply follow the survivor (row ids returned for the audit log)
+_REPARENTED = ("communication_records", "follow_ups", "registrations", "archive_segments")
+
+
+@dataclass
+class ScanResult:
+    parents: int = 0
+    candidates: int = 0
+    pending: int = 0
+    removed: int = 0
+
+
+@dataclass
+class MergeResult:
+    survivor: Parent
+    merged: list[uuid.UUID]
+    moved: dict[str, int] = field(default_factory=dict)
+
+
+async def _next_batch(db: AsyncSession, after: uuid.UUID, batch_size: int) -> list[uuid.UUID]:
+    stmt = select(Parent.id).where(Parent.id > after).order_by(Parent.id).limit(batch_size)
+    return list((await db.execute(stmt)).scalars().all())
+
+
+async def scan_duplicates(db: AsyncSession, batch_size: int | None = None) -> ScanResult:
+    """Rebuild the duplicate candidates over all parents, one transaction per batch."""
+    batch_size = batch_size or settings.DEDUPE_BATCH_SIZE
+    sql = _SCAN_SQL.format(
+        a_name_key=NAME_KEY_SQL.format(column="a.name"),
+        p_name_key=NAME_KEY_SQL.format(column="p.name"),
+        d_name_key=NAME_KEY_SQL.format(column="d.name"),
+        phone_weight=PHONE_WEIGHT,
+        email_weight=EMAIL_WEIGHT,
+        name_weight=NAME_WEIGHT,
+    )
+    # Candidates touched by this run get a later detected_at than this
+    started = (await db.execute(text("SELECT now()"))).scalar_one()
+    await db.commit()
+
+    total = ScanResult()
+    after = uuid.UUID(int=0)
+    while parent_ids := await _next_batch(db, after, batch_size):
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock_shared(hashtextextended(:lock_key, 0))"), {"lock_key": _LOCK_KEY}
+        )
+        await db.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {"threshold": str(settings.DEDUPE_NAME_SIMILARITY)},
+        )
+        dismissed = (await db.execute(text(sql), {
+            "ids": parent_ids,
+            "name_similarity": settings.DEDUPE_NAME_SIMILARITY,
+            "min_score": settings.DEDUPE_MIN_SCORE,
+        })).scalars().all()
+        await db.commit()
+        total.parents += len(parent_ids)
+        total.candidates += len(dismissed)
+        total.pending += dismissed.count(False)
+        after = parent_ids[-1]
+        logger.info("Scanned %d parents, %d candidate pairs so far", total.parents, total.candidates)
+
+    removed = await db.execute(
+        text(
+            "DELETE FROM parent_duplicate_candidates c USING parents p "
+            "WHERE p.id = c.parent_id AND NOT c.dismissed AND c.detected_at < :started "
+            "AND (CAST(:campus_id AS uuid) IS NULL OR p.campus_id = :campus_id)"
+        ),
+        {"started": started, "campus_id": current_campus_id()},
+    )
+    await db.commit()
+    total.removed = removed.rowcount
+    return total
+
+
+async def merge_parents(
+    db: AsyncSession, survivor_id: uuid.UUID, duplicate_ids: list[uuid.UUID]
+) -> MergeResult:
+    """Move everything of ``duplicate_ids`` onto ``survivor_id`` and delete them; caller commits."""
+    duplicate_ids = list(dict.fromkeys(duplicate_ids))
+    if not duplicate_ids:
+        raise HTTPException(status_code=400, detail="No parents to merge")
+    if survivor_id in duplicate_ids:
+        raise HTTPException(status_code=400, detail="A parent cannot be merged into itself")
+
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtextextended(:lock_key, 0))"), {"lock_key": _LOCK_KEY}
+    )
+    # Row locks in id order, so overlapping merges cannot deadlock
+    parents = {p.id: p for p in (await db.execute(
+        select(Parent).where(Parent.id.in_([survivor_id, *duplicate_ids])).order_by(Parent.id).with_for_update()
+    )).scalars().all()}
+    if survivor_id not in parents:
+        raise HTTPException(status_code=404, detail="Parent not found")
+    missing = [str(pid) for pid in duplicate_ids if pid not in parents]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Parents not found: {missing}")
+    survivor = parents[survivor_id]
+    duplicates = [parents[pid] for pid in duplicate_ids]
+
+    params = {"survivor_id": survivor_id, "duplicate_ids": duplicate_ids}
+    moved: dict[str, int] = {}
+    student_ids = (await db.execute(text(_MOVE_STUDENT_LINKS_SQL), params)).scalars().all()
+    moved["parent_student"] = len(student_ids)
+    await db.execute(text(_MOVE_MATCH_CANDIDATES_SQL), params)
+    for table in _REPARENTED:
+        row_ids = (await db.execute(text(
+            f"UPDATE {table} SET parent_id = :survivor_id WHERE parent_id = ANY(:duplicate_ids) RETURNING id"
+        ), params)).scalars().all()
+        moved[table] = len(row_ids)
+        if row_ids:
+            record_bulk_change(db, table)
+            record_bulk(db, table, "UPDATE", [(str(row_id), {"parent_id": survivor_id}) for row_id in row_ids])
+    if student_ids:
+        record_bulk_change(db, "parent_student")
+        record_bulk(db, "parent_student", "UPDATE", [
+            (f"{survivor_id}:{student_id}", {"parent_id": survivor_id}) for student_id in student_ids
+        ])
+
+    # Keep what only the duplicates knew; the survivor's own values win
+    for dup in duplicates:
+        survivor.email = survivor.email or dup.email
+        survivor.address = survivor.address or dup.address
+        if dup.note and dup.note not in (survivor.note or ""):
+            survivor.note = f"{survivor.note}\n{dup.note}" if survivor.note else dup.note
+        db.expunge(dup)
+    await db.flush()
+
+    # Core delete: the ORM cascades would load every remaining child row. Leftover
+    # links and review candidates go with the ON DELETE CASCADE foreign keys.
+    await db.execute(delete(Parent).where(Parent.id.in_(duplicate_ids)).execution_options(synchronize_session=False))
+    record_bulk_change(db, "parents", "DELETE")
+    record_bulk(db, "parents", "DELETE", [(str(pid), {"merged_into": survivor_id}) for pid in duplicate_ids])
+    return MergeResult(survivor=survivor, merged=duplicate_ids, moved=moved)
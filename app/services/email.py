@@ -6,9 +6,12 @@ once SMTP settings are configured in app/config.py.
 
 import logging
 
+from app.services.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
+@traced("email.send")
 async def send_notification_email(to_email: str, to_name: str, subject: str, body: str) -> bool:
     """Send a notification email. Currently a placeholder that logs the action."""
     logger.info(
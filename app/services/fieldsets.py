@@ -0,0 +1,166 @@
+"""Sparse fieldsets (``?fields=``) and embedded relations (``?include=``).
+
+A router declares a ``View`` of its resource: the fields a client may ask for
+(plain columns, or expressions that need an outer join such as a user's name)
+and the relations it may embed. ``View.parse()`` turns the query parameters
+into a ``Projection`` whose ``select()`` names only the requested columns and
+joins; each embed is a correlated JSON subquery (``json_build_object`` for a
+to-one relation, ``json_agg`` for a to-many), so related rows come back in the
+same round trip. Endpoints add their usual ``where``/``order_by`` to it.
+
+``fields=id,name,students.grade&include=students`` — ``id`` is always
+returned; a dotted field narrows an embed (and implies its ``include``).
+
+``View.schema`` is the response model of a projected row: every field and
+embed optional, and only the selected ones serialized. List endpoints declare
+``response_model=list[FooOut] | list[foo_view.schema]``.
+"""
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model, model_serializer
+from sqlalchemy import JSON, Select, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.engine import Result
+from sqlalchemy.sql.elements import ColumnElement
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return (id is always included); 'relation.field' narrows an include"
+INCLUDE_DESCRIPTION = "Comma-separated related resources to embed"
+
+
+@dataclass(frozen=True)
+class Field:
+    expr: ColumnElement
+    # (target, onclause) pairs outer-joined when the field is selected
+    joins: tuple[tuple[Any, ColumnElement], ...] = ()
+
+
+@dataclass(frozen=True)
+class Embed:
+    source: Any
+    # Ties the subquery to the outer row, e.g. ``Parent.id == FollowUp.parent_id``
+    correlate: ColumnElement
+    fields: dict[str, ColumnElement]
+    default: tuple[str, ...]
+    many: bool = False
+    joins: tuple[tuple[Any, ColumnElement], ...] = ()
+    order_by: tuple[ColumnElement, ...] = ()
+
+    def subquery(self, names: list[str], outer):
+        pairs = []
+        for name in names:
+            pairs += [literal_column(f"'{name}'"), self.fields[name]]
+        obj = func.json_build_object(*pairs, type_=JSON)
+        if self.many:
+            agg = func.json_agg(aggregate_order_by(obj, *self.order_by) if self.order_by else obj, type_=JSON)
+            stmt = select(func.coalesce(agg, literal_column("'[]'::json"), type_=JSON))
+        else:
+            stmt = select(obj)
+        stmt = stmt.select_from(self.source)
+        for target, onclause in self.joins:
+            stmt = stmt.join(target, onclause)
+        # Correlate with the outer resource only: a field join may put the embedded table in the outer FROM too
+        return stmt.where(self.correlate).correlate(outer).scalar_subquery()
+
+
+class Projection:
+    def __init__(self, view: "View", fields: list[str], embeds: dict[str, list[str]]):
+        self.view = view
+        self.fields = fields
+        self.embeds = embeds
+
+    def select(self) -> Select:
+        columns, joins = [], {}
+        for name in self.fields:
+            f = self.view.fields[name]
+            columns.append(f.expr.label(name))
+            for target, onclause in f.joins:
+                joins.setdefault(target, onclause)
+        for name, names in self.embeds.items():
+            columns.append(self.view.includes[name].subquery(names, self.view.model).label(name))
+        stmt = select(*columns).select_from(self.view.model)
+        for target, onclause in joins.items():
+            stmt = stmt.outerjoin(target, onclause)
+        return stmt
+
+    def rows(self, result: Result) -> list["Selected"]:
+        return [self.view.schema.model_validate(dict(row)) for row in result.mappings()]
+
+
+class Selected(BaseModel):
+    """Base of ``View.schema``: serializes the fields that were set, i.e. selected."""
+
+    @model_serializer(mode="wrap")
+    def _selected_only(self, handler):
+        return {key: value for key, value in handler(self).items() if key in self.model_fields_set}
+
+
+def _annotation(name: str, expr: ColumnElement, out: type[BaseModel] | None):
+    if out is not None and name in out.model_fields:
+        return out.model_fields[name].annotation
+    try:
+        return expr.type.python_type
+    except NotImplementedError:
+        return Any
+
+
+class View:
+    def __init__(
+        self,
+        model,
+        fields: dict[str, ColumnElement | Field],
+        includes: dict[str, Embed] | None = None,
+        *,
+        out: type[BaseModel] | None = None,
+    ):
+        """``out`` is the full representation; projected fields take their types from it."""
+        self.model = model
+        self.fields = {name: f if isinstance(f, Field) else Field(f) for name, f in fields.items()}
+        self.includes = includes or {}
+        definitions: dict[str, Any] = {
+            name: (_annotation(name, f.expr, out) | None, None) for name, f in self.fields.items()
+        }
+        for name, embed in self.includes.items():
+            definitions[name] = ((list[dict[str, Any]] if embed.many else dict[str, Any]) | None, None)
+        name = (out.__name__.removesuffix("Out") if out else model.__name__) + "Fields"
+        self.schema: type[Selected] = create_model(name, __base__=Selected, **definitions)
+
+    def parse(self, fields: str | None, include: str | None) -> Projection | None:
+        """Projection for the query parameters, or None when neither is given (full representation)."""
+        if fields is None and include is None:
+            return None
+        requested = [name.strip() for name in (fields or "").split(",") if name.strip()]
+        includes = [name.strip() for name in (include or "").split(",") if name.strip()]
+
+        top = [name for name in requested if "." not in name]
+        nested: dict[str, list[str]] = {}
+        for name in requested:
+            if "." in name:
+                relation, _, sub = name.partition(".")
+                nested.setdefault(relation, []).append(sub)
+
+        unknown = [name for name in top if name not in self.fields]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields {unknown}; allowed: {sorted(self.fields)}",
+            )
+        unknown = [name for name in [*includes, *nested] if name not in self.includes]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown include {unknown}; allowed: {sorted(self.includes)}",
+            )
+
+        selected = ["id", *dict.fromkeys(name for name in top if name != "id")] if top else list(self.fields)
+        embeds = {}
+        for relation in dict.fromkeys([*includes, *nested]):
+            embed = self.includes[relation]
+            names = list(dict.fromkeys(nested.get(relation, ())))
+            bad = [name for name in names if name not in embed.fields]
+            if bad:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown {relation} fields {bad}; allowed: {sorted(embed.fields)}",
+                )
+            embeds[relation] = names or list(embed.default)
+        return Projection(self, selected, embeds)
@@ -0,0 +1,114 @@
+"""Household graph: everyone connected to a parent or student through parent_student.
+
+One recursive CTE walks the bipartite parent–student graph from the anchor
+(its parents, their other children, those children's other parents, ...) and
+returns every edge with both ends' details and each parent's latest contact.
+``UNION`` de-duplicates edges, so the walk stops once no new edge is found;
+both directions are index lookups (the primary key for parent -> students,
+``ix_parent_student_student_id_parent_id`` for student -> parents). Only
+members of the signed-in user's campus are returned.
+"""
+import uuid
+from typing import Literal
+
+from fastapi import HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.communication import CommunicationRecord
+from app.models.parent import Parent
+from app.models.student import Student
+from app.services.tenancy import current_campus_id
+
+_HOUSEHOLD_SQL = """
+    WITH RECURSIVE family(parent_id, student_id, relationship_type) AS (
+        SELECT ps.parent_id, ps.student_id, ps.relationship_type
+        FROM parent_student ps
+        WHERE ps.{anchor_column} = :anchor_id
+      UNION
+        SELECT ps.parent_id, ps.student_id, ps.relationship_type
+        FROM family f
+        JOIN parent_student ps ON ps.parent_id = f.parent_id OR ps.student_id = f.student_id
+    )
+    SELECT f.parent_id, f.student_id, f.relationship_type,
+           p.name AS parent_name, p.phone, p.email,
+           s.name AS student_name, s.grade,
+           lc.created_at AS last_contact_at, lc.contact_type AS last_contact_type
+    FROM family f
+    JOIN parents p ON p.id = f.parent_id
+    JOIN students s ON s.id = f.student_id
+    LEFT JOIN LATERAL (
+        SELECT c.created_at, c.contact_type
+        FROM communication_records c
+        WHERE c.parent_id = f.parent_id
+        ORDER BY c.created_at DESC
+        LIMIT 1
+    ) lc ON true
+    WHERE CAST(:campus_id AS uuid) IS NULL OR (p.campus_id = :campus_id AND s.campus_id = :campus_id)
+    ORDER BY s.name, p.name
+"""
+
+
+def _last_contact(created_at, contact_type) -> dict | None:
+    if created_at is None:
+        return None
+    return {"created_at": created_at.isoformat(), "contact_type": contact_type}
+
+
+async def get_household(db: AsyncSession, kind: Literal["parent", "student"], anchor_id: uuid.UUID) -> dict:
+    """Connected family of a parent or student: parents, students, links and latest contacts."""
+    rows = (await db.execute(
+        text(_HOUSEHOLD_SQL.format(anchor_column=f"{kind}_id")), {"anchor_id": anchor_id, "campus_id": current_campus_id()}
+    )).all()
+
+    parents: dict[uuid.UUID, dict] = {}
+    students: dict[uuid.UUID, dict] = {}
+    links = []
+    for r in rows:
+        parents.setdefault(r.parent_id, {
+            "id": str(r.parent_id),
+            "name": r.parent_name,
+            "phone": r.phone,
+            "email": r.email,
+            "last_contact": _last_contact(r.last_contact_at, r.last_contact_type),
+        })
+        students.setdefault(r.student_id, {"id": str(r.student_id), "name": r.student_name, "grade": r.grade})
+        links.append({
+            "parent_id": str(r.parent_id),
+            "student_id": str(r.student_id),
+            "relationship_type": r.relationship_type,
+        })
+
+    if not rows:
+        # No links at all: the household is just the anchor (if it exists)
+        if kind == "parent":
+            parent = await db.get(Parent, anchor_id)
+            if parent is None:
+                raise HTTPException(status_code=404, detail="Parent not found")
+            latest = (await db.execute(
+                select(CommunicationRecord.created_at, CommunicationRecord.contact_type)
+                .where(CommunicationRecord.parent_id == anchor_id)
+                .order_by(CommunicationRecord.created_at.desc())
+                .limit(1)
+            )).first()
+            parents[parent.id] = {
+                "id": str(parent.id),
+                "name": parent.name,
+                "phone": parent.phone,
+                "email": parent.email,
+                "last_contact": _last_contact(latest.created_at, latest.contact_type.value) if latest else None,
+            }
+        else:
+            student = await db.get(Student, anchor_id)
+            if student is None:
+                raise HTTPException(status_code=404, detail="Student not found")
+            students[student.id] = {"id": str(student.id), "name": student.name, "grade": student.grade}
+
+    contacts = [p["last_contact"] for p in parents.values() if p["last_contact"]]
+    return {
+        "anchor": {"kind": kind, "id": str(anchor_id)},
+        "parents": list(parents.values()),
+        "students": list(students.values()),
+        "links": links,
+        "last_contact": max(contacts, key=lambda c: c["created_at"]) if contacts else None,
+    }
@@ -0,0 +1,129 @@
+"""``Idempotency-Key`` support for create endpoints.
+
+A request carrying the header takes a transaction-scoped advisory lock on
+``(user, key)`` before doing anything else. The endpoint stores its response
+with ``Idempotency.save()`` in the same transaction as its write, so:
+
+* a retry that arrives after the commit is answered from the stored response;
+* a duplicate that arrives while the first request is still running waits on
+  the lock, then replays the stored response instead of writing again;
+* if the first request fails, nothing is stored and a retry runs normally.
+"""
+import asyncio
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import database_urls, session_maker_for
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class Idempotency:
+    def __init__(
+        self,
+        key: str | None = None,
+        user_id: uuid.UUID | None = None,
+        request_hash: str | None = None,
+        replay: JSONResponse | None = None,
+    ):
+        self.key = key
+        self.user_id = user_id
+        self.request_hash = request_hash
+        # Stored response of an earlier identical request; return it as-is
+        self.replay = replay
+
+    async def save(self, db: AsyncSession, status_code: int, body) -> None:
+        """Record the response; call before the endpoint's commit."""
+        if self.key is None:
+            return
+        values = {
+            "request_hash": self.request_hash,
+            "status_code": status_code,
+            "response_body": jsonable_encoder(body),
+            "created_at": func.now(),
+            "expires_at": func.now() + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+        }
+        # Overwrites an expired entry for the same key
+        stmt = insert(IdempotencyKey).values(user_id=self.user_id, key=self.key, **values)
+        stmt = stmt.on_conflict_do_update(index_elements=["user_id", "key"], set_=values)
+        await db.execute(stmt)
+
+
+async def _request_hash(request: Request) -> str:
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    # Multipart boundaries change on every resubmit, so only JSON bodies are compared
+    if request.headers.get("content-type", "").startswith("application/json"):
+        digest.update(await request.body())
+    return digest.hexdigest()
+
+
+async def begin(request: Request, db: AsyncSession, user_id: uuid.UUID) -> Idempotency:
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return Idempotency()
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+    request_hash = await _request_hash(request)
+    # Held until the endpoint commits or rolls back; concurrent duplicates queue here
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtextextended(:lock_key, 0))"),
+        {"lock_key": f"idempotency:{user_id}:{key}"},
+    )
+    stored = (await db.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > func.now(),
+        )
+    )).scalar_one_or_none()
+    if stored is None:
+        return Idempotency(key, user_id, request_hash)
+    if stored.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_HEADER} was already used for a different request")
+    replay = JSONResponse(
+        status_code=stored.status_code,
+        content=stored.response_body,
+        headers={"Idempotent-Replayed": "true"},
+    )
+    return Idempotency(key, user_id, request_hash, replay=replay)
+
+
+async def purge_expired() -> int:
+    purged = 0
+    for url in database_urls():
+        async with session_maker_for(url)() as db:
+            result = await db.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+            )
+            await db.commit()
+            purged += result.rowcount
+    return purged
+
+
+async def run_purger() -> None:
+    """Delete expired keys every PURGE_INTERVAL_SECONDS (expired keys are already ignored on read)."""
+    while True:
+        await asyncio.sleep(PURGE_INTERVAL_SECONDS)
+        try:
+            purged = await purge_expired()
+            if purged:
+                logger.info("Purged %d expired idempotency keys", purged)
+        except Exception:
+            logger.exception("Idempotency key purge failed")
@@ -0,0 +1,207 @@
+"""Adaptive concurrency limit and priority load shedding for the API.
+
+The latency of every admitted critical and normal request, from admission
+to the last byte (so time spent waiting for a pooled connection counts), is
+fed into an AIMD limiter. While requests complete close to their no-load
+baseline the limit creeps up; once the window average exceeds
+``baseline * CONCURRENCY_LATENCY_TOLERANCE`` (the DB or the pool is
+saturated) it is cut multiplicatively. Low-priority requests are admitted
+but not measured: imports and scans take seconds by design. ``LoadShedMiddleware`` admits
+an API request only while the in-flight count is below its priority's share
+of the limit, and otherwise answers ``503`` with ``Retry-After`` straight
+away instead of letting the request queue inside SQLAlchemy.
+"""
+import json
+import re
+import time
+from collections import deque
+from enum import IntEnum
+
+from app.config import settings
+
+
+class Priority(IntEnum):
+    critical = 0
+    normal = 1
+    low = 2
+
+
+# Share of the current limit each priority may fill; critical traffic always
+# has the top of the window to itself.
+ADMISSION_SHARE = {Priority.critical: 1.0, Priority.normal: 0.85, Priority.low: 0.5}
+RETRY_AFTER_SECONDS = {Priority.critical: 1, Priority.normal: 2, Priority.low: 10}
+# The baseline window is kept as this many per-slice minimums
+BASELINE_SLICES = 10
+# Requests above the pool size that can still be admitted by default: some
+# are answered from caches and never check out a connection
+POOL_HEADROOM_SHARE = 0.25
+
+# Login, caller-ID, typeahead and front-desk walk-in registration (check-in)
+_CRITICAL = [
+    ("POST", re.compile(r"^/api/auth/login$")),
+    ("GET", re.compile(r"^/api/auth/me$")),
+    ("GET", re.compile(r"^/api/lookup/")),
+    ("GET", re.compile(r"^/api/typeahead")),
+    ("POST", re.compile(r"^/api/info-sessions/[^/]+/registrations$")),
+]
+# Bulk imports, exports and other heavy scans
+_LOW = [
+    ("POST", re.compile(r"/registrations/import$")),
+    ("POST", re.compile(r"/send-email$")),
+    ("GET", re.compile(r"^/api/parents/[^/]+/archive$")),
+    ("POST", re.compile(r"^/api/parents/batch-detail$")),
+    ("GET", re.compile(r"^/api/audit")),
+    ("GET", re.compile(r"^/api/communications/search")),
+    ("POST", re.compile(r"^/api/reports/refresh$")),
+    ("POST", re.compile(r"^/api/parents/duplicates/scan$")),
+]
+
+
+def classify(method: str, path: str) -> Priority:
+    for m, pattern in _CRITICAL:
+        if method == m and pattern.search(path):
+            return Priority.critical
+    for m, pattern in _LOW:
+        if method == m and pattern.search(path):
+            return Priority.low
+    return Priority.normal
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float,
+        baseline_window_seconds: float,
+        window_seconds: float = 0.5,
+        backoff: float = 0.9,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.window_seconds = window_seconds
+        self.backoff = backoff
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self.baseline_window_seconds = baseline_window_seconds
+        # [slice start, lowest window average in the slice], oldest first
+        self._baseline_slices: deque[list[float]] = deque()
+        self._window_start = time.monotonic()
+        self._window_total = 0.0
+        self._window_count = 0
+        self._window_peak_in_flight = 0
+        self.admitted = {p.name: 0 for p in Priority}
+        self.shed = {p.name: 0 for p in Priority}
+        self.last_window_ms: float | None = None
+
+    def try_acquire(self, priority: Priority) -> bool:
+        if self.in_flight >= max(1, int(self.limit * ADMISSION_SHARE[priority])):
+            self.shed[priority.name] += 1
+            return False
+        self.in_flight += 1
+        self._window_peak_in_flight = max(self._window_peak_in_flight, self.in_flight)
+        self.admitted[priority.name] += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def observe(self, seconds: float) -> None:
+        """Record one request latency; adjusts the limit once per window."""
+        self._window_total += seconds
+        self._window_count += 1
+        now = time.monotonic()
+        if now - self._window_start < self.window_seconds:
+            return
+        avg = self._window_total / self._window_count
+        self.last_window_ms = avg * 1000
+        self._update_baseline(now, avg)
+        if avg > self.baseline * self.tolerance:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif self._window_peak_in_flight >= int(self.limit * ADMISSION_SHARE[Priority.normal]):
+            # Only grow while the current limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1)
+        self._window_start = now
+        self._window_total = 0.0
+        self._window_count = 0
+        self._window_peak_in_flight = self.in_flight
+
+    def _update_baseline(self, now: float, avg: float) -> None:
+        """Baseline = lowest window average over the baseline window.
+
+        Saturated windows never lower it, and they only become the baseline
+        once the whole window has been saturated; so a permanently slower
+        database is accepted as the new normal, but not a few seconds of overload.
+        """
+        slice_seconds = self.baseline_window_seconds / BASELINE_SLICES
+        slices = self._baseline_slices
+        if slices and now - slices[-1][0] < slice_seconds:
+            slices[-1][1] = min(slices[-1][1], avg)
+        else:
+            slices.append([now, avg])
+        while now - slices[0][0] >= self.baseline_window_seconds:
+            slices.popleft()
+        self.baseline = min(lowest for _, lowest in slices)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "baseline_ms": round(self.baseline * 1000, 3) if self.baseline is not None else None,
+            "last_window_ms": round(self.last_window_ms, 3) if self.last_window_ms is not None else None,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+_pool_capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+limiter = AdaptiveLimiter(
+    initial=settings.CONCURRENCY_LIMIT_INITIAL or _pool_capacity,
+    min_limit=settings.CONCURRENCY_LIMIT_MIN,
+    max_limit=settings.CONCURRENCY_LIMIT_MAX or _pool_capacity + max(2, int(_pool_capacity * POOL_HEADROOM_SHARE)),
+    tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+    baseline_window_seconds=settings.CONCURRENCY_BASELINE_WINDOW_SECONDS,
+)
+
+
+class LoadShedMiddleware:
+    """Pure ASGI middleware: admits /api/ requests through ``limiter``."""
+
+    def __init__(self, app, prefix: str = "/api/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.LOAD_SHED_ENABLED or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        priority = classify(scope["method"], scope["path"])
+        if not limiter.try_acquire(priority):
+            await _reject(send, RETRY_AFTER_SECONDS[priority])
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+            if priority != Priority.low:
+                limiter.observe(time.perf_counter() - started)
+
+
+async def _reject(send, retry_after: int) -> None:
+    body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,256 @@
+"""Non-blocking structured (JSON) logging with request correlation.
+
+``configure_logging()`` replaces the root handlers with a ``QueueHandler``:
+on the event loop a log call only captures the record (message rendered,
+request context attached) and puts it on a bounded queue. A
+``QueueListener`` thread formats the JSON lines and does the actual I/O, so a
+slow terminal, pipe or disk never stalls request handling. When the queue is
+full, records are dropped and counted rather than blocking.
+
+``RequestContextMiddleware`` gives every request an id (``X-Request-ID`` is
+honoured and echoed back) and writes one access line when it ends. Each line
+logged while the request runs carries ``request_id``, ``user_id``, ``route``
+and ``duration_ms`` (time since the request started), plus ``trace_id`` when the
+request is traced.
+
+``LOG_SAMPLING`` keeps only a share of the INFO/DEBUG lines of noisy loggers
+(prefix match, most specific wins). The decision is made per request, so a
+sampled request keeps all of its lines. Warnings and errors are never
+sampled.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import traceback
+import uuid
+import zlib
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.services.audit import audit_actor
+from app.services.tracing import current_trace_id
+
+REQUEST_ID_HEADER = b"x-request-id"
+ACCESS_LOGGER = "app.access"
+# Liveness/readiness probes are logged here so they can be sampled on their own
+PROBE_LOGGER = "app.access.probes"
+PROBE_PATHS = ("/healthz", "/readyz")
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+access_logger = logging.getLogger(ACCESS_LOGGER)
+probe_logger = logging.getLogger(PROBE_LOGGER)
+
+
+@dataclass
+class RequestContext:
+    request_id: str
+    scope: dict
+    started: float = field(default_factory=time.perf_counter)
+    # Set by get_current_user; kept here too because the handler may run in a
+    # copied context (CancelOnDisconnectMiddleware) that the access line cannot see
+    user_id: uuid.UUID | None = None
+
+    @property
+    def route(self) -> str | None:
+        route = self.scope.get("route")
+        return getattr(route, "path", None)
+
+    def duration_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+
+request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: "ContextQueueHandler | None" = None
+
+
+def bind_user(user_id: uuid.UUID) -> None:
+    """Record the signed-in user on the current request's log context."""
+    ctx = request_context.get()
+    if ctx is not None:
+        ctx.user_id = user_id
+
+
+def current_request_id() -> str | None:
+    ctx = request_context.get()
+    return ctx.request_id if ctx else None
+
+
+# ---- capture (event loop) ----
+
+class SamplingFilter(logging.Filter):
+    """Keep ``LOG_SAMPLING[prefix]`` of a logger's records below WARNING."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "app.access.probes" wins over "app.access"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        request_id = current_request_id()
+        key = f"{record.name}:{request_id}" if request_id else f"{record.name}:{record.created}"
+        return zlib.crc32(key.encode()) / 0xFFFFFFFF < rate
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Attach the request context and hand the record to the listener thread."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render now: args may be mutated once the call returns. JSON encoding
+        # and I/O are left to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        ctx = request_context.get()
+        if ctx is not None:
+            record.request_id = ctx.request_id
+            record.route = ctx.route
+            record.duration_ms = ctx.duration_ms()
+            user_id = audit_actor.get() or ctx.user_id
+            record.user_id = str(user_id) if user_id else None
+        record.trace_id = current_trace_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ---- output (listener thread) ----
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; context fields are omitted when not set."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                line[key] = value
+        if record.exc_text:
+            line["exc"] = record.exc_text
+        return json.dumps(line, ensure_ascii=False, default=str)
+
+
+def _output_handler() -> logging.Handler:
+    if settings.LOG_FILE:
+        handler: logging.Handler = logging.handlers.WatchedFileHandler(settings.LOG_FILE, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_JSON:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s", defaults={"request_id": "-"},
+        ))
+    return handler
+
+
+def configure_logging(output: logging.Handler | None = None) -> None:
+    """Route all logging through the queue to ``output`` (default from LOG_FILE/LOG_JSON).
+
+    Safe to call more than once; only the first call takes effect.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_MAX)
+    _queue_handler = ContextQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+    _listener = logging.handlers.QueueListener(log_queue, output or _output_handler(), respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+    # uvicorn installs its own stream handlers; send its lines through the queue
+    # too, and let the access middleware replace uvicorn's access log
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    logging.getLogger("uvicorn.access").disabled = True
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush everything queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def stats() -> dict:
+    handler = _queue_handler
+    return {
+        "queued": handler.queue.qsize() if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "sampling": settings.LOG_SAMPLING,
+    }
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware: request id, log context and one access line per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")[:64]
+        ctx = RequestContext(request_id=incoming or uuid.uuid4().hex, scope=scope)
+        token = request_context.set(ctx)
+        status: int | None = None
+
+        async def send_with_id(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, ctx.request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if settings.LOG_ACCESS:
+                logger = probe_logger if scope["path"] in PROBE_PATHS else access_logger
+                logger.info(
+                    "%s %s %s", scope["method"], scope["path"], status if status is not None else "-",
+                    extra={"method": scope["method"], "path": scope["path"], "status": status},
+                )
+            request_context.reset(token)
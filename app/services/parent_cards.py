@@ -0,0 +1,80 @@
+"""Streaming printable output for ``POST /api/parents/batch-detail``.
+
+Cards are fetched ``CARD_CHUNK_SIZE`` parents at a time (four queries per
+chunk) and written out as each chunk arrives, so the first page of a few
+hundred cards prints while the rest is still being queried. Streaming runs on
+its own session because the request's session is closed before the body is
+sent.
+"""
+import csv
+import io
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from app.services.parent_detail import get_parents_batch_detail
+from app.services.query_budget import apply_budget
+from app.services.tenancy import campus_sessionmaker
+from app.services.tracing import span
+
+CARD_CHUNK_SIZE = 100
+
+CSV_HEADER = ["姓名", "電話", "Email", "地址", "備註", "學生", "最近聯絡", "最近聯絡摘要", "未完成待辦"]
+
+
+async def _card_chunks(
+    parent_ids: list[uuid.UUID], since: datetime | None, communications_per_parent: int
+) -> AsyncIterator[list[dict]]:
+    async with campus_sessionmaker()() as db:
+        apply_budget(db, "parents_batch_detail")
+        for start in range(0, len(parent_ids), CARD_CHUNK_SIZE):
+            chunk = parent_ids[start:start + CARD_CHUNK_SIZE]
+            yield await get_parents_batch_detail(db, chunk, since, communications_per_parent)
+            # Release the snapshot between chunks; nothing here writes
+            await db.rollback()
+
+
+async def stream_cards_html(
+    parent_ids: list[uuid.UUID], since: datetime | None, communications_per_parent: int
+) -> AsyncIterator[str]:
+    from app.routers.pages import templates
+
+    macros = templates.env.get_template("parents/print_cards.html").module
+    yield str(macros.head(len(parent_ids)))
+    async for cards in _card_chunks(parent_ids, since, communications_per_parent):
+        with span("template.render", template="parents/print_cards.html#card", cards=len(cards)):
+            html = "".join(str(macros.card(card)) for card in cards)
+        yield html
+    yield str(macros.tail())
+
+
+def _csv_row(card: dict) -> list:
+    last = card["communications"][0] if card["communications"] else None
+    return [
+        card["name"],
+        card["phone"],
+        card["email"] or "",
+        card["address"] or "",
+        card["note"] or "",
+        "; ".join(f"{s['student_name']}（{s['grade']}）" for s in card["students"]),
+        last["created_at"][:10] if last else "",
+        last["summary"] if last else "",
+        "; ".join(f["description"] for f in card["follow_ups"]),
+    ]
+
+
+async def stream_cards_csv(
+    parent_ids: list[uuid.UUID], since: datetime | None, communications_per_parent: int
+) -> AsyncIterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # BOM so Excel opens the UTF-8 file correctly (the import endpoint reads utf-8-sig too)
+    buf.write("\ufeff")
+    writer.writerow(CSV_HEADER)
+    async for cards in _card_chunks(parent_ids, since, communications_per_parent):
+        writer.writerows(_csv_row(card) for card in cards)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
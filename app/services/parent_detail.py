@@ -1,17 +1,24 @@
 import uuid
+from datetime import datetime
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.communication import CommunicationRecord, FollowUp
 from app.models.parent import Parent
 from app.models.student import ParentStudent, Student
+from app.models.user import User
+from app.services.archive import archived_count
 
 
-async def get_parent_full_detail(db: AsyncSession, parent_id: uuid.UUID) -> dict:
-    """Fetch a parent's full profile: info + students + communications + follow-ups."""
+async def get_parent_full_detail(db: AsyncSession, parent_id: uuid.UUID, since: datetime | None = None) -> dict:
+    """Fetch a parent's full profile: info + students + communications + follow-ups.
+
+    Only communications created at or after ``since`` are included (None = all
+    history); bounding it keeps older yearly partitions out of the query.
+    """
     result = await db.execute(select(Parent).where(Parent.id == parent_id))
     parent = result.scalar_one_or_none()
     if not parent:
@@ -41,6 +48,8 @@ async def get_parent_full_detail(db: AsyncSession, parent_id: uuid.UUID) -> dict
         .where(CommunicationRecord.parent_id == parent_id)
         .order_by(CommunicationRecord.created_at.desc())
     )
+    if since is not None:
+        stmt_comms = stmt_comms.where(CommunicationRecord.created_at >= since)
     comms = (await db.execute(stmt_comms)).scalars().all()
     communications = [
         {
@@ -82,7 +91,104 @@ async def get_parent_full_detail(db: AsyncSession, parent_id: uuid.UUID) -> dict
         "note": parent.note,
         "created_at": parent.created_at.isoformat(),
         "updated_at": parent.updated_at.isoformat(),
+        "version": parent.version,
         "students": students,
         "communications": communications,
+        "communications_since": since.isoformat() if since else None,
+        # Moved to cold storage; streamed on demand from /api/parents/{id}/archive
+        "archived_communications": await archived_count(db, parent_id),
         "follow_ups": follow_ups,
     }
+
+
+async def get_parents_batch_detail(
+    db: AsyncSession,
+    parent_ids: list[uuid.UUID],
+    since: datetime | None = None,
+    communications_per_parent: int = 5,
+) -> list[dict]:
+    """Printable cards for many parents: info, students, recent communications, open follow-ups.
+
+    Runs four set-based queries however many ids are passed (the per-parent
+    ``LIMIT`` is a LATERAL join on the (parent_id, created_at) index). Cards
+    come back in ``parent_ids`` order; unknown ids are skipped.
+    """
+    parents = {
+        p.id: p for p in (await db.execute(select(Parent).where(Parent.id.in_(parent_ids)))).scalars().all()
+    }
+    cards = {
+        pid: {
+            "id": str(p.id),
+            "name": p.name,
+            "phone": p.phone,
+            "email": p.email,
+            "address": p.address,
+            "note": p.note,
+            "students": [],
+            "communications": [],
+            "follow_ups": [],
+        }
+        for pid, p in parents.items()
+    }
+    if not cards:
+        return []
+    ids = list(cards)
+
+    student_rows = (await db.execute(
+        select(ParentStudent, Student)
+        .join(Student, ParentStudent.student_id == Student.id)
+        .where(ParentStudent.parent_id.in_(ids))
+        .order_by(Student.name)
+    )).all()
+    for ps, s in student_rows:
+        cards[ps.parent_id]["students"].append({
+            "student_id": str(s.id),
+            "student_name": s.name,
+            "grade": s.grade,
+            "relationship_type": ps.relationship_type,
+        })
+
+    if communications_per_parent > 0:
+        recent = (
+            select(
+                CommunicationRecord.id, CommunicationRecord.contact_type, CommunicationRecord.summary,
+                CommunicationRecord.created_at, User.full_name.label("user_name"),
+            )
+            .outerjoin(User, User.id == CommunicationRecord.user_id)
+            .where(CommunicationRecord.parent_id == Parent.id)
+            .order_by(CommunicationRecord.created_at.desc())
+            .limit(communications_per_parent)
+        )
+        if since is not None:
+            recent = recent.where(CommunicationRecord.created_at >= since)
+        recent = recent.lateral("recent")
+        comm_rows = (await db.execute(
+            select(Parent.id.label("parent_id"), recent)
+            .select_from(Parent)
+            .join(recent, true())
+            .where(Parent.id.in_(ids))
+        )).all()
+        for c in comm_rows:
+            cards[c.parent_id]["communications"].append({
+                "id": str(c.id),
+                "contact_type": c.contact_type.value,
+                "summary": c.summary,
+                "created_at": c.created_at.isoformat(),
+                "user_name": c.user_name,
+            })
+
+    follow_rows = (await db.execute(
+        select(FollowUp, User.full_name)
+        .outerjoin(User, User.id == FollowUp.assigned_to)
+        .where(FollowUp.parent_id.in_(ids), FollowUp.is_done == False)  # noqa: E712
+        .order_by(FollowUp.due_date.asc().nullslast(), FollowUp.created_at)
+    )).all()
+    for f, assigned_user_name in follow_rows:
+        cards[f.parent_id]["follow_ups"].append({
+            "id": str(f.id),
+            "description": f.description,
+            "due_date": f.due_date.isoformat() if f.due_date else None,
+            "assigned_user_name": assigned_user_name,
+        })
+
+    return [cards[pid] for pid in parent_ids if pid in cards]
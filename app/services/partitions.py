@@ -0,0 +1,46 @@
+"""Yearly partitions of ``communication_records``.
+
+Rows are routed to ``communication_records_<year>`` by ``created_at`` (UTC
+year boundaries). Postgres cannot create a partition on the fly at insert
+time, so a background task keeps this year and next provisioned. Queries
+that bound ``created_at`` from below (``hot_since()``) let the planner skip
+every older partition.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import database_urls, engine_for
+
+logger = logging.getLogger(__name__)
+
+
+def hot_since(now: datetime | None = None) -> datetime:
+    """Start of the oldest year that day-to-day communication queries look at."""
+    now = now or datetime.now(timezone.utc)
+    return datetime(now.year - settings.COMMUNICATION_HOT_YEARS + 1, 1, 1, tzinfo=timezone.utc)
+
+
+async def ensure_partitions(now: datetime | None = None) -> None:
+    """Create this year's and next year's partitions (in every campus database) if they do not exist yet."""
+    year = (now or datetime.now(timezone.utc)).year
+    for url in database_urls():
+        async with engine_for(url).begin() as conn:
+            for y in (year, year + 1):
+                await conn.execute(
+                    text("SELECT communication_records_ensure_partition(make_date(:year, 1, 1))"),
+                    {"year": y},
+                )
+
+
+async def run_maintenance() -> None:
+    """Provision upcoming partitions now and every PARTITION_MAINTENANCE_INTERVAL_SECONDS."""
+    while True:
+        try:
+            await ensure_partitions()
+        except Exception:
+            logger.exception("Partition maintenance failed; retrying next interval")
+        await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
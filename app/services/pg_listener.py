@@ -0,0 +1,107 @@
+"""Postgres LISTEN/NOTIFY listener.
+
+Holds one dedicated asyncpg connection (outside the SQLAlchemy pool) and
+dispatches notifications to subscribed callbacks. On connect and on every
+reconnect the ``on_connect`` callbacks run, so subscribers can resync any
+state that may have missed notifications while the connection was down.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+
+import asyncpg
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Channel written by the crm_notify_change() trigger function
+CHANGES_CHANNEL = "crm_changes"
+
+NotifyCallback = Callable[[dict], Awaitable[None]]
+ConnectCallback = Callable[[], Awaitable[None]]
+
+
+def asyncpg_dsn(url: str | None = None) -> str:
+    """``url`` (default DATABASE_URL) without the SQLAlchemy driver suffix, as asyncpg expects."""
+    return (url or settings.DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+class PgListener:
+    def __init__(self, url: str | None = None, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self._url = url
+        self._subscribers: dict[str, list[NotifyCallback]] = defaultdict(list)
+        self._on_connect: list[ConnectCallback] = []
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    def subscribe(self, channel: str, callback: NotifyCallback) -> None:
+        self._subscribers[channel].append(callback)
+
+    def on_connect(self, callback: ConnectCallback) -> None:
+        self._on_connect.append(callback)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run(), name="pg-listener")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _dispatch(self, connection, pid, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed notification on %s: %r", channel, payload)
+            return
+        for callback in self._subscribers.get(channel, ()):
+            asyncio.create_task(self._safe_call(callback, event))
+
+    @staticmethod
+    async def _safe_call(callback: NotifyCallback, event: dict) -> None:
+        try:
+            await callback(event)
+        except Exception:
+            logger.exception("Notification handler failed for %r", event)
+
+    async def _run(self) -> None:
+        delay = self._reconnect_delay
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = await asyncpg.connect(asyncpg_dsn(self._url))
+                for channel in self._subscribers:
+                    await conn.add_listener(channel, self._dispatch)
+                for callback in self._on_connect:
+                    await callback()
+                delay = self._reconnect_delay
+                # Block until the connection drops
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await closed.wait()
+                logger.warning("LISTEN connection closed; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN connection failed; retrying in %.1fs", delay)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+
+listener = PgListener()
@@ -0,0 +1,45 @@
+"""Phone number normalization.
+
+Parent phone numbers are entered free-form (``0912-345-678``, ``0912345678``,
+``+886 912 345 678``, ``+886 0912 345 678``). ``normalize_phone`` folds them into E.164 so the same
+number always maps to the same indexed key.
+"""
+import re
+
+DEFAULT_COUNTRY_CODE = "886"  # Taiwan
+# Country codes whose national trunk 0 is commonly kept after the code
+# (``+886 0912 345 678``); it is never part of the E.164 number.
+TRUNK_ZERO_COUNTRY_CODES = ("886",)
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw: str | None, country_code: str = DEFAULT_COUNTRY_CODE) -> str | None:
+    """Return ``raw`` as an E.164 string (``+886912345678``), or None if it has no usable digits."""
+    if not raw:
+        return None
+    raw = raw.strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if not digits:
+        return None
+    if raw.startswith("+"):
+        e164 = digits
+    elif digits.startswith("00"):
+        # International dialing prefix, e.g. 00886912345678
+        e164 = digits[2:]
+    elif digits.startswith(country_code) and len(digits) > 10:
+        # Country code typed without the leading '+'
+        e164 = digits
+    elif digits.startswith("0"):
+        # National trunk prefix: 0912345678 -> 886912345678
+        e164 = country_code + digits[1:]
+    else:
+        e164 = country_code + digits
+    for code in TRUNK_ZERO_COUNTRY_CODES:
+        if e164.startswith(code + "0"):
+            e164 = code + e164[len(code) + 1:]
+            break
+    # E.164 allows at most 15 digits
+    if len(e164) < 8 or len(e164) > 15:
+        return None
+    return "+" + e164
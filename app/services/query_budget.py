@@ -0,0 +1,117 @@
+"""Per-route statement timeouts and query cancellation on client disconnect.
+
+``apply_budget()`` tags a session with its route's budget (STATEMENT_TIMEOUTS_MS,
+falling back to STATEMENT_TIMEOUT_MS); every transaction the session begins
+then starts with ``SET LOCAL statement_timeout``. Postgres aborts a query
+that runs past it with SQLSTATE 57014, which ``statement_timeout_handler``
+turns into a ``504``.
+
+``CancelOnDisconnectMiddleware`` watches safe (GET/HEAD) API requests for
+``http.disconnect``: when the client goes away before the response is
+complete, the request task is cancelled and asyncpg sends a cancel request for
+the running query, so the pooled connection is freed at once. On coalesced
+routes the shared execution (and its query) is cancelled once the last
+client waiting for it has gone.
+"""
+import asyncio
+import logging
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_CANCELED = "57014"
+SAFE_METHODS = ("GET", "HEAD")
+
+cancelled_on_disconnect = 0
+timed_out = 0
+
+
+def timeout_for(route_name: str | None) -> int:
+    """Statement timeout in milliseconds for a route (by endpoint function name)."""
+    return settings.STATEMENT_TIMEOUTS_MS.get(route_name or "", settings.STATEMENT_TIMEOUT_MS)
+
+
+def apply_budget(session, route_name: str | None) -> None:
+    """Give ``session`` (sync or async) the statement timeout of ``route_name``."""
+    session.info["statement_timeout_ms"] = timeout_for(route_name)
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session, transaction, connection) -> None:
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+async def statement_timeout_handler(request: Request, exc: DBAPIError):
+    if getattr(exc.orig, "sqlstate", None) != QUERY_CANCELED:
+        raise exc
+    global timed_out
+    timed_out += 1
+    route = request.scope.get("route")
+    logger.warning("Statement timeout on %s %s (%s ms)", request.method, request.url.path,
+                   timeout_for(getattr(route, "name", None)))
+    return JSONResponse(status_code=504, content={"detail": "Query took too long, please narrow the request"})
+
+
+class CancelOnDisconnectMiddleware:
+    """Pure ASGI middleware: cancels safe /api/ requests whose client has disconnected."""
+
+    def __init__(self, app, prefix: str = "/api/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in SAFE_METHODS or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        messages: asyncio.Queue = asyncio.Queue()
+        state = {"response_complete": False, "disconnected": False}
+
+        async def tracked_send(message) -> None:
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                state["response_complete"] = True
+            await send(message)
+
+        task = asyncio.ensure_future(self.app(scope, messages.get, tracked_send))
+
+        async def watch() -> None:
+            # The app reads the request through ``messages``; this loop is the only reader of ``receive``
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not state["response_complete"] and not task.done():
+                        state["disconnected"] = True
+                        task.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await task
+        except asyncio.CancelledError:
+            # Only swallow our own cancellation, never a server shutdown
+            if not state["disconnected"] or asyncio.current_task().cancelling():
+                raise
+            global cancelled_on_disconnect
+            cancelled_on_disconnect += 1
+            logger.info("Client disconnected, cancelled %s %s", scope["method"], scope["path"])
+        finally:
+            watcher.cancel()
+
+
+def stats() -> dict:
+    return {
+        "default_timeout_ms": settings.STATEMENT_TIMEOUT_MS,
+        "route_timeouts_ms": settings.STATEMENT_TIMEOUTS_MS,
+        "timed_out": timed_out,
+        "cancelled_on_disconnect": cancelled_on_disconnect,
+    }
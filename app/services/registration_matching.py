@@ -0,0 +1,123 @@
+"""Set-based matching of info-session registrations to existing parents.
+
+``match_registrations()`` links every not-yet-matched registration of a
+session in one statement. Candidates come from three equality joins against
+indexed parent keys of the registration's campus, each with a weight:
+
+* ``email``  – ``lower(email)`` (``ix_parents_campus_id_email_lower``), weight 3
+* ``phone``  – E.164 number (``ix_parents_phone_e164``), weight 3
+* ``name``   – name without case or whitespace (``ix_parents_campus_id_name_key``), weight 1
+
+Scores are summed per (registration, parent). A registration is ``matched``
+when a single parent has the top score and it is at least ``AUTO_MATCH_SCORE``
+(an e-mail or phone hit); tied or name-only candidates go to the review queue
+(``registration_match_candidates``) and are resolved by hand; no candidate at
+all is ``no_match``. A per-session advisory lock serializes concurrent runs
+(e.g. two imports at once).
+"""
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.parent import NAME_KEY_SQL
+from app.services.audit import record_bulk
+from app.services.cache import record_bulk_change
+
+EMAIL_WEIGHT = 3
+PHONE_WEIGHT = 3
+NAME_WEIGHT = 1
+AUTO_MATCH_SCORE = 3
+
+_MATCH_SQL = """
+    WITH pending AS (
+        SELECT r.id, r.campus_id, lower(r.email) AS email_key, r.phone_e164, {registration_name_key} AS name_key
+        FROM registrations r
+        WHERE r.session_id = :session_id
+          AND (r.match_status IS NULL OR (CAST(:retry_unmatched AS boolean) AND r.match_status = 'no_match'))
+    ),
+    hits AS (
+        SELECT pe.id AS registration_id, p.id AS parent_id, 'email' AS reason, {email_weight} AS weight
+        FROM pending pe JOIN parents p ON p.campus_id = pe.campus_id AND lower(p.email) = pe.email_key
+      UNION ALL
+        SELECT pe.id, p.id, 'phone', {phone_weight}
+        FROM pending pe JOIN parents p ON p.phone_e164 = pe.phone_e164 AND p.campus_id = pe.campus_id
+      UNION ALL
+        SELECT pe.id, p.id, 'name', {name_weight}
+        FROM pending pe JOIN parents p ON p.campus_id = pe.campus_id AND {parent_name_key} = pe.name_key
+    ),
+    scored AS (
+        SELECT registration_id, parent_id, sum(weight) AS score, array_agg(reason ORDER BY reason) AS reasons,
+               rank() OVER (PARTITION BY registration_id ORDER BY sum(weight) DESC) AS rnk
+        FROM hits
+        GROUP BY registration_id, parent_id
+    ),
+    best AS (
+        SELECT registration_id, max(score) AS top_score, count(*) FILTER (WHERE rnk = 1) AS top_count,
+               (array_agg(parent_id ORDER BY score DESC))[1] AS top_parent
+        FROM scored
+        GROUP BY registration_id
+    ),
+    decided AS (
+        SELECT pe.id AS registration_id,
+               CASE WHEN b.top_count = 1 AND b.top_score >= :auto_score THEN b.top_parent END AS parent_id,
+               CASE WHEN b.registration_id IS NULL THEN 'no_match'
+                    WHEN b.top_count = 1 AND b.top_score >= :auto_score THEN 'matched'
+                    ELSE 'review' END AS match_status
+        FROM pending pe
+        LEFT JOIN best b ON b.registration_id = pe.id
+    ),
+    queued AS (
+        INSERT INTO registration_match_candidates (registration_id, parent_id, score, reasons)
+        SELECT s.registration_id, s.parent_id, s.score, s.reasons
+        FROM scored s
+        JOIN decided d ON d.registration_id = s.registration_id AND d.match_status = 'review'
+        ON CONFLICT (registration_id, parent_id) DO UPDATE SET score = EXCLUDED.score, reasons = EXCLUDED.reasons
+    )
+    UPDATE registrations r
+    SET parent_id = d.parent_id, match_status = CAST(d.match_status AS registration_match_status)
+    FROM decided d
+    WHERE r.id = d.registration_id
+    RETURNING r.id, r.parent_id, r.match_status
+"""
+
+
+@dataclass
+class MatchResult:
+    matched: int = 0
+    review: int = 0
+    no_match: int = 0
+
+
+async def match_registrations(
+    db: AsyncSession, session_id: uuid.UUID, retry_unmatched: bool = False
+) -> MatchResult:
+    """Match the session's pending registrations (and ``no_match`` ones if asked); caller commits."""
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtextextended(:lock_key, 0))"),
+        {"lock_key": f"registration_match:{session_id}"},
+    )
+    sql = _MATCH_SQL.format(
+        registration_name_key=NAME_KEY_SQL.format(column="r.name"),
+        parent_name_key=NAME_KEY_SQL.format(column="p.name"),
+        email_weight=EMAIL_WEIGHT,
+        phone_weight=PHONE_WEIGHT,
+        name_weight=NAME_WEIGHT,
+    )
+    rows = (await db.execute(text(sql), {
+        "session_id": session_id,
+        "retry_unmatched": retry_unmatched,
+        "auto_score": AUTO_MATCH_SCORE,
+    })).all()
+
+    result = MatchResult()
+    for r in rows:
+        setattr(result, r.match_status, getattr(result, r.match_status) + 1)
+    if rows:
+        record_bulk_change(db, "registrations")
+        record_bulk(db, "registrations", "UPDATE", [
+            (str(r.id), {"parent_id": r.parent_id, "match_status": r.match_status}) for r in rows
+        ])
+    return result
+
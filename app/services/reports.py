@@ -0,0 +1,331 @@
+"""Reporting rollups and the queries behind ``/api/reports/*``.
+
+Reports never scan the raw tables. Three rollups hold pre-aggregated counts:
+
+* ``report_communications_daily`` – communications per day, staff member and type
+* ``report_follow_ups_daily``     – follow-ups created / completed (with total
+  completion time) and overdue events per day and assignee
+* ``report_session_funnel``       – per info session: registrations, confirmed,
+  cancelled, existing families and converted registrants
+
+Statement-level triggers on the source tables journal every touched day (or
+session) into ``report_changes``. ``refresh_reports()`` consumes the journal
+and recomputes just those keys, then moves each rollup's watermark
+(``report_watermarks.as_of``) to the refresh's start: every change committed
+before it is reflected. A rollup without a watermark is rebuilt in full.
+Refreshes run every REPORT_REFRESH_INTERVAL_SECONDS in the background and
+through ``scripts/refresh_reports.py``; an advisory lock keeps them one at a
+time across workers.
+
+Days are local school days (``crm_report_day()``, see the migration). Report
+queries group the daily rows into weeks or months, so a five-year range reads
+at most a few thousand small rows.
+"""
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Literal
+
+from sqlalchemy import Date, cast, func, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import database_urls, session_maker_for
+from app.models.communication import ContactType
+from app.models.info_session import InfoSession
+from app.models.report import (
+    ReportCommunicationDaily,
+    ReportFollowUpDaily,
+    ReportSessionFunnel,
+    ReportWatermark,
+)
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+Granularity = Literal["day", "week", "month"]
+
+_LOCK_SQL = "SELECT {fn}(hashtextextended('report_refresh', 0))"
+
+_DAY_RANGE = "{col} >= crm_report_day_start(d.day) AND {col} < crm_report_day_start(d.day + 1)"
+
+
+@dataclass(frozen=True)
+class _Rollup:
+    table: str
+    key_column: str
+    key_type: str
+    all_keys_sql: str
+    recompute_sql: str
+
+
+ROLLUPS = {
+    "communications": _Rollup(
+        table="report_communications_daily",
+        key_column="day",
+        key_type="date",
+        all_keys_sql="SELECT DISTINCT crm_report_day(created_at) FROM communication_records",
+        recompute_sql=f"""
+            INSERT INTO report_communications_daily (day, user_id, contact_type, communications)
+            SELECT d.day, c.user_id, c.contact_type, count(*)
+            FROM unnest(CAST(:keys AS date[])) AS d(day)
+            JOIN communication_records c ON {_DAY_RANGE.format(col="c.created_at")}
+            GROUP BY d.day, c.user_id, c.contact_type
+        """,
+    ),
+    "follow_ups": _Rollup(
+        table="report_follow_ups_daily",
+        key_column="day",
+        key_type="date",
+        all_keys_sql="""
+            SELECT crm_report_day(created_at) FROM follow_ups
+            UNION SELECT crm_report_day(completed_at) FROM follow_ups WHERE completed_at IS NOT NULL
+            UNION SELECT due_date + 1 FROM follow_ups WHERE due_date IS NOT NULL
+        """,
+        recompute_sql=f"""
+            WITH days AS (SELECT unnest(CAST(:keys AS date[])) AS day),
+            events AS (
+                SELECT d.day, f.assigned_to, 1 AS created, 0 AS completed, CAST(0 AS bigint) AS completion_seconds,
+                       0 AS became_overdue, 0 AS overdue_resolved
+                FROM days d JOIN follow_ups f ON {_DAY_RANGE.format(col="f.created_at")}
+              UNION ALL
+                SELECT d.day, f.assigned_to, 0, 1, CAST(extract(epoch FROM f.completed_at - f.created_at) AS bigint),
+                       0, CASE WHEN d.day > f.due_date THEN 1 ELSE 0 END
+                FROM days d JOIN follow_ups f ON {_DAY_RANGE.format(col="f.completed_at")}
+                WHERE f.is_done
+              UNION ALL
+                -- overdue from the day after the due date, unless completed by then
+                SELECT d.day, f.assigned_to, 0, 0, 0, 1, 0
+                FROM days d JOIN follow_ups f ON f.due_date = d.day - 1
+                WHERE NOT f.is_done OR crm_report_day(f.completed_at) > f.due_date
+            )
+            INSERT INTO report_follow_ups_daily
+                (day, assigned_to, created, completed, completion_seconds, became_overdue, overdue_resolved)
+            SELECT day, assigned_to, sum(created), sum(completed), sum(completion_seconds),
+                   sum(became_overdue), sum(overdue_resolved)
+            FROM events
+            GROUP BY day, assigned_to
+        """,
+    ),
+    "sessions": _Rollup(
+        table="report_session_funnel",
+        key_column="session_id",
+        key_type="uuid",
+        all_keys_sql="SELECT id FROM info_sessions",
+        recompute_sql="""
+            INSERT INTO report_session_funnel
+                (session_id, title, session_date, registrations, confirmed, cancelled, existing_families, converted)
+            SELECT s.id, s.title, s.session_date,
+                   count(r.id),
+                   count(r.id) FILTER (WHERE r.status = 'confirmed'),
+                   count(r.id) FILTER (WHERE r.status = 'cancelled'),
+                   count(p.id) FILTER (WHERE p.created_at <= r.created_at),
+                   count(p.id) FILTER (WHERE p.created_at > r.created_at)
+            FROM info_sessions s
+            LEFT JOIN registrations r ON r.session_id = s.id
+            LEFT JOIN parents p ON p.id = r.parent_id
+            WHERE s.id = ANY(CAST(:keys AS uuid[]))
+            GROUP BY s.id
+        """,
+    ),
+}
+
+
+async def refresh_reports(db: AsyncSession, full: bool = False, wait: bool = True) -> dict[str, int] | None:
+    """Fold journaled changes into every rollup and commit; returns keys recomputed per rollup.
+
+    ``full`` rebuilds from the raw tables (dropping counts kept for archived
+    history). With ``wait=False`` it returns None when another refresh holds the lock.
+    """
+    if wait:
+        await db.execute(text(_LOCK_SQL.format(fn="pg_advisory_xact_lock")))
+    elif not (await db.execute(text(_LOCK_SQL.format(fn="pg_try_advisory_xact_lock")))).scalar_one():
+        await db.rollback()
+        return None
+
+    watermarks = set((await db.execute(select(ReportWatermark.rollup))).scalars().all())
+    refreshed = {}
+    for name, rollup in ROLLUPS.items():
+        keys = (await db.execute(
+            text(f"""
+                WITH consumed AS (DELETE FROM report_changes WHERE rollup = :rollup RETURNING {rollup.key_column})
+                SELECT DISTINCT {rollup.key_column} FROM consumed
+            """),
+            {"rollup": name},
+        )).scalars().all()
+        if full or name not in watermarks:
+            await db.execute(text(f"DELETE FROM {rollup.table}"))
+            keys = (await db.execute(text(rollup.all_keys_sql))).scalars().all()
+        elif keys:
+            await db.execute(
+                text(f"DELETE FROM {rollup.table} WHERE {rollup.key_column} = ANY(CAST(:keys AS {rollup.key_type}[]))"),
+                {"keys": keys},
+            )
+        if keys:
+            await db.execute(text(rollup.recompute_sql), {"keys": keys})
+        await db.execute(
+            text("""
+                INSERT INTO report_watermarks (rollup, as_of, keys_refreshed) VALUES (:rollup, now(), :n)
+                ON CONFLICT (rollup) DO UPDATE SET as_of = EXCLUDED.as_of, keys_refreshed = EXCLUDED.keys_refreshed
+            """),
+            {"rollup": name, "n": len(keys)},
+        )
+        refreshed[name] = len(keys)
+    await db.commit()
+    return refreshed
+
+
+async def run_refresher() -> None:
+    """Refresh the rollups every REPORT_REFRESH_INTERVAL_SECONDS (0 = leave it to the script)."""
+    if settings.REPORT_REFRESH_INTERVAL_SECONDS <= 0:
+        return
+    while True:
+        # Every campus database keeps its own rollups
+        for url in database_urls():
+            try:
+                async with session_maker_for(url)() as db:
+                    refreshed = await refresh_reports(db, wait=False)
+                if refreshed and any(refreshed.values()):
+                    logger.info("Refreshed report rollups: %s", refreshed)
+            except Exception:
+                logger.exception("Report refresh failed; retrying next interval")
+        await asyncio.sleep(settings.REPORT_REFRESH_INTERVAL_SECONDS)
+
+
+# ---- Queries ----
+
+async def watermark(db: AsyncSession) -> datetime | None:
+    """Oldest rollup watermark: every report reflects changes committed before it."""
+    return (await db.execute(select(func.min(ReportWatermark.as_of)))).scalar_one()
+
+
+def _period(column, granularity: Granularity):
+    if granularity == "day":
+        return column
+    return cast(func.date_trunc(granularity, column), Date)
+
+
+# GROUP BY the output name: a repeated expression would carry its own bind parameters
+_BY_PERIOD = literal_column("period")
+
+
+async def communications_report(
+    db: AsyncSession, date_from: date, date_to: date, granularity: Granularity, user_id: uuid.UUID | None = None
+) -> list[dict]:
+    r = ReportCommunicationDaily
+    period = _period(r.day, granularity).label("period")
+    stmt = (
+        select(period, r.user_id, User.full_name, r.contact_type, func.sum(r.communications))
+        .join(User, User.id == r.user_id)
+        .where(r.day >= date_from, r.day <= date_to)
+        .group_by(_BY_PERIOD, r.user_id, User.full_name, r.contact_type)
+        .order_by(period, User.full_name)
+    )
+    if user_id:
+        stmt = stmt.where(r.user_id == user_id)
+    rows: dict[tuple, dict] = {}
+    for p, uid, name, contact_type, count in (await db.execute(stmt)).all():
+        row = rows.setdefault((p, uid), {
+            "period": p, "user_id": uid, "user_name": name, "total": 0,
+            "by_type": {t.value: 0 for t in ContactType},
+        })
+        row["by_type"][contact_type.value] = int(count)
+        row["total"] += int(count)
+    return list(rows.values())
+
+
+async def follow_ups_report(
+    db: AsyncSession, date_from: date, date_to: date, granularity: Granularity, user_id: uuid.UUID | None = None
+) -> list[dict]:
+    r = ReportFollowUpDaily
+    period = _period(r.day, granularity).label("period")
+    stmt = (
+        select(
+            period, r.assigned_to, User.full_name,
+            func.sum(r.created), func.sum(r.completed), func.sum(r.completion_seconds),
+        )
+        .join(User, User.id == r.assigned_to)
+        .where(r.day >= date_from, r.day <= date_to)
+        .group_by(_BY_PERIOD, r.assigned_to, User.full_name)
+        .order_by(period, User.full_name)
+    )
+    if user_id:
+        stmt = stmt.where(r.assigned_to == user_id)
+    return [
+        {
+            "period": p, "user_id": uid, "user_name": name, "created": int(created), "completed": int(completed),
+            "avg_completion_hours": round(float(seconds) / float(completed) / 3600, 1) if completed else None,
+        }
+        for p, uid, name, created, completed, seconds in (await db.execute(stmt)).all()
+    ]
+
+
+async def overdue_report(
+    db: AsyncSession, date_from: date, date_to: date, granularity: Granularity, user_id: uuid.UUID | None = None
+) -> list[dict]:
+    """Overdue backlog per assignee at the end of each period (running sum of overdue events)."""
+    r = ReportFollowUpDaily
+    # Everything before date_from folds into the first period as its opening balance
+    period = func.greatest(_period(r.day, granularity), _period(cast(date_from, Date), granularity)).label("period")
+    net = (
+        select(period, r.assigned_to, func.sum(r.became_overdue - r.overdue_resolved).label("net"))
+        .join(User, User.id == r.assigned_to)  # scopes the rollup to the campus's staff
+        .where(r.day <= date_to)
+        .group_by(_BY_PERIOD, r.assigned_to)
+    )
+    if user_id:
+        net = net.where(r.assigned_to == user_id)
+    net = net.subquery()
+    stmt = select(
+        net.c.period, net.c.assigned_to,
+        func.sum(net.c.net).over(partition_by=net.c.assigned_to, order_by=net.c.period),
+    )
+    backlog: dict[uuid.UUID, dict[date, int]] = {}
+    for p, uid, value in (await db.execute(stmt)).all():
+        backlog.setdefault(uid, {})[p] = int(value)
+    if not backlog:
+        return []
+    names = dict((await db.execute(select(User.id, User.full_name).where(User.id.in_(backlog)))).all())
+    periods = (await db.execute(
+        select(cast(func.generate_series(
+            _period(cast(date_from, Date), granularity), date_to, text(f"interval '1 {granularity}'"),
+        ), Date))
+    )).scalars().all()
+
+    result = []
+    for uid, by_period in sorted(backlog.items(), key=lambda item: names.get(item[0], "")):
+        current = 0
+        for p in periods:
+            # Periods without events carry the previous balance forward
+            current = by_period.get(p, current)
+            result.append({"period": p, "user_id": uid, "user_name": names.get(uid), "overdue": current})
+    return result
+
+
+async def sessions_report(db: AsyncSession, date_from: date, date_to: date) -> dict:
+    r = ReportSessionFunnel
+    sessions = (await db.execute(
+        select(r)
+        .join(InfoSession, InfoSession.id == r.session_id)  # scopes the rollup to the campus's sessions
+        .where(r.session_date >= date_from, r.session_date <= date_to)
+        .order_by(r.session_date)
+    )).scalars().all()
+    rows = []
+    for s in sessions:
+        # Registrants who were not families yet when they signed up
+        prospects = s.registrations - s.existing_families
+        rows.append({
+            "session_id": s.session_id, "title": s.title, "session_date": s.session_date,
+            "registrations": s.registrations, "confirmed": s.confirmed, "cancelled": s.cancelled,
+            "existing_families": s.existing_families, "converted": s.converted,
+            "conversion_rate": round(s.converted / prospects, 3) if prospects > 0 else None,
+        })
+    totals = {
+        key: sum(row[key] for row in rows)
+        for key in ("registrations", "confirmed", "cancelled", "existing_families", "converted")
+    }
+    prospects = totals["registrations"] - totals["existing_families"]
+    totals["conversion_rate"] = round(totals["converted"] / prospects, 3) if prospects > 0 else None
+    return {"sessions": rows, "totals": totals}
@@ -0,0 +1,211 @@
+"""Full-text search over communication summaries.
+
+Summaries are mostly Traditional Chinese, which has no word boundaries, so
+text is indexed as CJK bigrams plus whole Latin/digit words in
+``communication_search_grams`` (an inverted index kept in Postgres).
+A query matches a record when every query gram is present; results are
+ranked by term frequency with a boost for exact phrase matches. A
+single-character CJK term is only indexed as a unigram where it stands alone
+(王 in 王小明 is only part of the bigram 王小), so next to other grams it is
+checked against the summary text instead of the index.
+
+A common gram can match tens of thousands of records in a campus; only the
+newest ``MAX_RANKED_HITS`` of them are ranked, so deep pages of a vague query
+end there.
+"""
+import html
+import re
+import unicodedata
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.communication import ContactType
+from app.services.tenancy import current_campus_id
+
+MAX_WORD_LENGTH = 32
+MAX_RANKED_HITS = 1000
+SNIPPET_RADIUS = 40
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[0-9a-z]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+
+def _normalize(value: str) -> str:
+    # NFKC folds full-width ASCII (Ａ１) into plain ASCII before lowercasing
+    return unicodedata.normalize("NFKC", value).lower()
+
+
+def _terms(value: str) -> list[str]:
+    """Split text into CJK runs and Latin/digit words."""
+    return _TOKEN_RE.findall(_normalize(value))
+
+
+def tokenize(value: str) -> Counter:
+    """Return gram -> term frequency for a piece of text."""
+    grams: Counter = Counter()
+    for term in _terms(value):
+        if _CJK_RE.match(term):
+            if len(term) == 1:
+                grams[term] += 1
+            else:
+                grams.update(term[i:i + 2] for i in range(len(term) - 1))
+        else:
+            grams[term[:MAX_WORD_LENGTH]] += 1
+    return grams
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def query_terms(q: str) -> tuple[list[str], list[str]]:
+    """Split a query into index grams every hit must have, and terms checked with ILIKE."""
+    grams = list(tokenize(q))
+    singles = [g for g in grams if len(g) == 1 and _CJK_RE.match(g)]
+    if len(singles) == len(grams):
+        return [], singles
+    return [g for g in grams if g not in singles], singles
+
+
+async def index_communication(db: AsyncSession, record_id: uuid.UUID, summary: str) -> None:
+    """(Re)index one record. Runs in the caller's transaction, so the index commits with the row."""
+    await db.execute(
+        text("DELETE FROM communication_search_grams WHERE record_id = :record_id"),
+        {"record_id": record_id},
+    )
+    grams = tokenize(summary)
+    if not grams:
+        return
+    # Pull campus/contact_type/created_at from the row itself so filters can be applied inside the index.
+    await db.execute(
+        text(
+            "INSERT INTO communication_search_grams (gram, record_id, tf, campus_id, contact_type, created_at) "
+            "SELECT g.gram, r.id, g.tf, r.campus_id, r.contact_type, r.created_at "
+            "FROM communication_records r, unnest(CAST(:grams AS varchar[]), CAST(:tfs AS smallint[])) AS g(gram, tf) "
+            "WHERE r.id = :record_id"
+        ),
+        {"record_id": record_id, "grams": list(grams), "tfs": [min(tf, 32767) for tf in grams.values()]},
+    )
+
+
+def make_snippet(summary: str, query: str) -> str:
+    """Return an HTML-escaped excerpt of ``summary`` around the first hit, with hits wrapped in <mark>."""
+    terms = sorted({t for t in _terms(query)}, key=len, reverse=True)
+    lowered = _normalize(summary)
+    if len(lowered) != len(summary):
+        # NFKC changed the length (rare ligatures); fall back to a plain case fold
+        lowered = summary.lower()
+    first = min((pos for t in terms if (pos := lowered.find(t)) >= 0), default=0)
+    start = max(first - SNIPPET_RADIUS, 0)
+    end = min(first + SNIPPET_RADIUS * 2, len(summary))
+
+    window = summary[start:end]
+    window_lower = lowered[start:end]
+    spans: list[tuple[int, int]] = []
+    for t in terms:
+        pos = window_lower.find(t)
+        while pos >= 0:
+            if not any(s < pos + len(t) and pos < e for s, e in spans):
+                spans.append((pos, pos + len(t)))
+            pos = window_lower.find(t, pos + len(t))
+    spans.sort()
+
+    parts = []
+    cursor = 0
+    for s, e in spans:
+        parts.append(html.escape(window[cursor:s]))
+        parts.append(f"<mark>{html.escape(window[s:e])}</mark>")
+        cursor = e
+    parts.append(html.escape(window[cursor:]))
+    return ("…" if start > 0 else "") + "".join(parts) + ("…" if end < len(summary) else "")
+
+
+async def search_communications(
+    db: AsyncSession,
+    q: str,
+    contact_types: list[ContactType] | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[dict]:
+    """Ranked search. Returns row mappings with record columns, parent/user names and ``score``."""
+    grams, singles = query_terms(q)
+    params: dict = {"limit": limit, "offset": offset, "phrase": f"%{_like_escape(q.strip())}%"}
+    # Standalone CJK characters: substring checks on the record
+    text_filters = []
+    for i, char in enumerate(singles):
+        text_filters.append(f"r.summary ILIKE :single_{i}")
+        params[f"single_{i}"] = f"%{char}%"
+    filters = []
+    if contact_types:
+        filters.append("{alias}.contact_type = ANY(CAST(:contact_types AS contact_type[]))")
+        params["contact_types"] = [ct.value for ct in contact_types]
+    if date_from:
+        filters.append("{alias}.created_at >= :date_from")
+        params["date_from"] = date_from
+    if date_to:
+        filters.append("{alias}.created_at < :date_to")
+        params["date_to"] = date_to + timedelta(days=1)
+
+    # Campus, like type and date, is a column of the gram index: a common gram is
+    # only aggregated over the current campus's hot rows.
+    if (campus_id := current_campus_id()) is not None:
+        filters.insert(0, "{alias}.campus_id = :campus_id")
+        params["campus_id"] = campus_id
+
+    select_cols = (
+        "r.id, r.parent_id, r.user_id, r.contact_type, r.summary, r.created_at, "
+        "p.name AS parent_name, u.full_name AS user_name"
+    )
+    joins = "JOIN parents p ON p.id = r.parent_id LEFT JOIN users u ON u.id = r.user_id"
+
+    # Queries that only contain single CJK characters have no bigram to probe;
+    # fall back to a substring scan (still bounded by the date/type filters).
+    if not grams:
+        where = " AND ".join([
+            *(text_filters or ["r.summary ILIKE :phrase ESCAPE '\\'"]), *(f.format(alias="r") for f in filters),
+        ])
+        stmt = (
+            f"SELECT {select_cols}, 1.0 AS score FROM communication_records r {joins} "
+            f"WHERE {where} ORDER BY r.created_at DESC LIMIT :limit OFFSET :offset"
+        )
+        return [dict(row) for row in (await db.execute(text(stmt), params)).mappings()]
+
+    params["grams"] = grams
+    params["n_grams"] = len(grams)
+    params["max_hits"] = MAX_RANKED_HITS
+    record_where = " AND ".join(text_filters)
+    gram_where = " AND ".join(["g.gram = ANY(CAST(:grams AS varchar[]))", *(f.format(alias="g") for f in filters)])
+    # Without checks on the summary, the newest hits can be picked from the index alone
+    hits_limit = "" if record_where else "  ORDER BY g.created_at DESC LIMIT :max_hits"
+    # The gram scan is index-only (the index covers record_id/tf/contact_type).
+    # Joining on the full (id, created_at) key lets each hit probe a single
+    # partition; parents/users are only joined for the page being returned.
+    stmt = (
+        "WITH hits AS ("
+        "  SELECT g.record_id, g.created_at, sum(g.tf) AS tf"
+        "  FROM communication_search_grams g"
+        f"  WHERE {gram_where}"
+        "  GROUP BY g.record_id, g.created_at"
+        "  HAVING count(*) = :n_grams"
+        f"{hits_limit}"
+        "), candidates AS ("
+        "  SELECT r.*, hits.tf"
+        "  FROM hits JOIN communication_records r ON r.id = hits.record_id AND r.created_at = hits.created_at"
+        f"  {'WHERE ' + record_where if record_where else ''}"
+        "  ORDER BY r.created_at DESC LIMIT :max_hits"
+        "), ranked AS ("
+        "  SELECT *,"
+        "    (tf + CASE WHEN summary ILIKE :phrase ESCAPE '\\' THEN :n_grams * 4 ELSE 0 END)::float AS score"
+        "  FROM candidates ORDER BY score DESC, created_at DESC LIMIT :limit OFFSET :offset"
+        ") "
+        f"SELECT {select_cols}, r.score FROM ranked r {joins} "
+        "ORDER BY r.score DESC, r.created_at DESC"
+    )
+    return [dict(row) for row in (await db.execute(text(stmt), params)).mappings()]
@@ -0,0 +1,254 @@
+"""Set-based follow-up generation for info-session attendees.
+
+``generate_follow_ups()`` plans every assignment in a single
+``INSERT ... SELECT`` into a transaction-local temp table, then writes from it
+with one statement per table:
+
+* an ``in_person`` communication record per attendee ("attended session X"),
+  with its search-index grams (follow-ups must reference a communication);
+* the follow-up itself, assigned to staff;
+* ``registrations.follow_up_id``, which marks the registration as handled.
+
+Assignment is done in SQL: ``round_robin`` deals attendees out in staff
+order; ``balanced`` water-fills by each person's open follow-up count (the
+next attendee always goes to whoever would have the fewest open follow-ups).
+
+The session row is locked ``FOR UPDATE`` and handled registrations are
+skipped, so repeating the call (or running it twice at once) never creates
+duplicates. Attendees are linked to parents through ``registrations.parent_id``;
+pending registrations are matched first (see ``registration_matching``), and
+those left in review or without a match are reported as unmatched.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Literal
+
+from fastapi import HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.info_session import InfoSession, RegistrationStatus
+from app.models.user import Role, User
+from app.services.audit import record_bulk
+from app.services.cache import record_bulk_change
+from app.services.registration_matching import match_registrations
+from app.services.search import tokenize
+
+Strategy = Literal["round_robin", "balanced"]
+
+_SLOT_ORDER = {
+    # slot k of every staff member before slot k+1 of anyone
+    "round_robin": "k, ord",
+    # open follow-ups after taking this slot, least loaded first
+    "balanced": "open_count + k, ord",
+}
+
+_CREATE_PLAN_SQL = """
+    CREATE TEMP TABLE session_follow_up_plan (
+        registration_id uuid PRIMARY KEY,
+        registration_name varchar(100),
+        parent_id uuid NOT NULL,
+        assigned_to uuid NOT NULL,
+        communication_id uuid NOT NULL,
+        follow_up_id uuid NOT NULL
+    ) ON COMMIT DROP
+"""
+
+_PLAN_SQL = """
+    INSERT INTO session_follow_up_plan
+    WITH attendees AS (
+        SELECT r.id AS registration_id, r.name, r.created_at, r.parent_id
+        FROM registrations r
+        WHERE r.session_id = :session_id
+          AND r.status = ANY(CAST(:statuses AS registration_status[]))
+          AND r.follow_up_id IS NULL
+          AND r.parent_id IS NOT NULL
+    ),
+    numbered AS (
+        SELECT a.*, row_number() OVER (ORDER BY a.created_at, a.registration_id) AS rn FROM attendees a
+    ),
+    staff AS (
+        SELECT s.id AS user_id, s.ord,
+               (SELECT count(*) FROM follow_ups f WHERE f.assigned_to = s.id AND NOT f.is_done) AS open_count
+        FROM unnest(CAST(:staff_ids AS uuid[])) WITH ORDINALITY AS s(id, ord)
+    ),
+    slots AS (
+        SELECT staff.user_id, row_number() OVER (ORDER BY {slot_order}) AS slot
+        FROM staff CROSS JOIN generate_series(1, (SELECT count(*) FROM numbered)) AS k
+    )
+    SELECT n.registration_id, n.name, n.parent_id, s.user_id, gen_random_uuid(), gen_random_uuid()
+    FROM numbered n
+    JOIN slots s ON s.slot = n.rn
+"""
+
+_INSERT_COMMUNICATIONS_SQL = """
+    INSERT INTO communication_records (id, campus_id, parent_id, user_id, contact_type, summary)
+    SELECT communication_id, :campus_id, parent_id, :user_id, CAST('in_person' AS contact_type), :summary
+    FROM session_follow_up_plan
+"""
+
+# created_at = now() is the insert above (same transaction): prunes to the current partition
+_INDEX_COMMUNICATIONS_SQL = """
+    INSERT INTO communication_search_grams (gram, record_id, tf, campus_id, contact_type, created_at)
+    SELECT g.gram, r.id, g.tf, r.campus_id, r.contact_type, r.created_at
+    FROM session_follow_up_plan p
+    JOIN communication_records r ON r.id = p.communication_id AND r.created_at = now(),
+         unnest(CAST(:grams AS varchar[]), CAST(:tfs AS smallint[])) AS g(gram, tf)
+"""
+
+_INSERT_FOLLOW_UPS_SQL = """
+    INSERT INTO follow_ups (id, campus_id, communication_id, parent_id, assigned_to, description, due_date, is_done)
+    SELECT follow_up_id, :campus_id, communication_id, parent_id, assigned_to, :description, :due_date, false
+    FROM session_follow_up_plan
+"""
+
+_MARK_REGISTRATIONS_SQL = """
+    UPDATE registrations r SET follow_up_id = p.follow_up_id
+    FROM session_follow_up_plan p
+    WHERE r.id = p.registration_id
+"""
+
+_REPORT_SQL = """
+    SELECT p.registration_id, p.registration_name, p.parent_id, pa.name AS parent_name,
+           p.communication_id, p.follow_up_id, p.assigned_to, u.full_name AS assigned_user_name
+    FROM session_follow_up_plan p
+    JOIN parents pa ON pa.id = p.parent_id
+    JOIN users u ON u.id = p.assigned_to
+    ORDER BY u.full_name, pa.name
+"""
+
+_UNMATCHED_SQL = """
+    SELECT r.id, r.name, r.email, r.match_status FROM registrations r
+    WHERE r.session_id = :session_id
+      AND r.status = ANY(CAST(:statuses AS registration_status[]))
+      AND r.follow_up_id IS NULL
+      AND NOT EXISTS (SELECT 1 FROM session_follow_up_plan p WHERE p.registration_id = r.id)
+    ORDER BY r.created_at
+"""
+
+_ALREADY_SQL = """
+    SELECT count(*) FROM registrations
+    WHERE session_id = :session_id AND follow_up_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM session_follow_up_plan p WHERE p.registration_id = registrations.id)
+"""
+
+
+@dataclass
+class GenerationResult:
+    created: list[dict] = field(default_factory=list)
+    unmatched: list[dict] = field(default_factory=list)
+    already_generated: int = 0
+    per_assignee: dict[str, int] = field(default_factory=dict)
+
+
+async def _resolve_staff(db: AsyncSession, assignee_ids: list[uuid.UUID] | None) -> list[uuid.UUID]:
+    if assignee_ids:
+        assignee_ids = list(dict.fromkeys(assignee_ids))
+        found = set((await db.execute(
+            select(User.id).where(User.id.in_(assignee_ids), User.is_active == True)  # noqa: E712
+        )).scalars().all())
+        missing = [str(uid) for uid in assignee_ids if uid not in found]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown or inactive assignees: {missing}")
+        return assignee_ids
+    staff = list((await db.execute(
+        select(User.id)
+        .where(User.role == Role.teacher, User.is_active == True)  # noqa: E712
+        .order_by(User.full_name)
+    )).scalars().all())
+    if not staff:
+        raise HTTPException(status_code=400, detail="No active teachers to assign follow-ups to")
+    return staff
+
+
+async def generate_follow_ups(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    actor_id: uuid.UUID,
+    strategy: Strategy = "balanced",
+    assignee_ids: list[uuid.UUID] | None = None,
+    statuses: list[RegistrationStatus] | None = None,
+    due_in_days: int = 3,
+    description: str | None = None,
+) -> GenerationResult:
+    """Create one follow-up per attendee who does not have one yet; caller commits."""
+    statuses = statuses or [RegistrationStatus.confirmed]
+    if RegistrationStatus.cancelled in statuses:
+        raise HTTPException(status_code=400, detail="Cancelled registrations cannot get follow-ups")
+    # Serializes concurrent runs for the same session
+    session = (await db.execute(
+        select(InfoSession).where(InfoSession.id == session_id).with_for_update()
+    )).scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    staff_ids = await _resolve_staff(db, assignee_ids)
+    await match_registrations(db, session_id)
+
+    status_values = [s.value for s in statuses]
+    await db.execute(text(_CREATE_PLAN_SQL))
+    await db.execute(
+        text(_PLAN_SQL.format(slot_order=_SLOT_ORDER[strategy])),
+        {"session_id": session_id, "statuses": status_values, "staff_ids": staff_ids},
+    )
+
+    result = GenerationResult()
+    rows = (await db.execute(text(_REPORT_SQL))).all()
+    if rows:
+        summary = f"參加說明會「{session.title}」（{session.session_date.isoformat()}）"
+        description = description or f"說明會後續聯繫：{session.title}"
+        due_date = max(session.session_date, date.today()) + timedelta(days=due_in_days)
+        await db.execute(
+            text(_INSERT_COMMUNICATIONS_SQL),
+            {"campus_id": session.campus_id, "user_id": actor_id, "summary": summary},
+        )
+        grams = tokenize(summary)
+        if grams:
+            await db.execute(
+                text(_INDEX_COMMUNICATIONS_SQL),
+                {"grams": list(grams), "tfs": [min(tf, 32767) for tf in grams.values()]},
+            )
+        await db.execute(
+            text(_INSERT_FOLLOW_UPS_SQL),
+            {"campus_id": session.campus_id, "description": description, "due_date": due_date},
+        )
+        await db.execute(text(_MARK_REGISTRATIONS_SQL))
+
+        record_bulk_change(db, "communication_records", "INSERT")
+        record_bulk_change(db, "follow_ups", "INSERT")
+        record_bulk_change(db, "registrations")
+        record_bulk(db, "communication_records", "INSERT", [
+            (str(r.communication_id), {"id": r.communication_id, "parent_id": r.parent_id, "user_id": actor_id,
+                                       "contact_type": "in_person", "summary": summary})
+            for r in rows
+        ])
+        record_bulk(db, "follow_ups", "INSERT", [
+            (str(r.follow_up_id), {"id": r.follow_up_id, "communication_id": r.communication_id,
+                                   "parent_id": r.parent_id, "assigned_to": r.assigned_to,
+                                   "description": description, "due_date": due_date, "is_done": False})
+            for r in rows
+        ])
+        record_bulk(db, "registrations", "UPDATE", [
+            (str(r.registration_id), {"follow_up_id": r.follow_up_id}) for r in rows
+        ])
+
+        for r in rows:
+            result.created.append({
+                "registration_id": str(r.registration_id),
+                "registration_name": r.registration_name,
+                "parent_id": str(r.parent_id),
+                "parent_name": r.parent_name,
+                "follow_up_id": str(r.follow_up_id),
+                "assigned_to": str(r.assigned_to),
+                "assigned_user_name": r.assigned_user_name,
+                "due_date": due_date.isoformat(),
+            })
+            result.per_assignee[r.assigned_user_name] = result.per_assignee.get(r.assigned_user_name, 0) + 1
+
+    params = {"session_id": session_id, "statuses": status_values}
+    result.unmatched = [
+        {"registration_id": str(r.id), "name": r.name, "email": r.email, "match_status": r.match_status}
+        for r in (await db.execute(text(_UNMATCHED_SQL), params)).all()
+    ]
+    result.already_generated = (await db.execute(text(_ALREADY_SQL), {"session_id": session_id})).scalar_one()
+    return result
@@ -0,0 +1,83 @@
+"""Campus (tenant) scoping.
+
+``get_current_user`` calls ``enter_campus()`` with the signed-in user's
+campus. From then on, within the request:
+
+* every ORM SELECT/UPDATE/DELETE on a ``CampusScoped`` model gets
+  ``campus_id = <campus>`` added (``with_loader_criteria``), including
+  ``db.get()`` of a row that is not yet in the session;
+* new ``CampusScoped`` objects are stamped with the campus on flush;
+* with TENANT_RLS on, each transaction sets ``crm.campus_id`` so the
+  ``campus_isolation`` row-level security policies apply as well.
+
+Raw SQL (``text()``) is not rewritten; those queries filter on
+``campus_id`` themselves. Background jobs and scripts run without a campus
+and see every row of the database they are connected to.
+"""
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+from app.config import settings
+from app.database import campus_session
+from app.models.user import CampusScoped
+
+
+@dataclass(frozen=True)
+class CampusContext:
+    id: uuid.UUID
+    code: str
+
+
+current_campus: ContextVar[CampusContext | None] = ContextVar("current_campus", default=None)
+
+
+def current_campus_id() -> uuid.UUID | None:
+    campus = current_campus.get()
+    return campus.id if campus else None
+
+
+async def enter_campus(db: AsyncSession, campus: CampusContext) -> None:
+    """Scope the rest of the request (and ``db``) to ``campus``."""
+    current_campus.set(campus)
+    if settings.TENANT_RLS and db.in_transaction():
+        # The transaction started before the campus was known (user lookup)
+        await db.execute(text("SELECT set_config('crm.campus_id', :campus_id, true)"), {"campus_id": str(campus.id)})
+
+
+def campus_sessionmaker() -> async_sessionmaker:
+    """Session factory for the current campus's database (DATABASE_URL outside a request)."""
+    campus = current_campus.get()
+    return campus_session(campus.code if campus else None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_statement(state: ORMExecuteState) -> None:
+    campus_id = current_campus_id()
+    if campus_id is None or state.is_column_load or state.is_relationship_load:
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        state.statement = state.statement.options(
+            with_loader_criteria(CampusScoped, lambda cls: cls.campus_id == campus_id, include_aliases=True)
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_campus(session: Session, flush_context, instances) -> None:
+    campus_id = current_campus_id()
+    if campus_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, CampusScoped) and obj.campus_id is None:
+            obj.campus_id = campus_id
+
+
+@event.listens_for(Session, "after_begin")
+def _set_rls_campus(session: Session, transaction, connection) -> None:
+    campus_id = current_campus_id()
+    if settings.TENANT_RLS and campus_id is not None:
+        connection.execute(text("SELECT set_config('crm.campus_id', :campus_id, true)"), {"campus_id": str(campus_id)})
@@ -0,0 +1,390 @@
+"""Lightweight request tracing with local export.
+
+``TracingMiddleware`` opens a root span for each sampled HTTP request. The
+span continues a W3C ``traceparent`` header when one is sent, and the trace
+id is returned as ``X-Trace-ID``. Nested spans are recorded for:
+
+* ``endpoint`` – the matched route, from ``TracedRoute`` (parameter
+  validation, dependencies, handler, serialization);
+* ``auth.get_current_user`` and other functions decorated with ``@traced``;
+* ``db <VERB> <table>`` – every SQL statement, from engine events;
+* ``handler`` / ``serialize`` / ``coalesce.wait`` inside coalesced GETs;
+* ``email.send``, ``template.render`` and ``http.send`` (response body
+  streaming).
+
+Context travels in a ContextVar, so spans opened in tasks, greenlets
+(SQLAlchemy) and threadpool calls nest correctly. Outside a sampled request
+``span()`` does nothing. Finished spans are queued to a background thread,
+which writes them as JSON lines to a rotating file or POSTs them as OTLP/JSON
+to a collector (``scripts/trace_report.py collect`` is a local stand-in).
+``scripts/trace_report.py summary`` reports the critical path per route.
+"""
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import jinja2
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = b"x-trace-id"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Where the table name follows, per leading SQL keyword
+_TABLE_AFTER = {
+    verb: re.compile(pattern + r'"?([\w.]+)', re.IGNORECASE)
+    for verb, pattern in {
+        "SELECT": r"\bFROM\s+", "DELETE": r"\bFROM\s+", "INSERT": r"\bINTO\s+",
+        "UPDATE": r"^\s*UPDATE\s+", "COPY": r"^\s*COPY\s+",
+    }.items()
+}
+_EXPORT_BATCH = 512
+
+
+@dataclass(slots=True)
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def current_trace_id() -> str | None:
+    span = current_span.get()
+    return span.trace_id if span else None
+
+
+def _child(name: str, attributes: dict) -> Span | None:
+    parent = current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace_id, _new_id(64), parent.span_id, name, time.time_ns(), attributes=attributes)
+
+
+def _finish(span: Span, end_ns: int | None = None) -> None:
+    span.end_ns = end_ns or time.time_ns()
+    exporter.submit(span)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child of the current span around the block (no-op outside a sampled request)."""
+    s = _child(name, attributes)
+    if s is None:
+        yield None
+        return
+    token = current_span.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.error = type(exc).__name__
+        raise
+    finally:
+        current_span.reset(token)
+        _finish(s)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes) -> None:
+    """Record an already finished child of the current span."""
+    s = _child(name, attributes)
+    if s is not None:
+        s.start_ns = start_ns
+        _finish(s, end_ns)
+
+
+def traced(name: str) -> Callable:
+    """Decorator: run an async function inside ``span(name)``.
+
+    ``functools.wraps`` keeps the signature, so FastAPI dependencies can be traced too.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---- HTTP ----
+
+class TracedRoute(APIRoute):
+    """APIRoute whose handler runs in an ``endpoint`` span."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        path, name = self.path, self.name
+
+        async def traced_handler(request):
+            with span("endpoint", route=path, handler=name):
+                return await handler(request)
+
+        return traced_handler
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware: root span per sampled HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        parent = _TRACEPARENT_RE.match(dict(scope["headers"]).get(b"traceparent", b"").decode("latin-1"))
+        if parent:
+            trace_id, parent_id, sampled = parent.group(1), parent.group(2), parent.group(3) == "01"
+        else:
+            trace_id, parent_id, sampled = _new_id(128), None, random.random() < settings.TRACE_SAMPLE_RATE
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(trace_id, _new_id(64), parent_id, "http", time.time_ns(), attributes={
+            "http.method": scope["method"], "http.target": scope["path"],
+        })
+        token = current_span.set(root)
+        send_started: int | None = None
+
+        async def traced_send(message) -> None:
+            nonlocal send_started
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                message["headers"] = [*message.get("headers", []), (TRACE_ID_HEADER, trace_id.encode())]
+                send_started = time.time_ns()
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and send_started:
+                record_span("http.send", send_started, time.time_ns())
+
+        try:
+            await self.app(scope, receive, traced_send)
+        except BaseException as exc:
+            root.error = type(exc).__name__
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            root.attributes["route"] = route
+            root.name = f"{scope['method']} {route or scope['path']}"
+            current_span.reset(token)
+            _finish(root)
+
+
+# ---- SQL ----
+
+def statement_name(statement: str) -> str:
+    """``db SELECT parents`` style span name: leading keyword and first table of a statement."""
+    verb = statement.split(None, 1)[0].upper() if statement.strip() else ""
+    pattern = _TABLE_AFTER.get(verb)
+    match = pattern.search(statement) if pattern else None
+    return f"db {verb} {match.group(1)}" if match else f"db {verb}".rstrip()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    s = _child(statement_name(statement), {"db.statement": statement[:settings.TRACE_SQL_MAX_LENGTH]})
+    if s is not None:
+        conn.info.setdefault("trace_spans", []).append(s)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    spans = conn.info.get("trace_spans")
+    if spans:
+        s = spans.pop()
+        s.attributes["db.rows"] = cursor.rowcount
+        _finish(s)
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_query(exception_context) -> None:
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        s = spans.pop()
+        s.error = type(exception_context.original_exception).__name__
+        _finish(s)
+
+
+# ---- templates ----
+
+class TracedTemplate(jinja2.Template):
+    """Jinja template class whose ``render()`` is a ``template.render`` span."""
+
+    def render(self, *args, **kwargs) -> str:
+        with span("template.render", template=self.name):
+            return super().render(*args, **kwargs)
+
+
+# ---- export ----
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    """OTLP/JSON ``ExportTraceServiceRequest`` for ``spans``."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": "app.services.tracing"},
+            "spans": [
+                {
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 2 if s.parent_id is None else 1,  # SERVER for roots, INTERNAL otherwise
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [
+                        {"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items() if v is not None
+                    ],
+                    "status": {"code": 2, "message": s.error} if s.error else {},
+                }
+                for s in spans
+            ],
+        }],
+    }]}
+
+
+class SpanExporter:
+    """Bounded queue drained by a background thread (file or OTLP/HTTP sink)."""
+
+    def __init__(self):
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, span: Span) -> None:
+        q = self._queue
+        if q is None:
+            return
+        try:
+            q.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        if self._thread is not None or not settings.TRACING_ENABLED:
+            return
+        sink: logging.Handler | None = None
+        if settings.TRACE_EXPORTER == "file":
+            os.makedirs(os.path.dirname(settings.TRACE_FILE) or ".", exist_ok=True)
+            sink = logging.handlers.RotatingFileHandler(
+                settings.TRACE_FILE, maxBytes=settings.TRACE_FILE_MAX_BYTES,
+                backupCount=settings.TRACE_FILE_BACKUPS, encoding="utf-8",
+            )
+        self._queue = queue.Queue(maxsize=settings.TRACE_QUEUE_MAX)
+        # The thread keeps its own queue and sink: stop() may give up waiting while it still exports
+        self._thread = threading.Thread(
+            target=self._run, args=(self._queue, sink), name="trace-exporter", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop taking spans; export what is queued, waiting up to 10 s for the thread."""
+        if self._thread is None:
+            return
+        q, thread = self._queue, self._thread
+        self._queue = self._thread = None
+        q.put(None)
+        thread.join(timeout=10)
+        if thread.is_alive():
+            logger.warning("Trace exporter still busy after 10s; it finishes in the background")
+
+    def _run(self, q: queue.Queue, sink: logging.Handler | None) -> None:
+        try:
+            while True:
+                batch = [q.get()]
+                while len(batch) < _EXPORT_BATCH and batch[-1] is not None:
+                    try:
+                        batch.append(q.get(timeout=settings.TRACE_FLUSH_INTERVAL_SECONDS))
+                    except queue.Empty:
+                        break
+                spans = [s for s in batch if s is not None]
+                if spans:
+                    self._export(spans, sink)
+                if batch[-1] is None:
+                    return
+        finally:
+            if sink is not None:
+                sink.close()
+
+    def _export(self, spans: list[Span], sink: logging.Handler | None) -> None:
+        try:
+            if sink is not None:
+                for s in spans:
+                    sink.emit(logging.makeLogRecord({"msg": json.dumps(s.to_dict(), ensure_ascii=False)}))
+            else:
+                request = urllib.request.Request(
+                    settings.TRACE_OTLP_ENDPOINT, data=json.dumps(to_otlp(spans)).encode(),
+                    headers={"Content-Type": "application/json"}, method="POST",
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+            self.exported += len(spans)
+        except Exception:
+            self.failed += len(spans)
+            logger.exception("Exporting %d spans failed", len(spans))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.TRACING_ENABLED,
+            "exporter": settings.TRACE_EXPORTER,
+            "sample_rate": settings.TRACE_SAMPLE_RATE,
+            "queued": q.qsize() if (q := self._queue) else 0,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+exporter = SpanExporter()
@@ -0,0 +1,314 @@
+"""In-process typeahead index over parent and student names.
+
+Built once at startup and kept current from ``crm_changes`` notifications,
+so ``/api/typeahead`` answers from memory without touching Postgres.
+The index covers the campuses in DATABASE_URL, each with postings of its
+own, so a search only ever looks at its campus's entries. Campuses placed on a database of
+their own (CAMPUS_DATABASES) are answered by ``search_db``.
+
+Each entry is indexed by the unigrams and bigrams of its searchable text
+(name, plus grade for students) and by the trailing digits of its phone
+number. A query intersects the postings of its own grams, verifies the
+substring match and ranks exact > prefix > substring > phone suffix.
+"""
+import bisect
+import heapq
+import logging
+import re
+import unicodedata
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session, database_url
+from app.models.parent import Parent
+from app.models.student import Student
+
+logger = logging.getLogger(__name__)
+
+MIN_PHONE_SUFFIX = 3
+# Bounds worst-case latency for very unselective queries (a single common character)
+MAX_SCORED_CANDIDATES = 2000
+_NON_DIGITS = re.compile(r"\D")
+
+
+@dataclass(slots=True)
+class Entry:
+    kind: str  # "parent" | "student"
+    id: uuid.UUID
+    campus_id: uuid.UUID
+    name: str
+    detail: str  # phone for parents, grade for students
+    key: str  # normalized name
+    text: str  # normalized searchable text
+    phone_digits: str = ""
+
+
+def _normalize(value: str) -> str:
+    return unicodedata.normalize("NFKC", value).lower().strip()
+
+
+def _grams(value: str) -> set[str]:
+    chars = value.replace(" ", "")
+    grams = set(chars)
+    grams.update(chars[i:i + 2] for i in range(len(chars) - 1))
+    return grams
+
+
+class _CampusIndex:
+    """Postings of one campus: a search never sees, or pays for, another campus's entries."""
+
+    def __init__(self):
+        self.entries: dict[uuid.UUID, Entry] = {}
+        self.postings: dict[str, set[uuid.UUID]] = {}
+        self.phone_suffixes: dict[str, set[uuid.UUID]] = {}
+        # (key, id) sorted by key: prefix matches are a bisect range scan
+        self.sorted_keys: list[tuple[str, uuid.UUID]] = []
+
+    def add(self, entry: Entry, keep_sorted: bool = True) -> None:
+        self.entries[entry.id] = entry
+        if keep_sorted:
+            bisect.insort(self.sorted_keys, (entry.key, entry.id))
+        else:
+            self.sorted_keys.append((entry.key, entry.id))
+        for gram in _grams(entry.text):
+            self.postings.setdefault(gram, set()).add(entry.id)
+        digits = entry.phone_digits
+        for k in range(MIN_PHONE_SUFFIX, len(digits) + 1):
+            self.phone_suffixes.setdefault(digits[-k:], set()).add(entry.id)
+
+    def discard(self, entry: Entry) -> None:
+        self.entries.pop(entry.id, None)
+        pos = bisect.bisect_left(self.sorted_keys, (entry.key, entry.id))
+        if pos < len(self.sorted_keys) and self.sorted_keys[pos] == (entry.key, entry.id):
+            del self.sorted_keys[pos]
+        for gram in _grams(entry.text):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(entry.id)
+                if not ids:
+                    del self.postings[gram]
+        digits = entry.phone_digits
+        for k in range(MIN_PHONE_SUFFIX, len(digits) + 1):
+            ids = self.phone_suffixes.get(digits[-k:])
+            if ids is not None:
+                ids.discard(entry.id)
+                if not ids:
+                    del self.phone_suffixes[digits[-k:]]
+
+    def search(self, query: str, limit: int, kind: str | None) -> list[tuple[Entry, int]]:
+        scored: dict[uuid.UUID, int] = {}
+
+        # Fast path: enough exact/prefix name matches to fill the page
+        prefix_hits: list[tuple[Entry, int]] = []
+        pos = bisect.bisect_left(self.sorted_keys, (query,))
+        while pos < len(self.sorted_keys) and len(prefix_hits) < limit:
+            key, entry_id = self.sorted_keys[pos]
+            if not key.startswith(query):
+                break
+            entry = self.entries[entry_id]
+            if kind is None or entry.kind == kind:
+                prefix_hits.append((entry, 100 if key == query else 80))
+            pos += 1
+        if len(prefix_hits) >= limit:
+            return sorted(prefix_hits, key=lambda r: (-r[1], len(r[0].name), r[0].name))
+        # Fewer than ``limit``: these are all of them, so the cap below cannot drop one
+        for entry, score in prefix_hits:
+            scored[entry.id] = score
+
+        compact = query.replace(" ", "")
+        grams = sorted(
+            {compact[i:i + 2] for i in range(len(compact) - 1)} or {compact},
+            key=lambda g: len(self.postings.get(g, ())),
+        )
+        candidates: set[uuid.UUID] | None = None
+        for gram in grams:
+            ids = self.postings.get(gram)
+            if not ids:
+                candidates = set()
+                break
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                break
+        if candidates and kind is not None:
+            candidates = {entry_id for entry_id in candidates if self.entries[entry_id].kind == kind}
+        if candidates and len(candidates) > MAX_SCORED_CANDIDATES:
+            # Shortest names first: the closest to an exact match, and the ranking's tie-break
+            candidates = heapq.nsmallest(
+                MAX_SCORED_CANDIDATES, candidates,
+                key=lambda entry_id: (len(self.entries[entry_id].key), self.entries[entry_id].key),
+            )
+        for entry_id in candidates or ():
+            if entry_id in scored:
+                continue
+            entry = self.entries[entry_id]
+            name = entry.key
+            if name == query:
+                scored[entry_id] = 100
+            elif name.startswith(query):
+                scored[entry_id] = 80
+            elif query in name:
+                scored[entry_id] = 60
+            elif query in entry.text:
+                scored[entry_id] = 40
+
+        digits = _NON_DIGITS.sub("", query)
+        if len(digits) >= MIN_PHONE_SUFFIX and len(digits) == len(compact):
+            for entry_id in self.phone_suffixes.get(digits, ()):
+                if kind is None or self.entries[entry_id].kind == kind:
+                    scored[entry_id] = max(scored.get(entry_id, 0), 50)
+
+        results = ((self.entries[entry_id], score) for entry_id, score in scored.items())
+        return heapq.nsmallest(limit, results, key=lambda r: (-r[1], len(r[0].name), r[0].name))
+
+
+class TypeaheadIndex:
+    def __init__(self):
+        self._entries: dict[uuid.UUID, Entry] = {}
+        self._campuses: dict[uuid.UUID, _CampusIndex] = {}
+        # Changes applied while a rebuild reads its snapshot, replayed onto it before the swap
+        self._rebuild_logs: list[list[tuple[uuid.UUID, Entry | None]]] = []
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---- maintenance ----
+
+    def upsert(self, entry: Entry) -> None:
+        self._apply(entry.id, entry)
+
+    def remove(self, entry_id: uuid.UUID) -> None:
+        self._apply(entry_id, None)
+
+    def _apply(self, entry_id: uuid.UUID, entry: Entry | None) -> None:
+        for log in self._rebuild_logs:
+            log.append((entry_id, entry))
+        old = self._entries.pop(entry_id, None)
+        if old is not None:
+            campus = self._campuses[old.campus_id]
+            campus.discard(old)
+            if not campus.entries:
+                del self._campuses[old.campus_id]
+        if entry is not None:
+            self._entries[entry_id] = entry
+            self._campuses.setdefault(entry.campus_id, _CampusIndex()).add(entry)
+
+    def begin_rebuild(self) -> list[tuple[uuid.UUID, Entry | None]]:
+        """Start recording changes; call before reading the snapshot handed to ``replace_all``."""
+        log: list[tuple[uuid.UUID, Entry | None]] = []
+        self._rebuild_logs.append(log)
+        return log
+
+    def end_rebuild(self, log: list[tuple[uuid.UUID, Entry | None]]) -> None:
+        self._rebuild_logs = [active for active in self._rebuild_logs if active is not log]
+
+    def replace_all(self, entries: list[Entry], log: list[tuple[uuid.UUID, Entry | None]] = ()) -> None:
+        """Swap in ``entries``, plus the changes recorded in ``log`` since the snapshot was read."""
+        fresh = TypeaheadIndex()
+        for entry in entries:
+            fresh._entries[entry.id] = entry
+            fresh._campuses.setdefault(entry.campus_id, _CampusIndex()).add(entry, keep_sorted=False)
+        for campus in fresh._campuses.values():
+            campus.sorted_keys.sort()
+        # An upsert that landed during the read may predate or postdate the
+        # snapshot; replaying in arrival order leaves what incremental updates would have
+        for entry_id, entry in log:
+            fresh._apply(entry_id, entry)
+        self.end_rebuild(log)
+        # Swap in one step so concurrent readers never see a half-built index
+        self._entries, self._campuses = fresh._entries, fresh._campuses
+        self.ready = True
+
+    # ---- query ----
+
+    def search(
+        self, q: str, campus_id: uuid.UUID, limit: int = 10, kind: str | None = None
+    ) -> list[tuple[Entry, int]]:
+        query = _normalize(q)
+        campus = self._campuses.get(campus_id)
+        if not query or campus is None:
+            return []
+        return campus.search(query, limit, kind)
+
+
+def parent_entry(parent_id: uuid.UUID, campus_id: uuid.UUID, name: str, phone: str) -> Entry:
+    return Entry(
+        kind="parent", id=parent_id, campus_id=campus_id, name=name, detail=phone,
+        key=_normalize(name), text=_normalize(name), phone_digits=_NON_DIGITS.sub("", phone or ""),
+    )
+
+
+def student_entry(student_id: uuid.UUID, campus_id: uuid.UUID, name: str, grade: str) -> Entry:
+    return Entry(
+        kind="student", id=student_id, campus_id=campus_id, name=name, detail=grade,
+        key=_normalize(name), text=_normalize(f"{name} {grade}"),
+    )
+
+
+index = TypeaheadIndex()
+
+
+def indexed(campus: str | None) -> bool:
+    """Whether ``campus`` (by code) lives in the database the index is built from."""
+    return database_url(campus) == settings.DATABASE_URL
+
+
+async def rebuild() -> None:
+    """Reload every parent and student into a fresh index."""
+    log = index.begin_rebuild()
+    try:
+        async with async_session() as db:
+            parents = (await db.execute(select(Parent.id, Parent.campus_id, Parent.name, Parent.phone))).all()
+            students = (await db.execute(select(Student.id, Student.campus_id, Student.name, Student.grade))).all()
+    except BaseException:
+        index.end_rebuild(log)
+        raise
+    index.replace_all(
+        [parent_entry(*row) for row in parents] + [student_entry(*row) for row in students], log
+    )
+    logger.info("Typeahead index built: %d parents, %d students", len(parents), len(students))
+
+
+async def handle_change(event: dict) -> None:
+    """Apply one ``crm_changes`` notification.
+
+    The trigger only fires when an indexed column changes and sends those
+    columns along ({"table", "op", "id", "campus_id", "name", "phone" | "grade"}),
+    so a bulk import costs each worker no queries at all.
+    """
+    table = event.get("table")
+    if table not in ("parents", "students"):
+        return
+    entry_id = uuid.UUID(event["id"])
+    if event.get("op") == "DELETE":
+        index.remove(entry_id)
+        return
+    campus_id = uuid.UUID(event["campus_id"])
+    if table == "parents":
+        index.upsert(parent_entry(entry_id, campus_id, event["name"], event["phone"]))
+    else:
+        index.upsert(student_entry(entry_id, campus_id, event["name"], event["grade"]))
+
+
+async def search_db(db: AsyncSession, q: str, limit: int = 10, kind: str | None = None) -> list[tuple[Entry, int]]:
+    """Fallback until the in-memory index has been built, and for campuses it does not cover."""
+    results: list[tuple[Entry, int]] = []
+    if kind in (None, "parent"):
+        rows = (await db.execute(
+            select(Parent.id, Parent.campus_id, Parent.name, Parent.phone)
+            .where(Parent.name.ilike(f"%{q}%") | Parent.phone.ilike(f"%{q}%"))
+            .limit(limit)
+        )).all()
+        results += [(parent_entry(*row), 0) for row in rows]
+    if kind in (None, "student"):
+        rows = (await db.execute(
+            select(Student.id, Student.campus_id, Student.name, Student.grade)
+            .where(Student.name.ilike(f"%{q}%") | Student.grade.ilike(f"%{q}%"))
+            .limit(limit)
+        )).all()
+        results += [(student_entry(*row), 0) for row in rows]
+    return results[:limit]
@@ -0,0 +1,85 @@
+"""Startup warm-up and readiness.
+
+Instances scale to zero, so the first request after a scale-up used to pay
+for opening DB connections and compiling Jinja templates. ``warm_up()`` does
+that work once at startup; ``/readyz`` reports ready only after it finishes.
+"""
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.services.assets import load_manifest
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY_SECONDS = 2.0
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.checks: dict[str, bool] = {"database": False, "templates": False, "assets": False}
+        self.timings_ms: dict[str, float] = {}
+        self.error: str | None = None
+
+
+readiness = Readiness()
+
+
+async def _warm_pool() -> None:
+    # Check out N connections at once so the pool really holds N open sockets afterwards.
+    count = max(1, min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE))
+
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(count)))
+
+
+def _warm_templates() -> int:
+    # Imported here: pages.py builds the Jinja environment at import time
+    from app.routers.pages import templates
+
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
+
+
+async def warm_up() -> None:
+    """Run every warm-up step, retrying the DB until it is reachable."""
+    started = time.perf_counter()
+
+    t = time.perf_counter()
+    count = _warm_templates()
+    readiness.timings_ms["templates"] = round((time.perf_counter() - t) * 1000, 1)
+    readiness.checks["templates"] = True
+    logger.info("Compiled %d templates", count)
+
+    t = time.perf_counter()
+    load_manifest()
+    readiness.timings_ms["assets"] = round((time.perf_counter() - t) * 1000, 1)
+    readiness.checks["assets"] = True
+
+    while True:
+        t = time.perf_counter()
+        try:
+            await _warm_pool()
+        except Exception as exc:
+            readiness.error = f"database: {exc}"
+            logger.warning("DB warm-up failed (%s); retrying in %.0fs", exc, RETRY_DELAY_SECONDS)
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
+            continue
+        readiness.timings_ms["database"] = round((time.perf_counter() - t) * 1000, 1)
+        readiness.checks["database"] = True
+        readiness.error = None
+        break
+
+    readiness.timings_ms["total"] = round((time.perf_counter() - started) * 1000, 1)
+    readiness.ready = True
+    logger.info("Warm-up complete: %s", readiness.timings_ms)
@@ -0,0 +1,181 @@
+"""Single-statement writes with RETURNING and optimistic concurrency.
+
+The edit endpoints used to SELECT the row, set attributes, commit and
+``refresh()`` it. That was three round trips, and the last writer silently
+won. Here every write is one statement:
+
+* ``insert_returning`` – ``INSERT ... RETURNING`` the stored row, server
+  defaults included;
+* ``update_returning`` – ``UPDATE ... FROM (SELECT ... FOR UPDATE) old WHERE
+  id = ... AND version = ... RETURNING`` the new row plus the previous values
+  of the changed columns (for the audit diff). ``version`` is bumped in the
+  same statement;
+* ``delete_returning`` – ``DELETE ... WHERE id = ... AND version = ...
+  RETURNING`` the removed row.
+
+Clients send the version they last read as ``If-Match`` (write responses
+carry it as ``ETag``). A stale version is answered with 409; only then is
+the row read again to tell a conflict from a missing row. Without
+``If-Match`` the write is unconditional, but it still only sets the columns
+the request names.
+
+These statements bypass the unit of work, so the audit entries and cache
+invalidations the flush hooks would record are recorded here. ``@validates``
+hooks only run for inserts (the object is built first); for updates, callers
+set derived columns themselves. ORM flushes of the same models check and bump
+``version`` too (``version_id_col``); ``stale_data_handler`` turns their
+conflicts into 409 as well.
+"""
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.sql import ColumnElement
+
+from app.models.user import CampusScoped
+from app.services.audit import record_rows
+from app.services.cache import record_bulk_change, record_row_change
+from app.services.tenancy import current_campus_id
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: str | None) -> int | None:
+    """Version from an ``If-Match`` header (``"3"`` or ``W/"3"``); None when absent or ``*``."""
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be an ETag returned by this API")
+    return int(tag)
+
+
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Modified by someone else; reload and try again"},
+    )
+
+
+def _row_id(obj) -> str:
+    mapper = type(obj).__mapper__
+    return ":".join(str(v) for v in mapper.primary_key_from_instance(obj))
+
+
+def _values(obj, keys=None) -> dict:
+    return {
+        attr.key: getattr(obj, attr.key)
+        for attr in type(obj).__mapper__.column_attrs
+        if keys is None or attr.key in keys
+    }
+
+
+async def _miss(
+    db: AsyncSession, model: type[DeclarativeBase], row_id, where: tuple, not_found: str, forbidden: str,
+) -> HTTPException:
+    """Why a guarded write matched no row: 404, 403 (``where`` failed) or 409 (stale version)."""
+    pk = model.__mapper__.primary_key[0]
+    current = (await db.execute(select(model.version, *where).where(pk == row_id))).first()
+    if current is None:
+        return HTTPException(status_code=404, detail=not_found)
+    if not all(current[1:]):
+        return HTTPException(status_code=403, detail=forbidden)
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Modified by someone else (now version {current.version}); reload and try again",
+        headers={"ETag": etag(current.version)},
+    )
+
+
+async def insert_returning(db: AsyncSession, obj, extra: tuple[ColumnElement, ...] = ()) -> Row:
+    """INSERT the transient ``obj``'s values; ``row[0]`` is the stored row, ``extra`` columns follow."""
+    model = type(obj)
+    if isinstance(obj, CampusScoped) and obj.campus_id is None:
+        obj.campus_id = current_campus_id()
+    # Constructor and @validates output; Python-side column defaults are applied by the INSERT
+    values = {k: v for k, v in vars(obj).items() if k in model.__mapper__.column_attrs}
+    row = (await db.execute(insert(model).values(**values).returning(model, *extra))).one()
+    created = row[0]
+    record_rows(db, model.__tablename__, "INSERT", [
+        (_row_id(created), {}, {k: v for k, v in _values(created).items() if v is not None}),
+    ])
+    record_row_change(db, created, "INSERT")
+    return row
+
+
+async def update_returning(
+    db: AsyncSession,
+    model: type[DeclarativeBase],
+    row_id,
+    values: dict,
+    version: int | None,
+    *,
+    not_found: str,
+    where: tuple[ColumnElement, ...] = (),
+    forbidden: str = "Forbidden",
+    extra: tuple[ColumnElement, ...] = (),
+) -> Row:
+    """UPDATE one row by primary key, guarded by ``version`` (None = unconditional) and ``where``.
+
+    ``row[0]`` is the updated row, ``extra`` columns follow. Raises 404, 403
+    (``where`` not met) or 409 (stale version) when nothing was updated.
+    """
+    pk = model.__mapper__.primary_key[0]
+    keys = list(values)
+    # The subquery reads (and locks) the row before the update: previous values for the audit entry
+    old = select(pk, *(getattr(model, k) for k in keys)).where(pk == row_id).with_for_update().subquery("old")
+    guard = [pk == old.c[pk.key], *where]
+    if version is not None:
+        guard.append(model.version == version)
+    stmt = (
+        update(model)
+        .where(*guard)
+        .values(**values, version=model.version + 1)
+        .returning(model, *extra, *(old.c[k].label(f"old_{k}") for k in keys))
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        raise await _miss(db, model, row_id, where, not_found, forbidden)
+    updated = row[0]
+    before = {k: row._mapping[f"old_{k}"] for k in keys}
+    after = _values(updated, keys)
+    changed = [k for k in keys if before[k] != after[k]]
+    if changed:
+        record_rows(db, model.__tablename__, "UPDATE", [
+            (_row_id(updated), {k: before[k] for k in changed}, {k: after[k] for k in changed}),
+        ])
+    record_row_change(db, updated, "UPDATE")
+    return row
+
+
+async def delete_returning(
+    db: AsyncSession, model: type[DeclarativeBase], row_id, version: int | None, *, not_found: str,
+):
+    """DELETE one row by primary key, guarded by ``version``; returns the removed row.
+
+    Dependent rows go with it through the foreign keys' ON DELETE actions, not
+    one ORM delete per child; their tables' caches are dropped as a whole.
+    """
+    pk = model.__mapper__.primary_key[0]
+    stmt = delete(model).where(pk == row_id)
+    if version is not None:
+        stmt = stmt.where(model.version == version)
+    stmt = stmt.returning(model).execution_options(synchronize_session=False)
+    deleted = (await db.execute(stmt)).scalar_one_or_none()
+    if deleted is None:
+        raise await _miss(db, model, row_id, (), not_found, "Forbidden")
+    record_rows(db, model.__tablename__, "DELETE", [
+        (_row_id(deleted), {k: v for k, v in _values(deleted).items() if v is not None}, {}),
+    ])
+    record_row_change(db, deleted, "DELETE")
+    for table in model.metadata.tables.values():
+        for fk in table.foreign_keys:
+            if fk.column.table is model.__table__ and fk.ondelete:
+                record_bulk_change(db, table.name, "DELETE" if fk.ondelete.upper() == "CASCADE" else "UPDATE")
+    db.expunge(deleted)
+    return deleted
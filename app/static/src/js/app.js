@@ -0,0 +1,31 @@
+// Shared by every page that extends base.html (navbar user + logout)
+async function logout() {
+    await fetch('/api/auth/logout', { method: 'POST' });
+    window.location.href = '/login';
+}
+
+// One Idempotency-Key per pending submission of a form: double clicks and
+// retries reuse it (the server answers them with the first response); it is
+// dropped once the submission succeeds so the next one gets a fresh key.
+const pendingSubmitKeys = {};
+function submitKey(name) {
+    if (!pendingSubmitKeys[name]) {
+        pendingSubmitKeys[name] = crypto.randomUUID
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+    return pendingSubmitKeys[name];
+}
+function submitDone(name) {
+    delete pendingSubmitKeys[name];
+}
+
+document.addEventListener('DOMContentLoaded', async () => {
+    try {
+        const resp = await fetch('/api/auth/me');
+        if (resp.ok) {
+            const user = await resp.json();
+            document.getElementById('navUserName').textContent = user.full_name;
+        }
+    } catch(e) {}
+});
@@ -0,0 +1,57 @@
+const today = new Date().toISOString().split('T')[0];
+
+async function loadDashboard() {
+    try {
+        const [followResp, parentResp, studentResp] = await Promise.all([
+            fetch('/api/follow-ups?mine=true&pending=true&fields=parent_id,parent_name,description,due_date'),
+            fetch('/api/parents?fields=id'),
+            fetch('/api/students?fields=id'),
+        ]);
+        const followUps = await followResp.json();
+        const parents = await parentResp.json();
+        const students = await studentResp.json();
+
+        document.getElementById('pendingCount').textContent = followUps.length;
+        document.getElementById('parentCount').textContent = parents.length;
+        document.getElementById('studentCount').textContent = students.length;
+
+        let overdue = 0;
+        const tbody = document.getElementById('followUpTable');
+        if (followUps.length === 0) {
+            tbody.innerHTML = '<tr><td colspan="4" class="text-center text-muted">目前沒有待辦事項</td></tr>';
+        } else {
+            tbody.innerHTML = '';
+            followUps.forEach(f => {
+                const isOverdue = f.due_date && f.due_date < today;
+                if (isOverdue) overdue++;
+                const row = document.createElement('tr');
+                if (isOverdue) row.classList.add('table-danger');
+                row.innerHTML = `
+                    <td><a href="/parents/${f.parent_id}">${f.parent_name || '-'}</a></td>
+                    <td>${f.description}</td>
+                    <td>${f.due_date || '<span class="text-muted">未設定</span>'}</td>
+                    <td>
+                        <button class="btn btn-sm btn-success" onclick="markDone('${f.id}')">
+                            <i class="bi bi-check-lg"></i> 完成
+                        </button>
+                    </td>
+                `;
+                tbody.appendChild(row);
+            });
+        }
+        document.getElementById('overdueCount').textContent = overdue;
+    } catch (e) {
+        console.error(e);
+    }
+}
+
+async function markDone(id) {
+    await fetch(`/api/follow-ups/${id}`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ is_done: true }),
+    });
+    loadDashboard();
+}
+
+loadDashboard();
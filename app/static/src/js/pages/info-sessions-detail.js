@@ -0,0 +1,166 @@
+const STATUS_MAP = { 'pending': '待確認', 'confirmed': '已確認', 'cancelled': '已取消' };
+const STATUS_CLASS = { 'pending': 'bg-warning', 'confirmed': 'bg-success', 'cancelled': 'bg-secondary' };
+const MATCH_BADGE = {
+    'review': '<span class="badge bg-info text-dark">待確認家長</span>',
+    'no_match': '<span class="badge bg-light text-dark">新家庭</span>',
+};
+let sessionData = null;
+
+async function loadSession() {
+    const resp = await fetch(`/api/info-sessions/${sessionId}`);
+    if (!resp.ok) { document.getElementById('sessionInfo').innerHTML = '<p class="text-danger">找不到此場次</p>'; return; }
+    sessionData = await resp.json();
+
+    document.getElementById('breadcrumbName').textContent = sessionData.title;
+
+    // 場次資訊
+    const capText = sessionData.capacity ? `${sessionData.registrations.length} / ${sessionData.capacity}` : `${sessionData.registrations.length} 人`;
+    document.getElementById('sessionInfo').innerHTML = `
+        <div class="row">
+            <div class="col-sm-6 mb-2"><strong>名稱：</strong>${sessionData.title}</div>
+            <div class="col-sm-6 mb-2"><strong>日期：</strong>${sessionData.session_date}</div>
+            <div class="col-sm-6 mb-2"><strong>時間：</strong>${sessionData.session_time}</div>
+            <div class="col-sm-6 mb-2"><strong>地點：</strong>${sessionData.location}</div>
+            <div class="col-sm-6 mb-2"><strong>報名人數：</strong>${capText}</div>
+        </div>
+        ${sessionData.description ? `<div class="mt-2"><strong>說明：</strong><br>${sessionData.description}</div>` : ''}
+    `;
+
+    // 填入編輯表單
+    document.getElementById('editTitle').value = sessionData.title;
+    document.getElementById('editDesc').value = sessionData.description || '';
+    document.getElementById('editDate').value = sessionData.session_date;
+    document.getElementById('editTime').value = sessionData.session_time;
+    document.getElementById('editLocation').value = sessionData.location;
+    document.getElementById('editCapacity').value = sessionData.capacity || '';
+
+    // 報名名單
+    const tbody = document.getElementById('regTable');
+    if (sessionData.registrations.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="6" class="text-center text-muted">尚無報名者</td></tr>';
+    } else {
+        tbody.innerHTML = sessionData.registrations.map(r => `
+            <tr>
+                <td>${r.parent_id ? `<a href="/parents/${r.parent_id}">${r.name}</a>` : r.name} ${MATCH_BADGE[r.match_status] || ''}</td>
+                <td>${r.email}</td>
+                <td><span class="badge ${STATUS_CLASS[r.status]}">${STATUS_MAP[r.status]}</span></td>
+                <td>${r.email_sent ? '<i class="bi bi-check-circle-fill text-success"></i> 已寄' : '<i class="bi bi-circle text-muted"></i> 未寄'}</td>
+                <td>${r.note || '-'}</td>
+                <td>
+                    <button class="btn btn-sm btn-outline-danger" onclick="removeReg('${r.id}')">
+                        <i class="bi bi-trash"></i>
+                    </button>
+                </td>
+            </tr>
+        `).join('');
+    }
+}
+
+async function updateSession() {
+    const form = document.getElementById('editForm');
+    const data = Object.fromEntries(new FormData(form));
+    if (data.capacity === '') delete data.capacity;
+    else data.capacity = parseInt(data.capacity) || null;
+    const resp = await fetch(`/api/info-sessions/${sessionId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json', 'If-Match': `"${sessionData.version}"` },
+        body: JSON.stringify(data),
+    });
+    if (resp.status === 409) {
+        alert('此場次已被他人修改，已重新載入最新資料，請再編輯一次');
+        bootstrap.Modal.getInstance(document.getElementById('editModal')).hide();
+        loadSession();
+        return;
+    }
+    if (resp.ok) {
+        bootstrap.Modal.getInstance(document.getElementById('editModal')).hide();
+        loadSession();
+    }
+}
+
+async function addRegistration() {
+    const form = document.getElementById('addRegForm');
+    const data = Object.fromEntries(new FormData(form));
+    Object.keys(data).forEach(k => { if (!data[k]) delete data[k]; });
+    const resp = await fetch(`/api/info-sessions/${sessionId}/registrations`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': submitKey('registration') },
+        body: JSON.stringify(data),
+    });
+    if (resp.ok) {
+        submitDone('registration');
+        bootstrap.Modal.getInstance(document.getElementById('addRegModal')).hide();
+        form.reset();
+        loadSession();
+    } else {
+        const err = await resp.json();
+        alert(err.detail || '發生錯誤');
+    }
+}
+
+async function removeReg(regId) {
+    if (!confirm('確定要移除此報名者？')) return;
+    await fetch(`/api/info-sessions/${sessionId}/registrations/${regId}`, { method: 'DELETE' });
+    loadSession();
+}
+
+async function importCSV() {
+    const fileInput = document.getElementById('csvFile');
+    const resultDiv = document.getElementById('importResult');
+    if (!fileInput.files.length) { alert('請選擇 CSV 檔案'); return; }
+    const formData = new FormData();
+    formData.append('file', fileInput.files[0]);
+    const resp = await fetch(`/api/info-sessions/${sessionId}/registrations/import`, {
+        method: 'POST',
+        headers: { 'Idempotency-Key': submitKey('import') },
+        body: formData,
+    });
+    const data = await resp.json();
+    if (resp.ok) {
+        submitDone('import');
+        resultDiv.className = 'alert alert-success';
+        resultDiv.textContent = `匯入成功：${data.imported} 筆，略過：${data.skipped} 筆；`
+            + `比對家長：${data.matched} 筆，待確認：${data.review} 筆，新家庭：${data.no_match} 筆`;
+        resultDiv.classList.remove('d-none');
+        loadSession();
+    } else {
+        resultDiv.className = 'alert alert-danger';
+        resultDiv.textContent = data.detail || '匯入失敗';
+        resultDiv.classList.remove('d-none');
+    }
+}
+
+async function sendEmails() {
+    if (!confirm('確定要發送通知 Email 給所有尚未寄送的報名者？')) return;
+    const resp = await fetch(`/api/info-sessions/${sessionId}/send-email`, { method: 'POST' });
+    const data = await resp.json();
+    if (resp.ok) {
+        alert(data.message);
+        loadSession();
+    } else {
+        alert(data.detail || '發送失敗');
+    }
+}
+
+async function generateFollowUps() {
+    if (!confirm('為已確認報名、尚未有待辦的家長建立後續待辦（依目前待辦量分配給教師）？')) return;
+    const resp = await fetch(`/api/info-sessions/${sessionId}/follow-ups`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ strategy: 'balanced' }),
+    });
+    const data = await resp.json();
+    if (!resp.ok) {
+        alert(data.detail || '發生錯誤');
+        return;
+    }
+    const perAssignee = Object.entries(data.per_assignee).map(([name, n]) => `${name}：${n}`).join('\n');
+    let message = `已建立 ${data.created.length} 筆待辦`;
+    if (perAssignee) message += `\n${perAssignee}`;
+    if (data.already_generated) message += `\n先前已建立：${data.already_generated} 筆`;
+    if (data.unmatched.length) message += `\n找不到對應家長（Email 不符）：${data.unmatched.map(r => r.name).join('、')}`;
+    alert(message);
+    loadSession();
+}
+
+loadSession();
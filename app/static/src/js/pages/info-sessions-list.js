@@ -0,0 +1,49 @@
+async function loadSessions() {
+    const resp = await fetch('/api/info-sessions?fields=title,session_date,session_time,location,capacity,registration_count');
+    const sessions = await resp.json();
+    const tbody = document.getElementById('sessionTable');
+    if (sessions.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="6" class="text-center text-muted">尚無說明會場次</td></tr>';
+        return;
+    }
+    tbody.innerHTML = sessions.map(s => {
+        const capText = s.capacity ? `${s.registration_count} / ${s.capacity}` : `${s.registration_count}`;
+        return `
+        <tr>
+            <td><a href="/info-sessions/${s.id}"><strong>${s.title}</strong></a></td>
+            <td>${s.session_date}</td>
+            <td>${s.session_time}</td>
+            <td>${s.location}</td>
+            <td>${capText}</td>
+            <td>
+                <a href="/info-sessions/${s.id}" class="btn btn-sm btn-outline-primary">
+                    <i class="bi bi-eye"></i> 查看
+                </a>
+            </td>
+        </tr>`;
+    }).join('');
+}
+
+async function addSession() {
+    const form = document.getElementById('addForm');
+    const data = Object.fromEntries(new FormData(form));
+    if (data.capacity === '') delete data.capacity;
+    else data.capacity = parseInt(data.capacity) || null;
+    Object.keys(data).forEach(k => { if (data[k] === '') delete data[k]; });
+    const resp = await fetch('/api/info-sessions', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': submitKey('session') },
+        body: JSON.stringify(data),
+    });
+    if (resp.ok) {
+        submitDone('session');
+        bootstrap.Modal.getInstance(document.getElementById('addModal')).hide();
+        form.reset();
+        loadSessions();
+    } else {
+        const err = await resp.json();
+        alert(err.detail || '發生錯誤');
+    }
+}
+
+loadSessions();
@@ -0,0 +1,26 @@
+document.getElementById('loginForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const errEl = document.getElementById('error');
+    errEl.classList.add('d-none');
+    try {
+        const resp = await fetch('/api/auth/login', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                username: document.getElementById('username').value,
+                password: document.getElementById('password').value,
+                campus: document.getElementById('campus').value.trim() || null,
+            }),
+        });
+        if (resp.ok) {
+            window.location.href = '/';
+        } else {
+            const data = await resp.json();
+            errEl.textContent = data.detail || '登入失敗';
+            errEl.classList.remove('d-none');
+        }
+    } catch (err) {
+        errEl.textContent = '連線錯誤';
+        errEl.classList.remove('d-none');
+    }
+});
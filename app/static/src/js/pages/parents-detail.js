@@ -0,0 +1,247 @@
+const CONTACT_TYPE_MAP = {
+    'phone': '電話', 'in_person': '面談', 'line': 'LINE', 'email': 'Email', 'other': '其他'
+};
+let parentData = null;
+let currentUserId = null;
+let allHistory = false;
+
+async function init() {
+    const meResp = await fetch('/api/auth/me');
+    if (meResp.ok) {
+        const me = await meResp.json();
+        currentUserId = me.id;
+    }
+    await loadParent();
+}
+
+async function loadAllHistory() {
+    allHistory = true;
+    await loadParent();
+}
+
+async function loadArchivedHistory() {
+    const loader = document.getElementById('archiveLoader');
+    loader.innerHTML = '<small class="text-muted">載入中...</small>';
+    const resp = await fetch(`/api/parents/${parentId}/archive`);
+    if (!resp.ok) { loader.innerHTML = '<small class="text-danger">無法載入封存紀錄</small>'; return; }
+    const records = (await resp.text()).split('\n').filter(Boolean).map(line => JSON.parse(line));
+    loader.outerHTML = `<div class="list-group list-group-flush border-top mt-2">` +
+        records.filter(r => r.type === 'communication').map(c => `
+            <div class="list-group-item text-muted">
+                <div class="d-flex justify-content-between">
+                    <span><span class="badge bg-light text-dark">封存</span>
+                    <span class="badge bg-secondary">${CONTACT_TYPE_MAP[c.contact_type] || c.contact_type}</span></span>
+                    <small>${new Date(c.created_at).toLocaleString()} 紀錄者：${c.user_name || '-'}</small>
+                </div>
+                <p class="mb-0 mt-1">${c.summary}</p>
+            </div>
+        `).join('') + `</div>`;
+}
+
+async function loadParent() {
+    const resp = await fetch(`/api/parents/${parentId}${allHistory ? '?all_history=true' : ''}`);
+    if (!resp.ok) { document.getElementById('parentInfo').innerHTML = '<p class="text-danger">找不到此家長</p>'; return; }
+    parentData = await resp.json();
+
+    document.getElementById('breadcrumbName').textContent = parentData.name;
+
+    // 家長資訊
+    document.getElementById('parentInfo').innerHTML = `
+        <div class="row">
+            <div class="col-sm-6 mb-2"><strong>姓名：</strong>${parentData.name}</div>
+            <div class="col-sm-6 mb-2"><strong>電話：</strong>${parentData.phone}</div>
+            <div class="col-sm-6 mb-2"><strong>Email：</strong>${parentData.email || '-'}</div>
+            <div class="col-sm-6 mb-2"><strong>地址：</strong>${parentData.address || '-'}</div>
+        </div>
+        ${parentData.note ? `<div class="mt-2"><strong>備註：</strong><br>${parentData.note}</div>` : ''}
+    `;
+
+    // 填入編輯表單
+    document.getElementById('editName').value = parentData.name;
+    document.getElementById('editPhone').value = parentData.phone;
+    document.getElementById('editEmail').value = parentData.email || '';
+    document.getElementById('editAddress').value = parentData.address || '';
+    document.getElementById('editNote').value = parentData.note || '';
+
+    // 關聯學生
+    const studentDiv = document.getElementById('studentList');
+    if (parentData.students.length === 0) {
+        studentDiv.innerHTML = '<p class="text-muted">尚無關聯學生</p>';
+    } else {
+        studentDiv.innerHTML = parentData.students.map(s => `
+            <div class="d-flex justify-content-between align-items-center mb-2">
+                <div>
+                    <a href="/students/${s.student_id}"><strong>${s.student_name}</strong></a>
+                    <br><small class="text-muted">${s.grade} / ${s.relationship_type}</small>
+                </div>
+            </div>
+        `).join('<hr class="my-1">');
+    }
+
+    // 溝通紀錄
+    const commDiv = document.getElementById('commList');
+    if (parentData.communications.length === 0) {
+        commDiv.innerHTML = '<p class="text-muted">尚無溝通紀錄</p>';
+    } else {
+        commDiv.innerHTML = `<div class="list-group list-group-flush">` +
+            parentData.communications.map(c => `
+                <div class="list-group-item">
+                    <div class="d-flex justify-content-between">
+                        <span class="badge bg-secondary">${CONTACT_TYPE_MAP[c.contact_type] || c.contact_type}</span>
+                        <small class="text-muted">${new Date(c.created_at).toLocaleString()} 紀錄者：${c.user_name || '-'}</small>
+                    </div>
+                    <p class="mb-0 mt-1">${c.summary}</p>
+                </div>
+            `).join('') + `</div>`;
+    }
+    if (parentData.communications_since) {
+        const since = new Date(parentData.communications_since).toLocaleDateString();
+        commDiv.insertAdjacentHTML('beforeend', `
+            <div class="text-center mt-2">
+                <small class="text-muted">顯示 ${since} 之後的紀錄</small>
+                <button class="btn btn-link btn-sm" onclick="loadAllHistory()">載入更早的紀錄</button>
+            </div>
+        `);
+    }
+    if (parentData.archived_communications > 0) {
+        commDiv.insertAdjacentHTML('beforeend', `
+            <div class="text-center mt-1" id="archiveLoader">
+                <button class="btn btn-link btn-sm" onclick="loadArchivedHistory()">載入封存紀錄（${parentData.archived_communications} 筆）</button>
+            </div>
+        `);
+    }
+
+    // 待辦事項
+    const fuDiv = document.getElementById('followUpList');
+    if (parentData.follow_ups.length === 0) {
+        fuDiv.innerHTML = '<p class="text-muted">尚無待辦事項</p>';
+    } else {
+        fuDiv.innerHTML = `<div class="table-responsive"><table class="table table-sm">
+            <thead><tr><th>狀態</th><th>說明</th><th>到期日</th><th>負責人</th><th></th></tr></thead>
+            <tbody>` +
+            parentData.follow_ups.map(f => `
+                <tr class="${f.is_done ? 'text-decoration-line-through text-muted' : (f.due_date && f.due_date < new Date().toISOString().split('T')[0] ? 'table-danger' : '')}">
+                    <td>${f.is_done ? '<i class="bi bi-check-circle-fill text-success"></i>' : '<i class="bi bi-circle text-warning"></i>'}</td>
+                    <td>${f.description}</td>
+                    <td>${f.due_date || '-'}</td>
+                    <td>${f.assigned_user_name || '-'}</td>
+                    <td>${!f.is_done ? `<button class="btn btn-sm btn-outline-success" onclick="markFollowUpDone('${f.id}')"><i class="bi bi-check"></i></button>` : ''}</td>
+                </tr>
+            `).join('') + `</tbody></table></div>`;
+    }
+}
+
+async function updateParent() {
+    const form = document.getElementById('editParentForm');
+    const data = Object.fromEntries(new FormData(form));
+    const resp = await fetch(`/api/parents/${parentId}`, {
+        method: 'PUT',
+        // 只在資料未被他人修改時寫入
+        headers: { 'Content-Type': 'application/json', 'If-Match': `"${parentData.version}"` },
+        body: JSON.stringify(data),
+    });
+    if (resp.status === 409) {
+        alert('此家長資料已被他人修改，已重新載入最新資料，請再編輯一次');
+        bootstrap.Modal.getInstance(document.getElementById('editParentModal')).hide();
+        loadParent();
+        return;
+    }
+    if (resp.ok) {
+        bootstrap.Modal.getInstance(document.getElementById('editParentModal')).hide();
+        loadParent();
+    }
+}
+
+async function addCommunication() {
+    const form = document.getElementById('addCommForm');
+    const fd = new FormData(form);
+    const commResp = await fetch('/api/communications', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': submitKey('communication') },
+        body: JSON.stringify({
+            parent_id: parentId,
+            contact_type: fd.get('contact_type'),
+            summary: fd.get('summary'),
+        }),
+    });
+    if (!commResp.ok) { alert('新增紀錄失敗'); return; }
+    const comm = await commResp.json();
+
+    // 如果有填寫待辦說明，一併建立待辦
+    const fuDesc = fd.get('followup_desc');
+    if (fuDesc) {
+        const fuResp = await fetch('/api/follow-ups', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Idempotency-Key': submitKey('follow-up') },
+            body: JSON.stringify({
+                communication_id: comm.id,
+                parent_id: parentId,
+                assigned_to: currentUserId,
+                description: fuDesc,
+                due_date: fd.get('followup_due') || null,
+            }),
+        });
+        if (!fuResp.ok) { alert('新增待辦失敗'); return; }
+    }
+
+    submitDone('communication');
+    submitDone('follow-up');
+    bootstrap.Modal.getInstance(document.getElementById('addCommModal')).hide();
+    form.reset();
+    loadParent();
+}
+
+async function markFollowUpDone(id) {
+    await fetch(`/api/follow-ups/${id}`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ is_done: true }),
+    });
+    loadParent();
+}
+
+let studentSearchTimer;
+document.getElementById('studentSearch').addEventListener('input', (e) => {
+    clearTimeout(studentSearchTimer);
+    document.getElementById('studentSelect').value = '';
+    studentSearchTimer = setTimeout(() => loadStudentSuggestions(e.target.value.trim()), 80);
+});
+
+async function loadStudentSuggestions(q) {
+    const box = document.getElementById('studentSuggestions');
+    if (!q) { box.innerHTML = ''; return; }
+    const resp = await fetch(`/api/typeahead?kind=student&q=${encodeURIComponent(q)}`);
+    if (!resp.ok) return;
+    const hits = await resp.json();
+    box.innerHTML = hits.map(h => `
+        <button type="button" class="list-group-item list-group-item-action" onclick="selectStudent('${h.id}', this.dataset.label)" data-label="${h.name}（${h.detail}）">
+            ${h.name} <small class="text-muted">${h.detail}</small>
+        </button>
+    `).join('');
+}
+
+function selectStudent(id, label) {
+    document.getElementById('studentSelect').value = id;
+    document.getElementById('studentSearch').value = label;
+    document.getElementById('studentSuggestions').innerHTML = '';
+}
+
+async function linkStudent() {
+    const form = document.getElementById('linkStudentForm');
+    const fd = new FormData(form);
+    if (!document.getElementById('studentSelect').value) { alert('請先選擇學生'); return; }
+    await fetch(`/api/parents/${parentId}/students`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            student_id: document.getElementById('studentSelect').value,
+            relationship_type: fd.get('relationship_type'),
+        }),
+    });
+    bootstrap.Modal.getInstance(document.getElementById('linkStudentModal')).hide();
+    form.reset();
+    document.getElementById('studentSelect').value = '';
+    loadParent();
+}
+
+init();
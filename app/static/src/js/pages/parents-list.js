@@ -0,0 +1,91 @@
+// 輸入時從記憶體索引取建議；按 Enter 才查詢完整列表
+let searchTimer;
+const searchInput = document.getElementById('searchInput');
+searchInput.addEventListener('input', (e) => {
+    clearTimeout(searchTimer);
+    const q = e.target.value.trim();
+    if (!q) { document.getElementById('searchSuggestions').innerHTML = ''; loadParents(); return; }
+    searchTimer = setTimeout(() => loadSuggestions(q), 80);
+});
+searchInput.addEventListener('keydown', (e) => {
+    if (e.key === 'Enter') {
+        clearTimeout(searchTimer);
+        document.getElementById('searchSuggestions').innerHTML = '';
+        loadParents(e.target.value.trim());
+    }
+});
+
+async function loadSuggestions(q) {
+    const resp = await fetch(`/api/typeahead?kind=parent&q=${encodeURIComponent(q)}`);
+    if (!resp.ok) return;
+    const hits = await resp.json();
+    document.getElementById('searchSuggestions').innerHTML = hits.map(h => `
+        <a class="list-group-item list-group-item-action" href="/parents/${h.id}">
+            <strong>${h.name}</strong> <small class="text-muted">${h.detail}</small>
+        </a>
+    `).join('');
+}
+
+let listedIds = [];
+
+// 目前列表中的家長一次取回，串流成可列印的 HTML
+async function printCards() {
+    if (listedIds.length === 0) return;
+    const win = window.open('', '_blank');
+    const resp = await fetch('/api/parents/batch-detail', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ids: listedIds, format: 'html' }),
+    });
+    if (!resp.ok) {
+        win.close();
+        const err = await resp.json();
+        alert(err.detail || '發生錯誤');
+        return;
+    }
+    win.location = URL.createObjectURL(await resp.blob());
+}
+
+async function loadParents(q = '') {
+    const fields = 'fields=name,phone,email,note_preview,created_at';
+    const url = q ? `/api/parents?q=${encodeURIComponent(q)}&${fields}` : `/api/parents?${fields}`;
+    const resp = await fetch(url);
+    const parents = await resp.json();
+    listedIds = parents.map(p => p.id);
+    const tbody = document.getElementById('parentTable');
+    if (parents.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="5" class="text-center text-muted">找不到家長資料</td></tr>';
+        return;
+    }
+    tbody.innerHTML = parents.map(p => `
+        <tr style="cursor:pointer" onclick="window.location='/parents/${p.id}'">
+            <td><strong>${p.name}</strong></td>
+            <td>${p.phone}</td>
+            <td>${p.email || '-'}</td>
+            <td>${p.note_preview || '-'}</td>
+            <td>${new Date(p.created_at).toLocaleDateString()}</td>
+        </tr>
+    `).join('');
+}
+
+async function addParent() {
+    const form = document.getElementById('addForm');
+    const data = Object.fromEntries(new FormData(form));
+    Object.keys(data).forEach(k => { if (!data[k]) delete data[k]; });
+    const resp = await fetch('/api/parents', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': submitKey('parent') },
+        body: JSON.stringify(data),
+    });
+    if (resp.ok) {
+        submitDone('parent');
+        bootstrap.Modal.getInstance(document.getElementById('addModal')).hide();
+        form.reset();
+        loadParents();
+    } else {
+        const err = await resp.json();
+        alert(err.detail || '發生錯誤');
+    }
+}
+
+loadParents();
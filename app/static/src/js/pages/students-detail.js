@@ -0,0 +1,46 @@
+let studentVersion = null;
+
+async function loadStudent() {
+    const resp = await fetch(`/api/students/${studentId}`);
+    if (!resp.ok) { document.getElementById('studentInfo').innerHTML = '<p class="text-danger">找不到此學生</p>'; return; }
+    const student = await resp.json();
+    studentVersion = student.version;
+
+    document.getElementById('breadcrumbName').textContent = student.name;
+    document.getElementById('studentInfo').innerHTML = `
+        <p><strong>姓名：</strong>${student.name}</p>
+        <p><strong>年級：</strong>${student.grade}</p>
+        ${student.note ? `<p><strong>備註：</strong>${student.note}</p>` : ''}
+    `;
+    document.getElementById('editName').value = student.name;
+    document.getElementById('editGrade').value = student.grade;
+    document.getElementById('editNote').value = student.note || '';
+}
+
+async function loadParents() {
+    const parentDiv = document.getElementById('parentList');
+    parentDiv.innerHTML = '<p class="text-muted">請至家長詳情頁面查看關聯資訊。</p>';
+}
+
+async function updateStudent() {
+    const form = document.getElementById('editForm');
+    const data = Object.fromEntries(new FormData(form));
+    const resp = await fetch(`/api/students/${studentId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json', 'If-Match': `"${studentVersion}"` },
+        body: JSON.stringify(data),
+    });
+    if (resp.status === 409) {
+        alert('此學生資料已被他人修改，已重新載入最新資料，請再編輯一次');
+        bootstrap.Modal.getInstance(document.getElementById('editModal')).hide();
+        loadStudent();
+        return;
+    }
+    if (resp.ok) {
+        bootstrap.Modal.getInstance(document.getElementById('editModal')).hide();
+        loadStudent();
+    }
+}
+
+loadStudent();
+loadParents();
@@ -0,0 +1,39 @@
+async function loadStudents() {
+    const resp = await fetch('/api/students');
+    const students = await resp.json();
+    const tbody = document.getElementById('studentTable');
+    if (students.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="4" class="text-center text-muted">找不到學生資料</td></tr>';
+        return;
+    }
+    tbody.innerHTML = students.map(s => `
+        <tr style="cursor:pointer" onclick="window.location='/students/${s.id}'">
+            <td><strong>${s.name}</strong></td>
+            <td>${s.grade}</td>
+            <td>${s.note || '-'}</td>
+            <td>${new Date(s.created_at).toLocaleDateString()}</td>
+        </tr>
+    `).join('');
+}
+
+async function addStudent() {
+    const form = document.getElementById('addForm');
+    const data = Object.fromEntries(new FormData(form));
+    Object.keys(data).forEach(k => { if (!data[k]) delete data[k]; });
+    const resp = await fetch('/api/students', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': submitKey('student') },
+        body: JSON.stringify(data),
+    });
+    if (resp.ok) {
+        submitDone('student');
+        bootstrap.Modal.getInstance(document.getElementById('addModal')).hide();
+        form.reset();
+        loadStudents();
+    } else {
+        const err = await resp.json();
+        alert(err.detail || '發生錯誤');
+    }
+}
+
+loadStudents();
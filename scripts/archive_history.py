@@ -0,0 +1,55 @@
+"""Move inactive parents' old communication history into cold storage.
+
+Usage:
+    python scripts/archive_history.py              # archive with settings from .env
+    python scripts/archive_history.py --dry-run    # only count eligible parents
+    python scripts/archive_history.py --after-years 5 --batch-size 200
+    python scripts/archive_history.py --import-files   # move segments from ARCHIVE_DIR files into the database
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from app.database import async_session
+from app.services.archive import archive_cutoff, archive_old_history, count_eligible, import_archive_files
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.after_years is not None:
+        settings.ARCHIVE_AFTER_YEARS = args.after_years
+    cutoff = archive_cutoff()
+    async with async_session() as session:
+        if args.import_files:
+            imported, unreadable = await import_archive_files(session, batch_size=args.batch_size)
+            print(f"Imported {imported} archive segments from {settings.ARCHIVE_DIR}; {unreadable} unreadable.")
+            if unreadable:
+                sys.exit(1)
+            return
+        if args.dry_run:
+            count = await count_eligible(session, cutoff)
+            print(f"{count} parents with no contact since {cutoff:%Y-%m-%d} would be archived.")
+            return
+        result = await archive_old_history(session, cutoff, batch_size=args.batch_size)
+    if result.parents == 0:
+        print(f"Nothing to archive (no eligible parents since {cutoff:%Y-%m-%d}).")
+        return
+    print(
+        f"Archived {result.communications} communications and {result.follow_ups} follow-ups "
+        f"for {result.parents} parents."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--after-years", type=int, help="override ARCHIVE_AFTER_YEARS")
+    parser.add_argument("--batch-size", type=int, default=100, help="parents per transaction")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--import-files", action="store_true", help="move segments from ARCHIVE_DIR files into the database")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""Measure ORM write latency with auditing off and on.
+
+Creates a scratch parent, then times N update+commit round trips in each
+mode (the audit writer runs in the background exactly as in the app) and
+prints p50/p95/p99. Run against a disposable database:
+
+    uv run python scripts/bench_audit.py --n 2000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete
+
+from app.config import settings
+from app.database import async_session
+from app.models.parent import Parent
+from app.services import audit
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(n: int, enabled: bool) -> list[float]:
+    settings.AUDIT_ENABLED = enabled
+    samples = []
+    async with async_session() as db:
+        parent = Parent(name="bench-audit", phone="0900000000")
+        db.add(parent)
+        await db.commit()
+        for i in range(n):
+            started = time.perf_counter()
+            parent.note = f"bench {i}"
+            await db.commit()
+            samples.append((time.perf_counter() - started) * 1000)
+        await db.execute(delete(Parent).where(Parent.id == parent.id))
+        await db.commit()
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=1000)
+    args = parser.parse_args()
+
+    writer = asyncio.create_task(audit.run_writer())
+    await asyncio.sleep(0)
+    await run(min(args.n, 100), enabled=False)  # warm the pool
+
+    for enabled in (False, True):
+        samples = await run(args.n, enabled)
+        print(
+            f"audit {'on ' if enabled else 'off'}  "
+            f"p50 {statistics.median(samples):6.2f} ms  "
+            f"p95 {percentile(samples, 0.95):6.2f} ms  "
+            f"p99 {percentile(samples, 0.99):6.2f} ms"
+        )
+
+    writer.cancel()
+    try:
+        await writer
+    except asyncio.CancelledError:
+        pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""Measure event-loop lag while logging heavily, synchronous vs. queued handlers.
+
+Simulates an e-mail blast: ``--tasks`` coroutines log ``--messages`` INFO
+lines in total while a probe coroutine wakes every ``--probe-ms`` and records
+how late it was woken (event-loop lag). The sink sleeps ``--sink-latency-ms``
+per line to stand in for a slow terminal, pipe or log driver. Each mode
+prints lag percentiles and how long the blast took; no database is needed.
+
+    uv run python scripts/bench_logging.py --messages 5000 --sink-latency-ms 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import logs
+
+logger = logging.getLogger("app.services.email")
+
+
+class SlowSink(logging.StreamHandler):
+    """Writes to /dev/null, pausing ``latency`` seconds per line."""
+
+    def __init__(self, latency: float):
+        super().__init__(open(os.devnull, "w"))
+        self.latency = latency
+        self.setFormatter(logs.JsonFormatter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        time.sleep(self.latency)
+        super().emit(record)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def probe(interval: float, lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def blast(messages: int, tasks: int) -> None:
+    async def sender(worker: int) -> None:
+        for i in range(worker, messages, tasks):
+            logger.info("[EMAIL] To: parent%d <parent%d@example.com> | Subject: 說明會通知", i, i)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(sender(w) for w in range(tasks)))
+
+
+async def run(messages: int, tasks: int, probe_interval: float) -> tuple[list[float], float]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(probe_interval, lags, stop))
+    await asyncio.sleep(probe_interval * 5)
+    started = time.perf_counter()
+    await blast(messages, tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+    return lags, elapsed
+
+
+def report(mode: str, lags: list[float], elapsed: float, messages: int) -> None:
+    print(
+        f"{mode:<6} lag p50 {statistics.median(lags):7.2f} ms  "
+        f"p99 {percentile(lags, 0.99):7.2f} ms  max {max(lags):7.2f} ms  "
+        f"blast {elapsed * 1000:8.1f} ms ({messages / elapsed:,.0f} lines/s on the loop)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2)
+    parser.add_argument("--probe-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    latency = args.sink_latency_ms / 1000
+    probe_interval = args.probe_ms / 1000
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    # Synchronous: formatting and the slow write happen on the event loop
+    root.handlers = [SlowSink(latency)]
+    lags, elapsed = asyncio.run(run(args.messages, args.tasks, probe_interval))
+    report("sync", lags, elapsed, args.messages)
+
+    # Queued: the loop only enqueues; the listener thread formats and writes
+    logs.configure_logging(SlowSink(latency))
+    lags, elapsed = asyncio.run(run(args.messages, args.tasks, probe_interval))
+    drain = time.perf_counter()
+    logs.shutdown_logging()
+    report("queue", lags, elapsed, args.messages)
+    print(f"       writer thread drained the backlog in {(time.perf_counter() - drain) * 1000:.1f} ms after the blast, "
+          f"{logs.stats()['dropped']} dropped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Measure communication search latency on a large synthetic history.
+
+Seeds ``--records`` communication records (with their search grams) spread
+over ``--campuses`` bench campuses and the last three years, then times each
+query below as the search endpoint runs it: inside one campus, bounded to the
+hot window. Seeding happens once; later runs reuse the bench campuses. Run
+against a disposable database migrated to head:
+
+    uv run python scripts/bench_search.py --records 1000000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+
+from app.database import async_session
+from app.services.partitions import hot_since
+from app.services.search import search_communications, tokenize
+from app.services.tenancy import CampusContext, current_campus
+
+BATCH_SIZE = 5000
+PARENTS_PER_CAMPUS = 2000
+
+SURNAMES = "王李張劉陳楊黃趙吳周徐孫馬朱胡郭何林羅高"
+GIVEN = ["小明", "美華", "志強", "淑芬", "家豪", "怡君", "俊傑", "雅婷", "建宏", "佩珊"]
+# Frequent phrases make frequent grams (家長, 詢問, 學費 ...), the rare ones a long tail
+COMMON = [
+    "家長來電詢問學費", "說明會後續聯繫", "詢問暑期課程", "家長詢問課後輔導", "預約參觀校園",
+    "反映孩子在校情況", "確認報名資料", "提醒繳交學費", "LINE 詢問校車路線", "Email 寄送招生簡章",
+]
+RARE = ["討論轉學事宜", "申請獎學金", "詢問國際交換計畫", "反映午餐過敏問題", "詢問 IB 課程"]
+CONTACT_TYPES = ["phone", "in_person", "line", "email", "other"]
+
+QUERIES = [
+    ("common bigram", "學費"),
+    ("two common bigrams", "家長詢問"),
+    ("rare phrase", "轉學"),
+    ("name", "王小明"),
+    ("char + bigram", "王 學費"),
+    ("single char", "王"),
+    ("latin word", "email"),
+    ("no hit", "火星"),
+]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def summary(rng: random.Random) -> str:
+    name = rng.choice(SURNAMES) + rng.choice(GIVEN)
+    phrases = rng.sample(COMMON, 2) + ([rng.choice(RARE)] if rng.random() < 0.01 else [])
+    return f"{name}：" + "，".join(phrases)
+
+
+async def seed(records: int, campuses: int) -> list[uuid.UUID]:
+    """Create the bench campuses and top them up to ``records`` records in total."""
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    async with async_session() as db:
+        for year in range(now.year - 3, now.year + 1):
+            await db.execute(text("SELECT communication_records_ensure_partition(make_date(:y, 1, 1))"), {"y": year})
+        campus_ids, users, parents = [], {}, {}
+        for i in range(campuses):
+            code = f"bench-{i}"
+            campus_id = (await db.execute(text("SELECT id FROM campuses WHERE code = :code"), {"code": code})).scalar()
+            if campus_id is None:
+                campus_id = uuid.uuid4()
+                await db.execute(
+                    text("INSERT INTO campuses (id, code, name) VALUES (:id, :code, :code)"), {"id": campus_id, "code": code},
+                )
+                await db.execute(
+                    text(
+                        "INSERT INTO users (id, campus_id, username, hashed_password, full_name, role, is_active) "
+                        "VALUES (gen_random_uuid(), :campus_id, 'bench', 'x', 'bench', 'teacher', true)"
+                    ),
+                    {"campus_id": campus_id},
+                )
+                await db.execute(
+                    text(
+                        "INSERT INTO parents (id, campus_id, name, phone) "
+                        "SELECT gen_random_uuid(), :campus_id, 'bench ' || n, '0900000000' "
+                        "FROM generate_series(1, :n) AS n"
+                    ),
+                    {"campus_id": campus_id, "n": PARENTS_PER_CAMPUS},
+                )
+            campus_ids.append(campus_id)
+            users[campus_id] = (await db.execute(
+                text("SELECT id FROM users WHERE campus_id = :c AND username = 'bench'"), {"c": campus_id}
+            )).scalar_one()
+            parents[campus_id] = (await db.execute(
+                text("SELECT id FROM parents WHERE campus_id = :c"), {"c": campus_id}
+            )).scalars().all()
+        await db.commit()
+
+        existing = (await db.execute(
+            text("SELECT count(*) FROM communication_records WHERE campus_id = ANY(:ids)"), {"ids": campus_ids}
+        )).scalar_one()
+        started = time.perf_counter()
+        for offset in range(existing, records, BATCH_SIZE):
+            rows = []
+            for _ in range(min(BATCH_SIZE, records - offset)):
+                campus_id = rng.choice(campus_ids)
+                created_at = now - timedelta(seconds=rng.randrange(3 * 365 * 86400))
+                rows.append((uuid.uuid4(), campus_id, rng.choice(parents[campus_id]), users[campus_id],
+                             rng.choice(CONTACT_TYPES), summary(rng), created_at))
+            ids, campus_col, parent_col, user_col, type_col, summary_col, created_col = map(list, zip(*rows))
+            await db.execute(
+                text(
+                    "INSERT INTO communication_records (id, campus_id, parent_id, user_id, contact_type, summary, created_at) "
+                    "SELECT * FROM unnest(CAST(:ids AS uuid[]), CAST(:campus AS uuid[]), CAST(:parent AS uuid[]), "
+                    "CAST(:user AS uuid[]), CAST(:type AS contact_type[]), CAST(:summary AS text[]), "
+                    "CAST(:created AS timestamptz[]))"
+                ),
+                {"ids": ids, "campus": campus_col, "parent": parent_col, "user": user_col, "type": type_col,
+                 "summary": summary_col, "created": created_col},
+            )
+            grams = [(g, r[0], tf, r[1], r[4], r[6]) for r in rows for g, tf in tokenize(r[5]).items()]
+            g_col, rid_col, tf_col, gc_col, gt_col, gd_col = map(list, zip(*grams))
+            await db.execute(
+                text(
+                    "INSERT INTO communication_search_grams (gram, record_id, tf, campus_id, contact_type, created_at) "
+                    "SELECT * FROM unnest(CAST(:gram AS varchar[]), CAST(:rid AS uuid[]), CAST(:tf AS smallint[]), "
+                    "CAST(:campus AS uuid[]), CAST(:type AS contact_type[]), CAST(:created AS timestamptz[]))"
+                ),
+                {"gram": g_col, "rid": rid_col, "tf": tf_col, "campus": gc_col, "type": gt_col, "created": gd_col},
+            )
+            await db.commit()
+            done = offset + len(rows)
+            if done % 100_000 < BATCH_SIZE:
+                print(f"seeded {done} records ({time.perf_counter() - started:.0f} s)", flush=True)
+        if existing < records:
+            await db.execute(text("ANALYZE communication_records"))
+            await db.execute(text("ANALYZE communication_search_grams"))
+            await db.commit()
+    return campus_ids
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--campuses", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    campus_ids = await seed(args.records, args.campuses)
+    token = current_campus.set(CampusContext(id=campus_ids[0], code="bench-0"))
+    try:
+        async with async_session() as db:
+            since = hot_since().date()
+            for label, q in QUERIES:
+                samples, hits = [], 0
+                for _ in range(args.repeat + 3):
+                    started = time.perf_counter()
+                    hits = len(await search_communications(db, q, date_from=since))
+                    samples.append((time.perf_counter() - started) * 1000)
+                samples = samples[3:]  # warm-up
+                print(
+                    f"{label:<20} {q!r:<12} {hits:3d} hits  "
+                    f"p50 {statistics.median(samples):7.2f} ms  p95 {percentile(samples, 0.95):7.2f} ms"
+                )
+    finally:
+        current_campus.reset(token)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
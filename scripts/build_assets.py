@@ -0,0 +1,71 @@
+"""Build fingerprinted, precompressed static assets.
+
+Copies every file under app/static/src to app/static/dist as
+``name.<hash>.ext`` with ``.gz`` and ``.br`` siblings (``brotli`` is a
+project dependency; without it only ``.gz`` is written), then writes
+dist/manifest.json mapping source paths to fingerprinted ones for
+``asset_url()``. Deployments run it once in the build step (zbpack.json
+``build_command``), so instances do not redo it on every cold start.
+"""
+import gzip
+import hashlib
+import json
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.assets import DIST_DIR, MANIFEST_PATH, STATIC_DIR
+
+try:
+    import brotli
+except ImportError:  # e.g. a bare interpreter without the project's dependencies
+    brotli = None
+
+SRC_DIR = STATIC_DIR / "src"
+HASH_LENGTH = 10
+# Compressing tiny or already-compressed files costs more than it saves
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".svg", ".html", ".txt", ".map"}
+
+
+def fingerprint(path: Path, data: bytes) -> Path:
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}")
+
+
+def build() -> dict[str, str]:
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+
+    manifest: dict[str, str] = {}
+    raw_total = gz_total = br_total = 0
+    for src in sorted(p for p in SRC_DIR.rglob("*") if p.is_file()):
+        rel = src.relative_to(SRC_DIR)
+        data = src.read_bytes()
+        out_rel = fingerprint(rel, data)
+        out = DIST_DIR / out_rel
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_bytes(data)
+        manifest[rel.as_posix()] = out_rel.as_posix()
+        raw_total += len(data)
+
+        if src.suffix in COMPRESSIBLE_SUFFIXES and len(data) >= MIN_COMPRESS_SIZE:
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            out.with_name(out.name + ".gz").write_bytes(gz)
+            gz_total += len(gz)
+            if brotli is not None:
+                br = brotli.compress(data, quality=11)
+                out.with_name(out.name + ".br").write_bytes(br)
+                br_total += len(br)
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    print(f"Built {len(manifest)} assets into {DIST_DIR}")
+    print(f"  raw {raw_total} B, gzip {gz_total} B" + (f", brotli {br_total} B" if brotli else " (brotli not installed)"))
+    return manifest
+
+
+if __name__ == "__main__":
+    build()
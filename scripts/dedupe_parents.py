@@ -0,0 +1,40 @@
+"""Find likely duplicate parents and list them for review (run nightly).
+
+Usage:
+    python scripts/dedupe_parents.py                    # scan with settings from .env
+    python scripts/dedupe_parents.py --batch-size 2000
+    python scripts/dedupe_parents.py --min-score 6      # only stronger matches
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from app.database import async_session
+from app.services.dedupe import scan_duplicates
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.min_score is not None:
+        settings.DEDUPE_MIN_SCORE = args.min_score
+    started = time.perf_counter()
+    async with async_session() as session:
+        result = await scan_duplicates(session, batch_size=args.batch_size)
+    print(
+        f"Scanned {result.parents} parents in {time.perf_counter() - started:.1f}s: "
+        f"{result.candidates} candidate pairs ({result.pending} awaiting review), {result.removed} stale removed."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, help="parents per transaction (default DEDUPE_BATCH_SIZE)")
+    parser.add_argument("--min-score", type=float, help="override DEDUPE_MIN_SCORE")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(parser.parse_args()))
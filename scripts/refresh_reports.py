@@ -0,0 +1,34 @@
+"""Fold pending changes into the reporting rollups (run from cron, or let the app do it).
+
+Usage:
+    python scripts/refresh_reports.py          # recompute the days/sessions changed since the last refresh
+    python scripts/refresh_reports.py --full   # rebuild every rollup from the raw tables
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import async_session
+from app.services.reports import refresh_reports
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with async_session() as session:
+        refreshed = await refresh_reports(session, full=args.full)
+    for rollup, keys in refreshed.items():
+        print(f"{rollup}: {keys} {'sessions' if rollup == 'sessions' else 'days'} recomputed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--full", action="store_true",
+        help="rebuild from the raw tables (counts of archived history are dropped)",
+    )
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(parser.parse_args()))
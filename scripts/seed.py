@@ -1,5 +1,11 @@
-"""Create default admin user."""
+"""Create default admin user.
 
+Usage:
+    python scripts/seed.py                                   # admin of DEFAULT_CAMPUS
+    python scripts/seed.py --campus east --campus-name 東區校   # new campus and its admin
+"""
+
+import argparse
 import asyncio
 import sys
 from pathlib import Path
@@ -7,10 +13,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import async_session
-from app.models.user import Role, User
+from app.config import settings
+from app.database import campus_session
+from app.models.user import Campus, Role, User
 from app.services.auth import hash_password
 
 ADMIN_USERNAME = "admin"
@@ -18,13 +24,24 @@ ADMIN_PASSWORD = "admin123"
 ADMIN_FULL_NAME = "System Admin"
 
 
-async def seed():
-    async with async_session() as session:
-        result = await session.execute(select(User).where(User.username == ADMIN_USERNAME))
+async def seed(code: str, name: str | None):
+    # Campuses listed in CAMPUS_DATABASES are seeded on their own database
+    async with campus_session(code)() as session:
+        campus = (await session.execute(select(Campus).where(Campus.code == code))).scalar_one_or_none()
+        if campus is None:
+            campus = Campus(code=code, name=name or code)
+            session.add(campus)
+            await session.flush()
+            print(f"Campus created: {code}")
+        result = await session.execute(
+            select(User).where(User.campus_id == campus.id, User.username == ADMIN_USERNAME)
+        )
         if result.scalar_one_or_none():
-            print(f"User '{ADMIN_USERNAME}' already exists. Skipping.")
+            print(f"User '{ADMIN_USERNAME}' already exists in campus '{code}'. Skipping.")
+            await session.commit()
             return
         admin = User(
+            campus_id=campus.id,
             username=ADMIN_USERNAME,
             hashed_password=hash_password(ADMIN_PASSWORD),
             full_name=ADMIN_FULL_NAME,
@@ -32,8 +49,12 @@ async def seed():
         )
         session.add(admin)
         await session.commit()
-        print(f"Admin user created: {ADMIN_USERNAME} / {ADMIN_PASSWORD}")
+        print(f"Admin user created: {ADMIN_USERNAME} / {ADMIN_PASSWORD} (campus '{code}')")
 
 
 if __name__ == "__main__":
-    asyncio.run(seed())
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--campus", default=settings.DEFAULT_CAMPUS, help="campus code (default DEFAULT_CAMPUS)")
+    parser.add_argument("--campus-name", help="display name when the campus is created")
+    args = parser.parse_args()
+    asyncio.run(seed(args.campus, args.campus_name))
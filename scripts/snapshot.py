@@ -0,0 +1,400 @@
+"""Export / restore a whole-CRM snapshot with binary COPY.
+
+Usage:
+    python scripts/snapshot.py export [-o snapshot.tar] [--jobs 4] [--anonymize]
+    python scripts/snapshot.py restore snapshot.tar [--jobs 4] [--truncate] [--force]
+
+Export reads every model table from one consistent snapshot (exported with
+pg_export_snapshot, shared by --jobs parallel connections), streams each
+table through gzip and packs the results plus a manifest into a single tar.
+Restore loads tables level by level in foreign-key order (tables on the same
+level in parallel), with user triggers switched off inside each table's COPY
+transaction, then resets identity sequences.
+
+The target database must be migrated to the same Alembic revision. Archive
+segments not yet imported from ARCHIVE_DIR files (scripts/archive_history.py
+--import-files) are not part of the snapshot.
+
+--anonymize rewrites names, phone numbers and e-mail addresses on the way
+out and leaves out audit_log, archive_segments and idempotency_keys (stored
+API responses), whose contents would otherwise carry the original values. Notes are cleared, but free text such as
+communication summaries is copied as-is.
+"""
+
+import argparse
+import asyncio
+import gzip
+import io
+import json
+import sys
+import tarfile
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncpg
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.user import Base
+from app.services.pg_listener import asyncpg_dsn
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Partitioned tables: partitions covering the exported range are created before restore
+PARTITIONED = {
+    "communication_records": ("created_at", "year", "communication_records_ensure_partition"),
+    "audit_log": ("changed_at", "month", "audit_log_ensure_partition"),
+}
+
+# SQL expressions replacing PII columns when exporting with --anonymize
+_PHONE_DIGITS = "lpad(((('x' || substr(md5(id::text), 1, 8))::bit(32)::bigint) % 100000000)::text, 8, '0')"
+ANONYMIZE = {
+    "parents": {
+        "name": "'家長' || left(md5(id::text), 6)",
+        "phone": f"'09' || {_PHONE_DIGITS}",
+        "phone_e164": f"CASE WHEN phone_e164 IS NULL THEN NULL ELSE '+8869' || {_PHONE_DIGITS} END",
+        "email": "CASE WHEN email IS NULL THEN NULL ELSE 'parent-' || left(md5(id::text), 10) || '@example.invalid' END",
+        "address": "NULL",
+        "note": "NULL",
+    },
+    "students": {
+        "name": "'學生' || left(md5(id::text), 6)",
+        "note": "NULL",
+    },
+    "registrations": {
+        "name": "'報名者' || left(md5(id::text), 6)",
+        "email": "'registrant-' || left(md5(id::text), 10) || '@example.invalid'",
+        "phone": "NULL",
+        "phone_e164": "NULL",
+        "note": "NULL",
+    },
+    "users": {
+        "full_name": "'職員' || left(md5(id::text), 6)",
+    },
+}
+EXCLUDED_WHEN_ANONYMIZED = {"audit_log", "archive_segments", "idempotency_keys"}
+
+
+class Progress:
+    """Prints a one-line running total to stderr about once a second."""
+
+    def __init__(self, action: str, tables_total: int):
+        self.action = action
+        self.tables_total = tables_total
+        self.tables_done = 0
+        self.rows = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._task: asyncio.Task | None = None
+
+    def _line(self) -> str:
+        elapsed = time.monotonic() - self.started
+        return (
+            f"{self.action}: {self.tables_done}/{self.tables_total} tables, {self.rows:,} rows, "
+            f"{self.bytes / 1e6:,.1f} MB, {elapsed:.1f}s"
+        )
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(1)
+            print("\r" + self._line(), end="", file=sys.stderr, flush=True)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._report())
+
+    def table_done(self, name: str, rows: int) -> None:
+        self.tables_done += 1
+        self.rows += rows
+        print(f"\r  {name}: {rows:,} rows".ljust(60), file=sys.stderr, flush=True)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+        print("\r" + self._line(), file=sys.stderr, flush=True)
+
+
+def _tables(anonymize: bool) -> list:
+    """Model tables in foreign-key order (parents before children)."""
+    return [
+        t for t in Base.metadata.sorted_tables
+        if not (anonymize and t.name in EXCLUDED_WHEN_ANONYMIZED)
+    ]
+
+
+def _levels(tables: list) -> list[list]:
+    """Group tables so that every table's FK targets are in an earlier group."""
+    names = {t.name for t in tables}
+    level: dict[str, int] = {}
+    for table in tables:  # sorted_tables order: dependencies come first
+        deps = {fk.column.table.name for fk in table.foreign_keys} & names - {table.name}
+        level[table.name] = 1 + max((level[d] for d in deps), default=-1)
+    groups: list[list] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for table in tables:
+        groups[level[table.name]].append(table)
+    return groups
+
+
+async def _alembic_revision(conn: asyncpg.Connection) -> str | None:
+    try:
+        return await conn.fetchval("SELECT version_num FROM alembic_version")
+    except asyncpg.UndefinedTableError:
+        return None
+
+
+# ---- export ----
+
+def _select_sql(table, anonymize: bool) -> tuple[str, list[str]]:
+    columns = [c.name for c in table.columns]
+    overrides = ANONYMIZE.get(table.name, {}) if anonymize else {}
+    exprs = [f'{overrides[c]} AS "{c}"' if c in overrides else f'"{c}"' for c in columns]
+    return f'SELECT {", ".join(exprs)} FROM "{table.name}"', columns
+
+
+async def _export_table(dsn: str, snapshot: str, table, anonymize: bool, workdir: Path, progress: Progress) -> dict:
+    query, columns = _select_sql(table, anonymize)
+    path = workdir / f"{table.name}.copy.gz"
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            await conn.execute(f"SET TRANSACTION SNAPSHOT '{snapshot}'")
+            info = {"name": table.name, "file": path.name, "columns": columns}
+            if table.name in PARTITIONED:
+                key = PARTITIONED[table.name][0]
+                low, high = await conn.fetchrow(f'SELECT min("{key}"), max("{key}") FROM "{table.name}"')
+                info["range"] = [low.isoformat() if low else None, high.isoformat() if high else None]
+            # compresslevel 1: the archive is CPU-bound on gzip long before disk or network
+            with gzip.open(path, "wb", compresslevel=1) as gz:
+                async def sink(chunk: bytes) -> None:
+                    progress.bytes += len(chunk)
+                    await asyncio.to_thread(gz.write, chunk)
+
+                status = await conn.copy_from_query(query, output=sink, format="binary")
+            info["rows"] = int(status.split()[-1])
+    finally:
+        await conn.close()
+    progress.table_done(table.name, info["rows"])
+    return info
+
+
+async def export(output: Path, jobs: int, anonymize: bool) -> None:
+    dsn = asyncpg_dsn()
+    tables = _tables(anonymize)
+    coordinator = await asyncpg.connect(dsn)
+    progress = Progress("export", len(tables))
+    try:
+        revision = await _alembic_revision(coordinator)
+        # Hold the snapshot open until every worker has imported it
+        tr = coordinator.transaction(isolation="repeatable_read", readonly=True)
+        await tr.start()
+        snapshot = await coordinator.fetchval("SELECT pg_export_snapshot()")
+
+        # Largest tables first so the slowest copy starts immediately
+        sizes = {
+            t.name: await coordinator.fetchval(
+                "SELECT coalesce(sum(greatest(c.reltuples, 0)), 0) FROM pg_class c "
+                "WHERE c.oid = $1::regclass OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = $1::regclass)",
+                t.name,
+            )
+            for t in tables
+        }
+        queue: asyncio.Queue = asyncio.Queue()
+        for table in sorted(tables, key=lambda t: sizes[t.name], reverse=True):
+            queue.put_nowait(table)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            results: list[dict] = []
+
+            async def worker() -> None:
+                while not queue.empty():
+                    table = queue.get_nowait()
+                    results.append(await _export_table(dsn, snapshot, table, anonymize, workdir, progress))
+
+            progress.start()
+            await asyncio.gather(*(worker() for _ in range(max(1, jobs))))
+            await tr.rollback()
+            await progress.stop()
+
+            order = {t.name: i for i, t in enumerate(tables)}
+            manifest = {
+                "format_version": FORMAT_VERSION,
+                "alembic_revision": revision,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "anonymized": anonymize,
+                "tables": sorted(results, key=lambda r: order[r["name"]]),
+            }
+            # Members are already gzip-compressed; the tar itself is stored uncompressed
+            with tarfile.open(output, "w") as tar:
+                data = json.dumps(manifest, ensure_ascii=False, indent=2).encode()
+                member = tarfile.TarInfo(MANIFEST_NAME)
+                member.size = len(data)
+                member.mtime = int(time.time())
+                tar.addfile(member, io.BytesIO(data))
+                for info in manifest["tables"]:
+                    tar.add(workdir / info["file"], arcname=info["file"])
+    finally:
+        await coordinator.close()
+    print(f"Wrote {output} ({output.stat().st_size / 1e6:,.1f} MB, {progress.rows:,} rows)")
+
+
+# ---- restore ----
+
+def _partition_points(kind: str, low: str, high: str) -> list[date]:
+    """First day of every year/month between ``low`` and ``high`` (UTC, like the partitions)."""
+    start = datetime.fromisoformat(low).astimezone(timezone.utc)
+    end = datetime.fromisoformat(high).astimezone(timezone.utc)
+    points = []
+    year, month = start.year, (start.month if kind == "month" else 1)
+    while (year, month) <= (end.year, end.month if kind == "month" else 1):
+        points.append(date(year, month, 1))
+        if kind == "year":
+            year += 1
+        else:
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return points
+
+
+async def _ensure_partitions(conn: asyncpg.Connection, info: dict) -> None:
+    if info["name"] not in PARTITIONED or not info.get("range") or info["range"][0] is None:
+        return
+    _, kind, function = PARTITIONED[info["name"]]
+    for point in _partition_points(kind, *info["range"]):
+        await conn.execute(f"SELECT {function}($1)", point)
+
+
+async def _partitions_of(conn: asyncpg.Connection, name: str) -> list[str]:
+    rows = await conn.fetch(
+        "SELECT inhrelid::regclass::text AS name FROM pg_inherits WHERE inhparent = $1::regclass", name
+    )
+    return [r["name"] for r in rows]
+
+
+async def _restore_table(dsn: str, archive: Path, member: tarfile.TarInfo, info: dict, progress: Progress) -> None:
+    conn = await asyncpg.connect(dsn)
+    try:
+        await _ensure_partitions(conn, info)
+        targets = [f'"{info["name"]}"', *await _partitions_of(conn, info["name"])]
+
+        async def chunks():
+            with open(archive, "rb") as fh:
+                fh.seek(member.offset_data)
+                with gzip.GzipFile(fileobj=io.BufferedReader(_Slice(fh, member.size)), mode="rb") as gz:
+                    while chunk := await asyncio.to_thread(gz.read, 1 << 20):
+                        progress.bytes += len(chunk)
+                        yield chunk
+
+        async with conn.transaction():
+            # Notify/cascade/check triggers would fire per row; FK constraints stay enforced
+            for target in targets:
+                await conn.execute(f"ALTER TABLE {target} DISABLE TRIGGER USER")
+            status = await conn.copy_to_table(info["name"], source=chunks(), columns=info["columns"], format="binary")
+            for target in targets:
+                await conn.execute(f"ALTER TABLE {target} ENABLE TRIGGER USER")
+    finally:
+        await conn.close()
+    progress.table_done(info["name"], int(status.split()[-1]))
+
+
+class _Slice(io.RawIOBase):
+    """Read-only view of ``size`` bytes from the current position of ``fh``."""
+
+    def __init__(self, fh, size: int):
+        self._fh = fh
+        self._left = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._left <= 0:
+            return 0
+        data = self._fh.read(min(len(buffer), self._left))
+        self._left -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+async def _reset_sequences(conn: asyncpg.Connection, tables: list) -> None:
+    for table in tables:
+        for column in table.primary_key.columns:
+            seq = await conn.fetchval("SELECT pg_get_serial_sequence($1, $2)", table.name, column.name)
+            if seq:
+                await conn.execute(
+                    f'SELECT setval($1, coalesce((SELECT max("{column.name}") FROM "{table.name}"), 0) + 1, false)',
+                    seq,
+                )
+
+
+async def restore(archive: Path, jobs: int, truncate: bool, force: bool) -> None:
+    dsn = asyncpg_dsn()
+    with tarfile.open(archive, "r") as tar:
+        manifest = json.load(tar.extractfile(MANIFEST_NAME))
+        members = {m.name: m for m in tar.getmembers()}
+    if manifest.get("format_version") != FORMAT_VERSION:
+        sys.exit(f"Unsupported snapshot format {manifest.get('format_version')!r}")
+
+    infos = {info["name"]: info for info in manifest["tables"]}
+    tables = [t for t in Base.metadata.sorted_tables if t.name in infos]
+    conn = await asyncpg.connect(dsn)
+    try:
+        revision = await _alembic_revision(conn)
+        if revision != manifest["alembic_revision"] and not force:
+            sys.exit(
+                f"Target is at revision {revision}, snapshot at {manifest['alembic_revision']}; "
+                "run `alembic upgrade` to match or pass --force"
+            )
+        non_empty = [t.name for t in tables if await conn.fetchval(f'SELECT EXISTS (SELECT 1 FROM "{t.name}")')]
+        if non_empty:
+            if not truncate:
+                sys.exit(f"Target tables are not empty ({', '.join(non_empty)}); pass --truncate to replace them")
+            await conn.execute(
+                "TRUNCATE " + ", ".join(f'"{t.name}"' for t in Base.metadata.sorted_tables) + " CASCADE"
+            )
+
+        progress = Progress("restore", len(tables))
+        progress.start()
+        semaphore = asyncio.Semaphore(max(1, jobs))
+
+        async def load(table) -> None:
+            async with semaphore:
+                info = infos[table.name]
+                await _restore_table(dsn, archive, members[info["file"]], info, progress)
+
+        for group in _levels(tables):
+            await asyncio.gather(*(load(t) for t in group))
+        await progress.stop()
+        await _reset_sequences(conn, tables)
+    finally:
+        await conn.close()
+    print(f"Restored {progress.rows:,} rows from {archive}" + (" (anonymized)" if manifest["anonymized"] else ""))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Whole-CRM snapshot export/restore (binary COPY).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="write a snapshot archive")
+    p_export.add_argument("-o", "--output", type=Path,
+                          default=Path(f"snapshot-{datetime.now():%Y%m%d-%H%M%S}.tar"))
+    p_export.add_argument("--jobs", type=int, default=4, help="parallel connections")
+    p_export.add_argument("--anonymize", action="store_true", help="replace names, phones and e-mails")
+
+    p_restore = sub.add_parser("restore", help="load a snapshot archive")
+    p_restore.add_argument("archive", type=Path)
+    p_restore.add_argument("--jobs", type=int, default=4, help="parallel connections")
+    p_restore.add_argument("--truncate", action="store_true", help="empty non-empty target tables first")
+    p_restore.add_argument("--force", action="store_true", help="ignore an Alembic revision mismatch")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        asyncio.run(export(args.output, args.jobs, args.anonymize))
+    else:
+        asyncio.run(restore(args.archive, args.jobs, args.truncate, args.force))
+
+
+if __name__ == "__main__":
+    main()
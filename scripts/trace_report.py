@@ -0,0 +1,190 @@
+"""Summarize exported spans: critical path per route, or run a local OTLP collector.
+
+``summary`` reads span JSON lines (default TRACE_FILE and its rotated
+backups), rebuilds each trace and walks its critical path: starting from the
+end of the root span, the child that finished last is followed, then the one
+that finished before that child started, and so on; time not covered by a
+child is the span's own ("self") time. Per route it prints how many traces,
+root latency percentiles, and the average time each span name contributes to
+the critical path. ``http (self)`` is middleware and routing; ``endpoint
+(self)`` is parameter validation, handler code and response serialization.
+
+``collect`` is a stand-in for an OpenTelemetry collector: it accepts OTLP/JSON
+on ``POST /v1/traces`` (TRACE_EXPORTER=otlp) and appends the spans to a
+file in the same JSON-lines format, ready for ``summary``.
+
+    uv run python scripts/trace_report.py summary --route /api/parents
+    uv run python scripts/trace_report.py collect --port 4318 --out traces/collected.jsonl
+"""
+import argparse
+import glob
+import json
+import statistics
+import sys
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def load(paths: list[str]) -> dict[str, list[dict]]:
+    traces: dict[str, list[dict]] = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    span = json.loads(line)
+                    traces[span["trace_id"]].append(span)
+    return traces
+
+
+def critical_path(span: dict, children: dict[str, list[dict]], label: str, out: list[tuple[str, float]]) -> None:
+    """Append (label, ms) segments of ``span``'s critical path to ``out``."""
+    cursor = span["end_ns"]
+    own = 0
+    for child in sorted(children[span["span_id"]], key=lambda c: c["end_ns"], reverse=True):
+        if child["start_ns"] >= cursor:
+            continue  # ran in parallel with a later child already on the path
+        end = min(child["end_ns"], cursor)
+        own += cursor - end
+        critical_path({**child, "end_ns": end}, children, child["name"], out)
+        cursor = child["start_ns"]
+    own += max(0, cursor - span["start_ns"])
+    out.append((f"{label} (self)" if children[span["span_id"]] else label, own / 1e6))
+
+
+def summary(args: argparse.Namespace) -> None:
+    paths = args.paths or sorted(glob.glob(settings.TRACE_FILE + "*"), reverse=True)
+    if not paths:
+        sys.exit(f"No span files found (looked for {settings.TRACE_FILE}*)")
+    # route -> [(root ms, {label: (ms, calls)})]
+    routes: dict[str, list[tuple[float, dict[str, list[float]]]]] = defaultdict(list)
+    for spans in load(paths).values():
+        ids = {s["span_id"] for s in spans}
+        children: dict[str, list[dict]] = defaultdict(list)
+        roots = []
+        for s in spans:
+            if s["parent_id"] in ids:
+                children[s["parent_id"]].append(s)
+            else:
+                roots.append(s)
+        for root in roots:
+            route = root["attributes"].get("route") or root["attributes"].get("http.target") or root["name"]
+            route = f"{root['attributes'].get('http.method', '')} {route}".strip()
+            if args.route and args.route not in route:
+                continue
+            segments: list[tuple[str, float]] = []
+            critical_path(root, children, "http", segments)
+            per_label: dict[str, list[float]] = defaultdict(lambda: [0.0, 0])
+            for label, ms in segments:
+                per_label[label][0] += ms
+                per_label[label][1] += 1
+            routes[route].append(((root["end_ns"] - root["start_ns"]) / 1e6, per_label))
+
+    for route, samples in sorted(routes.items(), key=lambda item: -len(item[1])):
+        if len(samples) < args.min_traces:
+            continue
+        totals = [total for total, _ in samples]
+        mean_total = statistics.fmean(totals)
+        print(f"\n{route}  traces {len(samples)}  p50 {percentile(totals, 0.5):.1f} ms  "
+              f"p95 {percentile(totals, 0.95):.1f} ms  max {max(totals):.1f} ms")
+        labels: dict[str, list[float]] = defaultdict(list)
+        calls: dict[str, int] = defaultdict(int)
+        for _, per_label in samples:
+            for label, (ms, count) in per_label.items():
+                labels[label].append(ms)
+                calls[label] += count
+        rows = sorted(labels.items(), key=lambda item: -sum(item[1]))[:args.top]
+        print(f"  {'critical path':<48} {'mean ms':>9} {'p95 ms':>9} {'share':>6} {'calls':>6}")
+        for label, values in rows:
+            mean = sum(values) / len(samples)
+            print(f"  {label[:48]:<48} {mean:9.2f} {percentile(values, 0.95):9.2f} "
+                  f"{mean / mean_total:6.0%} {calls[label] / len(samples):6.1f}")
+
+
+def _attribute(value: dict):
+    for key in ("stringValue", "boolValue", "doubleValue"):
+        if key in value:
+            return value[key]
+    return int(value["intValue"]) if "intValue" in value else None
+
+
+def collect(args: argparse.Namespace) -> None:
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    out = open(args.out, "a", encoding="utf-8")
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            lines = []
+            for resource in payload.get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for s in scope.get("spans", []):
+                        start, end = int(s["startTimeUnixNano"]), int(s["endTimeUnixNano"])
+                        lines.append(json.dumps({
+                            "trace_id": s["traceId"],
+                            "span_id": s["spanId"],
+                            "parent_id": s.get("parentSpanId") or None,
+                            "name": s["name"],
+                            "start_ns": start,
+                            "end_ns": end,
+                            "duration_ms": round((end - start) / 1e6, 3),
+                            "attributes": {a["key"]: _attribute(a["value"]) for a in s.get("attributes", [])},
+                            "error": s.get("status", {}).get("message"),
+                        }, ensure_ascii=False))
+            with lock:
+                out.writelines(line + "\n" for line in lines)
+                out.flush()
+            body = b"{}"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Collecting OTLP/JSON on http://{args.host}:{args.port}/v1/traces into {args.out}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        out.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("summary", help="critical path per route")
+    report.add_argument("paths", nargs="*", help="span files (default TRACE_FILE and its backups)")
+    report.add_argument("--route", help="only routes containing this text")
+    report.add_argument("--top", type=int, default=12, help="span names listed per route")
+    report.add_argument("--min-traces", type=int, default=1)
+    report.set_defaults(func=summary)
+    collector = commands.add_parser("collect", help="local OTLP/JSON collector writing span JSON lines")
+    collector.add_argument("--host", default="127.0.0.1")
+    collector.add_argument("--port", type=int, default=4318)
+    collector.add_argument("--out", default="traces/collected.jsonl")
+    collector.set_defaults(func=collect)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
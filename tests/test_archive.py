@@ -0,0 +1,69 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, text
+
+from app.models.archive import ArchiveSegment
+from app.models.communication import CommunicationRecord, ContactType
+from app.models.parent import Parent
+from app.services.archive import archive_old_history, import_archive_files, list_segments, stream_segments
+
+pytestmark = pytest.mark.anyio
+
+
+async def _lines(db, parent_id: uuid.UUID) -> list[dict]:
+    segments = await list_segments(db, parent_id)
+    body = b"".join([chunk async for chunk in stream_segments(segments)])
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+async def test_archived_history_is_stored_in_the_database_and_read_back(db, tenant_a):
+    old = datetime.now(timezone.utc) - timedelta(days=5 * 365)
+    await db.execute(text("SELECT communication_records_ensure_partition(:day)"), {"day": old.date()})
+    parent = Parent(name="許志安", phone="0911222333", campus_id=tenant_a.id)
+    db.add(parent)
+    await db.flush()
+    record = CommunicationRecord(
+        parent_id=parent.id, user_id=tenant_a.teacher.id, contact_type=ContactType.phone,
+        summary="詢問轉學", created_at=old, campus_id=tenant_a.id,
+    )
+    db.add(record)
+    await db.commit()
+    parent_id, record_id = parent.id, record.id
+
+    result = await archive_old_history(db, cutoff=old + timedelta(days=1))
+    assert result.parents >= 1
+
+    segment = (await db.execute(select(ArchiveSegment).where(ArchiveSegment.parent_id == parent_id))).scalar_one()
+    assert segment.file is None
+    assert await db.get(CommunicationRecord, (record_id, old)) is None
+    lines = await _lines(db, parent_id)
+    assert [(line["type"], line["id"], line["summary"]) for line in lines] == [
+        ("communication", str(record_id), "詢問轉學"),
+    ]
+
+
+async def test_unreadable_segment_is_reported_not_skipped(db, tenant_a):
+    parent = Parent(name="黎明", phone="0911444555", campus_id=tenant_a.id)
+    db.add(parent)
+    await db.flush()
+    at = datetime(2020, 5, 1, tzinfo=timezone.utc)
+    segment = ArchiveSegment(
+        parent_id=parent.id, file=f"missing-{uuid.uuid4()}.jsonl.gz", offset=0, length=100,
+        communication_count=3, follow_up_count=1, first_at=at, last_at=at,
+    )
+    db.add(segment)
+    await db.commit()
+    parent_id, segment_id = parent.id, segment.id
+
+    assert await _lines(db, parent_id) == [{
+        "type": "error", "detail": "Archived history could not be read", "segment_id": segment_id,
+        "communication_count": 3, "follow_up_count": 1, "first_at": at.isoformat(), "last_at": at.isoformat(),
+    }]
+    imported, unreadable = await import_archive_files(db)
+    assert unreadable >= 1
+    # Still points at its file, to be imported once the file is restored
+    await db.refresh(segment)
+    assert segment.file is not None
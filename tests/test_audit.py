@@ -0,0 +1,65 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+
+import asyncpg
+import pytest
+
+from app.services import audit
+
+DATABASE = "postgresql+asyncpg://crm:secret@db/crm"
+
+
+def _entry(row_id: str) -> tuple:
+    return (datetime(2026, 10, 31, 20, tzinfo=timezone.utc), None, None, "parents", row_id, "UPDATE", "{}")
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Fake COPY: rows whose row_id starts with "bad" are rejected like a constraint violation."""
+    rows: list = []
+
+    async def write(database, entries):
+        if any(e[4].startswith("bad") for e in entries):
+            raise asyncpg.CheckViolationError("rejected")
+        rows.extend(e[4] for e in entries)
+
+    monkeypatch.setattr(audit, "_write", write)
+    return rows
+
+
+@pytest.mark.anyio
+async def test_rejected_entries_are_isolated_and_logged(written, caplog):
+    batch = [(DATABASE, _entry(i)) for i in ["a", "b", "bad1", "c", "d", "bad2", "e"]]
+    with caplog.at_level(logging.ERROR, logger=audit.logger.name):
+        await audit._write_with_retry(batch)
+    assert sorted(written) == ["a", "b", "c", "d", "e"]
+    lost = [json.loads(r.getMessage().split(": ", 1)[1]) for r in caplog.records if "rejected by the database" in r.getMessage()]
+    assert [e["row_id"] for e in lost] == ["bad1", "bad2"]
+    assert lost[0]["database"] == "postgresql+asyncpg://crm:***@db/crm"
+
+
+@pytest.mark.anyio
+async def test_failed_batch_goes_back_on_the_queue(monkeypatch):
+    async def unreachable(database, entries):
+        raise ConnectionRefusedError()
+
+    monkeypatch.setattr(audit, "_write", unreachable)
+    monkeypatch.setattr(audit, "_queue", asyncio.Queue(maxsize=2))
+    monkeypatch.setattr(audit, "_dropped", 0)
+    batch = [(DATABASE, _entry(i)) for i in ["a", "b", "c"]]
+    await audit._write_with_retry(batch, attempts=1)
+    assert [audit._queue.get_nowait()[1][4] for _ in range(2)] == ["a", "b"]
+    assert audit._dropped == 1
+
+
+@pytest.mark.anyio
+async def test_failed_batch_is_logged_at_shutdown(monkeypatch, caplog):
+    async def unreachable(database, entries):
+        raise ConnectionRefusedError()
+
+    monkeypatch.setattr(audit, "_write", unreachable)
+    with caplog.at_level(logging.ERROR, logger=audit.logger.name):
+        await audit._write_with_retry([(DATABASE, _entry("a"))], attempts=1, requeue=False)
+    assert any("not written before shutdown" in r.getMessage() for r in caplog.records)
@@ -0,0 +1,70 @@
+import uuid
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import WORKER_ID, NamedCache, apply_events, handle_invalidation, named_cache
+
+
+def _cache(**kwargs) -> NamedCache:
+    # Registered, so apply_events() reaches it
+    options = dict(ttl=60, maxsize=3, tables=("parents",))
+    return named_cache(f"test-{uuid.uuid4().hex}", **{**options, **kwargs})
+
+
+def test_named_cache_is_created_once():
+    cache = _cache()
+    assert named_cache(cache.name, ttl=1, maxsize=1) is cache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache()
+    for key in "abc":
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in "acd"] == ["a", "c", "d"]
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: clock[0])
+    cache = _cache(ttl=5)
+    cache.set("a", 1)
+    clock[0] += 4
+    assert cache.get("a") == 1
+    clock[0] += 2
+    assert cache.get("a", "gone") == "gone"
+    assert (cache.expirations, len(cache)) == (1, 0)
+
+
+def test_direct_change_clears_the_cache_and_reference_only_drops_tagged_entries():
+    cache = _cache(tables=("follow_ups",))
+    parent_id = str(uuid.uuid4())
+    cache.set("mine", 1, tags=(("parents", parent_id),))
+    cache.set("other", 2, tags=(("parents", str(uuid.uuid4())),))
+    # A new communication references the parent
+    apply_events([("parents", "ref", parent_id)])
+    assert (cache.get("mine"), cache.get("other")) == (None, 2)
+    apply_events([("follow_ups", "INSERT", str(uuid.uuid4()))])
+    assert len(cache) == 0
+
+
+def test_reset_entry_loses_its_old_tags():
+    cache = _cache()
+    cache.set("a", 1, tags=(("students", "1"),))
+    cache.set("a", 2, tags=(("students", "2"),))
+    cache.invalidate_tag(("students", "1"))
+    assert cache.get("a") == 2
+
+
+@pytest.mark.anyio
+async def test_broadcasts_from_this_worker_are_ignored():
+    cache = _cache()
+    cache.set("a", 1)
+    await handle_invalidation({"worker": WORKER_ID, "flush": True})
+    assert cache.get("a") == 1
+    await handle_invalidation({"worker": "another", "events": [["parents", "UPDATE", "1"]]})
+    assert cache.get("a") is None
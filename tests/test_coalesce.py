@@ -0,0 +1,72 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.user import Role
+from app.services.coalesce import _inflight, coalesced
+
+USER = SimpleNamespace(id=uuid.uuid4(), campus_id=uuid.uuid4(), role=Role.teacher)
+
+
+class RequestSession:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def _call(handler, sessions: list, **params):
+    session = RequestSession()
+    sessions.append(session)
+    request = SimpleNamespace(scope={})
+    return asyncio.ensure_future(handler(**params, db=session, current_user=USER, request=request))
+
+
+@pytest.mark.anyio
+async def test_identical_calls_share_one_execution_and_release_their_sessions():
+    release = asyncio.Event()
+    calls = []
+
+    @coalesced("test_shared")
+    async def handler(q: str, db, current_user):
+        calls.append(q)
+        await release.wait()
+        return {"q": q}
+
+    sessions = []
+    callers = [_call(handler, sessions, q="a") for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert calls == ["a"]
+    # Nobody keeps the request's connection while waiting for the flight
+    assert all(s.closed for s in sessions)
+    release.set()
+    assert [r.body for r in await asyncio.gather(*callers)] == [b'{"q":"a"}'] * 3
+
+
+@pytest.mark.anyio
+async def test_flight_is_cancelled_when_its_last_caller_goes_away():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    @coalesced("test_cancel")
+    async def handler(q: str, db, current_user):
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return {}
+
+    sessions = []
+    leader, follower = _call(handler, sessions, q="a"), _call(handler, sessions, q="a")
+    await started.wait()
+    leader.cancel()
+    await asyncio.sleep(0.01)
+    # The follower still wants the result
+    assert not cancelled.is_set()
+    follower.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert not any(key[0] == "test_cancel" for key in _inflight)
@@ -0,0 +1,80 @@
+"""Duplicate-parent scoring: which blocking keys and weights make a candidate pair."""
+import uuid
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.parent import Parent, ParentDuplicate
+from app.services.dedupe import scan_duplicates
+from tests.conftest import as_campus
+
+pytestmark = pytest.mark.anyio
+
+
+def _phone() -> str:
+    return "09" + str(uuid.uuid4().int)[:8]
+
+
+def _email() -> str:
+    return f"family-{uuid.uuid4().hex[:8]}@example.com"
+
+
+async def _candidates(db, campus_id) -> dict[frozenset, tuple[float, list[str], bool]]:
+    rows = (await db.execute(
+        select(ParentDuplicate).join(Parent, Parent.id == ParentDuplicate.parent_id).where(Parent.campus_id == campus_id)
+        .execution_options(populate_existing=True)
+    )).scalars().all()
+    return {frozenset((c.parent_id, c.duplicate_id)): (c.score, c.reasons, c.dismissed) for c in rows}
+
+
+async def test_only_pairs_reaching_the_minimum_score_become_candidates(db, tenant_a):
+    # Latin names: trigram similarity of CJK text depends on the database collation
+    def add(name, phone=None, email=None):
+        parent = Parent(name=name, phone=phone or _phone(), email=email, campus_id=tenant_a.id)
+        db.add(parent)
+        return parent
+
+    email, phone, shared_phone, both_email = _email(), _phone(), _phone(), _email()
+    similar = (add("John Smith", email=email), add("Jon  Smith", email=email.upper()))  # 3 + 4 × 0.58
+    household = (add("Alice Wong", phone=phone), add("Bob Chan", phone=phone))  # 3
+    namesakes = (add("Mary Jane"), add("mary jane"))  # 4
+    contact = (add("Peter Pan", phone=shared_phone, email=both_email),
+               add("Wendy Darling", phone=shared_phone, email=both_email))  # 6
+    await db.commit()
+    pair = {label: frozenset(p.id for p in parents) for label, parents in
+            {"similar": similar, "household": household, "namesakes": namesakes, "contact": contact}.items()}
+
+    with as_campus(tenant_a):
+        await scan_duplicates(db)
+    found = await _candidates(db, tenant_a.id)
+    assert set(found) == {pair["similar"], pair["contact"]}
+    score, reasons, _ = found[pair["similar"]]
+    assert score == pytest.approx(3 + 4 * 0.5833, abs=0.01) and reasons == ["email", "name"]
+    assert found[pair["contact"]][:2] == (6, ["email", "phone"])
+
+
+async def test_rescan_drops_stale_candidates_but_keeps_dismissed_ones(db, tenant_a):
+    email, phone = _email(), _phone()
+    pairs = [
+        [Parent(name="Tom Lee", phone=_phone(), email=email, campus_id=tenant_a.id),
+         Parent(name="Tom Lee", phone=_phone(), email=email, campus_id=tenant_a.id)],
+        [Parent(name="Ann Ho", phone=phone, campus_id=tenant_a.id),
+         Parent(name="Ann Ho", phone=phone, campus_id=tenant_a.id)],
+    ]
+    db.add_all(pairs[0] + pairs[1])
+    await db.commit()
+    stale, dismissed = (frozenset(p.id for p in pair) for pair in pairs)
+    with as_campus(tenant_a):
+        await scan_duplicates(db)
+    assert set(await _candidates(db, tenant_a.id)) == {stale, dismissed}
+
+    await db.execute(update(ParentDuplicate).where(ParentDuplicate.parent_id == min(dismissed)).values(dismissed=True))
+    # Neither pair shares a contact any more
+    await db.execute(update(Parent).where(Parent.id.in_(stale | dismissed)).values(email=None))
+    for parent_id in stale | dismissed:
+        await db.execute(update(Parent).where(Parent.id == parent_id).values(phone=_phone(), phone_e164=None))
+    await db.commit()
+    with as_campus(tenant_a):
+        result = await scan_duplicates(db)
+    assert result.removed == 1
+    assert set(await _candidates(db, tenant_a.id)) == {dismissed}
@@ -0,0 +1,52 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.routers.parents import parent_view
+
+
+def test_no_parameters_means_the_full_representation():
+    assert parent_view.parse(None, None) is None
+
+
+def test_requested_fields_always_start_with_id():
+    projection = parent_view.parse("name,phone,id,name", None)
+    assert projection.fields == ["id", "name", "phone"]
+    assert projection.embeds == {}
+
+
+def test_include_alone_keeps_every_field_and_embeds_the_defaults():
+    projection = parent_view.parse(None, "students")
+    assert projection.fields == list(parent_view.fields)
+    assert projection.embeds == {"students": ["id", "name", "grade", "relationship_type"]}
+
+
+def test_dotted_field_narrows_and_implies_the_include():
+    projection = parent_view.parse(" name , students.grade ", None)
+    assert projection.fields == ["id", "name"]
+    assert projection.embeds == {"students": ["grade"]}
+
+
+@pytest.mark.parametrize("fields, include", [
+    ("name,password", None),
+    (None, "payments"),
+    ("students.birthday", None),
+])
+def test_unknown_names_are_rejected(fields, include):
+    with pytest.raises(HTTPException) as exc:
+        parent_view.parse(fields, include)
+    assert exc.value.status_code == 400
+
+
+def test_select_names_only_the_requested_columns_and_embeds():
+    sql = str(parent_view.parse("name,students.grade", None).select().compile(dialect=postgresql.dialect()))
+    assert "parents.phone" not in sql
+    assert "json_agg" in sql and "ORDER BY students.name" in sql
+
+
+def test_schema_serializes_only_selected_fields():
+    parent_id = uuid.uuid4()
+    row = parent_view.schema.model_validate({"id": parent_id, "name": "王小明"})
+    assert row.model_dump() == {"id": parent_id, "name": "王小明"}
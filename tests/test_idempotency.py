@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.services.idempotency import MAX_KEY_LENGTH, begin
+
+pytestmark = pytest.mark.anyio
+
+
+def _request(body: dict, key: str | None = "retry-1", content_type: str = "application/json") -> Request:
+    raw = json.dumps(body).encode()
+    headers = [(b"content-type", content_type.encode())]
+    if key is not None:
+        headers.append((b"idempotency-key", key.encode()))
+    scope = {"type": "http", "method": "POST", "path": "/api/parents", "headers": headers, "query_string": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": raw, "more_body": False}
+
+    return Request(scope, receive)
+
+
+async def test_without_header_nothing_is_stored(db, tenant_a):
+    idempotency = await begin(_request({}, key=None), db, tenant_a.teacher.id)
+    assert (idempotency.key, idempotency.replay) == (None, None)
+    await idempotency.save(db, 201, {"id": 1})
+
+
+@pytest.mark.parametrize("key", ["   ", "k" * (MAX_KEY_LENGTH + 1)])
+async def test_key_length_is_checked(db, tenant_a, key):
+    with pytest.raises(HTTPException) as exc:
+        await begin(_request({}, key=key), db, tenant_a.teacher.id)
+    assert exc.value.status_code == 400
+
+
+async def test_retry_replays_the_stored_response(db, tenant_a):
+    user_id, other_user_id = tenant_a.teacher.id, tenant_a.admin.id
+    first = await begin(_request({"name": "王小明"}), db, user_id)
+    assert first.replay is None
+    await first.save(db, 201, {"id": "p1", "name": "王小明"})
+    await db.commit()
+
+    retry = await begin(_request({"name": "王小明"}), db, user_id)
+    assert retry.replay.status_code == 201
+    assert json.loads(retry.replay.body) == {"id": "p1", "name": "王小明"}
+    assert retry.replay.headers["idempotent-replayed"] == "true"
+    await db.rollback()
+
+    with pytest.raises(HTTPException) as exc:
+        await begin(_request({"name": "李小華"}), db, user_id)
+    assert exc.value.status_code == 422
+    await db.rollback()
+    # Keys are per user
+    other = await begin(_request({"name": "李小華"}), db, other_user_id)
+    assert other.replay is None
+    await db.rollback()
+
+
+async def test_multipart_bodies_are_not_compared(db, tenant_a):
+    user_id = tenant_a.teacher.id
+    first = await begin(_request({"boundary": 1}, content_type="multipart/form-data; boundary=a"), db, user_id)
+    await first.save(db, 200, {"imported": 3})
+    await db.commit()
+    retry = await begin(_request({"boundary": 2}, content_type="multipart/form-data; boundary=b"), db, user_id)
+    assert retry.replay is not None
+    await db.rollback()
@@ -0,0 +1,81 @@
+import pytest
+
+from app.services.load_shed import AdaptiveLimiter, Priority, classify
+
+
+def _limiter(**kwargs) -> AdaptiveLimiter:
+    # window_seconds=0: every observation closes a window
+    options = dict(initial=10, min_limit=4, max_limit=12, tolerance=2.0, baseline_window_seconds=600, window_seconds=0)
+    return AdaptiveLimiter(**{**options, **kwargs})
+
+
+def _fill(limiter: AdaptiveLimiter, n: int) -> None:
+    for _ in range(n):
+        assert limiter.try_acquire(Priority.critical)
+
+
+@pytest.mark.parametrize("method, path, priority", [
+    ("POST", "/api/auth/login", Priority.critical),
+    ("GET", "/api/lookup/phone/0912345678", Priority.critical),
+    ("POST", "/api/info-sessions/abc/registrations", Priority.critical),
+    ("POST", "/api/info-sessions/abc/registrations/import", Priority.low),
+    ("GET", "/api/communications/search", Priority.low),
+    ("GET", "/api/parents", Priority.normal),
+    ("POST", "/api/parents", Priority.normal),
+])
+def test_classify(method, path, priority):
+    assert classify(method, path) == priority
+
+
+def test_priorities_get_their_share_of_the_limit():
+    limiter = _limiter()
+    _fill(limiter, 5)
+    assert not limiter.try_acquire(Priority.low)  # 50% of 10
+    _fill(limiter, 3)
+    assert not limiter.try_acquire(Priority.normal)  # 85% of 10
+    _fill(limiter, 2)
+    assert not limiter.try_acquire(Priority.critical)
+    assert limiter.shed == {"critical": 1, "normal": 1, "low": 1}
+    limiter.release()
+    assert limiter.try_acquire(Priority.critical)
+
+
+def test_grows_while_used_and_fast_up_to_max():
+    limiter = _limiter()
+    _fill(limiter, 10)
+    for _ in range(5):
+        limiter.observe(0.010)
+    assert limiter.limit == 12
+
+
+def test_does_not_grow_while_idle():
+    limiter = _limiter()
+    limiter.try_acquire(Priority.normal)
+    for _ in range(5):
+        limiter.observe(0.010)
+    assert limiter.limit == 10
+
+
+def test_backs_off_when_latency_exceeds_tolerance_down_to_min():
+    limiter = _limiter()
+    limiter.observe(0.010)
+    limiter.observe(0.025)
+    assert limiter.limit == pytest.approx(9.0)
+    for _ in range(50):
+        limiter.observe(0.100)
+    assert limiter.limit == 4
+
+
+def test_baseline_is_the_lowest_window_and_ages_out(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.load_shed.time.monotonic", lambda: clock[0])
+    limiter = _limiter(baseline_window_seconds=100)
+    limiter.observe(0.010)
+    clock[0] += 50
+    limiter.observe(0.050)
+    assert limiter.baseline == pytest.approx(0.010)
+    # Once the fast window is older than the baseline window, the slower
+    # latency is the new normal
+    clock[0] += 60
+    limiter.observe(0.050)
+    assert limiter.baseline == pytest.approx(0.050)
@@ -0,0 +1,39 @@
+import pytest
+
+from app.services.phone import normalize_phone
+
+
+@pytest.mark.parametrize("raw", [
+    "0912345678",
+    "0912-345-678",
+    " 0912 345 678 ",
+    "+886 912 345 678",
+    "+886-912-345-678",
+    "886912345678",
+    "00886912345678",
+    # Trunk 0 kept after the country code
+    "+886 0912 345 678",
+    "+886 (0)912-345-678",
+    "00886 0912 345 678",
+    "8860912345678",
+])
+def test_mobile_spellings_share_one_key(raw):
+    assert normalize_phone(raw) == "+886912345678"
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("02-2345-6789", "+886223456789"),
+    ("+886 02 2345 6789", "+886223456789"),
+    ("(02) 2345 6789", "+886223456789"),
+    # Other countries are left as dialed
+    ("+1 415 555 0100", "+14155550100"),
+    ("+39 06 1234 5678", "+390612345678"),
+    ("0081 90 1234 5678", "+819012345678"),
+])
+def test_landlines_and_foreign_numbers(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+@pytest.mark.parametrize("raw", [None, "", "   ", "n/a", "123", "+1234567890123456"])
+def test_unusable_input_is_none(raw):
+    assert normalize_phone(raw) is None
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+
+from app.database import engine, get_db
+from app.dependencies import get_current_user
+from app.services.coalesce import coalesced
+from app.services.query_budget import CancelOnDisconnectMiddleware
+
+SLEEP_SQL = "SELECT pg_sleep(30) /* test_query_budget */"
+
+
+def _app(user) -> CancelOnDisconnectMiddleware:
+    api = FastAPI()
+
+    @api.get("/api/slow")
+    @coalesced("test_slow")
+    async def slow(db=Depends(get_db), current_user=Depends(get_current_user)):
+        await db.execute(text(SLEEP_SQL))
+        return {}
+
+    api.dependency_overrides[get_current_user] = lambda: user
+    return CancelOnDisconnectMiddleware(api)
+
+
+def _client(app, gone: asyncio.Event) -> asyncio.Future:
+    """A GET /api/slow whose client disconnects once ``gone`` is set."""
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/api/slow", "raw_path": b"/api/slow", "query_string": b"", "root_path": "", "headers": [],
+        "server": ("test", 80), "client": ("test", 1),
+    }
+    return asyncio.ensure_future(app(scope, receive, send))
+
+
+async def _running(db) -> int:
+    await db.rollback()
+    return (await db.execute(
+        text("SELECT count(*) FROM pg_stat_activity WHERE query = :q AND state = 'active'"), {"q": SLEEP_SQL},
+    )).scalar_one()
+
+
+async def _wait_for_running(db, expected: int) -> int:
+    for _ in range(50):
+        if (count := await _running(db)) == expected:
+            break
+        await asyncio.sleep(0.1)
+    return count
+
+
+@pytest.mark.anyio
+async def test_disconnect_ends_the_coalesced_query(db, tenant_a):
+    app = _app(tenant_a.teacher)
+    first_gone, second_gone = asyncio.Event(), asyncio.Event()
+    clients = [_client(app, first_gone), _client(app, second_gone)]
+    try:
+        assert await _wait_for_running(db, 1) == 1
+        first_gone.set()
+        await clients[0]
+        # The other client still waits for the shared result
+        await asyncio.sleep(0.3)
+        assert await _running(db) == 1
+        second_gone.set()
+        await clients[1]
+        assert await _wait_for_running(db, 0) == 0
+    finally:
+        first_gone.set()
+        second_gone.set()
+        await asyncio.gather(*clients, return_exceptions=True)
+        # Pooled asyncpg connections must not outlive the test's event loop
+        await engine.dispose()
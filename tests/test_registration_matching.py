@@ -0,0 +1,102 @@
+"""Scoring of registration -> parent matches (weights and the auto-match threshold)."""
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.models.info_session import InfoSession, MatchStatus, Registration, RegistrationMatchCandidate
+from app.models.parent import Parent
+from app.services.registration_matching import match_registrations
+
+pytestmark = pytest.mark.anyio
+
+
+def _email(label: str) -> str:
+    return f"{label}-{uuid.uuid4().hex[:8]}@example.com"
+
+
+async def test_scores_decide_between_matched_review_and_no_match(db, tenant_a):
+    def parent(name, phone="0900000000", email=None):
+        p = Parent(name=name, phone=phone, email=email, campus_id=tenant_a.id)
+        db.add(p)
+        return p
+
+    shared_email = _email("chen")
+    by_phone = parent("林大同", phone="0912-000-001")
+    by_name = parent("Amy Wu")
+    tie_email, tie_phone = parent("陳一", email=shared_email), parent("陳二", phone="0912000002")
+    strong, weak = parent("黃小玲", email=_email("huang")), parent("黃大玲", phone="0912000003")
+    session = InfoSession(
+        title="說明會", session_date=date.today(), session_time="10:00", location="禮堂", campus_id=tenant_a.id,
+    )
+    db.add(session)
+    await db.flush()
+
+    def registration(name, email=None, phone=None):
+        r = Registration(
+            session_id=session.id, name=name, email=email or _email("new"), phone=phone, campus_id=tenant_a.id,
+        )
+        db.add(r)
+        return r
+
+    cases = {
+        # phone alone reaches AUTO_MATCH_SCORE
+        "phone": (registration("林先生", phone="+886 912 000 001"), MatchStatus.matched, by_phone),
+        # a name alone (case and spaces ignored) only goes to review
+        "name": (registration("amy  wu"), MatchStatus.review, None),
+        # two parents with the same top score: review
+        "tie": (registration("陳太太", email=shared_email.upper(), phone="0912000002"), MatchStatus.review, None),
+        # e-mail + name (4) beats phone (3)
+        "best": (registration("黃小玲", email=strong.email, phone="0912000003"), MatchStatus.matched, strong),
+        "none": (registration("無此人"), MatchStatus.no_match, None),
+    }
+    await db.commit()
+    ids = {label: r.id for label, (r, _, _) in cases.items()}
+    expected = {label: (status, p.id if p else None) for label, (_, status, p) in cases.items()}
+    tie_ids, name_id, weak_id = {tie_email.id, tie_phone.id}, by_name.id, weak.id
+
+    result = await match_registrations(db, session.id)
+    await db.commit()
+    assert (result.matched, result.review, result.no_match) == (2, 2, 1)
+    rows = (await db.execute(
+        select(Registration.id, Registration.match_status, Registration.parent_id)
+        .where(Registration.id.in_(ids.values()))
+    )).all()
+    assert {r.id: (r.match_status, r.parent_id) for r in rows} == {ids[k]: v for k, v in expected.items()}
+
+    candidates = (await db.execute(
+        select(RegistrationMatchCandidate.registration_id, RegistrationMatchCandidate.parent_id,
+               RegistrationMatchCandidate.score, RegistrationMatchCandidate.reasons)
+    )).all()
+    by_registration: dict = {}
+    for c in candidates:
+        by_registration.setdefault(c.registration_id, set()).add((c.parent_id, c.score, tuple(c.reasons)))
+    assert by_registration[ids["name"]] == {(name_id, 1, ("name",))}
+    assert {p for p, _, _ in by_registration[ids["tie"]]} == tie_ids
+    # Matched registrations leave nothing to review
+    assert ids["best"] not in by_registration and weak_id not in {p for s in by_registration.values() for p, _, _ in s}
+
+
+async def test_no_match_is_only_retried_when_asked(db, tenant_a):
+    session = InfoSession(
+        title="說明會", session_date=date.today(), session_time="10:00", location="禮堂", campus_id=tenant_a.id,
+    )
+    db.add(session)
+    await db.flush()
+    email = _email("late")
+    registration = Registration(session_id=session.id, name="周先生", email=email, campus_id=tenant_a.id)
+    db.add(registration)
+    await db.commit()
+    session_id = session.id
+    assert (await match_registrations(db, session_id)).no_match == 1
+
+    parent = Parent(name="周杰", phone="0933000000", email=email, campus_id=tenant_a.id)
+    db.add(parent)
+    await db.commit()
+    parent_id = parent.id
+    assert (await match_registrations(db, session_id)).matched == 0
+    assert (await match_registrations(db, session_id, retry_unmatched=True)).matched == 1
+    await db.commit()
+    await db.refresh(registration)
+    assert registration.parent_id == parent_id
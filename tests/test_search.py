@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.communication import CommunicationRecord, ContactType
+from app.models.parent import Parent
+from app.services import search
+from app.services.search import _like_escape, make_snippet, query_terms, search_communications, tokenize
+
+
+def test_cjk_runs_become_bigrams_and_words_stay_whole():
+    assert tokenize("王小明來電") == {"王小": 1, "小明": 1, "明來": 1, "來電": 1}
+    assert tokenize("Math 課程 math") == {"math": 2, "課程": 1}
+
+
+def test_standalone_cjk_character_is_a_unigram():
+    assert tokenize("王 先生") == {"王": 1, "先生": 1}
+
+
+def test_full_width_ascii_is_folded():
+    assert tokenize("ＡＢＣ１２３") == {"abc123": 1}
+
+
+def test_long_words_are_truncated():
+    assert list(tokenize("a" * 50)) == ["a" * 32]
+
+
+@pytest.mark.parametrize("q, grams, singles", [
+    ("學費", ["學費"], []),
+    ("王小明", ["王小", "小明"], []),
+    # A lone character is checked on the text when other grams exist...
+    ("王 電話", ["電話"], ["王"]),
+    # ...and there is nothing to probe the index with when it is alone
+    ("王", [], ["王"]),
+    ("王 李", [], ["王", "李"]),
+    ("100% 退費", ["100", "退費"], []),
+    ("", [], []),
+])
+def test_query_terms(q, grams, singles):
+    assert query_terms(q) == (grams, singles)
+
+
+def test_like_wildcards_are_escaped():
+    assert _like_escape(r"100%_a\b") == r"100\%\_a\\b"
+
+
+def test_snippet_marks_hits_and_escapes_html():
+    assert make_snippet("家長<b>詢問</b>學費", "學費") == "家長&lt;b&gt;詢問&lt;/b&gt;<mark>學費</mark>"
+
+
+def test_snippet_is_a_window_around_the_first_hit():
+    summary = "甲" * 100 + "學費" + "乙" * 100
+    snippet = make_snippet(summary, "學費")
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<mark>學費</mark>" in snippet
+    assert len(snippet) < len(summary)
+
+
+@pytest.mark.anyio
+async def test_only_the_newest_hits_are_ranked(db, tenant_a, monkeypatch):
+    parent = Parent(name="Chen Wei", phone="0911666777", campus_id=tenant_a.id)
+    db.add(parent)
+    await db.flush()
+    now = datetime.now(timezone.utc)
+    word = f"refund{uuid.uuid4().hex[:8]}"
+    summaries = [f"王 詢問 {word}", f"詢問 {word}", f"詢問 {word}"]
+    records = [
+        CommunicationRecord(
+            parent_id=parent.id, user_id=tenant_a.teacher.id, contact_type=ContactType.phone,
+            summary=summary, created_at=now - timedelta(minutes=i), campus_id=tenant_a.id,
+        )
+        for i, summary in enumerate(reversed(summaries))
+    ]
+    db.add_all(records)
+    await db.flush()
+    for record in records:
+        await search.index_communication(db, record.id, record.summary)
+    await db.commit()
+    newest, middle, oldest = (r.id for r in records)
+
+    monkeypatch.setattr(search, "MAX_RANKED_HITS", 2)
+    assert {row["id"] for row in await search_communications(db, word)} == {newest, middle}
+    # The cap applies after the summary checks, so an older match is not crowded out
+    assert [row["id"] for row in await search_communications(db, f"王 {word}")] == [oldest]
@@ -0,0 +1,79 @@
+"""Follow-up assignment strategies of generate_follow_ups()."""
+import uuid
+from datetime import date
+
+import pytest
+
+from app.models.info_session import InfoSession, MatchStatus, Registration, RegistrationStatus
+from app.models.parent import Parent
+from app.models.user import Role, User
+from app.services.session_follow_ups import generate_follow_ups
+from tests.conftest import as_campus
+
+pytestmark = pytest.mark.anyio
+
+
+async def _session_with_attendees(db, tenant, attendees: int) -> uuid.UUID:
+    session = InfoSession(
+        title="說明會", session_date=date.today(), session_time="10:00", location="禮堂", campus_id=tenant.id,
+    )
+    db.add(session)
+    await db.flush()
+    for i in range(attendees):
+        parent = Parent(name=f"家長{i}", phone="0900000000", campus_id=tenant.id)
+        db.add(parent)
+        await db.flush()
+        db.add(Registration(
+            session_id=session.id, name=parent.name, email=f"p{i}-{uuid.uuid4().hex[:6]}@example.com",
+            status=RegistrationStatus.confirmed, parent_id=parent.id, match_status=MatchStatus.matched,
+            campus_id=tenant.id,
+        ))
+    await db.commit()
+    return session.id
+
+
+async def _staff(db, tenant, *names: str) -> list[uuid.UUID]:
+    users = [
+        User(username=f"staff-{uuid.uuid4().hex[:6]}", hashed_password="x", full_name=name, role=Role.teacher,
+             campus_id=tenant.id)
+        for name in names
+    ]
+    db.add_all(users)
+    await db.commit()
+    return [u.id for u in users]
+
+
+async def test_round_robin_deals_attendees_out_in_staff_order(db, tenant_a):
+    staff = await _staff(db, tenant_a, "甲", "乙")
+    session_id = await _session_with_attendees(db, tenant_a, 5)
+    actor_id = tenant_a.admin.id
+    with as_campus(tenant_a):
+        result = await generate_follow_ups(db, session_id, actor_id, strategy="round_robin", assignee_ids=staff)
+        await db.commit()
+    assert result.per_assignee == {"甲": 3, "乙": 2}
+
+
+async def test_balanced_fills_up_the_least_loaded_first_and_reruns_add_nothing(db, tenant_a):
+    first, second = await _staff(db, tenant_a, "甲", "乙")
+    earlier = await _session_with_attendees(db, tenant_a, 3)
+    session_id = await _session_with_attendees(db, tenant_a, 5)
+    db.add(Registration(
+        session_id=session_id, name="沒有資料的人", email=f"{uuid.uuid4().hex}@example.com",
+        status=RegistrationStatus.confirmed, campus_id=tenant_a.id,
+    ))
+    await db.commit()
+    actor_id = tenant_a.admin.id
+
+    with as_campus(tenant_a):
+        # 甲 starts with 3 open follow-ups, 乙 with none
+        await generate_follow_ups(db, earlier, actor_id, assignee_ids=[first])
+        await db.commit()
+        result = await generate_follow_ups(db, session_id, actor_id, assignee_ids=[first, second])
+        await db.commit()
+        # 乙 takes 1-3; at 4 open each the tie goes to staff order
+        assert result.per_assignee == {"甲": 1, "乙": 4}
+        assert [(u["name"], u["match_status"]) for u in result.unmatched] == [("沒有資料的人", "no_match")]
+
+        again = await generate_follow_ups(db, session_id, actor_id, assignee_ids=[first, second])
+        await db.commit()
+    assert (again.created, again.already_generated) == ([], 5)
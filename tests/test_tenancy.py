@@ -0,0 +1,232 @@
+"""Campus isolation: ORM scoping, stamping, the raw-SQL paths and per-campus caches."""
+import uuid
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+
+from app.models.communication import CommunicationRecord, ContactType, FollowUp
+from app.models.info_session import InfoSession, MatchStatus, Registration, RegistrationStatus
+from app.models.parent import Parent, ParentDuplicate
+from app.models.student import ParentStudent, Student
+from app.models.user import Role
+from app.services import caller_id
+from app.services.coalesce import _scope_key
+from app.services.dedupe import scan_duplicates
+from app.services.household import get_household
+from app.services.registration_matching import match_registrations
+from app.services.search import index_communication, search_communications
+from app.services.session_follow_ups import generate_follow_ups
+from app.services.typeahead import TypeaheadIndex, parent_entry
+from tests.conftest import as_campus
+
+pytestmark = pytest.mark.anyio
+
+
+def _phone() -> str:
+    return "09" + str(uuid.uuid4().int)[:8]
+
+
+async def _parent(db, tenant, name: str = "王小明", phone: str | None = None, email: str | None = None) -> Parent:
+    parent = Parent(name=name, phone=phone or _phone(), email=email, campus_id=tenant.id)
+    db.add(parent)
+    await db.flush()
+    return parent
+
+
+# ---- ORM scoping ----
+
+async def test_orm_statements_only_see_the_current_campus(db, tenant_a, tenant_b):
+    mine = await _parent(db, tenant_a)
+    other = await _parent(db, tenant_b)
+    await db.commit()
+    db.expunge_all()
+
+    with as_campus(tenant_a):
+        assert (await db.execute(select(Parent.id))).scalars().all() == [mine.id]
+        assert await db.get(Parent, other.id) is None
+        # Joined entities are scoped too
+        joined = select(Parent.id).join(ParentStudent, ParentStudent.parent_id == Parent.id, isouter=True)
+        assert (await db.execute(joined)).scalars().all() == [mine.id]
+        assert (await db.execute(update(Parent).values(note="touched"))).rowcount == 1
+        assert (await db.execute(delete(Parent).where(Parent.id == other.id))).rowcount == 0
+        await db.commit()
+    db.expunge_all()
+
+    assert (await db.get(Parent, mine.id)).note == "touched"
+    assert (await db.get(Parent, other.id)).note is None
+
+
+async def test_new_rows_are_stamped_with_the_current_campus(db, tenant_a):
+    with as_campus(tenant_a):
+        parent = Parent(name="林美華", phone=_phone())
+        student = Student(name="林小華", grade="三年級")
+        db.add_all([parent, student])
+        await db.flush()
+    assert parent.campus_id == tenant_a.id
+    assert student.campus_id == tenant_a.id
+
+
+# ---- raw SQL paths ----
+
+async def test_search_only_returns_the_current_campus(db, tenant_a, tenant_b):
+    records = []
+    for tenant in (tenant_a, tenant_b):
+        parent = await _parent(db, tenant)
+        record = CommunicationRecord(
+            parent_id=parent.id, user_id=tenant.teacher.id, contact_type=ContactType.phone,
+            summary="詢問暑期課程學費", campus_id=tenant.id,
+        )
+        db.add(record)
+        await db.flush()
+        await index_communication(db, record.id, record.summary)
+        records.append(record)
+    await db.commit()
+
+    with as_campus(tenant_a):
+        hits = await search_communications(db, "學費")
+        single = await search_communications(db, "費")
+    assert [h["id"] for h in hits] == [records[0].id]
+    assert [h["id"] for h in single] == [records[0].id]
+
+
+async def test_household_stops_at_the_campus_boundary(db, tenant_a, tenant_b):
+    parent = await _parent(db, tenant_a)
+    student = Student(name="王小美", grade="二年級", campus_id=tenant_a.id)
+    db.add(student)
+    await db.flush()
+    # A link into another campus (e.g. bad import data) must not leak that campus's parent
+    intruder = await _parent(db, tenant_b, name="陳大文")
+    db.add_all([
+        ParentStudent(parent_id=parent.id, student_id=student.id, relationship_type="父親"),
+        ParentStudent(parent_id=intruder.id, student_id=student.id, relationship_type="母親"),
+    ])
+    await db.commit()
+
+    with as_campus(tenant_a):
+        household = await get_household(db, "parent", parent.id)
+    assert {p["id"] for p in household["parents"]} == {str(parent.id)}
+    assert {s["id"] for s in household["students"]} == {str(student.id)}
+
+    db.expunge_all()
+    with as_campus(tenant_b), pytest.raises(HTTPException) as exc:
+        await get_household(db, "parent", parent.id)
+    assert exc.value.status_code == 404
+
+
+async def test_registration_matching_only_considers_the_registration_campus(db, tenant_a, tenant_b):
+    email = f"family-{uuid.uuid4().hex[:8]}@example.com"
+    other = await _parent(db, tenant_b, email=email)
+    mine = await _parent(db, tenant_a, email=email)
+    session = InfoSession(
+        title="招生說明會", session_date=date.today(), session_time="10:00", location="禮堂", campus_id=tenant_a.id,
+    )
+    db.add(session)
+    await db.flush()
+    registration = Registration(
+        session_id=session.id, name="王先生", email=email.upper(), campus_id=tenant_a.id,
+    )
+    db.add(registration)
+    await db.commit()
+
+    # No campus in context (background run): the SQL itself keeps to the registration's campus
+    result = await match_registrations(db, session.id)
+    await db.commit()
+    await db.refresh(registration)
+    assert result.matched == 1
+    assert registration.parent_id == mine.id != other.id
+
+
+async def test_duplicate_scan_never_pairs_parents_of_different_campuses(db, tenant_a, tenant_b):
+    phone = _phone()
+    email = f"chang-{uuid.uuid4().hex[:8]}@example.com"
+    # Phone + e-mail alone reach the score threshold (name similarity depends on the collation)
+    first = await _parent(db, tenant_a, name="張志明", phone=phone, email=email)
+    second = await _parent(db, tenant_a, name="張志明", phone=phone, email=email)
+    elsewhere = await _parent(db, tenant_b, name="張志明", phone=phone, email=email)
+    await db.commit()
+
+    # Unscoped, like the nightly script: campus separation comes from the SQL alone
+    await scan_duplicates(db)
+
+    ids = [first.id, second.id, elsewhere.id]
+    pairs = (await db.execute(
+        select(ParentDuplicate.parent_id, ParentDuplicate.duplicate_id)
+        .where(ParentDuplicate.parent_id.in_(ids) | ParentDuplicate.duplicate_id.in_(ids))
+    )).all()
+    assert [set(pair) for pair in pairs] == [{first.id, second.id}]
+
+
+async def test_session_follow_ups_stay_in_the_session_campus(db, tenant_a, tenant_b):
+    parent = await _parent(db, tenant_a)
+    session = InfoSession(
+        title="開放參觀日", session_date=date.today(), session_time="14:00", location="校園", campus_id=tenant_a.id,
+    )
+    db.add(session)
+    await db.flush()
+    registration = Registration(
+        session_id=session.id, name=parent.name, email="a@example.com", status=RegistrationStatus.confirmed,
+        parent_id=parent.id, match_status=MatchStatus.matched, campus_id=tenant_a.id,
+    )
+    db.add(registration)
+    await db.commit()
+    # A rollback expires loaded objects; keep plain ids
+    parent_id, session_id, admin_id, teacher_id = parent.id, session.id, tenant_a.admin.id, tenant_a.teacher.id
+
+    with as_campus(tenant_a):
+        # Staff of another campus cannot be assigned
+        with pytest.raises(HTTPException) as exc:
+            await generate_follow_ups(db, session_id, admin_id, assignee_ids=[tenant_b.teacher.id])
+        assert exc.value.status_code == 400
+        await db.rollback()
+
+        result = await generate_follow_ups(db, session_id, admin_id)
+        await db.commit()
+    assert [row["assigned_to"] for row in result.created] == [str(teacher_id)]
+
+    follow_up = (await db.execute(select(FollowUp).where(FollowUp.parent_id == parent_id))).scalar_one()
+    communication = (await db.execute(
+        select(CommunicationRecord).where(CommunicationRecord.id == follow_up.communication_id)
+    )).scalar_one()
+    assert follow_up.campus_id == communication.campus_id == tenant_a.id
+    assert communication.user_id == admin_id
+    assert follow_up.due_date >= date.today() + timedelta(days=3)
+
+
+# ---- caches ----
+
+def test_coalesced_responses_are_keyed_by_campus():
+    campus_a, campus_b = uuid.uuid4(), uuid.uuid4()
+    user_a = SimpleNamespace(id=uuid.uuid4(), campus_id=campus_a, role=Role.admin)
+    user_b = SimpleNamespace(id=uuid.uuid4(), campus_id=campus_b, role=Role.admin)
+    for scope in ("shared", "role", "user"):
+        assert _scope_key(scope, user_a) != _scope_key(scope, user_b)
+
+
+async def test_caller_id_cache_is_keyed_by_campus(db, tenant_a, tenant_b):
+    phone = _phone()
+    mine = await _parent(db, tenant_a, name="李大同", phone=phone)
+    other = await _parent(db, tenant_b, name="李小同", phone=phone)
+    await db.commit()
+
+    with as_campus(tenant_a):
+        first = await caller_id.lookup_by_phone(db, phone)
+    with as_campus(tenant_b):
+        second = await caller_id.lookup_by_phone(db, phone)
+    assert [card.id for card in first] == [mine.id]
+    assert [card.id for card in second] == [other.id]
+
+
+def test_typeahead_searches_only_the_campus_partition():
+    small, large = uuid.uuid4(), uuid.uuid4()
+    index = TypeaheadIndex()
+    # Enough matching names elsewhere to exhaust a shared candidate budget
+    crowd = [parent_entry(uuid.uuid4(), large, f"王大明{i}", "0912345678") for i in range(5000)]
+    wanted = parent_entry(uuid.uuid4(), small, "老王大明", "0987654321")
+    index.replace_all([*crowd, wanted])
+
+    assert [entry.id for entry, _ in index.search("大明", small)] == [wanted.id]
+    assert all(entry.campus_id == large for entry, _ in index.search("大明", large))
+    assert index.search("大明", uuid.uuid4()) == []
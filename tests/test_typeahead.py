@@ -0,0 +1,133 @@
+import asyncio
+import json
+import uuid
+
+import asyncpg
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.models.parent import Parent
+from app.services import typeahead
+from app.services.pg_listener import CHANGES_CHANNEL, asyncpg_dsn
+from app.services.typeahead import MAX_SCORED_CANDIDATES, TypeaheadIndex, parent_entry, student_entry
+
+CAMPUS = uuid.uuid4()
+
+
+def _index(*entries) -> TypeaheadIndex:
+    index = TypeaheadIndex()
+    index.replace_all(list(entries))
+    return index
+
+
+def _names(results) -> list[str]:
+    return [entry.name for entry, _ in results]
+
+
+def test_exact_beats_prefix_beats_substring_beats_phone():
+    index = _index(
+        parent_entry(uuid.uuid4(), CAMPUS, "老王小明", "0911000001"),
+        parent_entry(uuid.uuid4(), CAMPUS, "王小明", "0911000002"),
+        parent_entry(uuid.uuid4(), CAMPUS, "王小明明", "0911000003"),
+        parent_entry(uuid.uuid4(), CAMPUS, "林美華", "0922123456"),
+    )
+    assert _names(index.search("王小明", CAMPUS)) == ["王小明", "王小明明", "老王小明"]
+    assert [score for _, score in index.search("王小明", CAMPUS)] == [100, 80, 60]
+    assert index.search("456", CAMPUS)[0][0].name == "林美華"
+    assert index.search("456", CAMPUS)[0][1] == 50
+
+
+def test_student_grade_is_searchable_and_kind_filters():
+    index = _index(
+        student_entry(uuid.uuid4(), CAMPUS, "陳小華", "三年級"),
+        parent_entry(uuid.uuid4(), CAMPUS, "陳大華", "0933000000"),
+    )
+    assert [(e.name, s) for e, s in index.search("三年級", CAMPUS)] == [("陳小華", 40)]
+    assert _names(index.search("陳", CAMPUS, kind="parent")) == ["陳大華"]
+    assert _names(index.search("陳", CAMPUS, kind="student")) == ["陳小華"]
+
+
+def test_query_is_normalized():
+    index = _index(parent_entry(uuid.uuid4(), CAMPUS, "Amy Chen", "0900000000"))
+    assert _names(index.search("  ＡＭＹ ", CAMPUS)) == ["Amy Chen"]
+
+
+def test_best_matches_survive_the_candidate_cap():
+    crowd = [
+        parent_entry(uuid.uuid4(), CAMPUS, f"張大明{i:05d}", "0900000000")
+        for i in range(MAX_SCORED_CANDIDATES * 2)
+    ]
+    best = parent_entry(uuid.uuid4(), CAMPUS, "老張大明", "0900000000")
+    index = _index(*crowd, best)
+    # Prefix hits fill the page first...
+    assert all(score == 80 for _, score in index.search("張大明", CAMPUS))
+    # ...and a substring query still finds the shortest names despite the cap
+    assert index.search("大明", CAMPUS, limit=1)[0][0].id == best.id
+
+
+def test_incremental_updates_and_removal():
+    entry = parent_entry(uuid.uuid4(), CAMPUS, "周杰", "0900000000")
+    index = _index(entry)
+    index.upsert(parent_entry(entry.id, CAMPUS, "周杰倫", "0900000000"))
+    assert _names(index.search("周杰", CAMPUS)) == ["周杰倫"]
+    index.remove(entry.id)
+    assert index.search("周杰", CAMPUS) == []
+    assert len(index) == 0
+
+
+def test_changes_during_a_rebuild_are_replayed_onto_the_snapshot():
+    kept = parent_entry(uuid.uuid4(), CAMPUS, "黃小玲", "0900000000")
+    index = _index(kept)
+    log = index.begin_rebuild()
+    snapshot = [kept]  # read before the changes below
+    added = parent_entry(uuid.uuid4(), CAMPUS, "黃大玲", "0900000000")
+    index.upsert(added)
+    index.remove(kept.id)
+    index.replace_all(snapshot, log)
+    assert _names(index.search("玲", CAMPUS)) == ["黃大玲"]
+    assert index._rebuild_logs == []
+
+
+@pytest.mark.anyio
+async def test_notifications_are_applied_from_the_payload(monkeypatch):
+    index = TypeaheadIndex()
+    monkeypatch.setattr(typeahead, "index", index)
+    parent_id, student_id = uuid.uuid4(), uuid.uuid4()
+    await typeahead.handle_change({
+        "table": "parents", "op": "INSERT", "id": str(parent_id), "campus_id": str(CAMPUS),
+        "name": "吳宗憲", "phone": "0912-345-678",
+    })
+    await typeahead.handle_change({
+        "table": "students", "op": "UPDATE", "id": str(student_id), "campus_id": str(CAMPUS),
+        "name": "吳小憲", "grade": "一年級",
+    })
+    assert {e.id for e, _ in index.search("吳", CAMPUS)} == {parent_id, student_id}
+    await typeahead.handle_change({"table": "parents", "op": "DELETE", "id": str(parent_id)})
+    assert [e.id for e, _ in index.search("吳", CAMPUS)] == [student_id]
+
+
+@pytest.mark.anyio
+async def test_trigger_sends_indexed_fields_and_skips_other_updates(db, tenant_a):
+    received: asyncio.Queue = asyncio.Queue()
+    conn = await asyncpg.connect(asyncpg_dsn(settings.DATABASE_URL))
+    await conn.add_listener(CHANGES_CHANNEL, lambda *args: received.put_nowait(json.loads(args[-1])))
+    try:
+        parent = Parent(name="鄭伊健", phone="0955111222", campus_id=tenant_a.id)
+        db.add(parent)
+        await db.commit()
+        event = await asyncio.wait_for(received.get(), 5)
+        assert event == {
+            "table": "parents", "op": "INSERT", "id": str(parent.id), "campus_id": str(tenant_a.id),
+            "name": "鄭伊健", "phone": "0955111222",
+        }
+
+        await db.execute(update(Parent).where(Parent.id == parent.id).values(note="回電"))
+        await db.commit()
+        await db.execute(update(Parent).where(Parent.id == parent.id).values(name="鄭伊建"))
+        await db.commit()
+        event = await asyncio.wait_for(received.get(), 5)
+        # The note-only update sent nothing: the next event is the rename
+        assert (event["op"], event["name"]) == ("UPDATE", "鄭伊建")
+    finally:
+        await conn.close()
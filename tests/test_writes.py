@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.writes import etag, parse_if_match
+
+
+@pytest.mark.parametrize("value, version", [
+    (None, None),
+    ("*", None),
+    (' * ', None),
+    ('"3"', 3),
+    ('W/"12"', 12),
+    (etag(7), 7),
+])
+def test_parse_if_match(value, version):
+    assert parse_if_match(value) == version
+
+
+@pytest.mark.parametrize("value", ['"abc"', '"-1"', '"3", "4"', ""])
+def test_parse_if_match_rejects_foreign_etags(value):
+    with pytest.raises(HTTPException) as exc:
+        parse_if_match(value)
+    assert exc.value.status_code == 400